@@ -2,6 +2,7 @@
 
 import logging
 from abc import ABC, abstractmethod
+from collections.abc import AsyncIterator
 from dataclasses import dataclass, field
 from enum import Enum
 from typing import Any, Optional
@@ -190,12 +191,37 @@ class ModelResponse:
         return self.usage.get("total_tokens", 0)
 
 
+@dataclass
+class StreamChunk:
+    """Incremental piece of a streamed model response.
+
+    Intermediate chunks carry a text delta. The final chunk carries the complete
+    ModelResponse (full content, usage and metadata) and no text.
+    """
+
+    text: str = ""
+    response: Optional[ModelResponse] = None
+
+
 class ModelProvider(ABC):
     """Abstract base class for model providers."""
 
     # All concrete providers must define their supported models
     SUPPORTED_MODELS: dict[str, Any] = {}
 
+    # Providers that implement agenerate_content without blocking the event loop
+    SUPPORTS_NATIVE_ASYNC = False
+
+    # Providers whose astream_content yields deltas as the model produces them
+    SUPPORTS_NATIVE_STREAMING = False
+
+    # Providers whose validate_model_name accepts names missing from get_model_configurations()
+    # (the model index asks them directly about such names)
+    ACCEPTS_UNLISTED_MODELS = False
+
+    # SDK modules the provider imports lazily on first use (see ModelProviderRegistry.preload_provider_sdks)
+    SDK_MODULES: tuple[str, ...] = ()
+
     def __init__(self, api_key: str, **kwargs):
         """Initialize the provider with API key and optional configuration."""
         self.api_key = api_key
@@ -231,6 +257,62 @@ class ModelProvider(ABC):
         """
         pass
 
+    async def agenerate_content(
+        self,
+        prompt: str,
+        model_name: str,
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.7,
+        max_output_tokens: Optional[int] = None,
+        **kwargs,
+    ) -> ModelResponse:
+        """Generate content without blocking the event loop.
+
+        Providers with an async SDK override this and set SUPPORTS_NATIVE_ASYNC.
+        The default runs generate_content on the shared provider executor.
+        """
+        from .executor import get_provider_executor
+
+        return await get_provider_executor().run(
+            self,
+            self.generate_content,
+            prompt=prompt,
+            model_name=model_name,
+            system_prompt=system_prompt,
+            temperature=temperature,
+            max_output_tokens=max_output_tokens,
+            **kwargs,
+        )
+
+    async def astream_content(
+        self,
+        prompt: str,
+        model_name: str,
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.7,
+        max_output_tokens: Optional[int] = None,
+        **kwargs,
+    ) -> AsyncIterator[StreamChunk]:
+        """Generate content as a stream of text deltas.
+
+        Yields StreamChunk objects with text deltas, followed by one final chunk
+        whose ``response`` holds the complete ModelResponse including usage.
+
+        Providers with a streaming API override this and set SUPPORTS_NATIVE_STREAMING.
+        The default generates the whole response and yields it as a single delta.
+        """
+        response = await self.agenerate_content(
+            prompt=prompt,
+            model_name=model_name,
+            system_prompt=system_prompt,
+            temperature=temperature,
+            max_output_tokens=max_output_tokens,
+            **kwargs,
+        )
+        if response.content:
+            yield StreamChunk(text=response.content)
+        yield StreamChunk(response=response)
+
     @abstractmethod
     def count_tokens(self, text: str, model_name: str) -> int:
         """Count tokens for the given text using the specified model's tokenizer."""
@@ -433,6 +515,12 @@ class ModelProvider(ABC):
 
         return list(all_models)
 
+    def _get_retry_cooldown(self):
+        """Get the rate-limit cooldown shared by all calls to this provider type."""
+        from .retry import get_provider_cooldown
+
+        return get_provider_cooldown(self.get_provider_type().value)
+
     def close(self):
         """Clean up any resources held by the provider.
 
@@ -2,6 +2,7 @@
 
 import logging
 import os
+from collections.abc import AsyncIterator
 from typing import Optional
 
 from .base import (
@@ -9,6 +10,7 @@ from .base import (
     ModelResponse,
     ProviderType,
     RangeTemperatureConstraint,
+    StreamChunk,
 )
 from .openai_compatible import OpenAICompatibleProvider
 from .openrouter_registry import OpenRouterModelRegistry
@@ -23,6 +25,12 @@ class CustomProvider(OpenAICompatibleProvider):
 
     FRIENDLY_NAME = "Custom API"
 
+    # Local model names (e.g. "llama3.2:latest") need not be listed in custom_models.json
+    ACCEPTS_UNLISTED_MODELS = True
+
+    # Local servers (Ollama, vLLM, LM Studio...) do not all accept stream_options
+    SUPPORTS_STREAM_USAGE = False
+
     # Model registry for managing configurations and aliases (shared with OpenRouter)
     _registry: Optional[OpenRouterModelRegistry] = None
 
@@ -266,6 +274,51 @@ class CustomProvider(OpenAICompatibleProvider):
             **kwargs,
         )
 
+    async def agenerate_content(
+        self,
+        prompt: str,
+        model_name: str,
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.7,
+        max_output_tokens: Optional[int] = None,
+        **kwargs,
+    ) -> ModelResponse:
+        """Async variant of generate_content with model alias resolution."""
+        # Resolve model alias before making API call
+        resolved_model_name = self._resolve_model_name(model_name)
+
+        return await super().agenerate_content(
+            prompt=prompt,
+            model_name=resolved_model_name,
+            system_prompt=system_prompt,
+            temperature=temperature,
+            max_output_tokens=max_output_tokens,
+            **kwargs,
+        )
+
+    async def astream_content(
+        self,
+        prompt: str,
+        model_name: str,
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.7,
+        max_output_tokens: Optional[int] = None,
+        **kwargs,
+    ) -> AsyncIterator[StreamChunk]:
+        """Streaming variant of generate_content with model alias resolution."""
+        # Resolve model alias before making API call
+        resolved_model_name = self._resolve_model_name(model_name)
+
+        async for chunk in super().astream_content(
+            prompt=prompt,
+            model_name=resolved_model_name,
+            system_prompt=system_prompt,
+            temperature=temperature,
+            max_output_tokens=max_output_tokens,
+            **kwargs,
+        ):
+            yield chunk
+
     def supports_thinking_mode(self, model_name: str) -> bool:
         """Check if the model supports extended thinking mode.
 
@@ -3,7 +3,6 @@
 import logging
 import os
 import threading
-import time
 from typing import Optional
 
 from .base import (
@@ -13,6 +12,7 @@ from .base import (
     create_temperature_constraint,
 )
 from .openai_compatible import OpenAICompatibleProvider
+from .retry import RetryExhaustedError, call_with_retry
 
 logger = logging.getLogger(__name__)
 
@@ -26,9 +26,9 @@ class DIALModelProvider(OpenAICompatibleProvider):
 
     FRIENDLY_NAME = "DIAL"
 
-    # Retry configuration for API calls
-    MAX_RETRIES = 4
-    RETRY_DELAYS = [1, 3, 5, 8]  # seconds
+    # DIAL uses per-deployment sync clients; async calls go through the provider executor
+    SUPPORTS_NATIVE_ASYNC = False
+    SUPPORTS_NATIVE_STREAMING = False
 
     # Model configurations using ModelCapabilities objects
     SUPPORTED_MODELS = {
@@ -461,54 +461,68 @@ class DIALModelProvider(OpenAICompatibleProvider):
         # DIAL-specific: Get cached client for deployment endpoint
         deployment_client = self._get_deployment_client(resolved_model)
 
-        # Retry logic with progressive delays
-        last_exception = None
+        def attempt():
+            # Generate completion using deployment-specific client
+            response = deployment_client.chat.completions.create(**completion_params)
+
+            # Extract content and usage
+            content = response.choices[0].message.content
+            usage = self._extract_usage(response)
+
+            return ModelResponse(
+                content=content,
+                usage=usage,
+                model_name=model_name,
+                friendly_name=self.FRIENDLY_NAME,
+                provider=self.get_provider_type(),
+                metadata={
+                    "finish_reason": response.choices[0].finish_reason,
+                    "model": response.model,
+                    "id": response.id,
+                    "created": response.created,
+                },
+            )
 
-        for attempt in range(self.MAX_RETRIES):
-            try:
-                # Generate completion using deployment-specific client
-                response = deployment_client.chat.completions.create(**completion_params)
-
-                # Extract content and usage
-                content = response.choices[0].message.content
-                usage = self._extract_usage(response)
-
-                return ModelResponse(
-                    content=content,
-                    usage=usage,
-                    model_name=model_name,
-                    friendly_name=self.FRIENDLY_NAME,
-                    provider=self.get_provider_type(),
-                    metadata={
-                        "finish_reason": response.choices[0].finish_reason,
-                        "model": response.model,
-                        "id": response.id,
-                        "created": response.created,
-                    },
-                )
-
-            except Exception as e:
-                last_exception = e
-
-                # Check if this is a retryable error
-                is_retryable = self._is_error_retryable(e)
-
-                if not is_retryable:
-                    # Non-retryable error, raise immediately
-                    raise ValueError(f"DIAL API error for model {model_name}: {str(e)}")
-
-                # If this isn't the last attempt and error is retryable, wait and retry
-                if attempt < self.MAX_RETRIES - 1:
-                    delay = self.RETRY_DELAYS[attempt]
-                    logger.info(
-                        f"DIAL API error (attempt {attempt + 1}/{self.MAX_RETRIES}), " f"retrying in {delay}s: {str(e)}"
-                    )
-                    time.sleep(delay)
-                    continue
-
-        # All retries exhausted
-        raise ValueError(
-            f"DIAL API error for model {model_name} after {self.MAX_RETRIES} attempts: {str(last_exception)}"
+        try:
+            return call_with_retry(
+                attempt,
+                self._is_error_retryable,
+                description=f"DIAL API error for model {model_name}",
+                cooldown=self._get_retry_cooldown(),
+            )
+        except RetryExhaustedError as e:
+            if not self._is_error_retryable(e.last_exception):
+                # Non-retryable error
+                raise ValueError(
+                    f"DIAL API error for model {model_name}: {str(e.last_exception)}"
+                ) from e.last_exception
+            raise ValueError(
+                f"DIAL API error for model {model_name} after {e.attempts_text}: {str(e.last_exception)}"
+            ) from e.last_exception
+
+    async def agenerate_content(
+        self,
+        prompt: str,
+        model_name: str,
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.7,
+        max_output_tokens: Optional[int] = None,
+        images: Optional[list[str]] = None,
+        **kwargs,
+    ) -> ModelResponse:
+        """Run the deployment-specific sync generate_content on the provider executor."""
+        from .executor import get_provider_executor
+
+        return await get_provider_executor().run(
+            self,
+            self.generate_content,
+            prompt=prompt,
+            model_name=model_name,
+            system_prompt=system_prompt,
+            temperature=temperature,
+            max_output_tokens=max_output_tokens,
+            images=images,
+            **kwargs,
         )
 
     def _supports_vision(self, model_name: str) -> bool:
@@ -0,0 +1,473 @@
+"""
+Bounded execution layer for blocking provider calls.
+
+Provider SDKs (openai, google-genai) expose synchronous ``generate_content``
+implementations that can block for minutes on reasoning models. Calling them
+directly from an ``async`` tool handler freezes the whole stdio server,
+including ``list_tools`` and every other in-flight tool call.
+
+This module dispatches those blocking calls onto a shared thread pool so the
+event loop stays responsive and concurrent tool calls actually overlap.
+
+Key Features:
+- Shared, lazily created thread pool sized by PROVIDER_EXECUTOR_MAX_WORKERS
+- Per-provider concurrency limits (PROVIDER_MAX_CONCURRENT_CALLS, overridable
+  per provider with e.g. OPENAI_MAX_CONCURRENT_CALLS)
+- Queue-depth, in-flight and latency metrics per provider
+- Context variables are propagated into the worker thread
+- Providers with a native async SDK bypass the pool but share the same limits
+- Streaming generation (stream_content) holds the provider slot for the whole stream
+- Outcomes and latencies of generation calls feed the per-provider circuit
+  breakers in health.py, which the registry uses to route around failing providers
+- Optional client-side RPM/TPM limits (see rate_limiter.py) are applied before
+  generate_content/stream_content calls take a concurrency slot
+- Optional response cache (see response_cache.py): repeated deterministic calls
+  are answered without a provider call, rate limit budget or concurrency slot
+- Singleton pattern for consistent limits within a single process
+"""
+
+import asyncio
+import contextvars
+import functools
+import logging
+import os
+import threading
+import time
+from collections.abc import AsyncIterator, Awaitable
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Optional
+
+from .base import ModelProvider, ModelResponse, ProviderType, StreamChunk
+from .health import get_provider_health
+from .rate_limiter import RateLimitReservation, get_rate_limiter
+from .response_cache import get_response_cache
+
+logger = logging.getLogger(__name__)
+
+
+def _get_positive_int_env(name: str, default: int) -> int:
+    """Read a positive integer from the environment, falling back to default on bad values."""
+    raw_value = os.getenv(name)
+    if not raw_value:
+        return default
+    try:
+        value = int(raw_value)
+    except ValueError:
+        logger.warning(f"Invalid {name} value ('{raw_value}'), using default of {default}")
+        return default
+    if value <= 0:
+        logger.warning(f"Invalid {name} value ({value}), using default of {default}")
+        return default
+    return value
+
+
+# Default pool size: provider calls are I/O bound, so this can comfortably exceed CPU count
+DEFAULT_EXECUTOR_MAX_WORKERS = 32
+# Default number of simultaneous calls allowed against a single provider
+DEFAULT_MAX_CONCURRENT_CALLS = 8
+
+
+@dataclass
+class ProviderCallStats:
+    """Running counters for calls dispatched to a single provider."""
+
+    queued: int = 0  # Calls waiting for a concurrency slot
+    in_flight: int = 0  # Calls currently executing in the pool
+    max_queue_depth: int = 0  # Highest observed number of waiting calls
+    completed: int = 0  # Calls that returned successfully
+    failed: int = 0  # Calls that raised an exception
+    total_wait_seconds: float = 0.0  # Time spent waiting for a slot
+    total_run_seconds: float = 0.0  # Time spent executing in the pool
+
+
+def _get_provider_key(provider: Any) -> str:
+    """Return a stable key identifying the provider for limits and metrics."""
+    try:
+        provider_type = provider.get_provider_type()
+    except Exception:
+        provider_type = None
+
+    if isinstance(provider_type, ProviderType):
+        return provider_type.value
+    return type(provider).__name__.lower()
+
+
+def _get_canonical_model_name(provider: Any, model_name: Optional[str]) -> Optional[str]:
+    """Resolve aliases so rate limits configured for a model apply to all of its names."""
+    if model_name and isinstance(provider, ModelProvider):
+        try:
+            return provider._resolve_model_name(model_name)
+        except Exception:
+            pass
+    return model_name
+
+
+def _estimate_request_tokens(provider: Any, kwargs: dict[str, Any]) -> int:
+    """Estimate the input tokens of a generate_content call from its prompts."""
+    text = "\n\n".join(part for part in (kwargs.get("system_prompt"), kwargs.get("prompt")) if part)
+    try:
+        return int(provider.count_tokens(text, kwargs.get("model_name")))
+    except Exception:
+        return len(text) // 4
+
+
+def _get_usage_tokens(response: Optional[ModelResponse]) -> Optional[int]:
+    """Return the total tokens reported for a response, if the provider reported usage."""
+    usage = getattr(response, "usage", None)
+    if not isinstance(usage, dict) or not usage:
+        return None
+    total = usage.get("total_tokens") or (usage.get("input_tokens", 0) + usage.get("output_tokens", 0))
+    return total or None
+
+
+class ProviderExecutor:
+    """Dispatches blocking provider calls to a bounded thread pool."""
+
+    def __init__(self, max_workers: Optional[int] = None, default_concurrency: Optional[int] = None):
+        self.max_workers = max_workers or _get_positive_int_env(
+            "PROVIDER_EXECUTOR_MAX_WORKERS", DEFAULT_EXECUTOR_MAX_WORKERS
+        )
+        self.default_concurrency = default_concurrency or _get_positive_int_env(
+            "PROVIDER_MAX_CONCURRENT_CALLS", DEFAULT_MAX_CONCURRENT_CALLS
+        )
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        # Semaphores are bound to the event loop that created them
+        self._semaphores: dict[str, tuple[asyncio.AbstractEventLoop, asyncio.Semaphore]] = {}
+        self._stats: dict[str, ProviderCallStats] = {}
+
+        logger.info(
+            f"Provider executor initialized with {self.max_workers} workers, "
+            f"{self.default_concurrency} concurrent calls per provider"
+        )
+
+    def _get_pool(self) -> ThreadPoolExecutor:
+        """Lazily create the shared thread pool."""
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="zen-provider")
+        return self._pool
+
+    def get_concurrency_limit(self, provider_key: str) -> int:
+        """Get the maximum number of simultaneous calls allowed for a provider."""
+        return _get_positive_int_env(f"{provider_key.upper()}_MAX_CONCURRENT_CALLS", self.default_concurrency)
+
+    def _get_semaphore(self, provider_key: str) -> asyncio.Semaphore:
+        """Get the concurrency semaphore for a provider on the running event loop."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            entry = self._semaphores.get(provider_key)
+            if entry is None or entry[0] is not loop:
+                entry = (loop, asyncio.Semaphore(self.get_concurrency_limit(provider_key)))
+                self._semaphores[provider_key] = entry
+            return entry[1]
+
+    def _get_stats(self, provider_key: str) -> ProviderCallStats:
+        """Get (or create) the stats record for a provider. Caller must hold the lock."""
+        stats = self._stats.get(provider_key)
+        if stats is None:
+            stats = ProviderCallStats()
+            self._stats[provider_key] = stats
+        return stats
+
+    async def run(self, provider: Any, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Run a blocking provider callable on the thread pool.
+
+        The call first waits for a free slot in the provider's concurrency limit,
+        then executes in a worker thread. The slot is held until the worker
+        finishes, even if the awaiting task is cancelled, so limits reflect
+        real load on the provider.
+
+        Args:
+            provider: Provider instance the call is made against (used for limits/metrics)
+            func: Blocking callable to execute
+            *args: Positional arguments for func
+            **kwargs: Keyword arguments for func
+
+        Returns:
+            Whatever func returns
+        """
+        provider_key = _get_provider_key(provider)
+        semaphore = self._get_semaphore(provider_key)
+        loop = asyncio.get_running_loop()
+
+        queued_at = time.monotonic()
+        with self._lock:
+            stats = self._get_stats(provider_key)
+            stats.queued += 1
+            stats.max_queue_depth = max(stats.max_queue_depth, stats.queued)
+            queue_depth = stats.queued
+
+        if semaphore.locked():
+            logger.debug(f"[EXECUTOR] {provider_key} at concurrency limit, {queue_depth} call(s) queued")
+
+        try:
+            await semaphore.acquire()
+        finally:
+            with self._lock:
+                stats.queued -= 1
+
+        started_at = time.monotonic()
+        with self._lock:
+            stats.in_flight += 1
+            stats.total_wait_seconds += started_at - queued_at
+
+        def _on_done(future) -> None:
+            with self._lock:
+                stats.in_flight -= 1
+                stats.total_run_seconds += time.monotonic() - started_at
+                if future.cancelled() or future.exception() is not None:
+                    stats.failed += 1
+                else:
+                    stats.completed += 1
+            try:
+                loop.call_soon_threadsafe(semaphore.release)
+            except RuntimeError:
+                # Event loop already closed - nothing left to release for
+                pass
+
+        # Propagate context variables (request context, logging state) into the worker
+        context = contextvars.copy_context()
+        call = functools.partial(context.run, func, *args, **kwargs)
+
+        try:
+            future = self._get_pool().submit(call)
+        except Exception:
+            with self._lock:
+                stats.in_flight -= 1
+                stats.failed += 1
+            semaphore.release()
+            raise
+
+        future.add_done_callback(_on_done)
+        return await asyncio.wrap_future(future)
+
+    async def run_async(self, provider: Any, coro_func: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        """
+        Await a native async provider call under the provider's concurrency limit.
+
+        Native async calls do not occupy a worker thread, but they share the same
+        per-provider limits and metrics as calls dispatched through run().
+
+        Args:
+            provider: Provider instance the call is made against (used for limits/metrics)
+            coro_func: Coroutine function to await
+            *args: Positional arguments for coro_func
+            **kwargs: Keyword arguments for coro_func
+
+        Returns:
+            Whatever coro_func returns
+        """
+        async with self._native_slot(provider):
+            return await coro_func(*args, **kwargs)
+
+    @asynccontextmanager
+    async def _native_slot(self, provider: Any) -> AsyncIterator[None]:
+        """Hold one of the provider's concurrency slots on the event loop, recording metrics."""
+        provider_key = _get_provider_key(provider)
+        semaphore = self._get_semaphore(provider_key)
+
+        queued_at = time.monotonic()
+        with self._lock:
+            stats = self._get_stats(provider_key)
+            stats.queued += 1
+            stats.max_queue_depth = max(stats.max_queue_depth, stats.queued)
+
+        try:
+            await semaphore.acquire()
+        finally:
+            with self._lock:
+                stats.queued -= 1
+
+        started_at = time.monotonic()
+        with self._lock:
+            stats.in_flight += 1
+            stats.total_wait_seconds += started_at - queued_at
+
+        succeeded = False
+        try:
+            yield
+            succeeded = True
+        finally:
+            with self._lock:
+                stats.in_flight -= 1
+                stats.total_run_seconds += time.monotonic() - started_at
+                if succeeded:
+                    stats.completed += 1
+                else:
+                    stats.failed += 1
+            semaphore.release()
+
+    async def _acquire_rate_limit(self, provider: Any, kwargs: dict[str, Any]) -> Optional[RateLimitReservation]:
+        """Wait for the provider's configured RPM/TPM budget before a generation call."""
+        limiter = get_rate_limiter()
+        provider_key = _get_provider_key(provider)
+        model_name = _get_canonical_model_name(provider, kwargs.get("model_name"))
+
+        tokens = 0
+        if limiter.needs_token_estimate(provider_key, model_name):
+            # Tokenizing a large prompt is CPU work - keep it off the event loop
+            loop = asyncio.get_running_loop()
+            tokens = await loop.run_in_executor(self._get_pool(), _estimate_request_tokens, provider, kwargs)
+        return await limiter.acquire(provider_key, model_name, tokens)
+
+    async def _lookup_cached_response(
+        self, provider: Any, kwargs: dict[str, Any]
+    ) -> tuple[Optional[str], Optional[ModelResponse]]:
+        """Return the response cache key of a generation call and its cached response, if any."""
+        cache = get_response_cache()
+        if not cache.enabled:
+            return None, None
+        provider_key = _get_provider_key(provider)
+        model_name = _get_canonical_model_name(provider, kwargs.get("model_name"))
+
+        def lookup() -> tuple[Optional[str], Optional[ModelResponse]]:
+            # Hashing large prompts and reading the disk tier stay off the event loop
+            key = cache.make_key(provider_key, model_name, kwargs)
+            return key, cache.get(key) if key is not None else None
+
+        key, response = await asyncio.get_running_loop().run_in_executor(self._get_pool(), lookup)
+        if response is not None:
+            logger.info(f"[RESPONSE_CACHE] Serving {provider_key}/{model_name} response from cache")
+            response.metadata["response_cache"] = "hit"
+        return key, response
+
+    async def _store_cached_response(self, key: Optional[str], response: Optional[ModelResponse]) -> None:
+        """Cache a fresh response under the key returned by _lookup_cached_response()."""
+        if key is None or response is None or not response.content:
+            return
+        cache = get_response_cache()
+        if await asyncio.get_running_loop().run_in_executor(self._get_pool(), cache.put, key, response):
+            response.metadata["response_cache"] = "miss"
+
+    async def generate_content(self, provider: ModelProvider, **kwargs) -> ModelResponse:
+        """
+        Call the provider without blocking the event loop.
+
+        Providers with a native async SDK (SUPPORTS_NATIVE_ASYNC) are awaited
+        directly on the loop; everything else runs generate_content on the pool.
+        Calls first wait for any configured rate limit budget. When the response
+        cache is enabled, cacheable calls seen before are answered from it.
+        """
+        cache_key, cached_response = await self._lookup_cached_response(provider, kwargs)
+        if cached_response is not None:
+            return cached_response
+
+        reservation = await self._acquire_rate_limit(provider, kwargs)
+        provider_key = _get_provider_key(provider)
+        model_name = _get_canonical_model_name(provider, kwargs.get("model_name"))
+        started_at = time.monotonic()
+        probe = get_provider_health().start_call(provider_key)
+        # Failed calls give back their estimated tokens
+        actual_tokens = 0
+        try:
+            try:
+                # Identity check so spec'd mocks (whose attributes are truthy Mocks) stay on the pool path
+                if isinstance(provider, ModelProvider) and provider.SUPPORTS_NATIVE_ASYNC is True:
+                    response = await self.run_async(provider, provider.agenerate_content, **kwargs)
+                else:
+                    response = await self.run(provider, provider.generate_content, **kwargs)
+            except Exception as e:
+                get_provider_health().record_failure(provider_key, model_name, e, probe)
+                raise
+            get_provider_health().record_success(provider_key, model_name, time.monotonic() - started_at, probe)
+            actual_tokens = _get_usage_tokens(response)
+        finally:
+            get_provider_health().end_call(provider_key, probe)
+            get_rate_limiter().settle(reservation, actual_tokens)
+        await self._store_cached_response(cache_key, response)
+        return response
+
+    async def stream_content(self, provider: ModelProvider, **kwargs) -> AsyncIterator[StreamChunk]:
+        """
+        Stream a provider response without blocking the event loop.
+
+        Providers with a streaming API (SUPPORTS_NATIVE_STREAMING) are iterated on
+        the loop while holding their concurrency slot for the whole stream. Others
+        are generated through generate_content() and delivered as a single delta,
+        as are responses served from the response cache.
+
+        Yields:
+            StreamChunk text deltas, then a final chunk carrying the ModelResponse
+        """
+        if isinstance(provider, ModelProvider) and provider.SUPPORTS_NATIVE_STREAMING is True:
+            cache_key, cached_response = await self._lookup_cached_response(provider, kwargs)
+            if cached_response is not None:
+                yield StreamChunk(text=cached_response.content)
+                yield StreamChunk(response=cached_response)
+                return
+
+            reservation = await self._acquire_rate_limit(provider, kwargs)
+            provider_key = _get_provider_key(provider)
+            model_name = _get_canonical_model_name(provider, kwargs.get("model_name"))
+            started_at = time.monotonic()
+            probe = get_provider_health().start_call(provider_key)
+            settled = False
+            try:
+                async with self._native_slot(provider):
+                    try:
+                        async for chunk in provider.astream_content(**kwargs):
+                            if chunk.response is not None:
+                                get_provider_health().record_success(
+                                    provider_key, model_name, time.monotonic() - started_at, probe
+                                )
+                                get_rate_limiter().settle(reservation, _get_usage_tokens(chunk.response))
+                                settled = True
+                                await self._store_cached_response(cache_key, chunk.response)
+                            yield chunk
+                    except Exception as e:
+                        get_provider_health().record_failure(provider_key, model_name, e, probe)
+                        raise
+            finally:
+                get_provider_health().end_call(provider_key, probe)
+                # Streams that failed or were abandoned before their final chunk give back their estimate
+                if not settled:
+                    get_rate_limiter().settle(reservation, 0)
+            return
+
+        response = await self.generate_content(provider, **kwargs)
+        if response.content:
+            yield StreamChunk(text=response.content)
+        yield StreamChunk(response=response)
+
+    def get_stats(self) -> dict[str, dict[str, Any]]:
+        """
+        Get a snapshot of per-provider execution metrics.
+
+        Returns:
+            Dict mapping provider keys to their counters plus configured limit
+        """
+        with self._lock:
+            snapshot = {}
+            for provider_key, stats in self._stats.items():
+                entry = asdict(stats)
+                entry["limit"] = self.get_concurrency_limit(provider_key)
+                snapshot[provider_key] = entry
+            return snapshot
+
+    def shutdown(self, wait: bool = False) -> None:
+        """Shut down the thread pool."""
+        with self._lock:
+            pool = self._pool
+            self._pool = None
+        if pool is not None:
+            pool.shutdown(wait=wait)
+
+
+# Global singleton instance
+_executor_instance = None
+_executor_lock = threading.Lock()
+
+
+def get_provider_executor() -> ProviderExecutor:
+    """Get the global provider executor instance (singleton pattern)"""
+    global _executor_instance
+    if _executor_instance is None:
+        with _executor_lock:
+            if _executor_instance is None:
+                _executor_instance = ProviderExecutor()
+    return _executor_instance
@@ -1,15 +1,32 @@
 """Gemini model provider implementation."""
 
+import asyncio
 import base64
 import logging
 import os
-import time
-from typing import Optional
-
-from google import genai
-from google.genai import types
-
-from .base import ModelCapabilities, ModelProvider, ModelResponse, ProviderType, create_temperature_constraint
+from collections.abc import AsyncIterator
+from typing import TYPE_CHECKING, Optional
+
+from .base import (
+    ModelCapabilities,
+    ModelProvider,
+    ModelResponse,
+    ProviderType,
+    StreamChunk,
+    create_temperature_constraint,
+)
+from .gemini_context_cache import CACHED_FILES_PLACEHOLDER, get_gemini_context_cache
+from .retry import (
+    RETRYABLE_STATUS_CODES,
+    RetryExhaustedError,
+    acall_with_retry,
+    call_with_retry,
+    get_status_code,
+    prefetch_until,
+)
+
+if TYPE_CHECKING:
+    from google.genai import types
 
 logger = logging.getLogger(__name__)
 
@@ -17,6 +34,10 @@ logger = logging.getLogger(__name__)
 class GeminiModelProvider(ModelProvider):
     """Google Gemini model provider implementation."""
 
+    SUPPORTS_NATIVE_ASYNC = True
+    SUPPORTS_NATIVE_STREAMING = True
+    SDK_MODULES = ("google.genai",)
+
     # Model configurations using ModelCapabilities objects
     SUPPORTED_MODELS = {
         "gemini-2.0-flash": ModelCapabilities(
@@ -124,6 +145,9 @@ class GeminiModelProvider(ModelProvider):
     def client(self):
         """Lazy initialization of Gemini client."""
         if self._client is None:
+            # Imported on first use: the SDK takes over a second to import, which would slow server startup
+            from google import genai
+
             self._client = genai.Client(api_key=self.api_key)
         return self._client
 
@@ -147,7 +171,7 @@ class GeminiModelProvider(ModelProvider):
         # Return the ModelCapabilities object directly from SUPPORTED_MODELS
         return self.SUPPORTED_MODELS[resolved_name]
 
-    def generate_content(
+    def _prepare_request(
         self,
         prompt: str,
         model_name: str,
@@ -156,9 +180,14 @@ class GeminiModelProvider(ModelProvider):
         max_output_tokens: Optional[int] = None,
         thinking_mode: str = "medium",
         images: Optional[list[str]] = None,
-        **kwargs,
-    ) -> ModelResponse:
-        """Generate content using Gemini model."""
+    ) -> tuple[str, list, "types.GenerateContentConfig", ModelCapabilities]:
+        """Validate parameters and build contents and generation config for a request.
+
+        Returns:
+            Tuple of (resolved_model_name, contents, generation_config, capabilities)
+        """
+        from google.genai import types
+
         # Validate parameters
         resolved_name = self._resolve_model_name(model_name)
         self.validate_parameters(model_name, temperature)
@@ -211,70 +240,268 @@ class GeminiModelProvider(ModelProvider):
                 actual_thinking_budget = int(max_thinking_tokens * self.THINKING_BUDGETS[thinking_mode])
                 generation_config.thinking_config = types.ThinkingConfig(thinking_budget=actual_thinking_budget)
 
-        # Retry logic with progressive delays
-        max_retries = 4  # Total of 4 attempts
-        retry_delays = [1, 3, 5, 8]  # Progressive delays: 1s, 3s, 5s, 8s
+        return resolved_name, contents, generation_config, capabilities
+
+    def _use_context_cache(
+        self, resolved_name: str, contents: list, generation_config: "types.GenerateContentConfig"
+    ) -> tuple[list, "types.GenerateContentConfig"]:
+        """Move the conversation's embedded files into a cached content, when context caching applies.
+
+        Returns:
+            Tuple of (contents, generation_config) for the request: the given ones when the files
+            are sent inline, otherwise copies referencing the cached content without the files
+        """
+        from utils.conversation_memory import get_embedded_conversation_files
+
+        context_cache = get_gemini_context_cache()
+        files = get_embedded_conversation_files()
+        if not context_cache.enabled or files is None:
+            return contents, generation_config
+
+        prompt_text = contents[0]["parts"][0]["text"]
+        if files.content not in prompt_text:
+            return contents, generation_config
+
+        cache_name = context_cache.get_cache_name(self.client, resolved_name, files)
+        if cache_name is None:
+            return contents, generation_config
+
+        parts = [{"text": prompt_text.replace(files.content, CACHED_FILES_PLACEHOLDER)}, *contents[0]["parts"][1:]]
+        return [{"parts": parts}], generation_config.model_copy(update={"cached_content": cache_name})
+
+    async def _ause_context_cache(
+        self, resolved_name: str, contents: list, generation_config: "types.GenerateContentConfig"
+    ) -> tuple[list, "types.GenerateContentConfig"]:
+        """Async variant of _use_context_cache; creating a cached content uploads the files, so it runs off the loop."""
+        if not get_gemini_context_cache().enabled:
+            return contents, generation_config
+        return await asyncio.to_thread(self._use_context_cache, resolved_name, contents, generation_config)
+
+    def _drop_context_cache(self, generation_config: "types.GenerateContentConfig", error: Exception) -> bool:
+        """Forget the cached content of a request that failed because of it; True to resend it uncached."""
+        cache_name = getattr(generation_config, "cached_content", None)
+        if not cache_name or not get_gemini_context_cache().is_cache_error(error):
+            return False
+        logger.warning(f"Gemini cached content {cache_name} could not be used, sending files inline: {error}")
+        get_gemini_context_cache().invalidate(self.client, cache_name)
+        return True
+
+    def _build_response(
+        self, response, resolved_name: str, thinking_mode: str, capabilities: ModelCapabilities
+    ) -> ModelResponse:
+        """Convert a Gemini SDK response into a ModelResponse."""
+        # Extract usage information if available
+        usage = self._extract_usage(response)
+
+        return ModelResponse(
+            content=response.text,
+            usage=usage,
+            model_name=resolved_name,
+            friendly_name="Gemini",
+            provider=ProviderType.GOOGLE,
+            metadata={
+                "thinking_mode": thinking_mode if capabilities.supports_extended_thinking else None,
+                "finish_reason": (
+                    getattr(response.candidates[0], "finish_reason", "STOP") if response.candidates else "STOP"
+                ),
+            },
+        )
 
-        last_exception = None
+    def generate_content(
+        self,
+        prompt: str,
+        model_name: str,
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.7,
+        max_output_tokens: Optional[int] = None,
+        thinking_mode: str = "medium",
+        images: Optional[list[str]] = None,
+        **kwargs,
+    ) -> ModelResponse:
+        """Generate content using Gemini model."""
+        resolved_name, contents, generation_config, capabilities = self._prepare_request(
+            prompt, model_name, system_prompt, temperature, max_output_tokens, thinking_mode, images
+        )
+        request_contents, request_config = self._use_context_cache(resolved_name, contents, generation_config)
 
-        for attempt in range(max_retries):
+        def attempt():
+            nonlocal request_contents, request_config
             try:
-                # Generate content
+                response = self.client.models.generate_content(
+                    model=resolved_name,
+                    contents=request_contents,
+                    config=request_config,
+                )
+            except Exception as e:
+                if not self._drop_context_cache(request_config, e):
+                    raise
+                request_contents, request_config = contents, generation_config
                 response = self.client.models.generate_content(
                     model=resolved_name,
                     contents=contents,
                     config=generation_config,
                 )
+            return self._build_response(response, resolved_name, thinking_mode, capabilities)
 
-                # Extract usage information if available
-                usage = self._extract_usage(response)
-
-                return ModelResponse(
-                    content=response.text,
-                    usage=usage,
-                    model_name=resolved_name,
-                    friendly_name="Gemini",
-                    provider=ProviderType.GOOGLE,
-                    metadata={
-                        "thinking_mode": thinking_mode if capabilities.supports_extended_thinking else None,
-                        "finish_reason": (
-                            getattr(response.candidates[0], "finish_reason", "STOP") if response.candidates else "STOP"
-                        ),
-                    },
-                )
+        try:
+            return call_with_retry(
+                attempt,
+                self._is_error_retryable,
+                description=f"Gemini API error for model {resolved_name}",
+                cooldown=self._get_retry_cooldown(),
+            )
+        except RetryExhaustedError as e:
+            error_msg = f"Gemini API error for model {resolved_name} after {e.attempts_text}: {str(e.last_exception)}"
+            raise RuntimeError(error_msg) from e.last_exception
+
+    async def agenerate_content(
+        self,
+        prompt: str,
+        model_name: str,
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.7,
+        max_output_tokens: Optional[int] = None,
+        thinking_mode: str = "medium",
+        images: Optional[list[str]] = None,
+        **kwargs,
+    ) -> ModelResponse:
+        """Generate content natively on the event loop using the google-genai async client."""
+        resolved_name, contents, generation_config, capabilities = self._prepare_request(
+            prompt, model_name, system_prompt, temperature, max_output_tokens, thinking_mode, images
+        )
+        request_contents, request_config = await self._ause_context_cache(resolved_name, contents, generation_config)
 
+        async def attempt():
+            nonlocal request_contents, request_config
+            try:
+                response = await self.client.aio.models.generate_content(
+                    model=resolved_name,
+                    contents=request_contents,
+                    config=request_config,
+                )
             except Exception as e:
-                last_exception = e
+                if not await asyncio.to_thread(self._drop_context_cache, request_config, e):
+                    raise
+                request_contents, request_config = contents, generation_config
+                response = await self.client.aio.models.generate_content(
+                    model=resolved_name,
+                    contents=contents,
+                    config=generation_config,
+                )
+            return self._build_response(response, resolved_name, thinking_mode, capabilities)
 
-                # Check if this is a retryable error using structured error codes
-                is_retryable = self._is_error_retryable(e)
+        try:
+            return await acall_with_retry(
+                attempt,
+                self._is_error_retryable,
+                description=f"Gemini API error for model {resolved_name}",
+                cooldown=self._get_retry_cooldown(),
+            )
+        except RetryExhaustedError as e:
+            error_msg = f"Gemini API error for model {resolved_name} after {e.attempts_text}: {str(e.last_exception)}"
+            raise RuntimeError(error_msg) from e.last_exception
+
+    async def astream_content(
+        self,
+        prompt: str,
+        model_name: str,
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.7,
+        max_output_tokens: Optional[int] = None,
+        thinking_mode: str = "medium",
+        images: Optional[list[str]] = None,
+        **kwargs,
+    ) -> AsyncIterator[StreamChunk]:
+        """Stream content from Gemini, yielding text deltas as they arrive.
 
-                # If this is the last attempt or not retryable, give up
-                if attempt == max_retries - 1 or not is_retryable:
-                    break
+        Errors before the first delta are retried like agenerate_content; once
+        text has been yielded the stream cannot be replayed.
+        """
+        resolved_name, contents, generation_config, capabilities = self._prepare_request(
+            prompt, model_name, system_prompt, temperature, max_output_tokens, thinking_mode, images
+        )
 
-                # Get progressive delay
-                delay = retry_delays[attempt]
+        request_contents, request_config = await self._ause_context_cache(resolved_name, contents, generation_config)
+        attempts = 0
 
-                # Log retry attempt
-                logger.warning(
-                    f"Gemini API error for model {resolved_name}, attempt {attempt + 1}/{max_retries}: {str(e)}. Retrying in {delay}s..."
+        async def open_stream():
+            # Opening the stream and reading up to the first delta is one retryable attempt
+            nonlocal attempts, request_contents, request_config
+            attempts += 1
+            try:
+                stream = await self.client.aio.models.generate_content_stream(
+                    model=resolved_name,
+                    contents=request_contents,
+                    config=request_config,
                 )
-                time.sleep(delay)
+            except Exception as e:
+                if not await asyncio.to_thread(self._drop_context_cache, request_config, e):
+                    raise
+                request_contents, request_config = contents, generation_config
+                stream = await self.client.aio.models.generate_content_stream(
+                    model=resolved_name,
+                    contents=contents,
+                    config=generation_config,
+                )
+            iterator = stream.__aiter__()
+            return iterator, await prefetch_until(iterator, lambda chunk: bool(chunk.text))
+
+        def failure(attempts_text: str, error: Exception) -> RuntimeError:
+            return RuntimeError(
+                f"Gemini API streaming error for model {resolved_name} after {attempts_text}: {str(error)}"
+            )
 
-        # If we get here, all retries failed
-        actual_attempts = attempt + 1  # Convert from 0-based index to human-readable count
-        error_msg = f"Gemini API error for model {resolved_name} after {actual_attempts} attempt{'s' if actual_attempts > 1 else ''}: {str(last_exception)}"
-        raise RuntimeError(error_msg) from last_exception
+        try:
+            iterator, prefetched = await acall_with_retry(
+                open_stream,
+                self._is_error_retryable,
+                description=f"Gemini API error for model {resolved_name}",
+                cooldown=self._get_retry_cooldown(),
+            )
+        except RetryExhaustedError as e:
+            raise failure(e.attempts_text, e.last_exception) from e.last_exception
+
+        parts = []
+        last_chunk = None
+        try:
+            for chunk in prefetched:
+                last_chunk = chunk
+                if chunk.text:
+                    parts.append(chunk.text)
+                    yield StreamChunk(text=chunk.text)
+            # Partial output has already been delivered, so errors from here on cannot be retried
+            async for chunk in iterator:
+                last_chunk = chunk
+                if chunk.text:
+                    parts.append(chunk.text)
+                    yield StreamChunk(text=chunk.text)
+        except Exception as e:
+            raise failure(f"{attempts} attempt{'s' if attempts > 1 else ''}", e) from e
+
+        # Usage and finish reason are reported on the last chunk
+        finish_reason = "STOP"
+        if last_chunk is not None and last_chunk.candidates:
+            finish_reason = getattr(last_chunk.candidates[0], "finish_reason", "STOP")
+        yield StreamChunk(
+            response=ModelResponse(
+                content="".join(parts),
+                usage=self._extract_usage(last_chunk) if last_chunk is not None else {},
+                model_name=resolved_name,
+                friendly_name="Gemini",
+                provider=ProviderType.GOOGLE,
+                metadata={
+                    "thinking_mode": thinking_mode if capabilities.supports_extended_thinking else None,
+                    "finish_reason": finish_reason,
+                    "streamed": True,
+                },
+            )
+        )
 
     def count_tokens(self, text: str, model_name: str) -> int:
-        """Count tokens for the given text using Gemini's tokenizer."""
-        self._resolve_model_name(model_name)
+        """Count tokens for the given text with the shared token counter (character-based for Gemini)."""
+        from utils.token_utils import estimate_tokens
 
-        # For now, use a simple estimation
-        # TODO: Use actual Gemini tokenizer when available in SDK
-        # Rough estimation: ~4 characters per token for English text
-        return len(text) // 4
+        return estimate_tokens(text, self._resolve_model_name(model_name))
 
     def get_provider_type(self) -> ProviderType:
         """Get the provider type."""
@@ -351,6 +578,11 @@ class GeminiModelProvider(ModelProvider):
             if input_tokens is not None and output_tokens is not None:
                 usage["total_tokens"] = input_tokens + output_tokens
 
+            # Input tokens served from implicit or explicit context caching
+            cached_tokens = getattr(metadata, "cached_content_token_count", None)
+            if isinstance(cached_tokens, int):
+                usage["cached_input_tokens"] = cached_tokens
+
         return usage
 
     def _supports_vision(self, model_name: str) -> bool:
@@ -377,9 +609,10 @@ class GeminiModelProvider(ModelProvider):
             True if error should be retried, False otherwise
         """
         error_str = str(error).lower()
+        status_code = get_status_code(error)
 
         # Check for 429 errors first - these need special handling
-        if "429" in error_str or "quota" in error_str or "resource_exhausted" in error_str:
+        if status_code == 429 or "429" in error_str or "quota" in error_str or "resource_exhausted" in error_str:
             # For Gemini, check for specific non-retryable error indicators
             # These typically indicate permanent failures or quota/size limits
             non_retryable_indicators = [
@@ -417,7 +650,11 @@ class GeminiModelProvider(ModelProvider):
             logger.debug(f"Retryable Gemini rate limiting error: {error_str[:100]}...")
             return True
 
-        # For non-429 errors, check if they're retryable
+        # Errors with an HTTP status are classified by the status alone
+        if status_code is not None:
+            return status_code in RETRYABLE_STATUS_CODES
+
+        # For other errors (connection failures, timeouts), check the message
         retryable_indicators = [
             "timeout",
             "connection",
@@ -0,0 +1,274 @@
+"""
+Explicit Gemini context caching of conversation files
+
+Every continuation embeds all files referenced in the conversation into its
+history, so with large file sets (analyze, codereview or secaudit on Gemini
+2.5 Pro) the same tokens are uploaded and billed on every call. With
+GEMINI_CONTEXT_CACHING=true the Gemini provider moves the conversation's
+embedded file block (see get_embedded_conversation_files()) into a server-side
+cached content and only sends the rest of the prompt:
+
+- Cached contents are keyed by the model and the set of embedded files, so all
+  continuations of a conversation (whichever tool they use) share one cache
+- A cache is replaced when any of its files changed on disk (mtime or size)
+  since it was created; the outdated cache is deleted
+- Cached contents are immutable (only their expiry can be updated) and a
+  request can reference a single one, so when a turn adds files the whole
+  block is uploaded again as a new cache for the new file set rather than
+  just the added files
+- Caches live as long as conversation threads (CONVERSATION_TIMEOUT_HOURS);
+  their expiry is extended when they are reused after half of it has passed
+- File blocks below GEMINI_CONTEXT_CACHE_MIN_TOKENS (default 32768) are sent
+  inline, since storing them costs more than caching saves
+
+Failures to create or use a cache are logged and the request is sent uncached.
+"""
+
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Optional
+
+from .retry import get_status_code
+
+if TYPE_CHECKING:
+    from utils.conversation_memory import EmbeddedConversationFiles
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MIN_TOKENS = 32_768
+
+# Cached contents kept per server process; the least recently used is deleted beyond this
+MAX_CACHED_CONTENTS = 32
+
+# Locks serializing cache creation, shared by file sets whose keys hash alike
+KEY_LOCK_STRIPES = 64
+
+# After a model fails to create a cached content (e.g. it does not support caching),
+# requests for it are sent uncached for this long before trying again
+CREATE_FAILURE_BACKOFF_SECONDS = 600
+
+# Replaces the file block in the prompt when the files are in the cached content
+CACHED_FILES_PLACEHOLDER = "(The contents of these files are provided in the cached context preceding this request)\n"
+
+
+def _get_min_tokens() -> int:
+    """Read GEMINI_CONTEXT_CACHE_MIN_TOKENS, falling back to the default on invalid values."""
+    value = os.getenv("GEMINI_CONTEXT_CACHE_MIN_TOKENS", "")
+    if not value:
+        return DEFAULT_MIN_TOKENS
+    try:
+        min_tokens = int(value)
+        if min_tokens < 0:
+            raise ValueError(value)
+        return min_tokens
+    except ValueError:
+        logger.warning(
+            f"Invalid GEMINI_CONTEXT_CACHE_MIN_TOKENS value ('{value}'), using default of {DEFAULT_MIN_TOKENS} tokens"
+        )
+        return DEFAULT_MIN_TOKENS
+
+
+@dataclass
+class CachedFiles:
+    """A server-side cached content holding one conversation file block"""
+
+    name: str  # Cached content resource name
+    file_versions: tuple[tuple[str, int, int], ...]
+    content_hash: bytes
+    expires_at: float  # time.monotonic() deadline
+
+
+class GeminiContextCache:
+    """Registry of the cached contents created for conversation file blocks"""
+
+    def __init__(
+        self,
+        enabled: Optional[bool] = None,
+        min_tokens: Optional[int] = None,
+        ttl_seconds: Optional[int] = None,
+    ):
+        if enabled is None:
+            enabled = os.getenv("GEMINI_CONTEXT_CACHING", "").lower() in ("true", "1", "yes")
+        if ttl_seconds is None:
+            from utils.conversation_memory import CONVERSATION_TIMEOUT_SECONDS
+
+            ttl_seconds = CONVERSATION_TIMEOUT_SECONDS
+        self.enabled = enabled
+        self.min_tokens = _get_min_tokens() if min_tokens is None else min_tokens
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[tuple[str, tuple[str, ...]], CachedFiles] = OrderedDict()
+        self._key_locks = [threading.Lock() for _ in range(KEY_LOCK_STRIPES)]
+        self._create_retry_after: dict[str, float] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _hash(content: str) -> bytes:
+        return hashlib.blake2b(content.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+
+    def get_cache_name(self, client: Any, model_name: str, files: "EmbeddedConversationFiles") -> Optional[str]:
+        """
+        Return the cached content holding a conversation's file block, creating it if needed.
+
+        Args:
+            client: google-genai client
+            model_name: Resolved Gemini model name
+            files: The embedded file block
+
+        Returns:
+            The cached content name, or None if the files should be sent inline
+        """
+        if not self.enabled:
+            return None
+        from utils.token_utils import estimate_tokens
+
+        if estimate_tokens(files.content, model_name) < self.min_tokens:
+            return None
+
+        key = (model_name, files.file_paths)
+        with self._lock:
+            if self._create_retry_after.get(model_name, 0) > time.monotonic():
+                return None
+            key_lock = self._key_locks[hash(key) % KEY_LOCK_STRIPES]
+
+        # One request per file set creates the cache; concurrent ones wait and reuse it
+        with key_lock:
+            content_hash = self._hash(files.content)
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    self._entries.move_to_end(key)
+            outdated = None
+            if entry is not None:
+                if entry.file_versions != files.file_versions or entry.content_hash != content_hash:
+                    logger.debug(f"[CONTEXT_CACHE] Files of {entry.name} changed, replacing it")
+                    outdated, entry = entry, None
+                elif entry.expires_at <= time.monotonic():
+                    entry = None
+                elif not self._extend(client, entry):
+                    outdated, entry = entry, None
+            if outdated is not None:
+                self._remove(key, outdated)
+                self._delete(client, outdated.name)
+
+            if entry is not None:
+                with self._lock:
+                    self.hits += 1
+                return entry.name
+
+            with self._lock:
+                self.misses += 1
+            entry = self._create(client, model_name, files, content_hash)
+            if entry is None:
+                return None
+            with self._lock:
+                self._entries[key] = entry
+                evicted = []
+                while len(self._entries) > MAX_CACHED_CONTENTS:
+                    evicted.append(self._entries.popitem(last=False)[1])
+        for evicted_entry in evicted:
+            self._delete(client, evicted_entry.name)
+        return entry.name
+
+    def _create(
+        self, client: Any, model_name: str, files: "EmbeddedConversationFiles", content_hash: bytes
+    ) -> Optional[CachedFiles]:
+        from google.genai import types
+
+        try:
+            cached_content = client.caches.create(
+                model=model_name,
+                config=types.CreateCachedContentConfig(
+                    contents=[types.Content(role="user", parts=[types.Part(text=files.content)])],
+                    ttl=f"{self.ttl_seconds}s",
+                    display_name=f"zen-mcp {files.thread_id}",
+                ),
+            )
+        except Exception as e:
+            logger.warning(f"Could not create Gemini context cache for {model_name}, sending files inline: {e}")
+            with self._lock:
+                self._create_retry_after[model_name] = time.monotonic() + CREATE_FAILURE_BACKOFF_SECONDS
+            return None
+
+        logger.info(
+            f"[CONTEXT_CACHE] Cached {len(files.file_paths)} conversation files for {model_name} as {cached_content.name}"
+        )
+        return CachedFiles(
+            name=cached_content.name,
+            file_versions=files.file_versions,
+            content_hash=content_hash,
+            expires_at=time.monotonic() + self.ttl_seconds,
+        )
+
+    def _extend(self, client: Any, entry: CachedFiles) -> bool:
+        """Extend the expiry of a cached content past half its TTL, so it lives as long as its thread."""
+        if entry.expires_at - time.monotonic() > self.ttl_seconds / 2:
+            return True
+        from google.genai import types
+
+        try:
+            client.caches.update(name=entry.name, config=types.UpdateCachedContentConfig(ttl=f"{self.ttl_seconds}s"))
+        except Exception as e:
+            logger.debug(f"[CONTEXT_CACHE] Could not extend {entry.name}: {e}")
+            return False
+        entry.expires_at = time.monotonic() + self.ttl_seconds
+        return True
+
+    def _remove(self, key: tuple[str, tuple[str, ...]], entry: CachedFiles) -> None:
+        with self._lock:
+            if self._entries.get(key) is entry:
+                del self._entries[key]
+
+    @staticmethod
+    def _delete(client: Any, name: str) -> None:
+        try:
+            client.caches.delete(name=name)
+        except Exception as e:
+            # Expires on its own at the end of its TTL
+            logger.debug(f"[CONTEXT_CACHE] Could not delete {name}: {e}")
+
+    def invalidate(self, client: Any, name: str) -> None:
+        """Forget a cached content that could not be used (e.g. it expired server-side) and delete it."""
+        with self._lock:
+            keys = [key for key, entry in self._entries.items() if entry.name == name]
+            for key in keys:
+                del self._entries[key]
+        self._delete(client, name)
+
+    @staticmethod
+    def is_cache_error(error: Exception) -> bool:
+        """Whether a request failed because of its cached content rather than the request itself."""
+        return get_status_code(error) in (403, 404) or "cachedcontent" in str(error).lower().replace(" ", "")
+
+    def get_stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+    def clear(self) -> None:
+        """Forget all cached contents (they expire server-side at the end of their TTL)."""
+        with self._lock:
+            self._entries.clear()
+            self._create_retry_after.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+# Global singleton instance
+_context_cache: Optional[GeminiContextCache] = None
+_context_cache_lock = threading.Lock()
+
+
+def get_gemini_context_cache() -> GeminiContextCache:
+    """Get the global Gemini context cache registry (singleton pattern)"""
+    global _context_cache
+    if _context_cache is None:
+        with _context_cache_lock:
+            if _context_cache is None:
+                _context_cache = GeminiContextCache()
+    return _context_cache
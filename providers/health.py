@@ -0,0 +1,349 @@
+"""
+Provider health tracking and circuit breakers
+
+The provider executor reports the outcome and latency of every generation call
+here. Each provider has a circuit breaker:
+
+- closed: calls are routed to the provider normally
+- open: after PROVIDER_CIRCUIT_FAILURE_THRESHOLD consecutive failures the
+  registry routes around the provider, falling through to the next provider
+  that can serve the same model (e.g. native OpenAI -> OpenRouter)
+- half-open: once PROVIDER_CIRCUIT_RESET_SECONDS have passed, the next call
+  the executor makes is let through as a single probe; the circuit stays open
+  for everyone else until the probe finishes. A successful probe closes the
+  circuit, a failed one re-opens it with the reset period doubled (up to 10
+  minutes). Outcomes of other calls - started before the circuit opened, or
+  sent while every provider for a model was failing - do not move an open or
+  half-open circuit
+
+This avoids spending the full retry schedule on a provider that is known to be
+down. Latencies are kept as exponentially weighted moving averages per provider
+and per model, together with p50/p95 latencies and error rates over the most
+recent calls, which auto mode uses to pick the fastest model of a quality tier.
+
+Failures are provider errors (API errors surfaced after retries, timeouts,
+connection problems). ValueErrors raised before a request is sent - invalid
+parameters, restricted models - and HTTP 4xx client errors say nothing about
+provider health and are ignored.
+"""
+
+import logging
+import math
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Optional
+
+from .retry import get_status_code
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FAILURE_THRESHOLD = 5
+DEFAULT_RESET_SECONDS = 30.0
+MAX_RESET_SECONDS = 600.0
+
+# Weight of the newest sample in the latency moving average
+LATENCY_EWMA_ALPHA = 0.2
+
+# Number of recent calls per provider/model used for percentiles and error rates
+STATS_WINDOW = 100
+
+
+def _read_env_number(name: str, default, cast):
+    """Read a positive number from the environment, falling back to the default on invalid values."""
+    value = os.getenv(name, "")
+    if not value:
+        return default
+    try:
+        number = cast(value)
+        if number <= 0:
+            raise ValueError(value)
+        return number
+    except ValueError:
+        logger.warning(f"Invalid {name} value ('{value}'), using default of {default}")
+        return default
+
+
+def is_provider_failure(error: BaseException) -> bool:
+    """Whether an error from a generation call reflects on the provider's health."""
+    if not isinstance(error, Exception):
+        return False
+    if isinstance(error, (ValueError, TypeError)) and error.__cause__ is None:
+        return False
+    # Client errors (bad request, context too long, auth) are the request's fault, not an outage
+    status_code = get_status_code(error.__cause__ or error)
+    if status_code is not None and 400 <= status_code < 500 and status_code not in (408, 429):
+        return False
+    return True
+
+
+class LatencyStats:
+    """Latency moving average plus a rolling window of recent outcomes for percentiles"""
+
+    def __init__(self, window: int = STATS_WINDOW):
+        self.ewma_seconds = 0.0
+        self.samples = 0  # Successful calls observed in total
+        self._latencies: deque[float] = deque(maxlen=window)
+        self._outcomes: deque[bool] = deque(maxlen=window)  # True for success
+
+    def add(self, seconds: float) -> None:
+        if self.samples == 0:
+            self.ewma_seconds = seconds
+        else:
+            self.ewma_seconds += LATENCY_EWMA_ALPHA * (seconds - self.ewma_seconds)
+        self.samples += 1
+        self._latencies.append(seconds)
+        self._outcomes.append(True)
+
+    def add_failure(self) -> None:
+        self._outcomes.append(False)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        """Nearest-rank percentile of the recent successful latencies."""
+        if not self._latencies:
+            return None
+        ordered = sorted(self._latencies)
+        rank = max(1, math.ceil(pct / 100 * len(ordered)))
+        return ordered[rank - 1]
+
+    @property
+    def window_samples(self) -> int:
+        return len(self._latencies)
+
+    @property
+    def error_rate(self) -> float:
+        if not self._outcomes:
+            return 0.0
+        return self._outcomes.count(False) / len(self._outcomes)
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "ewma_seconds": self.ewma_seconds,
+            "samples": self.samples,
+            "p50_seconds": self.percentile(50),
+            "p95_seconds": self.percentile(95),
+            "error_rate": self.error_rate,
+        }
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker for one provider"""
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.base_reset_seconds = reset_seconds
+        self.reset_seconds = reset_seconds
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.successes = 0
+        self.failures = 0
+        self.times_opened = 0
+        self.probe_started_at: Optional[float] = None
+
+    @property
+    def state(self) -> str:
+        if self.consecutive_failures < self.failure_threshold:
+            return "closed"
+        if time.monotonic() - self.opened_at < self.reset_seconds:
+            return "open"
+        return "half_open"
+
+    @property
+    def probing(self) -> bool:
+        # A probe that never reported back (e.g. an abandoned stream) is given up on eventually
+        return self.probe_started_at is not None and time.monotonic() - self.probe_started_at < MAX_RESET_SECONDS
+
+    def allows_calls(self) -> bool:
+        state = self.state
+        return state == "closed" or (state == "half_open" and not self.probing)
+
+    def start_probe(self) -> Optional[float]:
+        """Claim the half-open probe, returning its token, or None if this call is not the probe."""
+        if self.state != "half_open" or self.probing:
+            return None
+        self.probe_started_at = time.monotonic()
+        return self.probe_started_at
+
+    def end_probe(self, token: float) -> None:
+        if self.probe_started_at == token:
+            self.probe_started_at = None
+
+    def _is_probe(self, probe: Optional[float]) -> bool:
+        return probe is not None and probe == self.probe_started_at
+
+    def record_success(self, probe: Optional[float] = None) -> None:
+        self.successes += 1
+        if self.state != "closed" and not self._is_probe(probe):
+            # Only the probe decides whether an open circuit closes
+            return
+        self.consecutive_failures = 0
+        self.reset_seconds = self.base_reset_seconds
+        self.probe_started_at = None
+
+    def record_failure(self, probe: Optional[float] = None) -> None:
+        self.failures += 1
+        state = self.state
+        self.consecutive_failures += 1
+        if state != "closed":
+            if self._is_probe(probe):
+                # Probe failed - stay away for longer
+                self.reset_seconds = min(self.reset_seconds * 2, MAX_RESET_SECONDS)
+                self.opened_at = time.monotonic()
+                self.probe_started_at = None
+        elif self.consecutive_failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+            self.times_opened += 1
+
+
+class ProviderHealth:
+    """Thread-safe registry of per-provider circuit breakers and latency statistics"""
+
+    def __init__(self, failure_threshold: Optional[int] = None, reset_seconds: Optional[float] = None):
+        self.failure_threshold = failure_threshold or _read_env_number(
+            "PROVIDER_CIRCUIT_FAILURE_THRESHOLD", DEFAULT_FAILURE_THRESHOLD, int
+        )
+        self.reset_seconds = reset_seconds or _read_env_number(
+            "PROVIDER_CIRCUIT_RESET_SECONDS", DEFAULT_RESET_SECONDS, float
+        )
+        self._lock = threading.Lock()
+        self._breakers: dict[str, CircuitBreaker] = {}
+        self._latency: dict[tuple[str, Optional[str]], LatencyStats] = {}
+
+    def _get_breaker(self, provider_key: str) -> CircuitBreaker:
+        breaker = self._breakers.get(provider_key)
+        if breaker is None:
+            breaker = self._breakers[provider_key] = CircuitBreaker(self.failure_threshold, self.reset_seconds)
+        return breaker
+
+    def is_available(self, provider_key: str) -> bool:
+        """Whether calls should be routed to the provider (closed, or half-open with no probe in flight)."""
+        with self._lock:
+            breaker = self._breakers.get(provider_key)
+            return breaker is None or breaker.allows_calls()
+
+    def start_call(self, provider_key: str) -> Optional[float]:
+        """
+        Register a call that is about to be sent to the provider.
+
+        When the provider's circuit is half-open and no probe is in flight, this
+        call becomes the probe and the provider is reported unavailable to other
+        callers until it finishes.
+
+        Returns:
+            Probe token to pass to end_call(), or None if the call is not a probe
+        """
+        with self._lock:
+            breaker = self._breakers.get(provider_key)
+            return breaker.start_probe() if breaker else None
+
+    def end_call(self, provider_key: str, probe: Optional[float]) -> None:
+        """Release the probe claimed by start_call(), whatever the call's outcome."""
+        if probe is None:
+            return
+        with self._lock:
+            breaker = self._breakers.get(provider_key)
+            if breaker:
+                breaker.end_probe(probe)
+
+    def record_success(
+        self,
+        provider_key: str,
+        model_name: Optional[str],
+        latency_seconds: float,
+        probe: Optional[float] = None,
+    ) -> None:
+        """Record a successful call; probe is the token from start_call(), if the call was the probe."""
+        with self._lock:
+            breaker = self._get_breaker(provider_key)
+            was_closed = breaker.state == "closed"
+            breaker.record_success(probe)
+            if not was_closed and breaker.state == "closed":
+                logger.info(f"Provider {provider_key} recovered, closing circuit")
+            self._latency.setdefault((provider_key, None), LatencyStats()).add(latency_seconds)
+            if model_name:
+                self._latency.setdefault((provider_key, model_name), LatencyStats()).add(latency_seconds)
+
+    def record_failure(
+        self,
+        provider_key: str,
+        model_name: Optional[str],
+        error: BaseException,
+        probe: Optional[float] = None,
+    ) -> None:
+        """Record a failed call; probe is the token from start_call(), if the call was the probe."""
+        if not is_provider_failure(error):
+            return
+        with self._lock:
+            if model_name:
+                self._latency.setdefault((provider_key, model_name), LatencyStats()).add_failure()
+            breaker = self._get_breaker(provider_key)
+            was_open = breaker.state == "open"
+            breaker.record_failure(probe)
+            if breaker.state == "open" and not was_open:
+                logger.warning(
+                    f"Provider {provider_key} circuit open after {breaker.consecutive_failures} consecutive "
+                    f"failure(s), routing around it for {breaker.reset_seconds:.0f}s (last error: {error})"
+                )
+
+    def get_latency(self, provider_key: str, model_name: Optional[str] = None) -> Optional[float]:
+        """Return the average latency in seconds for a provider (or one of its models), if observed."""
+        with self._lock:
+            stats = self._latency.get((provider_key, model_name))
+            return stats.ewma_seconds if stats and stats.samples else None
+
+    def get_model_stats(self, provider_key: str, model_name: str) -> Optional[dict[str, Any]]:
+        """
+        Return rolling statistics for one model, or None if it has not been called yet.
+
+        Returns:
+            Dict with ewma_seconds, samples, p50_seconds, p95_seconds, error_rate
+            and window_samples (successful calls in the rolling window)
+        """
+        with self._lock:
+            stats = self._latency.get((provider_key, model_name))
+            if stats is None:
+                return None
+            return {**stats.as_dict(), "window_samples": stats.window_samples}
+
+    def get_stats(self) -> dict[str, dict[str, Any]]:
+        """Snapshot of circuit state, outcome counters and latencies per provider."""
+        with self._lock:
+            snapshot: dict[str, dict[str, Any]] = {}
+            for provider_key, breaker in self._breakers.items():
+                snapshot[provider_key] = {
+                    "state": breaker.state,
+                    "consecutive_failures": breaker.consecutive_failures,
+                    "successes": breaker.successes,
+                    "failures": breaker.failures,
+                    "times_opened": breaker.times_opened,
+                    "probing": breaker.probing,
+                    "models": {},
+                }
+            for (provider_key, model_name), stats in self._latency.items():
+                entry = snapshot.setdefault(provider_key, {"models": {}})
+                if model_name is None:
+                    entry["latency"] = stats.as_dict()
+                else:
+                    entry["models"][model_name] = stats.as_dict()
+            return snapshot
+
+    def reset(self) -> None:
+        with self._lock:
+            self._breakers.clear()
+            self._latency.clear()
+
+
+# Global singleton instance
+_health_instance: Optional[ProviderHealth] = None
+_health_lock = threading.Lock()
+
+
+def get_provider_health() -> ProviderHealth:
+    """Get the global provider health tracker (singleton pattern)"""
+    global _health_instance
+    if _health_instance is None:
+        with _health_lock:
+            if _health_instance is None:
+                _health_instance = ProviderHealth()
+    return _health_instance
@@ -0,0 +1,166 @@
+"""
+Model name resolution index
+
+Resolving a model name used to mean asking every provider in turn to validate
+it, and each provider resolving aliases by scanning its model table and
+consulting the restriction service. Listing models repeated the same scans for
+every tool schema. The index precomputes all of this once:
+
+- every lowercased model name and alias maps to the providers that list it, in
+  routing priority order, with the canonical name, capabilities and whether
+  the name is allowed by restrictions
+- the available model listings (with and without restrictions) are captured
+  per provider
+
+The index is immutable. ModelProviderRegistry builds a new one whenever the
+registered providers, their instances or the restriction service change, and
+whenever configure_providers() (re)loads the configuration.
+
+Providers that accept names they do not list (custom endpoints accept local
+model names, OpenRouter accepts any model) are still asked directly for names
+missing from the index.
+"""
+
+import logging
+from collections.abc import Mapping
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Optional
+
+from .base import ModelCapabilities, ModelProvider, ProviderType
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ModelIndexEntry:
+    """Resolution of one model name by one provider"""
+
+    provider_type: ProviderType
+    model_name: str  # Canonical model name
+    capabilities: Optional[ModelCapabilities]
+    allowed: bool  # Whether the provider accepts the name (restrictions applied)
+
+
+class ModelIndex:
+    """Immutable snapshot of model names, aliases and availability across providers"""
+
+    def __init__(
+        self,
+        providers: list[tuple[ProviderType, Any]],
+        priority_order: list[ProviderType],
+        signature: tuple = (),
+        generation: int = 0,
+    ):
+        """
+        Build the index.
+
+        Args:
+            providers: (provider type, initialized provider) pairs in registration order
+            priority_order: Provider types in routing priority order; others are never routed to
+            signature: Opaque value identifying the registry state the index was built from
+            generation: Build counter; changes whenever the providers or restrictions change, so
+                anything derived from the index (e.g. tool schemas) can be cached against it
+        """
+        self.signature = signature
+        self.generation = generation
+        priority = {provider_type: rank for rank, provider_type in enumerate(priority_order)}
+        self._providers: tuple[tuple[ProviderType, Any], ...] = tuple(
+            sorted(
+                ((provider_type, provider) for provider_type, provider in providers if provider_type in priority),
+                key=lambda item: priority[item[0]],
+            )
+        )
+        # Providers asked directly about names missing from their listing
+        open_providers = {
+            provider_type
+            for provider_type, provider in providers
+            if not isinstance(provider, ModelProvider) or getattr(provider, "ACCEPTS_UNLISTED_MODELS", False)
+        }
+
+        entries: dict[str, list[ModelIndexEntry]] = {}
+        listings: dict[tuple[ProviderType, bool], tuple[str, ...]] = {}
+        available: dict[bool, dict[str, ProviderType]] = {True: {}, False: {}}
+        for provider_type, provider in providers:
+            if isinstance(provider, ModelProvider):
+                try:
+                    self._index_provider(provider_type, provider, entries)
+                except Exception as e:
+                    # Fall back to asking the provider directly rather than losing it
+                    logger.warning(f"Could not index models of provider {provider_type.value}: {e}")
+                    open_providers.add(provider_type)
+            for respect_restrictions in (True, False):
+                try:
+                    models = provider.list_models(respect_restrictions=respect_restrictions)
+                except NotImplementedError:
+                    logger.warning("Provider %s does not implement list_models", provider_type)
+                    break
+                listings[(provider_type, respect_restrictions)] = tuple(models)
+                for model_name in models:
+                    available[respect_restrictions][model_name] = provider_type
+
+        self._open_providers = frozenset(open_providers)
+        self._entries: Mapping[str, tuple[ModelIndexEntry, ...]] = MappingProxyType(
+            {
+                name: tuple(sorted(name_entries, key=lambda entry: priority.get(entry.provider_type, len(priority))))
+                for name, name_entries in entries.items()
+            }
+        )
+        self._listings = MappingProxyType(listings)
+        self._available = {key: MappingProxyType(models) for key, models in available.items()}
+
+    @staticmethod
+    def _index_provider(
+        provider_type: ProviderType, provider: ModelProvider, entries: dict[str, list[ModelIndexEntry]]
+    ) -> None:
+        configurations = provider.get_model_configurations()
+        aliases = provider.get_all_model_aliases()
+        for model_name, capabilities in configurations.items():
+            for name in (model_name, *aliases.get(model_name, [])):
+                name_entries = entries.setdefault(name.lower(), [])
+                if any(entry.provider_type == provider_type for entry in name_entries):
+                    continue
+                name_entries.append(
+                    ModelIndexEntry(
+                        provider_type=provider_type,
+                        model_name=model_name,
+                        capabilities=capabilities,
+                        allowed=bool(provider.validate_model_name(name)),
+                    )
+                )
+
+    def lookup(self, model_name: str) -> tuple[ModelIndexEntry, ...]:
+        """Return every provider's resolution of a model name or alias, in priority order."""
+        return self._entries.get(model_name.lower(), ())
+
+    def get_entry(self, model_name: str, provider_type: ProviderType) -> Optional[ModelIndexEntry]:
+        """Return one provider's resolution of a model name or alias, if it lists the name."""
+        return next((entry for entry in self.lookup(model_name) if entry.provider_type == provider_type), None)
+
+    def resolve(self, model_name: str) -> Optional[ModelIndexEntry]:
+        """Return the highest priority allowed resolution of a model name, if any provider lists it."""
+        return next((entry for entry in self.lookup(model_name) if entry.allowed), None)
+
+    def iter_candidates(self, model_name: str):
+        """
+        Yield (provider type, provider) pairs that accept a model name, in priority order.
+
+        Listed names are answered from the index; providers that accept unlisted
+        names are asked directly when the name is not in their listing.
+        """
+        entries = {entry.provider_type: entry for entry in self.lookup(model_name)}
+        for provider_type, provider in self._providers:
+            entry = entries.get(provider_type)
+            if entry is not None:
+                if entry.allowed:
+                    yield provider_type, provider
+            elif provider_type in self._open_providers and provider.validate_model_name(model_name):
+                yield provider_type, provider
+
+    def list_models(self, provider_type: ProviderType, respect_restrictions: bool = True) -> tuple[str, ...]:
+        """Return the models listed by one provider (empty if it is not configured)."""
+        return self._listings.get((provider_type, respect_restrictions), ())
+
+    def get_available_models(self, respect_restrictions: bool = True) -> dict[str, ProviderType]:
+        """Return a mapping of every listed model name to its provider type."""
+        return dict(self._available[respect_restrictions])
@@ -1,24 +1,50 @@
 """Base class for OpenAI-compatible API providers."""
 
+import asyncio
 import base64
 import ipaddress
 import logging
 import os
-import time
+import sys
+import weakref
 from abc import abstractmethod
+from collections.abc import AsyncIterator
 from typing import Optional
 from urllib.parse import urlparse
 
-from openai import OpenAI
-
 from .base import (
     ModelCapabilities,
     ModelProvider,
     ModelResponse,
     ProviderType,
+    StreamChunk,
+)
+from .retry import (
+    RETRYABLE_STATUS_CODES,
+    RetryExhaustedError,
+    acall_with_retry,
+    call_with_retry,
+    get_status_code,
+    prefetch_until,
 )
 
 
+def __getattr__(name: str):
+    """Import the OpenAI SDK client classes on first use rather than at server startup."""
+    if name in ("OpenAI", "AsyncOpenAI"):
+        import openai
+
+        value = getattr(openai, name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _get_client_class(name: str):
+    # Resolve through the module so the lazily imported (or patched) class is used
+    return getattr(sys.modules[__name__], name)
+
+
 class OpenAICompatibleProvider(ModelProvider):
     """Base class for any provider using an OpenAI-compatible API.
 
@@ -30,6 +56,11 @@ class OpenAICompatibleProvider(ModelProvider):
 
     DEFAULT_HEADERS = {}
     FRIENDLY_NAME = "OpenAI Compatible"
+    SUPPORTS_NATIVE_ASYNC = True
+    SUPPORTS_NATIVE_STREAMING = True
+    # Whether the endpoint accepts stream_options to report usage in the final chunk
+    SUPPORTS_STREAM_USAGE = True
+    SDK_MODULES = ("openai",)
 
     def __init__(self, api_key: str, base_url: str = None, **kwargs):
         """Initialize the provider with API key and optional base URL.
@@ -41,6 +72,7 @@ class OpenAICompatibleProvider(ModelProvider):
         """
         super().__init__(api_key, **kwargs)
         self._client = None
+        self._async_clients = weakref.WeakKeyDictionary()
         self.base_url = base_url
         self.organization = kwargs.get("organization")
         self.allowed_models = self._parse_allowed_models()
@@ -193,86 +225,112 @@ class OpenAICompatibleProvider(ModelProvider):
                 raise
             raise ValueError(f"Invalid base URL '{self.base_url}': {str(e)}")
 
-    @property
-    def client(self):
-        """Lazy initialization of OpenAI client with security checks and timeout configuration."""
-        if self._client is None:
-            import os
+    def _create_client(self, client_class, http_client_class):
+        """Create an OpenAI SDK client with security checks and timeout configuration.
 
-            import httpx
+        Args:
+            client_class: OpenAI or AsyncOpenAI
+            http_client_class: httpx.Client or httpx.AsyncClient, matching client_class
 
-            # Temporarily disable proxy environment variables to prevent httpx from detecting them
-            original_env = {}
-            proxy_env_vars = ["HTTP_PROXY", "HTTPS_PROXY", "ALL_PROXY", "http_proxy", "https_proxy", "all_proxy"]
+        Returns:
+            Configured client instance
+        """
+        import httpx
 
-            for var in proxy_env_vars:
-                if var in os.environ:
-                    original_env[var] = os.environ[var]
-                    del os.environ[var]
+        # Temporarily disable proxy environment variables to prevent httpx from detecting them
+        original_env = {}
+        proxy_env_vars = ["HTTP_PROXY", "HTTPS_PROXY", "ALL_PROXY", "http_proxy", "https_proxy", "all_proxy"]
 
-            try:
-                # Create a custom httpx client that explicitly avoids proxy parameters
-                timeout_config = (
-                    self.timeout_config
-                    if hasattr(self, "timeout_config") and self.timeout_config
-                    else httpx.Timeout(30.0)
-                )
+        for var in proxy_env_vars:
+            if var in os.environ:
+                original_env[var] = os.environ[var]
+                del os.environ[var]
 
-                # Create httpx client with minimal config to avoid proxy conflicts
-                # Note: proxies parameter was removed in httpx 0.28.0
-                http_client = httpx.Client(
-                    timeout=timeout_config,
-                    follow_redirects=True,
-                )
+        try:
+            # Create a custom httpx client that explicitly avoids proxy parameters
+            timeout_config = (
+                self.timeout_config if hasattr(self, "timeout_config") and self.timeout_config else httpx.Timeout(30.0)
+            )
 
-                # Keep client initialization minimal to avoid proxy parameter conflicts
-                client_kwargs = {
-                    "api_key": self.api_key,
-                    "http_client": http_client,
-                }
+            # Create httpx client with minimal config to avoid proxy conflicts
+            # Note: proxies parameter was removed in httpx 0.28.0
+            http_client = http_client_class(
+                timeout=timeout_config,
+                follow_redirects=True,
+            )
 
-                if self.base_url:
-                    client_kwargs["base_url"] = self.base_url
+            # Keep client initialization minimal to avoid proxy parameter conflicts
+            client_kwargs = {
+                "api_key": self.api_key,
+                "http_client": http_client,
+            }
 
-                if self.organization:
-                    client_kwargs["organization"] = self.organization
+            if self.base_url:
+                client_kwargs["base_url"] = self.base_url
 
-                # Add default headers if any
-                if self.DEFAULT_HEADERS:
-                    client_kwargs["default_headers"] = self.DEFAULT_HEADERS.copy()
+            if self.organization:
+                client_kwargs["organization"] = self.organization
 
-                logging.debug(f"OpenAI client initialized with custom httpx client and timeout: {timeout_config}")
+            # Add default headers if any
+            if self.DEFAULT_HEADERS:
+                client_kwargs["default_headers"] = self.DEFAULT_HEADERS.copy()
 
-                # Create OpenAI client with custom httpx client
-                self._client = OpenAI(**client_kwargs)
+            logging.debug(
+                f"{client_class.__name__} client initialized with custom httpx client and timeout: {timeout_config}"
+            )
 
-            except Exception as e:
-                # If all else fails, try absolute minimal client without custom httpx
-                logging.warning(f"Failed to create client with custom httpx, falling back to minimal config: {e}")
-                try:
-                    minimal_kwargs = {"api_key": self.api_key}
-                    if self.base_url:
-                        minimal_kwargs["base_url"] = self.base_url
-                    self._client = OpenAI(**minimal_kwargs)
-                except Exception as fallback_error:
-                    logging.error(f"Even minimal OpenAI client creation failed: {fallback_error}")
-                    raise
-            finally:
-                # Restore original proxy environment variables
-                for var, value in original_env.items():
-                    os.environ[var] = value
+            # Create OpenAI client with custom httpx client
+            return client_class(**client_kwargs)
+
+        except Exception as e:
+            # If all else fails, try absolute minimal client without custom httpx
+            logging.warning(f"Failed to create client with custom httpx, falling back to minimal config: {e}")
+            try:
+                minimal_kwargs = {"api_key": self.api_key}
+                if self.base_url:
+                    minimal_kwargs["base_url"] = self.base_url
+                return client_class(**minimal_kwargs)
+            except Exception as fallback_error:
+                logging.error(f"Even minimal {client_class.__name__} client creation failed: {fallback_error}")
+                raise
+        finally:
+            # Restore original proxy environment variables
+            for var, value in original_env.items():
+                os.environ[var] = value
+
+    @property
+    def client(self):
+        """Lazy initialization of OpenAI client with security checks and timeout configuration."""
+        if self._client is None:
+            import httpx
+
+            self._client = self._create_client(_get_client_class("OpenAI"), httpx.Client)
 
         return self._client
 
-    def _generate_with_responses_endpoint(
-        self,
-        model_name: str,
-        messages: list,
-        temperature: float,
-        max_output_tokens: Optional[int] = None,
-        **kwargs,
-    ) -> ModelResponse:
-        """Generate content using the /v1/responses endpoint for o3-pro via OpenAI library."""
+    @property
+    def async_client(self):
+        """Lazy initialization of an AsyncOpenAI client for the running event loop.
+
+        The underlying httpx.AsyncClient pools connections on the loop it was first
+        used on, so one client is kept per loop. Entries go away with their loop, and
+        clients of loops that have since been closed are dropped when a new one is made.
+        """
+        loop = asyncio.get_running_loop()
+        async_client = self._async_clients.get(loop)
+        if async_client is None:
+            import httpx
+
+            for stale_loop in [known for known in self._async_clients if known.is_closed()]:
+                self._async_clients.pop(stale_loop, None)
+
+            async_client = self._create_client(_get_client_class("AsyncOpenAI"), httpx.AsyncClient)
+            self._async_clients[loop] = async_client
+
+        return async_client
+
+    def _prepare_responses_request(self, model_name: str, messages: list, max_output_tokens: Optional[int]) -> dict:
+        """Build /v1/responses endpoint parameters from chat-style messages (used for o3-pro)."""
         # Convert messages to the correct format for responses endpoint
         input_messages = []
 
@@ -304,86 +362,112 @@ class OpenAICompatibleProvider(ModelProvider):
 
         # For responses endpoint, we only add parameters that are explicitly supported
         # Remove unsupported chat completion parameters that may cause API errors
+        return completion_params
+
+    def _build_responses_response(self, response, model_name: str) -> ModelResponse:
+        """Convert a /v1/responses endpoint result into a ModelResponse."""
+        # Extract content and usage from responses endpoint format
+        # The response format is different for responses endpoint
+        content = ""
+        if hasattr(response, "output") and response.output:
+            if hasattr(response.output, "content") and response.output.content:
+                # Look for output_text in content
+                for content_item in response.output.content:
+                    if hasattr(content_item, "type") and content_item.type == "output_text":
+                        content = content_item.text
+                        break
+            elif hasattr(response.output, "text"):
+                content = response.output.text
+
+        # Try to extract usage information
+        usage = None
+        if hasattr(response, "usage"):
+            usage = self._extract_usage(response)
+        elif hasattr(response, "input_tokens") and hasattr(response, "output_tokens"):
+            # Safely extract token counts with None handling
+            input_tokens = getattr(response, "input_tokens", 0) or 0
+            output_tokens = getattr(response, "output_tokens", 0) or 0
+            usage = {
+                "input_tokens": input_tokens,
+                "output_tokens": output_tokens,
+                "total_tokens": input_tokens + output_tokens,
+            }
+
+        return ModelResponse(
+            content=content,
+            usage=usage,
+            model_name=model_name,
+            friendly_name=self.FRIENDLY_NAME,
+            provider=self.get_provider_type(),
+            metadata={
+                "model": getattr(response, "model", model_name),
+                "id": getattr(response, "id", ""),
+                "created": getattr(response, "created_at", 0),
+                "endpoint": "responses",
+            },
+        )
 
-        # Retry logic with progressive delays
-        max_retries = 4
-        retry_delays = [1, 3, 5, 8]
-        last_exception = None
+    def _generate_with_responses_endpoint(
+        self,
+        model_name: str,
+        messages: list,
+        temperature: float,
+        max_output_tokens: Optional[int] = None,
+        **kwargs,
+    ) -> ModelResponse:
+        """Generate content using the /v1/responses endpoint for o3-pro via OpenAI library."""
+        completion_params = self._prepare_responses_request(model_name, messages, max_output_tokens)
 
-        for attempt in range(max_retries):
-            try:  # Log the exact payload being sent for debugging
-                import json
+        def attempt():
+            # Log the exact payload being sent for debugging
+            import json
 
-                logging.info(
-                    f"o3-pro API request payload: {json.dumps(completion_params, indent=2, ensure_ascii=False)}"
-                )
+            logging.info(f"o3-pro API request payload: {json.dumps(completion_params, indent=2, ensure_ascii=False)}")
 
-                # Use OpenAI client's responses endpoint
-                response = self.client.responses.create(**completion_params)
-
-                # Extract content and usage from responses endpoint format
-                # The response format is different for responses endpoint
-                content = ""
-                if hasattr(response, "output") and response.output:
-                    if hasattr(response.output, "content") and response.output.content:
-                        # Look for output_text in content
-                        for content_item in response.output.content:
-                            if hasattr(content_item, "type") and content_item.type == "output_text":
-                                content = content_item.text
-                                break
-                    elif hasattr(response.output, "text"):
-                        content = response.output.text
-
-                # Try to extract usage information
-                usage = None
-                if hasattr(response, "usage"):
-                    usage = self._extract_usage(response)
-                elif hasattr(response, "input_tokens") and hasattr(response, "output_tokens"):
-                    # Safely extract token counts with None handling
-                    input_tokens = getattr(response, "input_tokens", 0) or 0
-                    output_tokens = getattr(response, "output_tokens", 0) or 0
-                    usage = {
-                        "input_tokens": input_tokens,
-                        "output_tokens": output_tokens,
-                        "total_tokens": input_tokens + output_tokens,
-                    }
-
-                return ModelResponse(
-                    content=content,
-                    usage=usage,
-                    model_name=model_name,
-                    friendly_name=self.FRIENDLY_NAME,
-                    provider=self.get_provider_type(),
-                    metadata={
-                        "model": getattr(response, "model", model_name),
-                        "id": getattr(response, "id", ""),
-                        "created": getattr(response, "created_at", 0),
-                        "endpoint": "responses",
-                    },
-                )
+            # Use OpenAI client's responses endpoint
+            response = self.client.responses.create(**completion_params)
+            return self._build_responses_response(response, model_name)
 
-            except Exception as e:
-                last_exception = e
-
-                # Check if this is a retryable error using structured error codes
-                is_retryable = self._is_error_retryable(e)
-
-                if is_retryable and attempt < max_retries - 1:
-                    delay = retry_delays[attempt]
-                    logging.warning(
-                        f"Retryable error for o3-pro responses endpoint, attempt {attempt + 1}/{max_retries}: {str(e)}. Retrying in {delay}s..."
-                    )
-                    time.sleep(delay)
-                else:
-                    break
-
-        # If we get here, all retries failed
-        actual_attempts = attempt + 1  # Convert from 0-based index to human-readable count
-        error_msg = f"o3-pro responses endpoint error after {actual_attempts} attempt{'s' if actual_attempts > 1 else ''}: {str(last_exception)}"
-        logging.error(error_msg)
-        raise RuntimeError(error_msg) from last_exception
+        try:
+            return call_with_retry(
+                attempt,
+                self._is_error_retryable,
+                description="Retryable error for o3-pro responses endpoint",
+                cooldown=self._get_retry_cooldown(),
+            )
+        except RetryExhaustedError as e:
+            error_msg = f"o3-pro responses endpoint error after {e.attempts_text}: {str(e.last_exception)}"
+            logging.error(error_msg)
+            raise RuntimeError(error_msg) from e.last_exception
 
-    def generate_content(
+    async def _agenerate_with_responses_endpoint(
+        self,
+        model_name: str,
+        messages: list,
+        temperature: float,
+        max_output_tokens: Optional[int] = None,
+        **kwargs,
+    ) -> ModelResponse:
+        """Async variant of _generate_with_responses_endpoint using AsyncOpenAI."""
+        completion_params = self._prepare_responses_request(model_name, messages, max_output_tokens)
+
+        async def attempt():
+            response = await self.async_client.responses.create(**completion_params)
+            return self._build_responses_response(response, model_name)
+
+        try:
+            return await acall_with_retry(
+                attempt,
+                self._is_error_retryable,
+                description="Retryable error for o3-pro responses endpoint",
+                cooldown=self._get_retry_cooldown(),
+            )
+        except RetryExhaustedError as e:
+            error_msg = f"o3-pro responses endpoint error after {e.attempts_text}: {str(e.last_exception)}"
+            logging.error(error_msg)
+            raise RuntimeError(error_msg) from e.last_exception
+
+    def _prepare_completion_request(
         self,
         prompt: str,
         model_name: str,
@@ -392,19 +476,14 @@ class OpenAICompatibleProvider(ModelProvider):
         max_output_tokens: Optional[int] = None,
         images: Optional[list[str]] = None,
         **kwargs,
-    ) -> ModelResponse:
-        """Generate content using the OpenAI-compatible API.
+    ) -> tuple[list, dict, str]:
+        """Validate the request and build chat completion parameters.
 
-        Args:
-            prompt: User prompt to send to the model
-            model_name: Name of the model to use
-            system_prompt: Optional system prompt for model behavior
-            temperature: Sampling temperature
-            max_output_tokens: Maximum tokens to generate
-            **kwargs: Additional provider-specific parameters
+        Shared by generate_content and agenerate_content so both paths send
+        identical payloads.
 
         Returns:
-            ModelResponse with generated content and metadata
+            Tuple of (messages, completion_params, resolved_model_name)
         """
         # Validate model name against allow-list
         if not self.validate_model_name(model_name):
@@ -480,6 +559,55 @@ class OpenAICompatibleProvider(ModelProvider):
                     continue  # Skip unsupported parameters for reasoning models
                 completion_params[key] = value
 
+        return messages, completion_params, resolved_model
+
+    def _build_chat_response(self, response, model_name: str) -> ModelResponse:
+        """Convert a chat completion result into a ModelResponse."""
+        # Extract content and usage
+        content = response.choices[0].message.content
+        usage = self._extract_usage(response)
+
+        return ModelResponse(
+            content=content,
+            usage=usage,
+            model_name=model_name,
+            friendly_name=self.FRIENDLY_NAME,
+            provider=self.get_provider_type(),
+            metadata={
+                "finish_reason": response.choices[0].finish_reason,
+                "model": response.model,  # Actual model used
+                "id": response.id,
+                "created": response.created,
+            },
+        )
+
+    def generate_content(
+        self,
+        prompt: str,
+        model_name: str,
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.7,
+        max_output_tokens: Optional[int] = None,
+        images: Optional[list[str]] = None,
+        **kwargs,
+    ) -> ModelResponse:
+        """Generate content using the OpenAI-compatible API.
+
+        Args:
+            prompt: User prompt to send to the model
+            model_name: Name of the model to use
+            system_prompt: Optional system prompt for model behavior
+            temperature: Sampling temperature
+            max_output_tokens: Maximum tokens to generate
+            **kwargs: Additional provider-specific parameters
+
+        Returns:
+            ModelResponse with generated content and metadata
+        """
+        messages, completion_params, resolved_model = self._prepare_completion_request(
+            prompt, model_name, system_prompt, temperature, max_output_tokens, images, **kwargs
+        )
+
         # Check if this is o3-pro and needs the responses endpoint
         if resolved_model == "o3-pro-2025-06-10":
             # This model requires the /v1/responses endpoint
@@ -492,67 +620,214 @@ class OpenAICompatibleProvider(ModelProvider):
                 **kwargs,
             )
 
-        # Retry logic with progressive delays
-        max_retries = 4  # Total of 4 attempts
-        retry_delays = [1, 3, 5, 8]  # Progressive delays: 1s, 3s, 5s, 8s
+        def attempt():
+            response = self.client.chat.completions.create(**completion_params)
+            return self._build_chat_response(response, model_name)
 
-        last_exception = None
+        try:
+            return call_with_retry(
+                attempt,
+                self._is_error_retryable,
+                description=f"{self.FRIENDLY_NAME} error for model {model_name}",
+                cooldown=self._get_retry_cooldown(),
+            )
+        except RetryExhaustedError as e:
+            error_msg = f"{self.FRIENDLY_NAME} API error for model {model_name} after {e.attempts_text}: {str(e.last_exception)}"
+            logging.error(error_msg)
+            raise RuntimeError(error_msg) from e.last_exception
 
-        for attempt in range(max_retries):
-            try:
-                # Generate completion
-                response = self.client.chat.completions.create(**completion_params)
-
-                # Extract content and usage
-                content = response.choices[0].message.content
-                usage = self._extract_usage(response)
-
-                return ModelResponse(
-                    content=content,
-                    usage=usage,
-                    model_name=model_name,
-                    friendly_name=self.FRIENDLY_NAME,
-                    provider=self.get_provider_type(),
-                    metadata={
-                        "finish_reason": response.choices[0].finish_reason,
-                        "model": response.model,  # Actual model used
-                        "id": response.id,
-                        "created": response.created,
-                    },
-                )
+    async def agenerate_content(
+        self,
+        prompt: str,
+        model_name: str,
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.7,
+        max_output_tokens: Optional[int] = None,
+        images: Optional[list[str]] = None,
+        **kwargs,
+    ) -> ModelResponse:
+        """Generate content natively on the event loop using AsyncOpenAI.
 
-            except Exception as e:
-                last_exception = e
+        Mirrors generate_content (same payload, retries and errors) without
+        tying up a thread for the duration of the request.
+        """
+        messages, completion_params, resolved_model = self._prepare_completion_request(
+            prompt, model_name, system_prompt, temperature, max_output_tokens, images, **kwargs
+        )
 
-                # Check if this is a retryable error using structured error codes
-                is_retryable = self._is_error_retryable(e)
+        # Check if this is o3-pro and needs the responses endpoint
+        if resolved_model == "o3-pro-2025-06-10":
+            return await self._agenerate_with_responses_endpoint(
+                model_name=resolved_model,
+                messages=messages,
+                temperature=temperature,
+                max_output_tokens=max_output_tokens,
+                **kwargs,
+            )
 
-                # If this is the last attempt or not retryable, give up
-                if attempt == max_retries - 1 or not is_retryable:
-                    break
+        async def attempt():
+            response = await self.async_client.chat.completions.create(**completion_params)
+            return self._build_chat_response(response, model_name)
 
-                # Get progressive delay
-                delay = retry_delays[attempt]
+        try:
+            return await acall_with_retry(
+                attempt,
+                self._is_error_retryable,
+                description=f"{self.FRIENDLY_NAME} error for model {model_name}",
+                cooldown=self._get_retry_cooldown(),
+            )
+        except RetryExhaustedError as e:
+            error_msg = f"{self.FRIENDLY_NAME} API error for model {model_name} after {e.attempts_text}: {str(e.last_exception)}"
+            logging.error(error_msg)
+            raise RuntimeError(error_msg) from e.last_exception
 
-                # Log retry attempt
-                logging.warning(
-                    f"{self.FRIENDLY_NAME} error for model {model_name}, attempt {attempt + 1}/{max_retries}: {str(e)}. Retrying in {delay}s..."
-                )
-                time.sleep(delay)
+    async def astream_content(
+        self,
+        prompt: str,
+        model_name: str,
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.7,
+        max_output_tokens: Optional[int] = None,
+        images: Optional[list[str]] = None,
+        **kwargs,
+    ) -> AsyncIterator[StreamChunk]:
+        """Stream a chat completion, yielding text deltas as they arrive.
+
+        Sends the same payload as agenerate_content with ``stream=True`` and
+        requests usage in the final chunk (where SUPPORTS_STREAM_USAGE). Errors
+        before the first delta are retried like agenerate_content; once text has
+        been yielded the stream cannot be replayed, so later errors are raised
+        immediately. Endpoints that reject the streaming request with a client
+        error are asked again without streaming and answered in a single delta.
+        """
+        kwargs.pop("stream", None)
+        messages, completion_params, resolved_model = self._prepare_completion_request(
+            prompt, model_name, system_prompt, temperature, max_output_tokens, images, **kwargs
+        )
+
+        # The responses endpoint is not streamed - deliver its result as a single delta
+        if resolved_model == "o3-pro-2025-06-10":
+            response = await self._agenerate_with_responses_endpoint(
+                model_name=resolved_model,
+                messages=messages,
+                temperature=temperature,
+                max_output_tokens=max_output_tokens,
+                **kwargs,
+            )
+            if response.content:
+                yield StreamChunk(text=response.content)
+            yield StreamChunk(response=response)
+            return
+
+        completion_params["stream"] = True
+        if self.SUPPORTS_STREAM_USAGE:
+            completion_params["stream_options"] = {"include_usage": True}
+
+        def has_text(chunk) -> bool:
+            return bool(chunk.choices and chunk.choices[0].delta and chunk.choices[0].delta.content)
+
+        attempts = 0
+
+        async def open_stream():
+            # Opening the stream and reading up to the first delta is one retryable attempt
+            nonlocal attempts
+            attempts += 1
+            stream = await self.async_client.chat.completions.create(**completion_params)
+            iterator = stream.__aiter__()
+            return iterator, await prefetch_until(iterator, has_text)
+
+        def failure(attempts_text: str, error: Exception) -> RuntimeError:
+            error_msg = (
+                f"{self.FRIENDLY_NAME} API streaming error for model {model_name} after {attempts_text}: {str(error)}"
+            )
+            logging.error(error_msg)
+            return RuntimeError(error_msg)
+
+        try:
+            iterator, prefetched = await acall_with_retry(
+                open_stream,
+                self._is_error_retryable,
+                description=f"{self.FRIENDLY_NAME} error for model {model_name}",
+                cooldown=self._get_retry_cooldown(),
+            )
+        except RetryExhaustedError as e:
+            if not self._is_streaming_rejected(e.last_exception):
+                raise failure(e.attempts_text, e.last_exception) from e.last_exception
+            logging.warning(
+                f"{self.FRIENDLY_NAME} rejected the streaming request for model {model_name} "
+                f"({e.last_exception}), retrying without streaming"
+            )
+            response = await self.agenerate_content(
+                prompt=prompt,
+                model_name=model_name,
+                system_prompt=system_prompt,
+                temperature=temperature,
+                max_output_tokens=max_output_tokens,
+                images=images,
+                **kwargs,
+            )
+            if response.content:
+                yield StreamChunk(text=response.content)
+            yield StreamChunk(response=response)
+            return
 
-        # If we get here, all retries failed
-        actual_attempts = attempt + 1  # Convert from 0-based index to human-readable count
-        error_msg = f"{self.FRIENDLY_NAME} API error for model {model_name} after {actual_attempts} attempt{'s' if actual_attempts > 1 else ''}: {str(last_exception)}"
-        logging.error(error_msg)
-        raise RuntimeError(error_msg) from last_exception
+        parts = []
+        usage = {}
+        finish_reason = None
+        metadata = {}
+
+        def consume(chunk) -> Optional[str]:
+            nonlocal usage, finish_reason, metadata
+            metadata = {"model": chunk.model, "id": chunk.id, "created": chunk.created}
+            if getattr(chunk, "usage", None):
+                usage = self._extract_usage(chunk)
+            if not chunk.choices:
+                return None
+            choice = chunk.choices[0]
+            if choice.finish_reason:
+                finish_reason = choice.finish_reason
+            return choice.delta.content if choice.delta else None
+
+        try:
+            for chunk in prefetched:
+                delta = consume(chunk)
+                if delta:
+                    parts.append(delta)
+                    yield StreamChunk(text=delta)
+            # Partial output has already been delivered, so errors from here on cannot be retried
+            async for chunk in iterator:
+                delta = consume(chunk)
+                if delta:
+                    parts.append(delta)
+                    yield StreamChunk(text=delta)
+        except Exception as e:
+            attempts_text = f"{attempts} attempt{'s' if attempts > 1 else ''}"
+            raise failure(attempts_text, e) from e
+
+        yield StreamChunk(
+            response=ModelResponse(
+                content="".join(parts),
+                usage=usage,
+                model_name=model_name,
+                friendly_name=self.FRIENDLY_NAME,
+                provider=self.get_provider_type(),
+                metadata={"finish_reason": finish_reason, **metadata, "streamed": True},
+            )
+        )
+
+    @staticmethod
+    def _is_streaming_rejected(error: Exception) -> bool:
+        """Whether a streaming request failed with a client error that a non-streaming request may avoid."""
+        status_code = get_status_code(error)
+        return status_code is not None and 400 <= status_code < 500 and status_code not in (401, 403, 408, 429)
 
     def count_tokens(self, text: str, model_name: str) -> int:
         """Count tokens for the given text.
 
         Uses a layered approach:
         1. Try provider-specific token counting endpoint
-        2. Try tiktoken for known model families
-        3. Fall back to character-based estimation
+        2. Fall back to the shared token counter, which uses the model family's
+           tiktoken encoding when available and a character-based estimate otherwise
 
         Args:
             text: Text to count tokens for
@@ -568,31 +843,10 @@ class OpenAICompatibleProvider(ModelProvider):
             except Exception as e:
                 logging.debug(f"Remote token counting failed: {e}")
 
-        # 2. Try tiktoken for known models
-        try:
-            import tiktoken
+        # 2. Shared token counter (tokenizers loaded once, counts cached by content)
+        from utils.token_utils import estimate_tokens
 
-            # Try to get encoding for the specific model
-            try:
-                encoding = tiktoken.encoding_for_model(model_name)
-            except KeyError:
-                # Try common encodings based on model patterns
-                if "gpt-4" in model_name or "gpt-3.5" in model_name:
-                    encoding = tiktoken.get_encoding("cl100k_base")
-                else:
-                    encoding = tiktoken.get_encoding("cl100k_base")  # Default
-
-            return len(encoding.encode(text))
-
-        except (ImportError, Exception) as e:
-            logging.debug(f"Tiktoken not available or failed: {e}")
-
-        # 3. Fall back to character-based estimation
-        logging.warning(
-            f"No specific tokenizer available for '{model_name}'. "
-            "Using character-based estimation (~4 chars per token)."
-        )
-        return len(text) // 4
+        return estimate_tokens(text, self._resolve_model_name(model_name))
 
     def validate_parameters(self, model_name: str, temperature: float, **kwargs) -> None:
         """Validate model parameters.
@@ -638,6 +892,16 @@ class OpenAICompatibleProvider(ModelProvider):
             usage["output_tokens"] = getattr(response.usage, "completion_tokens", 0) or 0
             usage["total_tokens"] = getattr(response.usage, "total_tokens", 0) or 0
 
+            # Input tokens served from the provider's prompt cache (OpenAI, and OpenRouter
+            # for the models it caches), reported only when the provider reports them.
+            # The responses endpoint names the details input_tokens_details.
+            details = getattr(response.usage, "prompt_tokens_details", None) or getattr(
+                response.usage, "input_tokens_details", None
+            )
+            cached_tokens = getattr(details, "cached_tokens", None) if details else None
+            if isinstance(cached_tokens, int):
+                usage["cached_input_tokens"] = cached_tokens
+
         return usage
 
     @abstractmethod
@@ -706,51 +970,53 @@ class OpenAICompatibleProvider(ModelProvider):
             True if error should be retried, False otherwise
         """
         error_str = str(error).lower()
+        status_code = get_status_code(error)
 
         # Check for 429 errors first - these need special handling
-        if "429" in error_str:
-            # Try to extract structured error information
-            error_type = None
-            error_code = None
-
-            # Parse structured error from OpenAI API response
-            # Format: "Error code: 429 - {'error': {'type': 'tokens', 'code': 'rate_limit_exceeded', ...}}"
-            try:
-                import ast
-                import json
-                import re
-
-                # Extract JSON part from error string using regex
-                # Look for pattern: {...} (from first { to last })
-                json_match = re.search(r"\{.*\}", str(error))
-                if json_match:
-                    json_like_str = json_match.group(0)
-
-                    # First try: parse as Python literal (handles single quotes safely)
-                    try:
-                        error_data = ast.literal_eval(json_like_str)
-                    except (ValueError, SyntaxError):
-                        # Fallback: try JSON parsing with simple quote replacement
-                        # (for cases where it's already valid JSON or simple replacements work)
-                        json_str = json_like_str.replace("'", '"')
-                        error_data = json.loads(json_str)
-
-                    if "error" in error_data:
-                        error_info = error_data["error"]
-                        error_type = error_info.get("type")
-                        error_code = error_info.get("code")
-
-            except (json.JSONDecodeError, ValueError, SyntaxError, AttributeError):
-                # Fall back to checking hasattr for OpenAI SDK exception objects
-                if hasattr(error, "response") and hasattr(error.response, "json"):
-                    try:
-                        response_data = error.response.json()
-                        if "error" in response_data:
-                            error_info = response_data["error"]
+        if status_code == 429 or "429" in error_str:
+            # OpenAI SDK exceptions expose the parsed error body directly
+            error_type = getattr(error, "type", None) if status_code is not None else None
+            error_code = getattr(error, "code", None) if status_code is not None else None
+
+            if error_type is None and error_code is None:
+                # Parse structured error from OpenAI API response
+                # Format: "Error code: 429 - {'error': {'type': 'tokens', 'code': 'rate_limit_exceeded', ...}}"
+                try:
+                    import ast
+                    import json
+                    import re
+
+                    # Extract JSON part from error string using regex
+                    # Look for pattern: {...} (from first { to last })
+                    json_match = re.search(r"\{.*\}", str(error))
+                    if json_match:
+                        json_like_str = json_match.group(0)
+
+                        # First try: parse as Python literal (handles single quotes safely)
+                        try:
+                            error_data = ast.literal_eval(json_like_str)
+                        except (ValueError, SyntaxError):
+                            # Fallback: try JSON parsing with simple quote replacement
+                            # (for cases where it's already valid JSON or simple replacements work)
+                            json_str = json_like_str.replace("'", '"')
+                            error_data = json.loads(json_str)
+
+                        if "error" in error_data:
+                            error_info = error_data["error"]
                             error_type = error_info.get("type")
                             error_code = error_info.get("code")
-                    except Exception:
-                        pass
+
+                except (json.JSONDecodeError, ValueError, SyntaxError, AttributeError):
+                    # Fall back to checking hasattr for OpenAI SDK exception objects
+                    if hasattr(error, "response") and hasattr(error.response, "json"):
+                        try:
+                            response_data = error.response.json()
+                            if "error" in response_data:
+                                error_info = response_data["error"]
+                                error_type = error_info.get("type")
+                                error_code = error_info.get("code")
+                        except Exception:
+                            pass
 
             # Determine if 429 is retryable based on structured error codes
             if error_type == "tokens":
@@ -766,7 +1032,11 @@ class OpenAICompatibleProvider(ModelProvider):
                 logging.debug(f"Retryable 429: rate limiting (type={error_type}, code={error_code})")
                 return True
 
-        # For non-429 errors, check if they're retryable
+        # Errors with an HTTP status are classified by the status alone
+        if status_code is not None:
+            return status_code in RETRYABLE_STATUS_CODES
+
+        # For other errors (connection failures, timeouts), check the message
         retryable_indicators = [
             "timeout",
             "connection",
@@ -23,6 +23,12 @@ class OpenRouterProvider(OpenAICompatibleProvider):
 
     FRIENDLY_NAME = "OpenRouter"
 
+    # Streaming is always disabled for OpenRouter (see generate_content)
+    SUPPORTS_NATIVE_STREAMING = False
+
+    # Catch-all: any model name may be served by OpenRouter
+    ACCEPTS_UNLISTED_MODELS = True
+
     # Custom headers required by OpenRouter
     DEFAULT_HEADERS = {
         "HTTP-Referer": os.getenv("OPENROUTER_REFERER", "https://github.com/BeehiveInnovations/zen-mcp-server"),
@@ -193,6 +199,32 @@ class OpenRouterProvider(OpenAICompatibleProvider):
             **kwargs,
         )
 
+    async def agenerate_content(
+        self,
+        prompt: str,
+        model_name: str,
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.7,
+        max_output_tokens: Optional[int] = None,
+        **kwargs,
+    ) -> ModelResponse:
+        """Async variant of generate_content with model alias resolution."""
+        # Resolve model alias before making API call
+        resolved_model_name = self._resolve_model_name(model_name)
+
+        # Always disable streaming for OpenRouter
+        if "stream" not in kwargs:
+            kwargs["stream"] = False
+
+        return await super().agenerate_content(
+            prompt=prompt,
+            model_name=resolved_model_name,
+            system_prompt=system_prompt,
+            temperature=temperature,
+            max_output_tokens=max_output_tokens,
+            **kwargs,
+        )
+
     def supports_thinking_mode(self, model_name: str) -> bool:
         """Check if the model supports extended thinking mode.
 
@@ -0,0 +1,316 @@
+"""
+Client-side rate limiting for provider calls
+
+Several MCP sessions sharing one API key easily exceed the provider's
+requests-per-minute (RPM) or tokens-per-minute (TPM) quota, and the resulting
+429s are only handled after the fact by the retry engine. This module
+throttles calls before they are sent:
+
+- Token buckets for requests and tokens, per provider and optionally per model
+- The token cost of a call is estimated up front from the prompt with the
+  provider's count_tokens() and corrected with the reported usage afterwards;
+  failed calls are refunded their estimate
+- Callers wait in a first-come, first-served queue per limit (one per provider
+  and one per model limit) instead of failing; a call larger than a whole
+  bucket is admitted once it is full
+- get_stats() exposes limits, remaining budget and queue depth for monitoring
+
+Limits are disabled unless configured:
+- <PROVIDER>_RATE_LIMIT_RPM / <PROVIDER>_RATE_LIMIT_TPM: provider-wide budgets,
+  e.g. OPENAI_RATE_LIMIT_RPM=500
+- <PROVIDER>_MODEL_RATE_LIMITS: per-model budgets as model:rpm/tpm entries where
+  either value may be left empty, e.g. OPENAI_MODEL_RATE_LIMITS=o3:50/30000,o4-mini:200/
+"""
+
+import asyncio
+import contextlib
+import logging
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    """Requests and tokens allowed per minute (None means unlimited)"""
+
+    rpm: Optional[int] = None
+    tpm: Optional[int] = None
+
+
+class TokenBucket:
+    """Continuously refilling budget of `per_minute` units per minute"""
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self._available = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._available = min(self.capacity, self._available + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def available(self) -> float:
+        self._refill()
+        return self._available
+
+    def delay_for(self, amount: float) -> float:
+        """Seconds until amount (capped at the bucket capacity) is available."""
+        missing = min(amount, self.capacity) - self.available()
+        return max(0.0, missing / self.rate)
+
+    def consume(self, amount: float) -> None:
+        """Take amount from the bucket; oversized calls leave it in debt."""
+        self._refill()
+        self._available -= amount
+
+    def refund(self, amount: float) -> None:
+        """Return over-estimated units (negative amount charges an under-estimate)."""
+        self._refill()
+        self._available = min(self.capacity, self._available + amount)
+
+
+def _parse_per_minute(value: str, name: str) -> Optional[int]:
+    value = value.strip()
+    if not value:
+        return None
+    try:
+        number = int(value)
+        if number <= 0:
+            raise ValueError(value)
+        return number
+    except ValueError:
+        logger.warning(f"Invalid {name} value ('{value}'), ignoring")
+        return None
+
+
+def load_rate_limits(provider_key: str) -> tuple[Optional[RateLimit], dict[str, RateLimit]]:
+    """
+    Read the configured limits for a provider from the environment.
+
+    Returns:
+        Tuple of (provider-wide limit or None, {lowercase model name: limit})
+    """
+    prefix = provider_key.upper()
+    rpm_name, tpm_name = f"{prefix}_RATE_LIMIT_RPM", f"{prefix}_RATE_LIMIT_TPM"
+    provider_limit = RateLimit(
+        rpm=_parse_per_minute(os.getenv(rpm_name, ""), rpm_name),
+        tpm=_parse_per_minute(os.getenv(tpm_name, ""), tpm_name),
+    )
+    if provider_limit.rpm is None and provider_limit.tpm is None:
+        provider_limit = None
+
+    models_name = f"{prefix}_MODEL_RATE_LIMITS"
+    model_limits = {}
+    for entry in os.getenv(models_name, "").split(","):
+        if not entry.strip():
+            continue
+        model, _, budgets = entry.rpartition(":")
+        rpm, _, tpm = budgets.partition("/")
+        limit = RateLimit(rpm=_parse_per_minute(rpm, models_name), tpm=_parse_per_minute(tpm, models_name))
+        if not model.strip() or (limit.rpm is None and limit.tpm is None):
+            logger.warning(f"Invalid {models_name} entry ('{entry.strip()}'), expected model:rpm/tpm")
+            continue
+        model_limits[model.strip().lower()] = limit
+    return provider_limit, model_limits
+
+
+@dataclass
+class RateLimitQueueStats:
+    """Running counters for one provider/model queue"""
+
+    waiting: int = 0  # Calls currently waiting for budget
+    max_queue_depth: int = 0  # Highest observed number of waiting calls
+    admitted: int = 0  # Calls let through
+    throttled: int = 0  # Calls that had to wait before being admitted
+    total_wait_seconds: float = 0.0  # Time spent waiting for budget
+
+
+class RateLimitReservation(NamedTuple):
+    """Token budget taken for one admitted call, settled once usage is known"""
+
+    token_buckets: tuple[TokenBucket, ...]
+    estimated_tokens: int
+
+
+class RateLimiter:
+    """Fair, per provider/model RPM and TPM limiter for async provider calls"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._limits: dict[str, tuple[Optional[RateLimit], dict[str, RateLimit]]] = {}
+        # (provider_key, model or None for provider-wide, "requests" | "tokens") -> bucket
+        self._buckets: dict[tuple[str, Optional[str], str], TokenBucket] = {}
+        # (provider_key, model or None for provider-wide) -> queue lock for calls under that limit.
+        # Queue locks are bound to the event loop that created them
+        self._queues: dict[tuple[str, Optional[str]], tuple[asyncio.AbstractEventLoop, asyncio.Lock]] = {}
+        self._stats: dict[tuple[str, str], RateLimitQueueStats] = {}
+
+    def _get_limits(self, provider_key: str) -> tuple[Optional[RateLimit], dict[str, RateLimit]]:
+        with self._lock:
+            limits = self._limits.get(provider_key)
+            if limits is None:
+                limits = self._limits[provider_key] = load_rate_limits(provider_key)
+                if limits[0] or limits[1]:
+                    logger.info(f"Rate limits for {provider_key}: provider={limits[0]}, models={limits[1]}")
+            return limits
+
+    def get_limits(self, provider_key: str, model_name: Optional[str]) -> list[tuple[Optional[str], RateLimit]]:
+        """Return the (scope, limit) pairs that apply to a call; scope is the model or None."""
+        provider_limit, model_limits = self._get_limits(provider_key)
+        applicable = []
+        if provider_limit is not None:
+            applicable.append((None, provider_limit))
+        model = (model_name or "").lower()
+        if model in model_limits:
+            applicable.append((model, model_limits[model]))
+        return applicable
+
+    def needs_token_estimate(self, provider_key: str, model_name: Optional[str]) -> bool:
+        """Whether any TPM limit applies, i.e. whether estimating the prompt's tokens is worthwhile."""
+        return any(limit.tpm is not None for _, limit in self.get_limits(provider_key, model_name))
+
+    def _get_bucket(self, provider_key: str, scope: Optional[str], kind: str, per_minute: int) -> TokenBucket:
+        key = (provider_key, scope, kind)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket(per_minute)
+        return bucket
+
+    def _get_queue(self, queue_key: tuple[str, Optional[str]]) -> asyncio.Lock:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            entry = self._queues.get(queue_key)
+            if entry is None or entry[0] is not loop:
+                entry = self._queues[queue_key] = (loop, asyncio.Lock())
+            return entry[1]
+
+    async def acquire(
+        self, provider_key: str, model_name: Optional[str], tokens: int = 0
+    ) -> Optional[RateLimitReservation]:
+        """
+        Wait until the call fits within every applicable budget, then take it.
+
+        Each limit has its own first-come, first-served queue: a call waits in its
+        model's queue until the model budget has room, then in the provider-wide
+        queue, so calls for different models sharing a provider limit are admitted
+        in arrival order too.
+
+        Args:
+            provider_key: Provider identifier (e.g. "openai")
+            model_name: Model the call is made against
+            tokens: Estimated tokens for the call (only used by TPM limits)
+
+        Returns:
+            Reservation to pass to settle(), or None when no limit applies
+        """
+        limits = self.get_limits(provider_key, model_name)
+        if not limits:
+            return None
+
+        # Most specific scope first: holding a model queue never blocks other models
+        scoped_charges = []
+        token_buckets = []
+        with self._lock:
+            for scope, limit in sorted(limits, key=lambda item: item[0] is None):
+                charges = []
+                if limit.rpm is not None:
+                    charges.append((self._get_bucket(provider_key, scope, "requests", limit.rpm), 1))
+                if limit.tpm is not None:
+                    token_buckets.append(self._get_bucket(provider_key, scope, "tokens", limit.tpm))
+                    charges.append((token_buckets[-1], tokens))
+                scoped_charges.append((scope, charges))
+
+        stats_key = (provider_key, (model_name or "").lower())
+        queued_at = time.monotonic()
+        with self._lock:
+            stats = self._stats.setdefault(stats_key, RateLimitQueueStats())
+            stats.waiting += 1
+            stats.max_queue_depth = max(stats.max_queue_depth, stats.waiting)
+
+        throttled = False
+        try:
+            async with contextlib.AsyncExitStack() as queues:
+                held_charges = []
+                for index, (scope, charges) in enumerate(scoped_charges):
+                    await queues.enter_async_context(self._get_queue((provider_key, scope)))
+                    held_charges.extend(charges)
+                    # Budgets of the queues already held can only be taken by this call
+                    consume = index == len(scoped_charges) - 1
+                    while True:
+                        with self._lock:
+                            delay = max(bucket.delay_for(amount) for bucket, amount in held_charges)
+                            if delay <= 0:
+                                if consume:
+                                    for bucket, amount in held_charges:
+                                        bucket.consume(amount)
+                                break
+                        if not throttled:
+                            logger.debug(f"[RATE_LIMIT] {provider_key}/{model_name} over budget, waiting {delay:.2f}s")
+                        throttled = True
+                        await asyncio.sleep(delay)
+        finally:
+            with self._lock:
+                stats.waiting -= 1
+
+        with self._lock:
+            stats.admitted += 1
+            stats.throttled += int(throttled)
+            stats.total_wait_seconds += time.monotonic() - queued_at
+
+        return RateLimitReservation(token_buckets=tuple(token_buckets), estimated_tokens=tokens)
+
+    def settle(self, reservation: Optional[RateLimitReservation], actual_tokens: Optional[int]) -> None:
+        """Correct the token buckets once the call's real usage is known (0 refunds a failed call)."""
+        if reservation is None or actual_tokens is None or not reservation.token_buckets:
+            return
+        with self._lock:
+            for bucket in reservation.token_buckets:
+                bucket.refund(reservation.estimated_tokens - actual_tokens)
+
+    def get_stats(self) -> dict[str, dict[str, Any]]:
+        """
+        Get a snapshot of configured limits, remaining budget and queue state.
+
+        Returns:
+            Dict keyed by "provider" or "provider/model" for every configured limit
+            and every queue that has seen traffic
+        """
+        with self._lock:
+            snapshot: dict[str, dict[str, Any]] = {}
+            for (provider_key, scope, kind), bucket in self._buckets.items():
+                entry = snapshot.setdefault(f"{provider_key}/{scope}" if scope else provider_key, {})
+                entry[f"{kind}_per_minute"] = int(bucket.capacity)
+                entry[f"{kind}_available"] = int(bucket.available())
+            for (provider_key, model), stats in self._stats.items():
+                snapshot.setdefault(f"{provider_key}/{model}" if model else provider_key, {}).update(asdict(stats))
+            return snapshot
+
+    def reset(self) -> None:
+        """Forget cached configuration, budgets and statistics (re-reads the environment)."""
+        with self._lock:
+            self._limits.clear()
+            self._buckets.clear()
+            self._queues.clear()
+            self._stats.clear()
+
+
+# Global singleton instance
+_limiter_instance: Optional[RateLimiter] = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Get the global rate limiter instance (singleton pattern)"""
+    global _limiter_instance
+    if _limiter_instance is None:
+        with _limiter_lock:
+            if _limiter_instance is None:
+                _limiter_instance = RateLimiter()
+    return _limiter_instance
@@ -1,20 +1,68 @@
 """Model provider registry for managing available providers."""
 
+import importlib
 import logging
 import os
+import threading
+import time
 from typing import TYPE_CHECKING, Optional
 
+from utils.profiling import record_provider_init
+
 from .base import ModelProvider, ProviderType
+from .model_index import ModelIndex
 
 if TYPE_CHECKING:
     from tools.models import ToolModelCategory
 
+# Quality tiers for latency-aware auto mode: models of a tier are considered
+# interchangeable for the category, so auto mode may pick whichever has been
+# fastest recently. Override per category with AUTO_MODE_<CATEGORY>_TIER, e.g.
+# AUTO_MODE_FAST_RESPONSE_TIER=o4-mini,gemini-2.5-flash (empty disables it).
+DEFAULT_LATENCY_TIERS = {
+    "fast_response": ["o4-mini", "o3-mini", "grok-3-fast", "gemini-2.5-flash", "gemini-2.0-flash"],
+}
+
+# A model needs this many recent successful calls before its latency is trusted
+LATENCY_MIN_SAMPLES = 5
+
+# Models failing more often than this are not picked for being fast
+LATENCY_MAX_ERROR_RATE = 0.25
+
+
+def get_latency_tier(tool_category: Optional["ToolModelCategory"]) -> list[str]:
+    """Return the models auto mode may choose between by latency for a tool category."""
+    if tool_category is None:
+        return []
+    env_value = os.getenv(f"AUTO_MODE_{tool_category.value.upper()}_TIER")
+    if env_value is None:
+        return DEFAULT_LATENCY_TIERS.get(tool_category.value, [])
+    return [model.strip().lower() for model in env_value.split(",") if model.strip()]
+
+
+# Provider priority order for routing model names:
+# native APIs first, then custom endpoints, then catch-all providers
+PROVIDER_PRIORITY_ORDER = [
+    ProviderType.GOOGLE,  # Direct Gemini access
+    ProviderType.OPENAI,  # Direct OpenAI access
+    ProviderType.XAI,  # Direct X.AI GROK access
+    ProviderType.DIAL,  # DIAL unified API access
+    ProviderType.CUSTOM,  # Local/self-hosted models
+    ProviderType.OPENROUTER,  # Catch-all for cloud models
+]
+
 
 class ModelProviderRegistry:
     """Registry for managing model providers."""
 
     _instance = None
 
+    # Model name resolution index (see providers/model_index.py)
+    _model_index: Optional[ModelIndex] = None
+    _model_index_generation = 0
+    _model_index_builds = 0
+    _model_index_lock = threading.RLock()
+
     def __new__(cls):
         """Singleton pattern for registry."""
         if cls._instance is None:
@@ -63,6 +111,7 @@ class ModelProviderRegistry:
 
         # Get provider class or factory function
         provider_class = instance._providers[provider_type]
+        started = time.perf_counter()
 
         # For custom providers, handle special initialization requirements
         if provider_type == ProviderType.CUSTOM:
@@ -90,6 +139,7 @@ class ModelProviderRegistry:
 
         # Cache the instance
         instance._initialized_providers[provider_type] = provider
+        record_provider_init(provider_type.value, time.perf_counter() - started)
 
         return provider
 
@@ -102,6 +152,9 @@ class ModelProviderRegistry:
         2. CUSTOM - For local/private models with specific endpoints
         3. OPENROUTER - Catch-all for cloud models via unified API
 
+        Providers whose circuit breaker is open (see providers/health.py) are
+        skipped in favour of the next provider that can serve the model.
+
         Args:
             model_name: Name of the model (e.g., "gemini-2.5-flash", "o3-mini")
 
@@ -110,38 +163,75 @@ class ModelProviderRegistry:
         """
         logging.debug(f"get_provider_for_model called with model_name='{model_name}'")
 
-        # Define explicit provider priority order
-        # Native APIs first, then custom endpoints, then catch-all providers
-        PROVIDER_PRIORITY_ORDER = [
-            ProviderType.GOOGLE,  # Direct Gemini access
-            ProviderType.OPENAI,  # Direct OpenAI access
-            ProviderType.XAI,  # Direct X.AI GROK access
-            ProviderType.DIAL,  # DIAL unified API access
-            ProviderType.CUSTOM,  # Local/self-hosted models
-            ProviderType.OPENROUTER,  # Catch-all for cloud models
-        ]
-
-        # Check providers in priority order
-        instance = cls()
-        logging.debug(f"Registry instance: {instance}")
-        logging.debug(f"Available providers in registry: {list(instance._providers.keys())}")
-
-        for provider_type in PROVIDER_PRIORITY_ORDER:
-            if provider_type in instance._providers:
-                logging.debug(f"Found {provider_type} in registry")
-                # Get or create provider instance
-                provider = cls.get_provider(provider_type)
-                if provider and provider.validate_model_name(model_name):
-                    logging.debug(f"{provider_type} validates model {model_name}")
-                    return provider
-                else:
-                    logging.debug(f"{provider_type} does not validate model {model_name}")
-            else:
-                logging.debug(f"{provider_type} not found in registry")
+        from .health import get_provider_health
+
+        health = get_provider_health()
+        unhealthy_provider = None
+
+        for provider_type, provider in cls.get_model_index().iter_candidates(model_name):
+            # Skip providers whose circuit is open if another provider can serve the model
+            if not health.is_available(provider_type.value):
+                logging.debug(f"{provider_type} validates model {model_name} but its circuit is open")
+                unhealthy_provider = unhealthy_provider or provider
+                continue
+            logging.debug(f"{provider_type} validates model {model_name}")
+            return provider
+
+        if unhealthy_provider is not None:
+            # Every provider for this model is failing - use the preferred one rather than none at all
+            logging.debug(f"All providers for model {model_name} have open circuits, using highest priority")
+            return unhealthy_provider
 
         logging.debug(f"No provider found for model {model_name}")
         return None
 
+    @classmethod
+    def get_model_index(cls) -> ModelIndex:
+        """Get the model name resolution index, rebuilding it if the registry state changed.
+
+        The index is keyed on the registered provider classes, the initialized
+        provider instances, the restriction service and an explicit generation
+        counter (see invalidate_model_index), so it is rebuilt whenever any of
+        them change and otherwise reused.
+
+        Returns:
+            Immutable ModelIndex for the current providers and restrictions
+        """
+        from utils.model_restrictions import get_restriction_service
+
+        instance = cls()
+        providers = []
+        for provider_type in list(instance._providers):
+            provider = cls.get_provider(provider_type)
+            if provider is not None:
+                providers.append((provider_type, provider))
+        signature = (
+            tuple(instance._providers.items()),
+            tuple(providers),
+            get_restriction_service(),
+            cls._model_index_generation,
+        )
+
+        index = cls._model_index
+        if index is not None and index.signature == signature:
+            return index
+
+        with cls._model_index_lock:
+            index = cls._model_index
+            if index is None or index.signature != signature:
+                cls._model_index_builds += 1
+                index = ModelIndex(providers, PROVIDER_PRIORITY_ORDER, signature, cls._model_index_builds)
+                cls._model_index = index
+                logging.debug(f"Built model index for providers: {[p.value for p, _ in providers]}")
+            return index
+
+    @classmethod
+    def invalidate_model_index(cls) -> None:
+        """Force the model index to be rebuilt on next use (e.g. after configuration was reloaded)."""
+        with cls._model_index_lock:
+            cls._model_index_generation += 1
+            cls._model_index = None
+
     @classmethod
     def get_available_providers(cls) -> list[ProviderType]:
         """Get list of registered provider types."""
@@ -158,45 +248,11 @@ class ModelProviderRegistry:
         Returns:
             Dict mapping model names to provider types
         """
-        # Import here to avoid circular imports
-        from utils.model_restrictions import get_restriction_service
-
-        restriction_service = get_restriction_service() if respect_restrictions else None
-        models: dict[str, ProviderType] = {}
-        instance = cls()
-
-        for provider_type in instance._providers:
-            provider = cls.get_provider(provider_type)
-            if not provider:
-                continue
-
-            try:
-                available = provider.list_models(respect_restrictions=respect_restrictions)
-            except NotImplementedError:
-                logging.warning("Provider %s does not implement list_models", provider_type)
-                continue
-
-            for model_name in available:
-                # =====================================================================================
-                # CRITICAL: Prevent double restriction filtering (Fixed Issue #98)
-                # =====================================================================================
-                # Previously, both the provider AND registry applied restrictions, causing
-                # double-filtering that resulted in "no models available" errors.
-                #
-                # Logic: If respect_restrictions=True, provider already filtered models,
-                # so registry should NOT filter them again.
-                # TEST COVERAGE: tests/test_provider_routing_bugs.py::TestOpenRouterAliasRestrictions
-                # =====================================================================================
-                if (
-                    restriction_service
-                    and not respect_restrictions  # Only filter if provider didn't already filter
-                    and not restriction_service.is_allowed(provider_type, model_name)
-                ):
-                    logging.debug("Model %s filtered by restrictions", model_name)
-                    continue
-                models[model_name] = provider_type
-
-        return models
+        # Provider listings are captured in the model index. When respect_restrictions=True
+        # providers already filtered their listings, so no second restriction pass is applied
+        # (double filtering caused "no models available" errors, see Issue #98 and
+        # tests/test_provider_routing_bugs.py::TestOpenRouterAliasRestrictions)
+        return cls.get_model_index().get_available_models(respect_restrictions)
 
     @classmethod
     def get_available_model_names(cls, provider_type: Optional[ProviderType] = None) -> list[str]:
@@ -375,6 +431,65 @@ class ModelProviderRegistry:
             # Return a reasonable default for backward compatibility
             return "gemini-2.5-flash"
 
+    @classmethod
+    def get_auto_mode_model(cls, tool_category: Optional["ToolModelCategory"] = None) -> str:
+        """Resolve auto mode to a model, preferring the fastest model of the category's quality tier.
+
+        Starts from get_preferred_fallback_model(). When that model belongs to the
+        category's latency tier (see get_latency_tier), the allowed tier models with
+        enough recent calls, an acceptable error rate and a closed circuit are ranked
+        by observed p50 (then p95) latency and the fastest one wins. Until the
+        preferred model itself has been measured it is kept, so routing only moves
+        away from it on evidence.
+
+        Args:
+            tool_category: Category of the tool being called
+
+        Returns:
+            Model name string for auto mode
+        """
+        from .health import get_provider_health
+
+        preferred = cls.get_preferred_fallback_model(tool_category)
+        tier = get_latency_tier(tool_category)
+        if preferred.lower() not in tier:
+            return preferred
+
+        health = get_provider_health()
+        available_models = {name.lower(): provider for name, provider in cls.get_available_models().items()}
+
+        def rank(model_name: str) -> Optional[tuple[float, float]]:
+            provider_type = available_models.get(model_name)
+            if provider_type is None or not health.is_available(provider_type.value):
+                return None
+            provider = cls.get_provider(provider_type)
+            canonical_name = provider._resolve_model_name(model_name) if provider else model_name
+            stats = health.get_model_stats(provider_type.value, canonical_name)
+            if (
+                not stats
+                or stats["window_samples"] < LATENCY_MIN_SAMPLES
+                or stats["error_rate"] > LATENCY_MAX_ERROR_RATE
+            ):
+                return None
+            return (stats["p50_seconds"], stats["p95_seconds"])
+
+        preferred_rank = rank(preferred.lower())
+        if preferred_rank is None:
+            return preferred
+
+        best_model, best_rank = preferred, preferred_rank
+        for model_name in tier:
+            model_rank = rank(model_name)
+            if model_rank is not None and model_rank < best_rank:
+                best_model, best_rank = model_name, model_rank
+
+        if best_model != preferred:
+            logging.info(
+                f"Auto mode: {best_model} (p50 {best_rank[0]:.1f}s) is currently faster than "
+                f"{preferred} (p50 {preferred_rank[0]:.1f}s)"
+            )
+        return best_model
+
     @classmethod
     def _find_extended_thinking_model(cls) -> Optional[str]:
         """Find a model suitable for extended reasoning from custom/openrouter providers.
@@ -435,6 +550,22 @@ class ModelProviderRegistry:
                 available.append(provider_type)
         return available
 
+    @classmethod
+    def preload_provider_sdks(cls) -> None:
+        """Import the SDKs of all registered providers.
+
+        Provider modules import their SDKs on first use to keep server startup
+        fast. The server calls this from a background thread once it is up, so
+        the first model call does not pay for the import either.
+        """
+        instance = cls()
+        for provider_type, provider_class in list(instance._providers.items()):
+            for module_name in getattr(provider_class, "SDK_MODULES", ()):
+                try:
+                    importlib.import_module(module_name)
+                except Exception as e:
+                    logging.debug(f"Could not preload {module_name} for {provider_type.value}: {e}")
+
     @classmethod
     def clear_cache(cls) -> None:
         """Clear cached provider instances."""
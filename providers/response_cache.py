@@ -0,0 +1,386 @@
+"""
+Response cache for deterministic provider calls
+
+Retried clients and duplicate agents often send the exact same request - the
+same codereview of the same files at the same low temperature - and each one
+pays for a full model call. With RESPONSE_CACHE_ENABLED=true the provider
+executor answers repeated generate_content/stream_content calls from this
+cache instead:
+
+- Entries are keyed by provider, resolved model, hashes of the system prompt,
+  prompt and images, temperature, thinking mode and any other call arguments.
+  Embedded files and conversation history are part of the prompt, so a changed
+  file or a new turn produces a new key
+- Only calls at or below RESPONSE_CACHE_MAX_TEMPERATURE (default 0.2, the
+  analytical tools' temperature) are cached; balanced and creative tools
+  bypass the cache unless the threshold is raised
+- Entries expire after RESPONSE_CACHE_TTL_SECONDS (default 1 hour)
+- A byte-bounded in-memory LRU (RESPONSE_CACHE_MAX_BYTES, default 32MB) sits in
+  front of a WAL-mode SQLite tier (RESPONSE_CACHE_DISK_MAX_BYTES, default
+  256MB, 0 keeps the cache in memory only) at RESPONSE_CACHE_PATH, which
+  survives restarts and is shared by server processes on the same host
+
+Responses served from the cache carry metadata["response_cache"] = "hit";
+fresh responses that were stored carry "miss".
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Optional
+
+from .base import ModelResponse, ProviderType
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL_SECONDS = 3600
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+DEFAULT_DISK_MAX_BYTES = 256 * 1024 * 1024
+# TEMPERATURE_ANALYTICAL in config.py
+DEFAULT_MAX_TEMPERATURE = 0.2
+DEFAULT_RESPONSE_CACHE_PATH = Path(__file__).resolve().parent.parent / ".zen_storage" / "response_cache.db"
+
+# Call arguments that are hashed rather than stored verbatim in the key
+_HASHED_ARGUMENTS = ("prompt", "system_prompt", "images")
+
+
+def _get_non_negative_env(name: str, default: int) -> int:
+    """Read a non-negative integer from the environment, falling back to default on invalid values."""
+    value = os.getenv(name, "")
+    if not value:
+        return default
+    try:
+        parsed = int(value)
+        if parsed < 0:
+            raise ValueError(value)
+        return parsed
+    except ValueError:
+        logger.warning(f"Invalid {name} value ('{value}'), using default of {default}")
+        return default
+
+
+def _get_max_temperature() -> float:
+    """Read RESPONSE_CACHE_MAX_TEMPERATURE, falling back to the default on invalid values."""
+    value = os.getenv("RESPONSE_CACHE_MAX_TEMPERATURE", "")
+    if not value:
+        return DEFAULT_MAX_TEMPERATURE
+    try:
+        return float(value)
+    except ValueError:
+        logger.warning(
+            f"Invalid RESPONSE_CACHE_MAX_TEMPERATURE value ('{value}'), using default of {DEFAULT_MAX_TEMPERATURE}"
+        )
+        return DEFAULT_MAX_TEMPERATURE
+
+
+def _hash_text(text: Optional[str]) -> Optional[str]:
+    if text is None:
+        return None
+    return hashlib.sha256(text.encode("utf-8", "surrogatepass")).hexdigest()
+
+
+def _hash_image(image: str) -> Optional[str]:
+    """Hash an image by content (file bytes or data URL), or None if it cannot be read."""
+    if image.startswith("data:"):
+        return _hash_text(image)
+    digest = hashlib.sha256()
+    try:
+        with open(image, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+    except OSError:
+        return None
+    return digest.hexdigest()
+
+
+def _serialize(response: ModelResponse) -> Optional[str]:
+    """Serialize a response for storage, or None if its metadata is not JSON serializable."""
+    provider = response.provider.value if isinstance(response.provider, ProviderType) else response.provider
+    try:
+        return json.dumps(
+            {
+                "content": response.content,
+                "usage": response.usage,
+                "model_name": response.model_name,
+                "friendly_name": response.friendly_name,
+                "provider": provider,
+                "metadata": response.metadata,
+            }
+        )
+    except (TypeError, ValueError):
+        return None
+
+
+def _deserialize(value: str) -> ModelResponse:
+    data = json.loads(value)
+    try:
+        data["provider"] = ProviderType(data["provider"])
+    except ValueError:
+        pass
+    return ModelResponse(**data)
+
+
+class ResponseCache:
+    """Two-tier (memory LRU, SQLite) cache of model responses bounded by size and age"""
+
+    def __init__(
+        self,
+        enabled: Optional[bool] = None,
+        ttl_seconds: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        disk_max_bytes: Optional[int] = None,
+        db_path: Optional[str] = None,
+        max_temperature: Optional[float] = None,
+    ):
+        if enabled is None:
+            enabled = os.getenv("RESPONSE_CACHE_ENABLED", "").lower() in ("true", "1", "yes")
+        self.enabled = enabled
+        self.ttl_seconds = (
+            _get_non_negative_env("RESPONSE_CACHE_TTL_SECONDS", DEFAULT_TTL_SECONDS)
+            if ttl_seconds is None
+            else ttl_seconds
+        )
+        self.max_bytes = (
+            _get_non_negative_env("RESPONSE_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES) if max_bytes is None else max_bytes
+        )
+        self.disk_max_bytes = (
+            _get_non_negative_env("RESPONSE_CACHE_DISK_MAX_BYTES", DEFAULT_DISK_MAX_BYTES)
+            if disk_max_bytes is None
+            else disk_max_bytes
+        )
+        self.max_temperature = _get_max_temperature() if max_temperature is None else max_temperature
+        self.db_path = Path(db_path or os.getenv("RESPONSE_CACHE_PATH") or DEFAULT_RESPONSE_CACHE_PATH)
+
+        self._lock = threading.Lock()
+        # key -> (serialized response, expires_at wall-clock time)
+        self._entries: OrderedDict[str, tuple[str, float]] = OrderedDict()
+        self._size = 0
+        self._conn: Optional[sqlite3.Connection] = None
+        self._disk_lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.evictions = 0
+
+    @property
+    def uses_disk(self) -> bool:
+        return self.disk_max_bytes > 0
+
+    def is_cacheable(self, temperature: Optional[float]) -> bool:
+        """Whether calls at this temperature are deterministic enough to be cached."""
+        return self.enabled and self.ttl_seconds > 0 and temperature is not None and temperature <= self.max_temperature
+
+    def make_key(self, provider_key: str, model_name: Optional[str], kwargs: dict[str, Any]) -> Optional[str]:
+        """
+        Build the cache key of a generation call.
+
+        Args:
+            provider_key: Provider identifier (e.g. "google")
+            model_name: Resolved model name
+            kwargs: Arguments of the generate_content call
+
+        Returns:
+            Hex digest identifying the request, or None if the call cannot be cached
+            (its temperature is above the threshold, or an image could not be read)
+        """
+        if not self.is_cacheable(kwargs.get("temperature")):
+            with self._lock:
+                self.bypassed += 1
+            return None
+
+        image_hashes = []
+        for image in kwargs.get("images") or []:
+            image_hash = _hash_image(image)
+            if image_hash is None:
+                with self._lock:
+                    self.bypassed += 1
+                return None
+            image_hashes.append(image_hash)
+
+        other_arguments = {
+            name: value for name, value in kwargs.items() if name not in _HASHED_ARGUMENTS and name != "model_name"
+        }
+        material = {
+            "provider": provider_key,
+            "model": model_name,
+            "system_prompt": _hash_text(kwargs.get("system_prompt")),
+            "prompt": _hash_text(kwargs.get("prompt")),
+            "images": image_hashes,
+            "arguments": other_arguments,
+        }
+        return hashlib.sha256(json.dumps(material, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[ModelResponse]:
+        """Return a fresh copy of the cached response for key, or None"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[1] > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return _deserialize(entry[0])
+                self._pop(key)
+
+        value = self._disk_get(key, now) if self.uses_disk else None
+        if value is None:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        serialized, expires_at = value
+        with self._lock:
+            self.hits += 1
+            self.disk_hits += 1
+            self._memory_put(key, serialized, expires_at)
+        return _deserialize(serialized)
+
+    def put(self, key: str, response: ModelResponse) -> bool:
+        """Store a response, evicting least recently used entries to stay within budget"""
+        serialized = _serialize(response)
+        if serialized is None:
+            logger.debug("[RESPONSE_CACHE] Response metadata is not serializable, not caching it")
+            return False
+
+        expires_at = time.time() + self.ttl_seconds
+        with self._lock:
+            self._memory_put(key, serialized, expires_at)
+        if self.uses_disk:
+            self._disk_put(key, serialized, expires_at)
+        return True
+
+    def _pop(self, key: str) -> None:
+        """Remove a memory entry. Caller must hold the lock."""
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._size -= len(entry[0])
+
+    def _memory_put(self, key: str, serialized: str, expires_at: float) -> None:
+        """Add a memory entry. Caller must hold the lock."""
+        # Character count is used as a cheap approximation of the entry's size in bytes
+        if len(serialized) > self.max_bytes:
+            return
+        self._pop(key)
+        self._entries[key] = (serialized, expires_at)
+        self._size += len(serialized)
+        while self._size > self.max_bytes:
+            _, (evicted, _) = self._entries.popitem(last=False)
+            self._size -= len(evicted)
+            self.evictions += 1
+
+    def _get_connection(self) -> sqlite3.Connection:
+        """Open the SQLite tier on first use. Caller must hold the disk lock."""
+        if self._conn is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.db_path), check_same_thread=False, isolation_level=None, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, "
+                "expires_at REAL NOT NULL, last_used REAL NOT NULL"
+                ") WITHOUT ROWID"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_last_used ON responses(last_used)")
+            self._conn = conn
+        return self._conn
+
+    def _disk_get(self, key: str, now: float) -> Optional[tuple[str, float]]:
+        try:
+            with self._disk_lock:
+                conn = self._get_connection()
+                row = conn.execute(
+                    "SELECT value, expires_at FROM responses WHERE key = ? AND expires_at > ?", (key, now)
+                ).fetchone()
+                if row is not None:
+                    conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+                return row
+        except sqlite3.Error as e:
+            logger.warning(f"[RESPONSE_CACHE] Could not read {self.db_path}: {e}")
+            return None
+
+    def _disk_put(self, key: str, serialized: str, expires_at: float) -> None:
+        size = len(serialized)
+        if size > self.disk_max_bytes:
+            return
+        now = time.time()
+        try:
+            with self._disk_lock:
+                conn = self._get_connection()
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO responses (key, value, size, expires_at, last_used) "
+                        "VALUES (?, ?, ?, ?, ?)",
+                        (key, serialized, size, expires_at, now),
+                    )
+                    conn.execute("DELETE FROM responses WHERE expires_at <= ?", (now,))
+                    # Drop the least recently used rows beyond the byte budget
+                    cursor = conn.execute(
+                        "DELETE FROM responses WHERE key IN ("
+                        "SELECT key FROM (SELECT key, SUM(size) OVER (ORDER BY last_used DESC, key) AS running "
+                        "FROM responses) WHERE running > ?)",
+                        (self.disk_max_bytes,),
+                    )
+                    conn.execute("COMMIT")
+                except BaseException:
+                    conn.execute("ROLLBACK")
+                    raise
+            if cursor.rowcount > 0:
+                with self._lock:
+                    self.evictions += cursor.rowcount
+        except sqlite3.Error as e:
+            logger.warning(f"[RESPONSE_CACHE] Could not write {self.db_path}: {e}")
+
+    def get_stats(self) -> dict[str, Any]:
+        """Return hit/miss counters and current memory occupancy"""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "bypassed": self.bypassed,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._size,
+                "max_bytes": self.max_bytes,
+            }
+
+    def clear(self) -> None:
+        """Drop all cached responses from both tiers and reset the counters"""
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+            self.hits = 0
+            self.disk_hits = 0
+            self.misses = 0
+            self.bypassed = 0
+            self.evictions = 0
+        if self.uses_disk and (self._conn is not None or self.db_path.exists()):
+            try:
+                with self._disk_lock:
+                    self._get_connection().execute("DELETE FROM responses")
+            except sqlite3.Error as e:
+                logger.warning(f"[RESPONSE_CACHE] Could not clear {self.db_path}: {e}")
+
+
+# Global singleton instance
+_response_cache: Optional[ResponseCache] = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> ResponseCache:
+    """Get the global response cache (singleton pattern)"""
+    global _response_cache
+    if _response_cache is None:
+        with _response_cache_lock:
+            if _response_cache is None:
+                _response_cache = ResponseCache()
+    return _response_cache
@@ -0,0 +1,308 @@
+"""
+Retry policy shared by provider API calls
+
+Each provider call used to carry its own copy of a retry loop with a fixed
+1s/3s/5s/8s schedule and a blocking time.sleep. This module provides a single
+retry engine for all of them:
+
+- Exponential backoff with jitter, so callers that failed together do not
+  retry in lockstep
+- Retry-After / retry-after-ms response headers are honoured when the API
+  sends them
+- call_with_retry() sleeps with time.sleep for callers running on worker
+  threads, acall_with_retry() awaits asyncio.sleep and never blocks the loop
+- Rate-limit errors start a cooldown shared by every call to the same
+  provider. All calls wait for it before their next attempt, so a burst of
+  429s produces one coordinated back-off instead of N independent retry
+  loops hammering the API
+
+Whether an error is retryable stays provider-specific (each provider's
+_is_error_retryable); this module only decides when and how long to wait.
+
+Configuration:
+- PROVIDER_RETRY_MAX_ATTEMPTS: attempts per call, including the first (default 4)
+- PROVIDER_RETRY_MAX_WAIT_SECONDS: longest single wait accepted before giving up;
+  a Retry-After beyond this fails the call instead of holding it open (default 60)
+"""
+
+import asyncio
+import email.utils
+import logging
+import os
+import random
+import threading
+import time
+from collections.abc import AsyncIterator, Awaitable
+from dataclasses import dataclass
+from typing import Any, Callable, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+DEFAULT_MAX_ATTEMPTS = 4
+DEFAULT_MAX_WAIT_SECONDS = 60.0
+
+# HTTP status codes that indicate a transient failure worth retrying
+RETRYABLE_STATUS_CODES = frozenset({408, 500, 502, 503, 504})
+
+
+def _read_env_number(name: str, default, cast, minimum):
+    """Read a numeric environment variable, falling back to the default on invalid values."""
+    value = os.getenv(name, "")
+    if not value:
+        return default
+    try:
+        number = cast(value)
+        if number < minimum:
+            raise ValueError(value)
+        return number
+    except ValueError:
+        logger.warning(f"Invalid {name} value ('{value}'), using default of {default}")
+        return default
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """How many times to attempt a call and how long to wait between attempts"""
+
+    max_attempts: int = DEFAULT_MAX_ATTEMPTS
+    # Backoff ceiling for the first retry; doubles for each further retry up to max_delay
+    base_delay: float = 2.0
+    max_delay: float = 16.0
+    max_wait: float = DEFAULT_MAX_WAIT_SECONDS
+
+    @classmethod
+    def from_env(cls) -> "RetryPolicy":
+        return cls(
+            max_attempts=_read_env_number("PROVIDER_RETRY_MAX_ATTEMPTS", DEFAULT_MAX_ATTEMPTS, int, 1),
+            max_wait=_read_env_number("PROVIDER_RETRY_MAX_WAIT_SECONDS", DEFAULT_MAX_WAIT_SECONDS, float, 0),
+        )
+
+    def backoff(self, retry_number: int) -> float:
+        """Exponential delay with equal jitter: half fixed, half random (retry_number starts at 0)."""
+        ceiling = min(self.max_delay, self.base_delay * (2**retry_number))
+        return ceiling / 2 + random.uniform(0, ceiling / 2)
+
+    def delay_for(self, retry_number: int, error: Exception) -> Optional[float]:
+        """Return how long to wait before retrying after error, or None if the wait is too long."""
+        retry_after = get_retry_after(error)
+        if retry_after is not None:
+            # Small jitter so callers released by the same Retry-After do not return at the same instant
+            delay = retry_after + random.uniform(0, min(1.0, retry_after * 0.1))
+        else:
+            delay = self.backoff(retry_number)
+        if delay > self.max_wait:
+            return None
+        return delay
+
+
+def get_status_code(error: Exception) -> Optional[int]:
+    """Return the HTTP status code carried by an SDK exception, if any."""
+    # openai.APIStatusError uses status_code, google.genai.errors.APIError uses code
+    for attribute in ("status_code", "code"):
+        value = getattr(error, attribute, None)
+        if isinstance(value, int) and not isinstance(value, bool):
+            return value
+    return None
+
+
+def get_retry_after(error: Exception) -> Optional[float]:
+    """Return the server-requested delay in seconds from Retry-After headers, if any."""
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if headers is None:
+        return None
+    try:
+        retry_after_ms = headers.get("retry-after-ms")
+        if retry_after_ms is not None:
+            return max(0.0, float(retry_after_ms) / 1000)
+
+        retry_after = headers.get("retry-after")
+        if retry_after is None:
+            return None
+        try:
+            return max(0.0, float(retry_after))
+        except ValueError:
+            # HTTP-date form
+            retry_at = email.utils.parsedate_to_datetime(retry_after)
+            return max(0.0, retry_at.timestamp() - time.time())
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """Whether the error signals provider-side rate limiting (HTTP 429)."""
+    if get_status_code(error) == 429:
+        return True
+    error_str = str(error).lower()
+    return "429" in error_str or "resource_exhausted" in error_str
+
+
+class ProviderCooldown:
+    """Shared "do not call before" deadline for one provider"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._until = 0.0
+        self._lock = threading.Lock()
+        self.activations = 0
+
+    def remaining(self) -> float:
+        with self._lock:
+            return max(0.0, self._until - time.monotonic())
+
+    def extend(self, seconds: float) -> None:
+        """Hold back all calls to this provider for at least the given number of seconds."""
+        with self._lock:
+            until = time.monotonic() + seconds
+            if until > self._until:
+                if self._until <= time.monotonic():
+                    self.activations += 1
+                self._until = until
+
+    def wait(self) -> None:
+        """Block the current thread until the cooldown has passed."""
+        while (remaining := self.remaining()) > 0:
+            time.sleep(remaining)
+
+    async def await_ready(self) -> None:
+        """Wait on the event loop until the cooldown has passed."""
+        while (remaining := self.remaining()) > 0:
+            await asyncio.sleep(remaining)
+
+
+class RetryExhaustedError(Exception):
+    """Raised when a call failed with a non-retryable error or ran out of attempts"""
+
+    def __init__(self, last_exception: Exception, attempts: int):
+        super().__init__(str(last_exception))
+        self.last_exception = last_exception
+        self.attempts = attempts
+
+    @property
+    def attempts_text(self) -> str:
+        """Human-readable attempt count, e.g. "1 attempt" or "3 attempts"."""
+        return f"{self.attempts} attempt{'s' if self.attempts > 1 else ''}"
+
+
+def _plan_retry(
+    error: Exception,
+    attempt: int,
+    policy: RetryPolicy,
+    is_retryable: Callable[[Exception], bool],
+    cooldown: Optional[ProviderCooldown],
+    description: str,
+) -> Optional[float]:
+    """Return the delay before the next attempt, or None to give up."""
+    if attempt >= policy.max_attempts or not is_retryable(error):
+        return None
+
+    delay = policy.delay_for(attempt - 1, error)
+    if delay is None:
+        logger.warning(f"{description}: requested retry delay exceeds {policy.max_wait}s, giving up: {error}")
+        return None
+
+    if cooldown is not None and is_rate_limit_error(error):
+        cooldown.extend(delay)
+
+    logger.warning(f"{description}, attempt {attempt}/{policy.max_attempts}: {str(error)}. Retrying in {delay:.1f}s...")
+    return delay
+
+
+def call_with_retry(
+    func: Callable[[], T],
+    is_retryable: Callable[[Exception], bool],
+    *,
+    description: str,
+    cooldown: Optional[ProviderCooldown] = None,
+    policy: Optional[RetryPolicy] = None,
+) -> T:
+    """
+    Call func until it succeeds, sleeping on the current thread between attempts.
+
+    Args:
+        func: Zero-argument callable performing one attempt
+        is_retryable: Provider-specific classification of errors
+        description: Prefix for retry log messages, e.g. "Gemini API error for model X"
+        cooldown: Optional shared provider cooldown to honour and extend on rate limits
+        policy: Retry policy (defaults to get_retry_policy())
+
+    Raises:
+        RetryExhaustedError: Wrapping the last error once no further attempt will be made
+    """
+    policy = policy or get_retry_policy()
+    attempt = 0
+    while True:
+        attempt += 1
+        if cooldown is not None:
+            cooldown.wait()
+        try:
+            return func()
+        except Exception as e:
+            delay = _plan_retry(e, attempt, policy, is_retryable, cooldown, description)
+            if delay is None:
+                raise RetryExhaustedError(e, attempt) from e
+            time.sleep(delay)
+
+
+async def acall_with_retry(
+    func: Callable[[], Awaitable[T]],
+    is_retryable: Callable[[Exception], bool],
+    *,
+    description: str,
+    cooldown: Optional[ProviderCooldown] = None,
+    policy: Optional[RetryPolicy] = None,
+) -> T:
+    """Async variant of call_with_retry: awaits func() and sleeps without blocking the event loop."""
+    policy = policy or get_retry_policy()
+    attempt = 0
+    while True:
+        attempt += 1
+        if cooldown is not None:
+            await cooldown.await_ready()
+        try:
+            return await func()
+        except Exception as e:
+            delay = _plan_retry(e, attempt, policy, is_retryable, cooldown, description)
+            if delay is None:
+                raise RetryExhaustedError(e, attempt) from e
+            await asyncio.sleep(delay)
+
+
+async def prefetch_until(iterator: AsyncIterator[Any], predicate: Callable[[Any], bool]) -> list[Any]:
+    """
+    Read items from an async iterator up to and including the first one matching predicate.
+
+    Used to open a stream and read it up to its first text delta inside a single
+    retryable attempt: errors before any output reaches the caller can be retried,
+    later ones cannot. The iterator is left open so reading can continue.
+    """
+    items = []
+    async for item in iterator:
+        items.append(item)
+        if predicate(item):
+            break
+    return items
+
+
+# Global instances
+_policy_instance: Optional[RetryPolicy] = None
+_cooldowns: dict[str, ProviderCooldown] = {}
+_cooldowns_lock = threading.Lock()
+
+
+def get_retry_policy() -> RetryPolicy:
+    """Get the global retry policy, configured from the environment on first use"""
+    global _policy_instance
+    if _policy_instance is None:
+        _policy_instance = RetryPolicy.from_env()
+    return _policy_instance
+
+
+def get_provider_cooldown(name: str) -> ProviderCooldown:
+    """Get the shared cooldown for a provider (one instance per name)"""
+    with _cooldowns_lock:
+        cooldown = _cooldowns.get(name)
+        if cooldown is None:
+            cooldown = _cooldowns[name] = ProviderCooldown(name)
+        return cooldown
@@ -23,11 +23,15 @@ import atexit
 import logging
 import os
 import sys
+import threading
 import time
 from logging.handlers import RotatingFileHandler
 from pathlib import Path
 from typing import Any, Optional
 
+# Start of server initialization, for the startup timing breakdown logged by main()
+_startup_started = time.perf_counter()
+
 # Try to load environment variables from .env file if dotenv is available
 # This is optional - environment variables can still be passed directly
 try:
@@ -43,6 +47,22 @@ except ImportError:
     # This commonly happens when running via uvx or in minimal environments
     pass
 
+from utils.profiling import (  # noqa: E402
+    PROFILE_LOGGER_NAME,
+    ImportTimer,
+    annotate_profile,
+    is_profiling_enabled,
+    profile_phase,
+    profile_tool_calls,
+    write_startup_profile,
+)
+
+# With PROFILING_ENABLED=true, time every module imported during startup
+_import_timer: Optional[ImportTimer] = None
+if is_profiling_enabled():
+    _import_timer = ImportTimer()
+    _import_timer.install()
+
 from mcp.server import Server  # noqa: E402
 from mcp.server.models import InitializationOptions  # noqa: E402
 from mcp.server.stdio import stdio_server  # noqa: E402
@@ -82,6 +102,17 @@ from tools import (  # noqa: E402
 )
 from tools.models import ToolOutput  # noqa: E402
 
+# Seconds spent in each startup phase, in order
+_startup_phases: dict[str, float] = {}
+
+
+def record_startup_phase(name: str) -> None:
+    """Record the time spent since the previous startup phase ended."""
+    _startup_phases[name] = time.perf_counter() - _startup_started - sum(_startup_phases.values())
+
+
+record_startup_phase("imports")
+
 # Configure logging for server operations
 # Can be controlled via LOG_LEVEL environment variable (DEBUG, INFO, WARNING, ERROR)
 log_level = os.getenv("LOG_LEVEL", "DEBUG").upper()
@@ -154,6 +185,22 @@ try:
     # Ensure MCP activity also goes to stderr
     mcp_logger.propagate = True
 
+    # Profile records as JSON lines, only when profiling was requested (PROFILING_ENABLED=true).
+    # They never propagate to the server log.
+    profile_logger = logging.getLogger(PROFILE_LOGGER_NAME)
+    profile_logger.propagate = False
+    if is_profiling_enabled():
+        profile_file_handler = RotatingFileHandler(
+            log_dir / "mcp_profile.jsonl",
+            maxBytes=10 * 1024 * 1024,
+            backupCount=2,
+            encoding="utf-8",
+            delay=True,
+        )
+        profile_file_handler.setFormatter(logging.Formatter("%(message)s"))
+        profile_logger.addHandler(profile_file_handler)
+        profile_logger.setLevel(logging.INFO)
+
     # Log setup info directly to root logger since logger isn't defined yet
     logging.info(f"Logging to: {log_dir / 'mcp_server.log'}")
     logging.info(f"Process PID: {os.getpid()}")
@@ -162,6 +209,7 @@ except Exception as e:
     print(f"Warning: Could not set up file logging: {e}", file=sys.stderr)
 
 logger = logging.getLogger(__name__)
+record_startup_phase("logging")
 
 
 # Create the MCP server instance with a unique name identifier
@@ -281,6 +329,7 @@ TOOLS = {
     "version": VersionTool(),  # Display server version and system information
 }
 TOOLS = filter_disabled_tools(TOOLS)
+record_startup_phase("tools")
 
 # Rich prompt templates for all tools
 PROMPT_TEMPLATES = {
@@ -558,6 +607,10 @@ def configure_providers():
     else:
         logger.info("No model restrictions configured - all models allowed")
 
+    # Build the model name resolution index once for the configured providers and restrictions
+    ModelProviderRegistry.invalidate_model_index()
+    ModelProviderRegistry.get_model_index()
+
     # Check if auto mode has any models available after restrictions
     from config import IS_AUTO_MODE
 
@@ -574,6 +627,10 @@ def configure_providers():
             )
 
 
+# (cache key, tools) from the last handle_list_tools call
+_list_tools_cache: Optional[tuple[tuple, list[Tool]]] = None
+
+
 @server.list_tools()
 async def handle_list_tools() -> list[Tool]:
     """
@@ -610,6 +667,14 @@ async def handle_list_tools() -> list[Tool]:
                 pass
     except Exception as e:
         logger.debug(f"Could not log client info during list_tools: {e}")
+
+    # Reuse the tool list while no tool's schema inputs changed (see BaseTool.get_schema_cache_key)
+    global _list_tools_cache
+    cache_key = tuple((name, tool, tool.get_schema_cache_key()) for name, tool in TOOLS.items())
+    if _list_tools_cache is not None and _list_tools_cache[0] == cache_key:
+        logger.debug(f"Returning {len(_list_tools_cache[1])} cached tools to MCP client")
+        return list(_list_tools_cache[1])
+
     tools = []
 
     # Add all registered AI-powered tools from the TOOLS registry
@@ -622,7 +687,7 @@ async def handle_list_tools() -> list[Tool]:
             Tool(
                 name=tool.name,
                 description=tool.description,
-                inputSchema=tool.get_input_schema(),
+                inputSchema=tool.get_cached_input_schema(),
                 annotations=tool_annotations,
             )
         )
@@ -631,11 +696,13 @@ async def handle_list_tools() -> list[Tool]:
     if os.getenv("OPENROUTER_API_KEY") and os.getenv("OPENROUTER_API_KEY") != "your_openrouter_api_key_here":
         logger.debug("OpenRouter registry cache used efficiently across all tool schemas")
 
+    _list_tools_cache = (cache_key, tools)
     logger.debug(f"Returning {len(tools)} tools to MCP client")
-    return tools
+    return list(tools)
 
 
 @server.call_tool()
+@profile_tool_calls
 async def handle_call_tool(name: str, arguments: dict[str, Any]) -> list[TextContent]:
     """
     Handle incoming tool execution requests from MCP clients.
@@ -718,7 +785,8 @@ async def handle_call_tool(name: str, arguments: dict[str, Any]) -> list[TextCon
         except Exception:
             pass
 
-        arguments = await reconstruct_thread_context(arguments)
+        with profile_phase("reconstruct_thread_context"):
+            arguments = await reconstruct_thread_context(arguments)
         logger.debug(f"[CONVERSATION_DEBUG] After thread reconstruction, arguments keys: {list(arguments.keys())}")
         if "_remaining_tokens" in arguments:
             logger.debug(f"[CONVERSATION_DEBUG] Remaining token budget: {arguments['_remaining_tokens']:,}")
@@ -757,7 +825,7 @@ async def handle_call_tool(name: str, arguments: dict[str, Any]) -> list[TextCon
         if model_name.lower() == "auto":
             # Get tool category to determine appropriate model
             tool_category = tool.get_model_category()
-            resolved_model = ModelProviderRegistry.get_preferred_fallback_model(tool_category)
+            resolved_model = ModelProviderRegistry.get_auto_mode_model(tool_category)
             logger.info(f"Auto mode resolved to {resolved_model} for {name} (category: {tool_category.value})")
             model_name = resolved_model
             # Update arguments with resolved model
@@ -785,6 +853,8 @@ async def handle_call_tool(name: str, arguments: dict[str, Any]) -> list[TextCon
             )
             return [TextContent(type="text", text=error_output.model_dump_json())]
 
+        annotate_profile(model=model_name)
+
         # Create model context with resolved model and option
         model_context = ModelContext(model_name, model_option)
         arguments["_model_context"] = model_context
@@ -1067,7 +1137,7 @@ async def reconstruct_thread_context(arguments: dict[str, Any]) -> dict[str, Any
     # All tools now use standardized 'prompt' field
     original_prompt = arguments.get("prompt", "")
     logger.debug("[CONVERSATION_DEBUG] Extracting user input from 'prompt' field")
-    original_prompt_tokens = estimate_tokens(original_prompt) if original_prompt else 0
+    original_prompt_tokens = model_context.estimate_tokens(original_prompt) if original_prompt else 0
     logger.debug(
         f"[CONVERSATION_DEBUG] User input length: {len(original_prompt)} chars (~{original_prompt_tokens:,} tokens)"
     )
@@ -1301,6 +1371,11 @@ async def main():
     """
     # Validate and configure providers based on available API keys
     configure_providers()
+    record_startup_phase("providers")
+    if _import_timer is not None:
+        _import_timer.uninstall()
+    if is_profiling_enabled():
+        write_startup_profile(_startup_phases, _import_timer)
 
     # Log startup message
     logger.info("Zen MCP Server starting up...")
@@ -1323,8 +1398,16 @@ async def main():
     logger.info(f"Default thinking mode (ThinkDeep): {DEFAULT_THINKING_MODE_THINKDEEP}")
 
     logger.info(f"Available tools: {list(TOOLS.keys())}")
+    breakdown = ", ".join(f"{phase} {seconds * 1000:.0f}ms" for phase, seconds in _startup_phases.items())
+    logger.info(f"Startup time: {sum(_startup_phases.values()) * 1000:.0f}ms ({breakdown})")
     logger.info("Server ready - waiting for tool requests...")
 
+    # Provider SDKs are imported on first use to keep startup fast; load them in the
+    # background now so the first tool call does not wait for the import either
+    from providers.registry import ModelProviderRegistry
+
+    threading.Thread(target=ModelProviderRegistry.preload_provider_sdks, name="sdk-preload", daemon=True).start()
+
     # Run the server using stdio transport (standard input/output)
     # This allows the server to be launched by MCP clients as a subprocess
     async with stdio_server() as (read_stream, write_stream):
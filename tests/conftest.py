@@ -188,3 +188,12 @@ def mock_provider_availability(request, monkeypatch):
         return False
 
     monkeypatch.setattr(BaseTool, "is_effective_auto_mode", mock_is_effective_auto_mode)
+
+
+@pytest.fixture(autouse=True)
+def reset_provider_health():
+    """Keep circuit breaker state from failing calls in one test out of routing in the next."""
+    yield
+    from providers.health import get_provider_health
+
+    get_provider_health().reset()
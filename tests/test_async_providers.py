@@ -0,0 +1,200 @@
+"""
+Tests for native async provider calls (agenerate_content).
+"""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, Mock, patch
+
+import pytest
+
+from providers.base import ProviderType
+from providers.dial import DIALModelProvider
+from providers.executor import ProviderExecutor
+from providers.gemini import GeminiModelProvider
+from providers.openai_provider import OpenAIModelProvider
+from providers.openrouter import OpenRouterProvider
+
+
+def _make_chat_completion(content="async response"):
+    """Create a mock chat completion response."""
+    response = MagicMock()
+    response.choices = [MagicMock()]
+    response.choices[0].message.content = content
+    response.choices[0].finish_reason = "stop"
+    response.model = "o3-mini"
+    response.id = "test-id"
+    response.created = 1234567890
+    response.usage = MagicMock()
+    response.usage.prompt_tokens = 10
+    response.usage.completion_tokens = 5
+    response.usage.total_tokens = 15
+    return response
+
+
+class TestAsyncProviders:
+    """Test native async generation paths"""
+
+    @pytest.mark.asyncio
+    async def test_openai_agenerate_content_uses_async_client(self):
+        """OpenAI provider should await the AsyncOpenAI client and never touch the sync client"""
+        provider = OpenAIModelProvider(api_key="test-key")
+        async_client = MagicMock()
+        async_client.chat.completions.create = AsyncMock(return_value=_make_chat_completion())
+
+        with patch("providers.openai_compatible.AsyncOpenAI", return_value=async_client) as mock_async_openai:
+            with patch("providers.openai_compatible.OpenAI") as mock_openai:
+                response = await provider.agenerate_content(prompt="Hello", model_name="mini", temperature=1.0)
+
+        assert response.content == "async response"
+        assert response.usage["total_tokens"] == 15
+        mock_async_openai.assert_called_once()
+        mock_openai.assert_not_called()
+
+        # Alias should be resolved before the request is sent
+        call_kwargs = async_client.chat.completions.create.call_args[1]
+        assert call_kwargs["model"] == "o4-mini"
+        assert call_kwargs["messages"] == [{"role": "user", "content": "Hello"}]
+
+    @pytest.mark.asyncio
+    async def test_async_client_is_kept_per_event_loop(self):
+        """Each event loop gets its own async client, and clients of closed loops are dropped"""
+        provider = OpenAIModelProvider(api_key="test-key")
+
+        async def client_and_loop():
+            return provider.async_client, asyncio.get_running_loop()
+
+        def run_on_new_loop():
+            # asyncio.run closes its loop on exit; keep a reference so the entry is not collected
+            return asyncio.run(client_and_loop())
+
+        with patch("providers.openai_compatible.AsyncOpenAI", side_effect=lambda **kwargs: Mock()) as mock_async:
+            first = provider.async_client
+            other, other_loop = await asyncio.to_thread(run_on_new_loop)
+            third, third_loop = await asyncio.to_thread(run_on_new_loop)
+
+            assert provider.async_client is first
+
+        assert other is not first
+        assert third is not first and third is not other
+        assert mock_async.call_count == 3
+        assert other_loop not in provider._async_clients
+        assert third_loop in provider._async_clients
+        assert provider._async_clients[asyncio.get_running_loop()] is first
+
+    @pytest.mark.asyncio
+    async def test_openai_agenerate_content_retries_without_blocking(self):
+        """Retryable errors should be retried with asyncio.sleep, not time.sleep"""
+        provider = OpenAIModelProvider(api_key="test-key")
+        async_client = MagicMock()
+        async_client.chat.completions.create = AsyncMock(
+            side_effect=[Exception("Connection timeout"), _make_chat_completion("after retry")]
+        )
+        provider._async_clients[asyncio.get_running_loop()] = async_client
+
+        with patch("providers.retry.asyncio.sleep", new=AsyncMock()) as mock_sleep:
+            with patch("providers.retry.time.sleep") as mock_time_sleep:
+                response = await provider.agenerate_content(prompt="Hello", model_name="o3-mini", temperature=1.0)
+
+        assert response.content == "after retry"
+        assert async_client.chat.completions.create.await_count == 2
+        mock_sleep.assert_awaited_once()
+        assert 1 <= mock_sleep.await_args.args[0] <= 2  # First backoff step with jitter
+        mock_time_sleep.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_openai_agenerate_content_raises_after_non_retryable_error(self):
+        """Non-retryable errors should surface immediately with the usual message"""
+        provider = OpenAIModelProvider(api_key="test-key")
+        async_client = MagicMock()
+        async_client.chat.completions.create = AsyncMock(side_effect=Exception("401 Unauthorized"))
+        provider._async_clients[asyncio.get_running_loop()] = async_client
+
+        with pytest.raises(RuntimeError, match="after 1 attempt"):
+            await provider.agenerate_content(prompt="Hello", model_name="o3-mini", temperature=1.0)
+
+    @pytest.mark.asyncio
+    async def test_openrouter_agenerate_content_disables_streaming(self):
+        """OpenRouter should keep forcing stream=False on the async path"""
+        provider = OpenRouterProvider(api_key="test-key")
+        async_client = MagicMock()
+        async_client.chat.completions.create = AsyncMock(return_value=_make_chat_completion())
+        provider._async_clients[asyncio.get_running_loop()] = async_client
+
+        await provider.agenerate_content(prompt="Hello", model_name="openai/gpt-4o", temperature=0.5)
+
+        call_kwargs = async_client.chat.completions.create.call_args[1]
+        assert call_kwargs["stream"] is False
+
+    @pytest.mark.asyncio
+    async def test_gemini_agenerate_content_uses_aio_client(self):
+        """Gemini provider should use client.aio rather than the blocking models API"""
+        provider = GeminiModelProvider(api_key="test-key")
+
+        response = MagicMock()
+        response.text = "gemini async"
+        response.candidates = []
+        response.usage_metadata = MagicMock(prompt_token_count=7, candidates_token_count=3)
+
+        client = MagicMock()
+        client.aio.models.generate_content = AsyncMock(return_value=response)
+        provider._client = client
+
+        result = await provider.agenerate_content(prompt="Hello", model_name="flash", temperature=0.5)
+
+        assert result.content == "gemini async"
+        assert result.model_name == "gemini-2.5-flash"
+        assert result.provider == ProviderType.GOOGLE
+        client.aio.models.generate_content.assert_awaited_once()
+        client.models.generate_content.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_executor_dispatches_native_async_providers(self):
+        """Native async providers should be awaited on the loop, not sent to the pool"""
+        executor = ProviderExecutor(max_workers=1, default_concurrency=1)
+        provider = GeminiModelProvider(api_key="test-key")
+
+        with patch.object(provider, "agenerate_content", new=AsyncMock(return_value="native")) as mock_async:
+            with patch.object(provider, "generate_content") as mock_sync:
+                result = await executor.generate_content(provider, prompt="Hello", model_name="flash")
+
+        assert result == "native"
+        mock_async.assert_awaited_once_with(prompt="Hello", model_name="flash")
+        mock_sync.assert_not_called()
+        assert executor._pool is None
+
+        stats = executor.get_stats()["google"]
+        assert stats["completed"] == 1
+        assert stats["in_flight"] == 0
+        executor.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_executor_native_async_failures_release_slot(self):
+        """Failures on the native path should be counted and free the concurrency slot"""
+        executor = ProviderExecutor(max_workers=1, default_concurrency=1)
+        provider = GeminiModelProvider(api_key="test-key")
+
+        with patch.object(provider, "agenerate_content", new=AsyncMock(side_effect=RuntimeError("boom"))):
+            with pytest.raises(RuntimeError, match="boom"):
+                await executor.generate_content(provider, prompt="Hello", model_name="flash")
+
+        with patch.object(provider, "agenerate_content", new=AsyncMock(return_value="ok")):
+            assert (
+                await asyncio.wait_for(executor.generate_content(provider, prompt="Hi", model_name="flash"), 1) == "ok"
+            )
+
+        stats = executor.get_stats()["google"]
+        assert stats["failed"] == 1
+        assert stats["completed"] == 1
+        executor.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_dial_falls_back_to_executor(self):
+        """DIAL has no async client path, so agenerate_content should run the sync call in the pool"""
+        provider = DIALModelProvider(api_key="test-key")
+        assert provider.SUPPORTS_NATIVE_ASYNC is False
+
+        with patch.object(provider, "generate_content", return_value="sync result") as mock_sync:
+            result = await provider.agenerate_content(prompt="Hello", model_name="o3", temperature=1.0)
+
+        assert result == "sync result"
+        assert mock_sync.call_args[1]["model_name"] == "o3"
@@ -2,7 +2,10 @@
 Tests for the Consensus tool using WorkflowTool architecture.
 """
 
-from unittest.mock import Mock
+import asyncio
+import json
+import time
+from unittest.mock import Mock, patch
 
 import pytest
 
@@ -331,6 +334,137 @@ class TestConsensusTool:
         result = tool.customize_workflow_response(response_data, request)
         assert result["consensus_workflow_status"] == "ready_for_synthesis"
 
+    def test_consultation_mode_defaults_to_sequential(self):
+        """Test that consultation_mode is opt-in and validated."""
+        base_args = {
+            "step": "Test",
+            "step_number": 1,
+            "total_steps": 1,
+            "next_step_required": False,
+            "findings": "Test findings",
+            "models": [{"model": "flash"}],
+        }
+
+        assert ConsensusRequest(**base_args).consultation_mode == "sequential"
+        assert ConsensusRequest(**base_args, consultation_mode="parallel").consultation_mode == "parallel"
+        with pytest.raises(ValueError):
+            ConsensusRequest(**base_args, consultation_mode="burst")
+
+        schema = ConsensusTool().get_input_schema()
+        assert schema["properties"]["consultation_mode"]["enum"] == ["sequential", "parallel"]
+
+    @pytest.mark.asyncio
+    async def test_parallel_consultation_overlaps_models(self):
+        """Test that parallel mode consults all models in one step with wall time near the slowest model."""
+        tool = ConsensusTool()
+        delays = {"flash": 0.2, "o3-mini": 0.3, "pro": 0.1}
+
+        async def fake_consult(model_config, request, context_files=None):
+            await asyncio.sleep(delays[model_config["model"]])
+            return {
+                "model": model_config["model"],
+                "stance": model_config.get("stance", "neutral"),
+                "status": "success",
+                "verdict": f"{model_config['model']} verdict",
+            }
+
+        arguments = {
+            "step": "Should we adopt this?",
+            "step_number": 1,
+            "total_steps": 3,
+            "next_step_required": True,
+            "findings": "Initial analysis",
+            "models": [
+                {"model": "flash", "stance": "for"},
+                {"model": "o3-mini", "stance": "against"},
+                {"model": "pro"},
+            ],
+            "consultation_mode": "parallel",
+        }
+
+        with patch.object(tool, "_consult_model", side_effect=fake_consult):
+            start = time.monotonic()
+            result = await tool.execute_workflow(arguments)
+            elapsed = time.monotonic() - start
+
+        assert elapsed < 0.5  # Roughly the slowest model (0.3s), not the sum (0.6s)
+        data = json.loads(result[0].text)
+        assert data["status"] == "consensus_workflow_complete"
+        assert data["next_step_required"] is False
+        assert [r["model"] for r in data["model_responses"]] == ["flash", "o3-mini", "pro"]
+        assert data["complete_consensus"]["total_responses"] == 3
+        assert data["complete_consensus"]["models_failed"] == []
+
+        latencies = data["timing"]["per_model_latency_seconds"]
+        assert latencies["o3-mini:against"] >= 0.3
+        assert latencies["pro:neutral"] < latencies["o3-mini:against"]
+
+    @pytest.mark.asyncio
+    async def test_parallel_consultation_returns_partial_results_on_timeout(self):
+        """Test that models exceeding DEFAULT_CONSENSUS_TIMEOUT are reported without discarding the others."""
+        tool = ConsensusTool()
+
+        async def fake_consult(model_config, request, context_files=None):
+            if model_config["model"] == "slow":
+                await asyncio.sleep(5)
+            return {"model": model_config["model"], "stance": "neutral", "status": "success", "verdict": "ok"}
+
+        arguments = {
+            "step": "Proposal",
+            "step_number": 1,
+            "total_steps": 2,
+            "next_step_required": True,
+            "findings": "Initial analysis",
+            "models": [{"model": "fast"}, {"model": "slow"}],
+            "consultation_mode": "parallel",
+        }
+
+        with patch("tools.consensus.DEFAULT_CONSENSUS_TIMEOUT", 0.1):
+            with patch.object(tool, "_consult_model", side_effect=fake_consult):
+                result = await tool.execute_workflow(arguments)
+
+        data = json.loads(result[0].text)
+        statuses = {r["model"]: r["status"] for r in data["model_responses"]}
+        assert statuses == {"fast": "success", "slow": "timeout"}
+        assert data["complete_consensus"]["models_consulted"] == ["fast:neutral"]
+        assert data["complete_consensus"]["models_failed"] == ["slow:neutral"]
+        assert data["complete_consensus"]["consensus_confidence"] == "partial"
+        assert "slow:neutral" in data["next_steps"]
+
+    @pytest.mark.asyncio
+    async def test_parallel_consultation_prepares_files_once(self):
+        """Test that parallel mode reads the context files once and reports the same metadata as sequential mode."""
+        tool = ConsensusTool()
+        received = []
+
+        async def fake_consult(model_config, request, context_files=None):
+            received.append(context_files)
+            return {"model": model_config["model"], "stance": "neutral", "status": "success", "verdict": "ok"}
+
+        arguments = {
+            "step": "Proposal",
+            "step_number": 1,
+            "total_steps": 2,
+            "next_step_required": True,
+            "findings": "Initial analysis",
+            "relevant_files": ["/absolute/path/proposal.md"],
+            "models": [{"model": "flash"}, {"model": "o3-mini"}],
+            "consultation_mode": "parallel",
+        }
+
+        with patch.object(
+            tool, "_prepare_file_content_for_prompt", return_value=("formatted files", ["/absolute/path/proposal.md"])
+        ) as mock_prepare:
+            with patch.object(tool, "_consult_model", side_effect=fake_consult):
+                result = await tool.execute_workflow(arguments)
+
+        mock_prepare.assert_called_once()
+        assert received == ["formatted files", "formatted files"]
+        metadata = json.loads(result[0].text)["metadata"]
+        assert metadata["model_used"] == metadata["model_name"]
+        assert metadata["provider_used"]
+        assert metadata["consultation_mode"] == "parallel"
+
 
 if __name__ == "__main__":
     import unittest
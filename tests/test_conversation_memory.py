@@ -5,6 +5,7 @@ Tests the Redis-based conversation persistence needed for AI-to-AI multi-turn
 discussions in stateless MCP environments.
 """
 
+import json
 import os
 from unittest.mock import Mock, patch
 
@@ -233,6 +234,86 @@ class TestConversationMemory:
         assert history == ""
         assert tokens == 0
 
+    def test_build_conversation_history_reuses_rendered_turns(self):
+        """Test that a continuation only renders turns added since the last history build"""
+        turns = [
+            ConversationTurn(role="user", content="First question", timestamp="2023-01-01T00:00:00Z"),
+            ConversationTurn(role="assistant", content="First answer", timestamp="2023-01-01T00:01:00Z"),
+        ]
+        context = ThreadContext(
+            thread_id="12345678-1234-1234-1234-123456789012",
+            created_at="2023-01-01T00:00:00Z",
+            last_updated_at="2023-01-01T00:01:00Z",
+            tool_name="chat",
+            turns=turns,
+            initial_context={},
+        )
+        first_history, first_tokens = build_conversation_history(context, model_context=None)
+
+        context.turns.append(ConversationTurn(role="user", content="Second question", timestamp="2023-01-01T00:02:00Z"))
+        with patch(
+            "utils.conversation_memory._get_tool_formatted_content", return_value=["Second question"]
+        ) as formatter:
+            history, tokens = build_conversation_history(context, model_context=None)
+
+        formatter.assert_called_once_with(context.turns[2])
+        assert "First answer" in history
+        assert "--- Turn 3 (Claude) ---\nSecond question" in history
+        assert tokens > first_tokens
+
+        # Turns are rendered again if their position changes
+        context.turns.pop(0)
+        history, _ = build_conversation_history(context, model_context=None)
+        assert "--- Turn 1 (Gemini) ---" in history
+        assert "--- Turn 3" not in history
+
+    def test_prefix_stable_history_layout(self, project_path, monkeypatch):
+        """Test that with CACHE_FRIENDLY_PROMPTS each continuation's history extends the previous one"""
+        monkeypatch.setenv("CACHE_FRIENDLY_PROMPTS", "true")
+        first_file = project_path / "first.py"
+        second_file = project_path / "second.py"
+        first_file.write_text("def first():\n    return 1\n")
+        second_file.write_text("def second():\n    return 2\n")
+
+        context = ThreadContext(
+            thread_id="12345678-1234-1234-1234-123456789012",
+            created_at="2023-01-01T00:00:00Z",
+            last_updated_at="2023-01-01T00:01:00Z",
+            tool_name="chat",
+            turns=[
+                ConversationTurn(
+                    role="user", content="Look at this", timestamp="2023-01-01T00:00:00Z", files=[str(first_file)]
+                ),
+                ConversationTurn(role="assistant", content="Looked", timestamp="2023-01-01T00:01:00Z"),
+            ],
+            initial_context={},
+        )
+        first_history, _ = build_conversation_history(context, model_context=None)
+        assert f"Turn 2/{MAX_CONVERSATION_TURNS}" not in first_history.split("Previous conversation turns:")[0]
+
+        # Referencing a file again keeps it where it was first embedded
+        context.turns.append(
+            ConversationTurn(
+                role="user", content="Look again", timestamp="2023-01-01T00:02:00Z", files=[str(first_file)]
+            )
+        )
+        history, _ = build_conversation_history(context, model_context=None)
+        stable_prefix = first_history.split(f"\nTurn 2/{MAX_CONVERSATION_TURNS}")[0]
+        assert history.startswith(stable_prefix)
+        assert history.index("Look again") < history.index(f"Turn 3/{MAX_CONVERSATION_TURNS}")
+
+        # Files shared later are embedded after the files shared before them
+        context.turns.append(
+            ConversationTurn(
+                role="user",
+                content="And this",
+                timestamp="2023-01-01T00:03:00Z",
+                files=[str(second_file), str(first_file)],
+            )
+        )
+        history, _ = build_conversation_history(context, model_context=None)
+        assert history.index("def first()") < history.index("def second()")
+
 
 class TestConversationFlow:
     """Test complete conversation flows simulating stateless MCP requests"""
@@ -756,5 +837,59 @@ class TestConversationFlow:
                 assert large_file in history
 
 
+class TestThreadContextCache:
+    """Test the decoded ThreadContext cache in front of the storage backend"""
+
+    @pytest.fixture
+    def storage(self, monkeypatch):
+        from utils import storage_backend
+        from utils.conversation_memory import get_thread_cache
+        from utils.storage_backend import InMemoryStorage
+
+        backend = InMemoryStorage()
+        monkeypatch.setattr(storage_backend, "_storage_instance", backend)
+        get_thread_cache().clear()
+        yield backend
+        get_thread_cache().clear()
+        backend.shutdown()
+
+    def test_repeated_lookups_skip_decoding(self, storage):
+        """Unchanged threads should be served from the cache without reading turns again"""
+        thread_id = create_thread("chat", {"prompt": "Hello"})
+        add_turn(thread_id, "user", "First")
+        add_turn(thread_id, "assistant", "Second")
+
+        with patch.object(storage, "lrange", wraps=storage.lrange) as mock_lrange:
+            with patch.object(ThreadContext, "model_validate", wraps=ThreadContext.model_validate) as mock_validate:
+                first = get_thread(thread_id)
+                second = get_thread(thread_id)
+
+        assert [turn.content for turn in second.turns] == ["First", "Second"]
+        mock_lrange.assert_not_called()
+        mock_validate.assert_not_called()
+
+        # Callers get independent copies
+        first.turns.append(ConversationTurn(role="user", content="Local only", timestamp="2023-01-01T00:00:00Z"))
+        assert len(get_thread(thread_id).turns) == 2
+
+    def test_external_writes_invalidate_cache(self, storage):
+        """A record rewritten behind the cache's back (e.g. by another process) must be re-decoded"""
+        thread_id = create_thread("chat", {})
+        add_turn(thread_id, "user", "First")
+        assert len(get_thread(thread_id).turns) == 1
+
+        # Simulate another process appending a turn directly to storage
+        storage.rpush(
+            f"thread:{thread_id}:turns",
+            60,
+            ConversationTurn(role="assistant", content="Elsewhere", timestamp="2023-01-01T00:00:00Z").model_dump_json(),
+        )
+        metadata = json.loads(storage.get(f"thread:{thread_id}"))
+        metadata["last_updated_at"] = "2023-01-01T00:00:01Z"
+        storage.setex(f"thread:{thread_id}", 60, json.dumps(metadata))
+
+        assert [turn.content for turn in get_thread(thread_id).turns] == ["First", "Elsewhere"]
+
+
 if __name__ == "__main__":
     pytest.main([__file__])
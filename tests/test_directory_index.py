@@ -0,0 +1,75 @@
+"""
+Tests for the cached, gitignore-aware directory index used by expand_paths
+"""
+
+import os
+import time
+
+from utils.directory_index import DirectoryIndex
+from utils.file_utils import expand_paths
+
+
+def _age_tree(root):
+    """Backdate every directory so its listing is considered stable"""
+    old = time.time() - 3600
+    for dirpath, _, _ in os.walk(root):
+        os.utime(dirpath, (old, old))
+
+
+class TestDirectoryIndex:
+    """Test directory listing cache and .gitignore handling"""
+
+    def test_gitignore_patterns_are_honored(self, project_path):
+        """Ignored files and directories should not be expanded, negations re-include files"""
+        (project_path / ".gitignore").write_text("build/\n*.log.py\n/top_only.py\n!keep.log.py\n", encoding="utf-8")
+        (project_path / "build").mkdir()
+        (project_path / "build" / "generated.py").write_text("x = 1", encoding="utf-8")
+        (project_path / "debug.log.py").write_text("x = 1", encoding="utf-8")
+        (project_path / "keep.log.py").write_text("x = 1", encoding="utf-8")
+        (project_path / "top_only.py").write_text("x = 1", encoding="utf-8")
+        (project_path / "src").mkdir()
+        (project_path / "src" / "top_only.py").write_text("x = 1", encoding="utf-8")
+        (project_path / "src" / ".gitignore").write_text("local.py\n", encoding="utf-8")
+        (project_path / "src" / "local.py").write_text("x = 1", encoding="utf-8")
+        (project_path / "src" / "main.py").write_text("x = 1", encoding="utf-8")
+
+        names = {os.path.relpath(path, project_path) for path in expand_paths([str(project_path)])}
+
+        assert "build/generated.py" not in names
+        assert "debug.log.py" not in names
+        assert "keep.log.py" in names
+        assert "top_only.py" not in names
+        assert "src/top_only.py" in names  # Anchored pattern only applies at the .gitignore level
+        assert "src/local.py" not in names
+        assert "src/main.py" in names
+
+    def test_unchanged_directories_are_not_relisted(self, tmp_path):
+        """Repeated listings of a stable tree should reuse every cached directory"""
+        for package in ("a", "b"):
+            (tmp_path / package).mkdir()
+            (tmp_path / package / "module.py").write_text("x = 1", encoding="utf-8")
+        _age_tree(tmp_path)
+        index = DirectoryIndex()
+
+        first = index.list_files(tmp_path)
+        scanned = index.directories_scanned
+        second = index.list_files(tmp_path)
+
+        assert sorted(first) == sorted(second)
+        assert scanned == 3
+        assert index.directories_scanned == 3
+        assert index.directories_reused == 3
+
+    def test_changes_are_picked_up(self, tmp_path):
+        """Adding a file or editing .gitignore should invalidate only the affected listing"""
+        (tmp_path / "pkg").mkdir()
+        (tmp_path / "pkg" / "old.py").write_text("x = 1", encoding="utf-8")
+        _age_tree(tmp_path)
+        index = DirectoryIndex()
+        index.list_files(tmp_path, {".py"})
+
+        (tmp_path / "pkg" / "new.py").write_text("x = 2", encoding="utf-8")
+        assert {os.path.basename(p) for p in index.list_files(tmp_path, {".py"})} == {"old.py", "new.py"}
+
+        (tmp_path / "pkg" / ".gitignore").write_text("old.py\n", encoding="utf-8")
+        assert {os.path.basename(p) for p in index.list_files(tmp_path, {".py"})} == {"new.py"}
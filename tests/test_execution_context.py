@@ -0,0 +1,181 @@
+"""
+Tests for request-scoped tool execution state.
+
+Tool instances are shared singletons in server.py, so per-call state must not
+leak between concurrent executions of the same tool.
+"""
+
+import asyncio
+import json
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from tools.planner import PlannerTool
+from tools.shared.execution_context import (
+    WorkflowSessionStore,
+    request_state,
+    tool_execution_context,
+    workflow_state,
+)
+
+
+class _StatefulTool:
+    """Minimal tool-like class with declared execution state."""
+
+    current_value = request_state()
+    history = workflow_state(default_factory=list)
+
+    def __init__(self):
+        self.current_value = "initial"
+        self.history = []
+
+    async def run(self, value, delay):
+        with tool_execution_context(self):
+            self.current_value = value
+            self.history.append(value)
+            await asyncio.sleep(delay)
+            return self.current_value, list(self.history)
+
+
+class TestExecutionContext:
+    """Test request-scoped tool state"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_executions_do_not_share_state(self):
+        """Interleaved executions on one instance should each see only their own values"""
+        tool = _StatefulTool()
+        construction_history = tool.history
+
+        results = await asyncio.gather(tool.run("first", 0.05), tool.run("second", 0.01), tool.run("third", 0.03))
+
+        assert results == [("first", ["first"]), ("second", ["second"]), ("third", ["third"])]
+        # Construction-time instance values are never mutated by executions
+        assert construction_history == []
+
+    def test_attributes_behave_normally_outside_execution(self):
+        """Outside an execution, declared attributes act like plain instance attributes"""
+        tool = _StatefulTool()
+        assert tool.current_value == "initial"
+
+        tool.current_value = "changed"
+        tool.history.append("direct")
+
+        assert tool.current_value == "changed"
+        assert tool.history == ["direct"]
+
+    def test_execution_starts_from_defaults_not_instance_state(self):
+        """Executions must not read state left on the instance by a previous execution"""
+        tool = _StatefulTool()
+        tool.history.append("stale")
+
+        with tool_execution_context(tool):
+            assert tool.history == []
+            assert tool.current_value is None
+
+    def test_reentering_reuses_active_context(self):
+        """Nested entry for the same tool should share the outer context"""
+        tool = _StatefulTool()
+
+        with tool_execution_context(tool) as outer:
+            tool.current_value = "outer"
+            with tool_execution_context(tool) as inner:
+                assert inner is outer
+                assert tool.current_value == "outer"
+
+    def test_session_store_resolution(self):
+        """Workflow sessions are keyed by continuation_id and bounded in size"""
+        store = WorkflowSessionStore(max_sessions=2)
+
+        first = store.resolve(None, 1)
+        store.bind("thread-a", first)
+        second = store.resolve(None, 1)
+        store.bind("thread-b", second)
+
+        assert first is not second
+        assert store.resolve("thread-a", 2) is first
+        # Unknown continuation beyond step 1 resumes the latest session
+        assert store.resolve(None, 3) is first
+        # Step 1 always starts fresh, even for a known continuation_id
+        assert store.resolve("thread-a", 1) is not first
+
+        store.bind("thread-c", {})
+        assert len(store) == 2
+
+    @pytest.mark.asyncio
+    async def test_interleaved_planner_workflows_keep_separate_history(self):
+        """Two workflows on the same planner instance should not mix their step history"""
+        tool = PlannerTool()
+
+        with patch("utils.conversation_memory.add_turn"):
+            result_a = await tool.execute(
+                {"step": "Plan A step 1", "step_number": 1, "total_steps": 3, "next_step_required": True}
+            )
+            result_b = await tool.execute(
+                {"step": "Plan B step 1", "step_number": 1, "total_steps": 3, "next_step_required": True}
+            )
+            continuation_a = json.loads(result_a[0].text)["continuation_id"]
+            continuation_b = json.loads(result_b[0].text)["continuation_id"]
+            assert continuation_a != continuation_b
+
+            await tool.execute(
+                {
+                    "step": "Plan A step 2",
+                    "step_number": 2,
+                    "total_steps": 3,
+                    "next_step_required": True,
+                    "continuation_id": continuation_a,
+                }
+            )
+
+        session_a = tool._workflow_sessions.resolve(continuation_a, 3)
+        session_b = tool._workflow_sessions.resolve(continuation_b, 2)
+        assert [step["step"] for step in session_a["work_history"]] == ["Plan A step 1", "Plan A step 2"]
+        assert [step["step"] for step in session_b["work_history"]] == ["Plan B step 1"]
+
+    @pytest.mark.asyncio
+    async def test_thinkdeep_expert_analysis_uses_parameters_from_earlier_steps(self):
+        """Parameters given in step 1 should reach the expert call made at the final step"""
+        from providers.base import ModelResponse
+        from tools.thinkdeep import ThinkDeepTool
+        from utils.model_context import ModelContext
+
+        tool = ThinkDeepTool()
+        model_context = ModelContext("flash")
+        step = {
+            "total_steps": 2,
+            "findings": "Connection pool is exhausted under load",
+            "relevant_files": ["/absolute/path/pool.py"],
+            "model": "flash",
+            "_model_context": model_context,
+            "_resolved_model_name": "flash",
+        }
+        generate = AsyncMock(return_value=ModelResponse(content='{"status": "analysis_complete"}'))
+
+        with patch.object(ThinkDeepTool, "generate_model_response", generate):
+            result = await tool.execute_workflow(
+                {
+                    **step,
+                    "step": "Investigate the pool",
+                    "step_number": 1,
+                    "next_step_required": True,
+                    "temperature": 0.3,
+                    "thinking_mode": "low",
+                    "use_websearch": False,
+                }
+            )
+            continuation_id = json.loads(result[0].text)["continuation_id"]
+            await tool.execute_workflow(
+                {
+                    **step,
+                    "step": "Conclude",
+                    "step_number": 2,
+                    "next_step_required": False,
+                    "continuation_id": continuation_id,
+                }
+            )
+
+        expert_call = generate.call_args.kwargs
+        assert expert_call["temperature"] == 0.3
+        assert expert_call["thinking_mode"] == "low"
+        assert expert_call["use_websearch"] is False
@@ -0,0 +1,190 @@
+"""
+Tests for Gemini context caching of conversation files
+"""
+
+import dataclasses
+import os
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+
+import providers.gemini_context_cache
+from providers.gemini import GeminiModelProvider
+from providers.gemini_context_cache import (
+    CACHED_FILES_PLACEHOLDER,
+    KEY_LOCK_STRIPES,
+    MAX_CACHED_CONTENTS,
+    GeminiContextCache,
+)
+from utils.conversation_memory import (
+    ConversationTurn,
+    ThreadContext,
+    _embedded_conversation_files,
+    build_conversation_history,
+    get_embedded_conversation_files,
+)
+
+
+class _FakeCaches:
+    def __init__(self):
+        self.created = []
+        self.deleted = []
+        self.updated = []
+
+    def create(self, model, config):
+        name = f"cachedContents/{len(self.created) + 1}"
+        self.created.append((model, config))
+        return SimpleNamespace(name=name)
+
+    def update(self, name, config):
+        self.updated.append(name)
+
+    def delete(self, name):
+        self.deleted.append(name)
+
+
+class _NotFoundError(Exception):
+    code = 404
+
+
+@pytest.fixture
+def conversation_files(project_path):
+    source = project_path / "module.py"
+    source.write_text("value = 1\n" * 200, encoding="utf-8")
+    context = ThreadContext(
+        thread_id="12345678-1234-1234-1234-123456789012",
+        created_at="2023-01-01T00:00:00Z",
+        last_updated_at="2023-01-01T00:01:00Z",
+        tool_name="analyze",
+        turns=[
+            ConversationTurn(role="user", content="Analyze", timestamp="2023-01-01T00:00:00Z", files=[str(source)]),
+            ConversationTurn(role="assistant", content="Done", timestamp="2023-01-01T00:01:00Z"),
+        ],
+        initial_context={},
+    )
+    token = _embedded_conversation_files.set(None)
+    history, _ = build_conversation_history(context, model_context=None)
+    yield source, history, get_embedded_conversation_files()
+    _embedded_conversation_files.reset(token)
+
+
+class TestGeminiContextCache:
+    """Test creation, reuse and invalidation of cached contents"""
+
+    def test_history_records_embedded_files(self, conversation_files):
+        source, history, files = conversation_files
+
+        assert files.file_paths == (str(source),)
+        assert files.content in history
+        assert "value = 1" in files.content
+
+    def test_reused_until_files_change(self, conversation_files):
+        source, _, files = conversation_files
+        caches = _FakeCaches()
+        client = SimpleNamespace(caches=caches)
+        cache = GeminiContextCache(enabled=True, min_tokens=0, ttl_seconds=3600)
+
+        name = cache.get_cache_name(client, "gemini-2.5-pro", files)
+        assert cache.get_cache_name(client, "gemini-2.5-pro", files) == name
+        assert len(caches.created) == 1
+        assert caches.created[0][1].ttl == "3600s"
+        # Per model
+        cache.get_cache_name(client, "gemini-2.5-flash", files)
+        assert len(caches.created) == 2
+
+        stat = source.stat()
+        os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        changed = files.__class__(
+            thread_id=files.thread_id,
+            file_paths=files.file_paths,
+            file_versions=((str(source), source.stat().st_mtime_ns, stat.st_size),),
+            content=files.content,
+        )
+        new_name = cache.get_cache_name(client, "gemini-2.5-pro", changed)
+
+        assert new_name != name
+        assert caches.deleted == [name]
+        assert cache.get_stats() == {"entries": 2, "hits": 1, "misses": 3}
+
+    def test_small_file_blocks_and_create_failures_are_sent_inline(self, conversation_files):
+        _, _, files = conversation_files
+        client = SimpleNamespace(caches=Mock())
+        client.caches.create.side_effect = RuntimeError("caching not supported")
+
+        assert GeminiContextCache(enabled=True, min_tokens=1_000_000).get_cache_name(client, "flash", files) is None
+        client.caches.create.assert_not_called()
+
+        cache = GeminiContextCache(enabled=True, min_tokens=0)
+        assert cache.get_cache_name(client, "gemini-2.0-flash-lite", files) is None
+        assert cache.get_cache_name(client, "gemini-2.0-flash-lite", files) is None
+        assert client.caches.create.call_count == 1  # Backs off after a failure
+
+    def test_bookkeeping_is_bounded_by_the_entry_limit(self, conversation_files):
+        _, _, files = conversation_files
+        caches = _FakeCaches()
+        client = SimpleNamespace(caches=caches)
+        cache = GeminiContextCache(enabled=True, min_tokens=0, ttl_seconds=3600)
+
+        for i in range(MAX_CACHED_CONTENTS + 10):
+            file_set = dataclasses.replace(files, file_paths=files.file_paths + (f"/tmp/other_{i}.py",))
+            cache.get_cache_name(client, "gemini-2.5-pro", file_set)
+
+        assert cache.get_stats()["entries"] == MAX_CACHED_CONTENTS
+        assert len(caches.deleted) == 10
+        # Creation locks are striped rather than kept per file set ever seen
+        assert len(cache._key_locks) == KEY_LOCK_STRIPES
+
+
+class TestGeminiProviderContextCache:
+    """Test that the provider sends cached files by reference"""
+
+    @pytest.fixture
+    def provider(self, monkeypatch):
+        cache = GeminiContextCache(enabled=True, min_tokens=0, ttl_seconds=3600)
+        monkeypatch.setattr(providers.gemini_context_cache, "_context_cache", cache)
+        provider = GeminiModelProvider(api_key="test-key")
+        provider._client = Mock()
+        provider._client.caches = _FakeCaches()
+        provider._client.models.generate_content.return_value = Mock(
+            text="Analysis", candidates=[], usage_metadata=None
+        )
+        return provider
+
+    def test_prompt_references_cached_files(self, provider, conversation_files):
+        _, history, files = conversation_files
+
+        provider.generate_content(prompt=f"{history}\n\nWhat next?", model_name="gemini-2.5-flash")
+
+        kwargs = provider._client.models.generate_content.call_args.kwargs
+        assert kwargs["config"].cached_content == "cachedContents/1"
+        sent_text = kwargs["contents"][0]["parts"][0]["text"]
+        assert files.content not in sent_text
+        assert CACHED_FILES_PLACEHOLDER in sent_text
+        assert sent_text.endswith("What next?")
+
+    @pytest.mark.asyncio
+    async def test_native_async_requests_use_cache(self, provider, conversation_files):
+        _, history, _ = conversation_files
+        provider._client.aio.models.generate_content = AsyncMock(
+            return_value=provider._client.models.generate_content.return_value
+        )
+
+        await provider.agenerate_content(prompt=history, model_name="gemini-2.5-flash")
+        await provider.agenerate_content(prompt=history, model_name="gemini-2.5-flash")
+
+        assert provider._client.aio.models.generate_content.call_args.kwargs["config"].cached_content
+        assert len(provider._client.caches.created) == 1
+
+    def test_unusable_cache_falls_back_to_inline_files(self, provider, conversation_files):
+        _, history, files = conversation_files
+        response = provider._client.models.generate_content.return_value
+        provider._client.models.generate_content.side_effect = [_NotFoundError("CachedContent not found"), response]
+
+        result = provider.generate_content(prompt=history, model_name="gemini-2.5-flash")
+
+        assert result.content == "Analysis"
+        retried = provider._client.models.generate_content.call_args.kwargs
+        assert retried["config"].cached_content is None
+        assert files.content in retried["contents"][0]["parts"][0]["text"]
+        assert provider._client.caches.deleted == ["cachedContents/1"]
@@ -90,6 +90,19 @@ class TestGeminiTokenUsage(unittest.TestCase):
         self.assertEqual(usage["output_tokens"], 0)
         self.assertEqual(usage["total_tokens"], 0)
 
+    def test_extract_usage_with_cached_tokens(self):
+        """Test that context cache hits are reported."""
+        response = Mock()
+        response.usage_metadata = Mock()
+        response.usage_metadata.prompt_token_count = 2000
+        response.usage_metadata.candidates_token_count = 50
+        response.usage_metadata.cached_content_token_count = 1024
+
+        usage = self.provider._extract_usage(response)
+
+        self.assertEqual(usage["cached_input_tokens"], 1024)
+        self.assertEqual(usage["total_tokens"], 2050)
+
     def test_extract_usage_missing_attributes(self):
         """Test token extraction when metadata lacks token count attributes."""
         response = Mock()
@@ -0,0 +1,80 @@
+"""
+Tests for the precomputed model name resolution index
+"""
+
+import pytest
+
+from providers.base import ProviderType
+from providers.custom import CustomProvider
+from providers.gemini import GeminiModelProvider
+from providers.openai_provider import OpenAIModelProvider
+from providers.openrouter import OpenRouterProvider
+from providers.registry import ModelProviderRegistry
+
+
+@pytest.mark.no_mock_provider
+class TestModelIndex:
+    """Test name resolution and routing through the model index"""
+
+    @pytest.fixture(autouse=True)
+    def providers(self, monkeypatch):
+        monkeypatch.setenv("GEMINI_API_KEY", "test-gemini-key")
+        monkeypatch.setenv("OPENAI_API_KEY", "test-openai-key")
+        monkeypatch.setenv("OPENROUTER_API_KEY", "test-openrouter-key")
+        monkeypatch.setenv("CUSTOM_API_URL", "http://localhost:11434/v1")
+        for name in ("GOOGLE_ALLOWED_MODELS", "OPENAI_ALLOWED_MODELS", "OPENROUTER_ALLOWED_MODELS"):
+            monkeypatch.delenv(name, raising=False)
+        import utils.model_restrictions
+
+        monkeypatch.setattr(utils.model_restrictions, "_restriction_service", None)
+
+        registry = ModelProviderRegistry()
+        monkeypatch.setattr(registry, "_providers", {})
+        monkeypatch.setattr(registry, "_initialized_providers", {})
+        ModelProviderRegistry.register_provider(ProviderType.GOOGLE, GeminiModelProvider)
+        ModelProviderRegistry.register_provider(ProviderType.OPENAI, OpenAIModelProvider)
+        ModelProviderRegistry.register_provider(ProviderType.CUSTOM, CustomProvider)
+        ModelProviderRegistry.register_provider(ProviderType.OPENROUTER, OpenRouterProvider)
+
+    def test_aliases_resolve_to_canonical_names_and_capabilities(self):
+        index = ModelProviderRegistry.get_model_index()
+
+        entry = index.resolve("Flash")
+        assert entry.provider_type == ProviderType.GOOGLE
+        assert entry.model_name == "gemini-2.5-flash"
+        assert entry.capabilities.context_window == 1_048_576
+        assert index.get_entry("o3-mini", ProviderType.OPENAI).allowed
+        assert "o3" in index.list_models(ProviderType.OPENAI)
+        assert index.get_available_models()["o3"] == ProviderType.OPENAI
+
+    def test_index_is_reused_until_registry_state_changes(self):
+        index = ModelProviderRegistry.get_model_index()
+        assert ModelProviderRegistry.get_model_index() is index
+
+        ModelProviderRegistry.unregister_provider(ProviderType.CUSTOM)
+        rebuilt = ModelProviderRegistry.get_model_index()
+        assert rebuilt is not index
+
+        ModelProviderRegistry.invalidate_model_index()
+        assert ModelProviderRegistry.get_model_index() is not rebuilt
+
+    def test_restricted_names_fall_through_to_catch_all_provider(self, monkeypatch):
+        monkeypatch.setenv("OPENAI_ALLOWED_MODELS", "o4-mini")
+        import utils.model_restrictions
+
+        monkeypatch.setattr(utils.model_restrictions, "_restriction_service", None)
+
+        index = ModelProviderRegistry.get_model_index()
+        assert not index.get_entry("o3", ProviderType.OPENAI).allowed
+        assert "o3" not in index.list_models(ProviderType.OPENAI)
+        assert ModelProviderRegistry.get_provider_for_model("o4-mini").get_provider_type() == ProviderType.OPENAI
+        assert ModelProviderRegistry.get_provider_for_model("o3").get_provider_type() == ProviderType.OPENROUTER
+
+    def test_unlisted_names_are_validated_by_open_providers(self):
+        # Local model names are not in custom_models.json but the custom provider accepts them
+        assert ModelProviderRegistry.get_model_index().lookup("llama3.2:latest") == ()
+        provider = ModelProviderRegistry.get_provider_for_model("llama3.2:latest")
+        assert provider.get_provider_type() == ProviderType.CUSTOM
+
+        provider = ModelProviderRegistry.get_provider_for_model("mistralai/some-new-model")
+        assert provider.get_provider_type() == ProviderType.OPENROUTER
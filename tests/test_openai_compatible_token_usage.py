@@ -116,6 +116,24 @@ class TestOpenAICompatibleTokenUsage(unittest.TestCase):
         self.assertEqual(usage["output_tokens"], 0)
         self.assertEqual(usage["total_tokens"], 0)
 
+    def test_extract_usage_with_cached_tokens(self):
+        """Test that prompt cache hits are reported when the provider reports them."""
+        response = Mock()
+        response.usage = Mock()
+        response.usage.prompt_tokens = 2000
+        response.usage.completion_tokens = 50
+        response.usage.total_tokens = 2050
+        response.usage.prompt_tokens_details = Mock(cached_tokens=1536)
+
+        usage = self.provider._extract_usage(response)
+
+        self.assertEqual(usage["cached_input_tokens"], 1536)
+
+        # Not reported when the provider returns no details
+        response.usage.prompt_tokens_details = None
+        response.usage.input_tokens_details = None
+        self.assertNotIn("cached_input_tokens", self.provider._extract_usage(response))
+
     def test_alternative_token_format_with_none(self):
         """Test alternative token format (input_tokens/output_tokens) with None values."""
         # This tests the other code path in generate_content_openai_responses
@@ -0,0 +1,142 @@
+"""
+Tests for opt-in startup and tool call profiling
+"""
+
+import json
+import logging
+import sys
+import time
+
+import pytest
+from mcp.types import TextContent
+
+import utils.profiling
+from utils.profiling import (
+    PROFILE_LOGGER_NAME,
+    ImportTimer,
+    annotate_profile,
+    profile_phase,
+    profile_tool_calls,
+    record_provider_init,
+    write_startup_profile,
+)
+
+
+class _RecordCollector(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(json.loads(record.getMessage()))
+
+
+@pytest.fixture
+def profile_records(monkeypatch):
+    monkeypatch.setenv("PROFILING_ENABLED", "true")
+    collector = _RecordCollector()
+    profile_logger = logging.getLogger(PROFILE_LOGGER_NAME)
+    # Detach the server's profile log file so test records never reach logs/mcp_profile.jsonl
+    previous_handlers = profile_logger.handlers[:]
+    previous_level, previous_propagate = profile_logger.level, profile_logger.propagate
+    profile_logger.handlers = [collector]
+    profile_logger.setLevel(logging.INFO)
+    profile_logger.propagate = False
+    yield collector.records
+    profile_logger.handlers = previous_handlers
+    profile_logger.setLevel(previous_level)
+    profile_logger.propagate = previous_propagate
+
+
+@profile_phase("file_reading")
+def _read():
+    with profile_phase("file_expansion"):
+        time.sleep(0.02)
+    time.sleep(0.01)
+
+
+@profile_tool_calls
+async def _handler(name, arguments):
+    with profile_phase("prompt_build"):
+        _read()
+    with profile_phase("provider_call"):
+        time.sleep(0.01)
+    annotate_profile(model="flash")
+    return [TextContent(type="text", text=json.dumps({"status": "success"}))]
+
+
+class TestToolCallProfile:
+    """Test tool call profile records"""
+
+    @pytest.mark.asyncio
+    async def test_records_exclusive_phase_times(self, profile_records):
+        await _handler("chat", {})
+
+        (record,) = profile_records
+        assert record["event"] == "tool_call"
+        assert record["tool"] == "chat"
+        assert record["model"] == "flash"
+        assert record["status"] == "success"
+        phases = record["phases"]
+        assert set(phases) == {"prompt_build", "file_reading", "file_expansion", "provider_call"}
+        assert phases["file_expansion"]["ms"] >= 20
+        # Time spent expanding paths is not counted again under file reading or prompt build
+        assert 10 <= phases["file_reading"]["ms"] < 20
+        assert phases["prompt_build"]["ms"] < 10
+        covered = sum(phase["ms"] for phase in phases.values())
+        assert record["total_ms"] == pytest.approx(covered + record["other_ms"], abs=0.01)
+
+    @pytest.mark.asyncio
+    async def test_disabled_by_default(self, profile_records, monkeypatch):
+        monkeypatch.delenv("PROFILING_ENABLED")
+
+        await _handler("chat", {})
+        _read()
+
+        assert profile_records == []
+
+    @pytest.mark.asyncio
+    async def test_failed_call_is_recorded(self, profile_records):
+        @profile_tool_calls
+        async def failing_handler(name, arguments):
+            raise RuntimeError("boom")
+
+        with pytest.raises(RuntimeError):
+            await failing_handler("debug", {})
+
+        assert profile_records[0]["status"] == "exception"
+
+    def test_server_handler_is_profiled(self):
+        import server
+
+        assert server.handle_call_tool.__wrapped__.__name__ == "handle_call_tool"
+
+
+class TestStartupProfile:
+    """Test import timing and the startup record"""
+
+    def test_import_times_and_provider_init(self, profile_records, tmp_path, monkeypatch):
+        (tmp_path / "profiled_outer.py").write_text("import time\nimport profiled_inner\ntime.sleep(0.01)\n")
+        (tmp_path / "profiled_inner.py").write_text("import time\ntime.sleep(0.02)\n")
+        monkeypatch.syspath_prepend(str(tmp_path))
+        for name in ("profiled_outer", "profiled_inner"):
+            monkeypatch.delitem(sys.modules, name, raising=False)
+        monkeypatch.setattr(utils.profiling, "_provider_init_seconds", {})
+
+        timer = ImportTimer()
+        timer.install()
+        try:
+            import profiled_outer  # noqa: F401
+        finally:
+            timer.uninstall()
+        record_provider_init("google", 0.005)
+        write_startup_profile({"imports": 0.5, "providers": 0.1}, timer)
+
+        (record,) = profile_records
+        assert record["event"] == "startup"
+        assert record["total_ms"] == 600
+        assert record["provider_init_ms"]["google"] == 5
+        imports = {entry["module"]: entry for entry in record["slowest_imports"]}
+        assert imports["profiled_inner"]["self_ms"] >= 20
+        assert 10 <= imports["profiled_outer"]["self_ms"] < 20
+        assert imports["profiled_outer"]["cumulative_ms"] >= 30
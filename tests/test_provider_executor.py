@@ -0,0 +1,150 @@
+"""
+Tests for the provider execution layer that keeps blocking provider calls off the event loop.
+"""
+
+import asyncio
+import threading
+import time
+from unittest.mock import Mock
+
+import pytest
+
+from providers.base import ProviderType
+from providers.executor import ProviderExecutor, get_provider_executor
+
+
+def _make_provider(provider_type=ProviderType.GOOGLE, delay=0.0, result="ok"):
+    """Create a mock provider whose generate_content blocks for `delay` seconds."""
+    provider = Mock()
+    provider.get_provider_type.return_value = provider_type
+
+    def generate_content(**kwargs):
+        time.sleep(delay)
+        return result
+
+    provider.generate_content.side_effect = generate_content
+    return provider
+
+
+class TestProviderExecutor:
+    """Test bounded provider execution"""
+
+    @pytest.mark.asyncio
+    async def test_generate_content_runs_off_event_loop(self):
+        """Blocking calls should run in a worker thread, not the event loop thread"""
+        executor = ProviderExecutor(max_workers=2, default_concurrency=2)
+        provider = Mock()
+        provider.get_provider_type.return_value = ProviderType.OPENAI
+        provider.generate_content.side_effect = lambda **kwargs: threading.current_thread().name
+
+        thread_name = await executor.generate_content(provider, prompt="hi", model_name="o3-mini")
+
+        assert thread_name.startswith("zen-provider")
+        provider.generate_content.assert_called_once_with(prompt="hi", model_name="o3-mini")
+        executor.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_overlap(self):
+        """Concurrent calls should take roughly as long as the slowest one"""
+        executor = ProviderExecutor(max_workers=4, default_concurrency=4)
+        provider = _make_provider(delay=0.2)
+
+        start = time.monotonic()
+        results = await asyncio.gather(*[executor.generate_content(provider, prompt=str(i)) for i in range(4)])
+        elapsed = time.monotonic() - start
+
+        assert results == ["ok"] * 4
+        assert elapsed < 0.6
+        executor.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_event_loop_stays_responsive(self):
+        """Other coroutines should make progress while a provider call is running"""
+        executor = ProviderExecutor(max_workers=2, default_concurrency=2)
+        provider = _make_provider(delay=0.3)
+        ticks = []
+
+        async def ticker():
+            for _ in range(5):
+                ticks.append(time.monotonic())
+                await asyncio.sleep(0.02)
+
+        await asyncio.gather(executor.generate_content(provider), ticker())
+
+        assert len(ticks) == 5
+        assert ticks[-1] - ticks[0] < 0.25
+        executor.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_per_provider_limit_and_queue_metrics(self, monkeypatch):
+        """Calls beyond the per-provider limit should queue and be reported in metrics"""
+        monkeypatch.setenv("GOOGLE_MAX_CONCURRENT_CALLS", "1")
+        executor = ProviderExecutor(max_workers=4, default_concurrency=4)
+        provider = _make_provider(ProviderType.GOOGLE, delay=0.1)
+
+        start = time.monotonic()
+        await asyncio.gather(*[executor.generate_content(provider) for _ in range(3)])
+        elapsed = time.monotonic() - start
+
+        # Serialized by the limit of 1
+        assert elapsed >= 0.3
+        stats = executor.get_stats()["google"]
+        assert stats["limit"] == 1
+        assert stats["completed"] == 3
+        assert stats["failed"] == 0
+        assert stats["in_flight"] == 0
+        assert stats["queued"] == 0
+        assert stats["max_queue_depth"] >= 2
+        executor.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_limits_are_independent_per_provider(self, monkeypatch):
+        """A saturated provider should not block calls to another provider"""
+        monkeypatch.setenv("OPENAI_MAX_CONCURRENT_CALLS", "1")
+        executor = ProviderExecutor(max_workers=4, default_concurrency=4)
+        slow_openai = _make_provider(ProviderType.OPENAI, delay=0.3)
+        fast_gemini = _make_provider(ProviderType.GOOGLE, delay=0.0, result="fast")
+
+        slow_tasks = [asyncio.ensure_future(executor.generate_content(slow_openai)) for _ in range(2)]
+        await asyncio.sleep(0.05)
+
+        start = time.monotonic()
+        assert await executor.generate_content(fast_gemini) == "fast"
+        assert time.monotonic() - start < 0.2
+
+        await asyncio.gather(*slow_tasks)
+        executor.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_exceptions_propagate_and_are_counted(self):
+        """Provider exceptions should reach the caller and count as failures"""
+        executor = ProviderExecutor(max_workers=1, default_concurrency=1)
+        provider = Mock()
+        provider.get_provider_type.return_value = ProviderType.XAI
+        provider.generate_content.side_effect = RuntimeError("boom")
+
+        with pytest.raises(RuntimeError, match="boom"):
+            await executor.generate_content(provider)
+
+        stats = executor.get_stats()["xai"]
+        assert stats["failed"] == 1
+        assert stats["in_flight"] == 0
+
+        # Slot must be released so subsequent calls still run
+        provider.generate_content.side_effect = None
+        provider.generate_content.return_value = "recovered"
+        assert await executor.generate_content(provider) == "recovered"
+        executor.shutdown()
+
+    def test_invalid_env_values_fall_back_to_defaults(self, monkeypatch):
+        """Invalid configuration should not break the executor"""
+        monkeypatch.setenv("PROVIDER_MAX_CONCURRENT_CALLS", "not-a-number")
+        monkeypatch.setenv("OPENAI_MAX_CONCURRENT_CALLS", "0")
+        executor = ProviderExecutor(max_workers=1)
+
+        assert executor.default_concurrency == 8
+        assert executor.get_concurrency_limit("openai") == 8
+
+    def test_singleton(self):
+        """get_provider_executor should return the same instance"""
+        assert get_provider_executor() is get_provider_executor()
@@ -0,0 +1,286 @@
+"""
+Tests for provider circuit breakers and health-aware routing
+"""
+
+import asyncio
+import threading
+import time
+from unittest.mock import Mock
+
+import httpx
+import openai
+import pytest
+
+from providers.base import ProviderType
+from providers.executor import ProviderExecutor
+from providers.gemini import GeminiModelProvider
+from providers.health import ProviderHealth, get_provider_health, is_provider_failure
+from providers.openai_provider import OpenAIModelProvider
+from providers.openrouter import OpenRouterProvider
+from providers.registry import LATENCY_MIN_SAMPLES, ModelProviderRegistry
+from tools.models import ToolModelCategory
+
+
+def _api_failure(message="OpenAI API error for model o3 after 4 attempts: 503 Service Unavailable"):
+    """Create the RuntimeError providers raise once retries are exhausted."""
+    try:
+        raise RuntimeError(message) from ConnectionError("upstream unavailable")
+    except RuntimeError as e:
+        return e
+
+
+class TestCircuitBreaker:
+    """Test circuit state transitions"""
+
+    def test_opens_after_consecutive_failures_and_recovers(self):
+        health = ProviderHealth(failure_threshold=3, reset_seconds=0.05)
+
+        for _ in range(2):
+            health.record_failure("openai", "o3", _api_failure())
+        assert health.is_available("openai")
+
+        health.record_failure("openai", "o3", _api_failure())
+        assert not health.is_available("openai")
+        assert health.get_stats()["openai"]["state"] == "open"
+
+        time.sleep(0.06)
+        assert health.is_available("openai")  # Half-open: let a probe through
+        probe = health.start_call("openai")
+        health.record_success("openai", "o3", 1.5, probe)
+        assert health.get_stats()["openai"]["state"] == "closed"
+        assert health.get_latency("openai", "o3") == 1.5
+
+    def test_failed_probe_reopens_for_longer(self):
+        health = ProviderHealth(failure_threshold=1, reset_seconds=0.05)
+        health.record_failure("google", None, _api_failure())
+        time.sleep(0.06)
+
+        probe = health.start_call("google")
+        health.record_failure("google", None, _api_failure(), probe)
+        health.end_call("google", probe)
+
+        assert not health.is_available("google")
+        time.sleep(0.06)
+        assert not health.is_available("google")  # Reset period doubled to 0.1s
+
+    def test_half_open_lets_a_single_probe_through(self):
+        health = ProviderHealth(failure_threshold=1, reset_seconds=0.05)
+        health.record_failure("openai", "o3", _api_failure())
+        time.sleep(0.06)
+
+        assert health.is_available("openai")
+        probe = health.start_call("openai")
+        assert probe is not None
+        # The circuit stays open to everyone else while the probe is in flight
+        assert not health.is_available("openai")
+        assert health.start_call("openai") is None
+        assert health.get_stats()["openai"]["probing"]
+
+        # A probe ending without a verdict (e.g. a client error) frees the slot for the next caller
+        health.end_call("openai", probe)
+        assert health.is_available("openai")
+
+        probe = health.start_call("openai")
+        health.record_failure("openai", "o3", _api_failure(), probe)
+        health.end_call("openai", probe)
+        assert not health.is_available("openai")
+
+        time.sleep(0.11)
+        probe = health.start_call("openai")
+        health.record_success("openai", "o3", 1.0, probe)
+        health.end_call("openai", probe)
+        assert health.is_available("openai")
+        assert health.start_call("openai") is None  # Closed circuits need no probe
+
+    def test_only_the_probe_moves_a_half_open_circuit(self):
+        health = ProviderHealth(failure_threshold=1, reset_seconds=0.05)
+        health.record_failure("openai", "o3", _api_failure())
+        time.sleep(0.06)
+        probe = health.start_call("openai")
+
+        # A call started before the circuit opened fails while the probe is in flight
+        health.record_failure("openai", "o3", _api_failure())
+        stats = health.get_stats()["openai"]
+        assert stats["state"] == "half_open"
+        assert stats["probing"]
+        assert stats["failures"] == 2
+        # ...and one sent through the all-providers-failing fallback succeeds
+        health.record_success("openai", "o3", 1.0)
+        assert health.get_stats()["openai"]["state"] == "half_open"
+        assert not health.is_available("openai")
+
+        health.record_success("openai", "o3", 1.0, probe)
+        health.end_call("openai", probe)
+        assert health.get_stats()["openai"]["state"] == "closed"
+        assert health.is_available("openai")
+
+    def test_client_errors_do_not_count(self):
+        request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+        bad_request = openai.BadRequestError(
+            "context too long", response=httpx.Response(400, request=request), body=None
+        )
+        try:
+            raise RuntimeError("OpenAI API error for model o3 after 1 attempt") from bad_request
+        except RuntimeError as e:
+            wrapped_bad_request = e
+
+        assert not is_provider_failure(ValueError("Temperature 3 is out of range"))
+        assert not is_provider_failure(wrapped_bad_request)
+        assert is_provider_failure(_api_failure())
+
+
+class TestRollingStatistics:
+    """Test percentile and error rate tracking per model"""
+
+    def test_percentiles_and_error_rate(self):
+        health = ProviderHealth()
+        for seconds in range(1, 21):
+            health.record_success("google", "gemini-2.5-flash", float(seconds))
+        health.record_failure("google", "gemini-2.5-flash", _api_failure())
+        health.record_failure("google", "gemini-2.5-flash", ValueError("invalid temperature"))  # Ignored
+
+        stats = health.get_model_stats("google", "gemini-2.5-flash")
+
+        assert stats["p50_seconds"] == 10.0
+        assert stats["p95_seconds"] == 19.0
+        assert stats["error_rate"] == 1 / 21
+        assert stats["window_samples"] == 20
+        assert health.get_model_stats("google", "gemini-2.5-pro") is None
+
+
+class TestHealthAwareRouting:
+    """Test registry routing around providers with open circuits"""
+
+    @pytest.fixture
+    def openai_and_openrouter(self, monkeypatch):
+        monkeypatch.setenv("OPENAI_API_KEY", "test-openai-key")
+        monkeypatch.setenv("OPENROUTER_API_KEY", "test-openrouter-key")
+        for name in ("OPENAI_ALLOWED_MODELS", "OPENROUTER_ALLOWED_MODELS"):
+            monkeypatch.delenv(name, raising=False)
+        import utils.model_restrictions
+
+        monkeypatch.setattr(utils.model_restrictions, "_restriction_service", None)
+
+        registry = ModelProviderRegistry()
+        monkeypatch.setattr(registry, "_providers", {})
+        monkeypatch.setattr(registry, "_initialized_providers", {})
+        ModelProviderRegistry.register_provider(ProviderType.OPENAI, OpenAIModelProvider)
+        ModelProviderRegistry.register_provider(ProviderType.OPENROUTER, OpenRouterProvider)
+
+    @pytest.mark.no_mock_provider
+    def test_open_circuit_falls_through_to_next_provider(self, openai_and_openrouter):
+        assert ModelProviderRegistry.get_provider_for_model("o3-mini").get_provider_type() == ProviderType.OPENAI
+
+        health = get_provider_health()
+        for _ in range(health.failure_threshold):
+            health.record_failure("openai", "o3-mini", _api_failure())
+
+        provider = ModelProviderRegistry.get_provider_for_model("o3-mini")
+        assert provider.get_provider_type() == ProviderType.OPENROUTER
+
+        # Without an alternative, the unhealthy provider is still preferred over no provider at all
+        ModelProviderRegistry.unregister_provider(ProviderType.OPENROUTER)
+        assert ModelProviderRegistry.get_provider_for_model("o3-mini").get_provider_type() == ProviderType.OPENAI
+
+    @pytest.mark.asyncio
+    async def test_executor_feeds_outcomes_and_latency(self):
+        executor = ProviderExecutor(max_workers=1, default_concurrency=1)
+        provider = Mock()
+        provider.get_provider_type.return_value = ProviderType.XAI
+        provider.generate_content.side_effect = [_api_failure(), "ok"]
+
+        with pytest.raises(RuntimeError):
+            await executor.generate_content(provider, prompt="hi", model_name="grok-3")
+        await executor.generate_content(provider, prompt="hi", model_name="grok-3")
+
+        stats = get_provider_health().get_stats()["xai"]
+        assert stats["failures"] == 1
+        assert stats["successes"] == 1
+        assert stats["models"]["grok-3"]["samples"] == 1
+        executor.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_executor_sends_a_single_half_open_probe(self, monkeypatch):
+        health = ProviderHealth(failure_threshold=1, reset_seconds=0.05)
+        monkeypatch.setattr("providers.executor.get_provider_health", lambda: health)
+        health.record_failure("xai", "grok-3", _api_failure())
+        time.sleep(0.06)
+
+        executor = ProviderExecutor(max_workers=2, default_concurrency=2)
+        release = threading.Event()
+        probe_started = threading.Event()
+        provider = Mock()
+        provider.get_provider_type.return_value = ProviderType.XAI
+
+        def slow_probe(**kwargs):
+            probe_started.set()
+            release.wait(5)
+            return "ok"
+
+        provider.generate_content.side_effect = slow_probe
+
+        call = asyncio.create_task(executor.generate_content(provider, prompt="hi", model_name="grok-3"))
+        await asyncio.to_thread(probe_started.wait, 5)
+
+        # Other requests are routed elsewhere until the probe reports back
+        assert not health.is_available("xai")
+        release.set()
+        await call
+
+        assert health.is_available("xai")
+        assert health.get_stats()["xai"]["state"] == "closed"
+        executor.shutdown()
+
+
+@pytest.mark.no_mock_provider
+class TestLatencyAwareAutoMode:
+    """Test auto mode picking the fastest model of a quality tier"""
+
+    @pytest.fixture(autouse=True)
+    def openai_and_gemini(self, monkeypatch):
+        monkeypatch.setenv("OPENAI_API_KEY", "test-openai-key")
+        monkeypatch.setenv("GEMINI_API_KEY", "test-gemini-key")
+        for name in ("OPENAI_ALLOWED_MODELS", "GOOGLE_ALLOWED_MODELS", "AUTO_MODE_FAST_RESPONSE_TIER"):
+            monkeypatch.delenv(name, raising=False)
+        import utils.model_restrictions
+
+        monkeypatch.setattr(utils.model_restrictions, "_restriction_service", None)
+
+        registry = ModelProviderRegistry()
+        monkeypatch.setattr(registry, "_providers", {})
+        monkeypatch.setattr(registry, "_initialized_providers", {})
+        ModelProviderRegistry.register_provider(ProviderType.OPENAI, OpenAIModelProvider)
+        ModelProviderRegistry.register_provider(ProviderType.GOOGLE, GeminiModelProvider)
+
+    @staticmethod
+    def _record(provider_key, model_name, seconds):
+        for _ in range(LATENCY_MIN_SAMPLES):
+            get_provider_health().record_success(provider_key, model_name, seconds)
+
+    def test_static_preference_without_measurements(self):
+        self._record("google", "gemini-2.5-flash", 1.0)  # o4-mini itself has not been measured yet
+
+        assert ModelProviderRegistry.get_auto_mode_model(ToolModelCategory.FAST_RESPONSE) == "o4-mini"
+
+    def test_fastest_tier_model_wins(self):
+        self._record("openai", "o4-mini", 12.0)
+        self._record("google", "gemini-2.5-flash", 3.0)
+
+        assert ModelProviderRegistry.get_auto_mode_model(ToolModelCategory.FAST_RESPONSE) == "gemini-2.5-flash"
+        # Extended reasoning has no latency tier and keeps its static choice
+        assert ModelProviderRegistry.get_auto_mode_model(ToolModelCategory.EXTENDED_REASONING) == "o3"
+
+    def test_failing_or_untiered_models_are_skipped(self, monkeypatch):
+        self._record("openai", "o4-mini", 12.0)
+        self._record("google", "gemini-2.5-flash", 3.0)
+        for _ in range(LATENCY_MIN_SAMPLES):
+            get_provider_health().record_failure("google", "gemini-2.5-flash", _api_failure())
+
+        assert ModelProviderRegistry.get_auto_mode_model(ToolModelCategory.FAST_RESPONSE) == "o4-mini"
+
+        get_provider_health().reset()
+        self._record("openai", "o4-mini", 12.0)
+        self._record("google", "gemini-2.5-flash", 3.0)
+        monkeypatch.setenv("AUTO_MODE_FAST_RESPONSE_TIER", "o4-mini,o3-mini")
+
+        assert ModelProviderRegistry.get_auto_mode_model(ToolModelCategory.FAST_RESPONSE) == "o4-mini"
@@ -0,0 +1,127 @@
+"""
+Tests for the shared provider retry engine
+"""
+
+import asyncio
+import email.utils
+import time
+from unittest.mock import patch
+
+import httpx
+import openai
+import pytest
+
+from providers.openai_provider import OpenAIModelProvider
+from providers.retry import (
+    ProviderCooldown,
+    RetryExhaustedError,
+    RetryPolicy,
+    acall_with_retry,
+    call_with_retry,
+    get_retry_after,
+)
+
+
+def _status_error(error_class, status_code, headers=None, body=None):
+    """Create an OpenAI SDK status error with a real httpx response."""
+    request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+    response = httpx.Response(status_code, headers=headers or {}, request=request)
+    return error_class(f"Error code: {status_code}", response=response, body=body)
+
+
+class TestRetryPolicy:
+    """Test delay calculation"""
+
+    def test_backoff_is_exponential_with_jitter(self):
+        policy = RetryPolicy(base_delay=2.0, max_delay=16.0)
+        for retry_number, (low, high) in enumerate([(1, 2), (2, 4), (4, 8), (8, 16), (8, 16)]):
+            delays = {policy.backoff(retry_number) for _ in range(20)}
+            assert all(low <= delay <= high for delay in delays)
+            assert len(delays) > 1
+
+    def test_retry_after_headers(self):
+        assert get_retry_after(_status_error(openai.RateLimitError, 429, {"retry-after": "7"})) == 7
+        assert get_retry_after(_status_error(openai.RateLimitError, 429, {"retry-after-ms": "250"})) == 0.25
+        retry_at = email.utils.formatdate(time.time() + 30, usegmt=True)
+        assert 25 < get_retry_after(_status_error(openai.RateLimitError, 429, {"retry-after": retry_at})) <= 30
+        assert get_retry_after(Exception("429 Too Many Requests")) is None
+
+    def test_retry_after_beyond_max_wait_gives_up(self):
+        policy = RetryPolicy(max_wait=10)
+        assert 5 <= policy.delay_for(0, _status_error(openai.RateLimitError, 429, {"retry-after": "5"})) <= 5.5
+        assert policy.delay_for(0, _status_error(openai.RateLimitError, 429, {"retry-after": "120"})) is None
+
+
+class TestRetryEngine:
+    """Test call_with_retry / acall_with_retry"""
+
+    def test_sync_retries_then_succeeds(self):
+        results = [ConnectionError("reset"), ConnectionError("reset"), "ok"]
+
+        def attempt():
+            result = results.pop(0)
+            if isinstance(result, Exception):
+                raise result
+            return result
+
+        with patch("providers.retry.time.sleep") as mock_sleep:
+            assert call_with_retry(attempt, lambda e: True, description="test") == "ok"
+        assert mock_sleep.call_count == 2
+
+    def test_non_retryable_error_stops_immediately(self):
+        def attempt():
+            raise ValueError("bad request")
+
+        with pytest.raises(RetryExhaustedError) as exc_info:
+            call_with_retry(attempt, lambda e: False, description="test")
+        assert exc_info.value.attempts == 1
+        assert exc_info.value.attempts_text == "1 attempt"
+        assert isinstance(exc_info.value.last_exception, ValueError)
+
+    @pytest.mark.asyncio
+    async def test_rate_limit_starts_shared_cooldown(self):
+        """A 429 on one call should hold back other calls to the same provider"""
+        cooldown = ProviderCooldown("test")
+        policy = RetryPolicy(max_attempts=2)
+        rate_limited = _status_error(openai.RateLimitError, 429, {"retry-after-ms": "200"})
+        first_calls = []
+
+        async def first():
+            first_calls.append(time.monotonic())
+            if len(first_calls) == 1:
+                raise rate_limited
+            return "first"
+
+        other_started = []
+
+        async def other():
+            other_started.append(time.monotonic())
+            return "other"
+
+        async def start_other_after_failure():
+            while not first_calls:
+                await asyncio.sleep(0.01)
+            return await acall_with_retry(other, lambda e: True, description="other", cooldown=cooldown, policy=policy)
+
+        results = await asyncio.gather(
+            acall_with_retry(first, lambda e: True, description="first", cooldown=cooldown, policy=policy),
+            start_other_after_failure(),
+        )
+
+        assert results == ["first", "other"]
+        assert cooldown.activations == 1
+        # The unrelated call waited for the cooldown instead of hitting the rate-limited API
+        assert other_started[0] - first_calls[0] >= 0.2
+
+
+class TestStructuredRetryClassification:
+    """Test _is_error_retryable with real SDK exceptions"""
+
+    def test_openai_sdk_errors(self):
+        provider = OpenAIModelProvider(api_key="test-key")
+
+        assert provider._is_error_retryable(_status_error(openai.RateLimitError, 429, body={"type": "requests"}))
+        assert not provider._is_error_retryable(_status_error(openai.RateLimitError, 429, body={"type": "tokens"}))
+        assert provider._is_error_retryable(_status_error(openai.InternalServerError, 503))
+        assert not provider._is_error_retryable(_status_error(openai.AuthenticationError, 401))
+        assert not provider._is_error_retryable(_status_error(openai.BadRequestError, 400))
@@ -0,0 +1,148 @@
+"""
+Tests for client-side provider rate limiting
+"""
+
+import asyncio
+import time
+from unittest.mock import Mock, patch
+
+import pytest
+
+from providers.base import ModelResponse, ProviderType
+from providers.executor import ProviderExecutor
+from providers.rate_limiter import RateLimit, RateLimiter, load_rate_limits
+
+
+class TestRateLimitConfiguration:
+    """Test parsing of rate limit environment variables"""
+
+    def test_limits_disabled_by_default(self, monkeypatch):
+        monkeypatch.delenv("OPENAI_RATE_LIMIT_RPM", raising=False)
+        monkeypatch.delenv("OPENAI_RATE_LIMIT_TPM", raising=False)
+        monkeypatch.delenv("OPENAI_MODEL_RATE_LIMITS", raising=False)
+
+        assert load_rate_limits("openai") == (None, {})
+        assert RateLimiter().get_limits("openai", "o3") == []
+
+    def test_provider_and_model_limits(self, monkeypatch):
+        monkeypatch.setenv("OPENAI_RATE_LIMIT_RPM", "500")
+        monkeypatch.setenv("OPENAI_RATE_LIMIT_TPM", "invalid")
+        monkeypatch.setenv("OPENAI_MODEL_RATE_LIMITS", "o3:50/30000, O4-Mini:200/ ,broken")
+
+        provider_limit, model_limits = load_rate_limits("openai")
+
+        assert provider_limit == RateLimit(rpm=500, tpm=None)
+        assert model_limits == {"o3": RateLimit(rpm=50, tpm=30000), "o4-mini": RateLimit(rpm=200, tpm=None)}
+
+
+class TestRateLimiter:
+    """Test token bucket admission"""
+
+    @pytest.mark.asyncio
+    async def test_waits_for_token_budget_in_arrival_order(self, monkeypatch):
+        """Calls over budget should wait, not fail, and be admitted first-come first-served"""
+        monkeypatch.setenv("GOOGLE_RATE_LIMIT_TPM", "6000")  # Refills 100 tokens per second
+        limiter = RateLimiter()
+        await limiter.acquire("google", "gemini-2.5-flash", tokens=6000)
+
+        admitted = []
+
+        async def call(name, tokens):
+            await limiter.acquire("google", "gemini-2.5-flash", tokens=tokens)
+            admitted.append((name, time.monotonic()))
+
+        start = time.monotonic()
+        tasks = [asyncio.create_task(call("first", 20))]
+        await asyncio.sleep(0.01)
+        tasks.append(asyncio.create_task(call("second", 1)))
+        await asyncio.sleep(0.01)
+
+        stats = limiter.get_stats()
+        assert stats["google/gemini-2.5-flash"]["waiting"] == 2
+        assert stats["google"]["tokens_per_minute"] == 6000
+
+        await asyncio.gather(*tasks)
+
+        # The small second call could fit sooner but does not overtake the first
+        assert [name for name, _ in admitted] == ["first", "second"]
+        assert admitted[0][1] - start >= 0.15
+        stats = limiter.get_stats()["google/gemini-2.5-flash"]
+        assert stats["waiting"] == 0
+        assert stats["admitted"] == 3
+        assert stats["throttled"] == 2
+
+    @pytest.mark.asyncio
+    async def test_provider_limit_admits_models_in_arrival_order(self, monkeypatch):
+        """Calls for different models sharing a provider-wide budget should not overtake each other"""
+        monkeypatch.setenv("GOOGLE_RATE_LIMIT_TPM", "6000")  # Refills 100 tokens per second
+        monkeypatch.setenv("GOOGLE_MODEL_RATE_LIMITS", "gemini-2.5-pro:100/")
+        limiter = RateLimiter()
+        await limiter.acquire("google", "gemini-2.5-flash", tokens=6000)
+
+        admitted = []
+
+        async def call(name, model, tokens):
+            await limiter.acquire("google", model, tokens=tokens)
+            admitted.append(name)
+
+        tasks = [asyncio.create_task(call("flash", "gemini-2.5-flash", 20))]
+        await asyncio.sleep(0.01)
+        tasks.append(asyncio.create_task(call("pro", "gemini-2.5-pro", 1)))
+        tasks.append(asyncio.create_task(call("lite", "gemini-2.0-flash-lite", 1)))
+        await asyncio.gather(*tasks)
+
+        assert admitted == ["flash", "pro", "lite"]
+
+    @pytest.mark.asyncio
+    async def test_settle_corrects_estimate_with_actual_usage(self, monkeypatch):
+        monkeypatch.setenv("XAI_RATE_LIMIT_TPM", "1000")
+        limiter = RateLimiter()
+
+        reservation = await limiter.acquire("xai", "grok-3", tokens=800)
+        assert limiter.get_stats()["xai"]["tokens_available"] <= 200
+
+        limiter.settle(reservation, 300)
+        assert 700 <= limiter.get_stats()["xai"]["tokens_available"] <= 710
+
+
+class TestExecutorRateLimiting:
+    """Test rate limiting in front of generate_content"""
+
+    @pytest.mark.asyncio
+    async def test_failed_call_refunds_token_estimate(self, monkeypatch):
+        monkeypatch.setenv("OPENAI_RATE_LIMIT_TPM", "10000")
+        limiter = RateLimiter()
+        executor = ProviderExecutor(max_workers=1, default_concurrency=1)
+        provider = Mock()
+        provider.get_provider_type.return_value = ProviderType.OPENAI
+        provider.count_tokens.return_value = 5000
+        provider.generate_content.side_effect = RuntimeError("upstream failure")
+
+        with patch("providers.executor.get_rate_limiter", return_value=limiter):
+            with pytest.raises(RuntimeError):
+                await executor.generate_content(provider, prompt="hello", model_name="o3")
+
+        assert limiter.get_stats()["openai"]["tokens_available"] >= 9990
+        executor.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_generate_content_estimates_and_settles_tokens(self, monkeypatch):
+        monkeypatch.setenv("OPENAI_MODEL_RATE_LIMITS", "o3:10/100000")
+        limiter = RateLimiter()
+        executor = ProviderExecutor(max_workers=1, default_concurrency=1)
+        provider = Mock()
+        provider.get_provider_type.return_value = ProviderType.OPENAI
+        provider.count_tokens.return_value = 5000
+        provider.generate_content.return_value = ModelResponse(
+            content="ok", usage={"input_tokens": 4000, "output_tokens": 500, "total_tokens": 4500}
+        )
+
+        with patch("providers.executor.get_rate_limiter", return_value=limiter):
+            await executor.generate_content(provider, prompt="hello", system_prompt="system", model_name="o3")
+
+        provider.count_tokens.assert_called_once_with("system\n\nhello", "o3")
+        stats = limiter.get_stats()["openai/o3"]
+        assert stats["admitted"] == 1
+        assert stats["requests_available"] == 9
+        assert 95500 <= stats["tokens_available"] <= 95600
+        executor.shutdown()
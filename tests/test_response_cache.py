@@ -0,0 +1,178 @@
+"""
+Tests for the response cache of deterministic provider calls
+"""
+
+import time
+from unittest.mock import Mock, patch
+
+import pytest
+
+from providers.base import ModelResponse, ProviderType
+from providers.executor import ProviderExecutor
+from providers.response_cache import ResponseCache, _serialize
+from tools.chat import ChatTool
+
+
+def _call(**overrides):
+    kwargs = {
+        "prompt": "Review this code",
+        "model_name": "o3",
+        "system_prompt": "You are a reviewer",
+        "temperature": 0.2,
+        "thinking_mode": "medium",
+        "images": None,
+    }
+    kwargs.update(overrides)
+    return kwargs
+
+
+def _response(content="Looks good"):
+    return ModelResponse(
+        content=content,
+        usage={"input_tokens": 100, "output_tokens": 10, "total_tokens": 110},
+        model_name="o3",
+        friendly_name="OpenAI",
+        provider=ProviderType.OPENAI,
+        metadata={"finish_reason": "stop"},
+    )
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ResponseCache(enabled=True, ttl_seconds=3600, db_path=str(tmp_path / "responses.db"))
+
+
+class TestResponseCacheKey:
+    """Test which calls share a cache key"""
+
+    def test_key_covers_request(self, cache, tmp_path):
+        key = cache.make_key("openai", "o3", _call())
+
+        assert cache.make_key("openai", "o3", _call()) == key
+        assert cache.make_key("openrouter", "o3", _call()) != key
+        assert cache.make_key("openai", "o3-pro", _call()) != key
+        assert cache.make_key("openai", "o3", _call(prompt="Review this code!")) != key
+        assert cache.make_key("openai", "o3", _call(system_prompt="Be brief")) != key
+        assert cache.make_key("openai", "o3", _call(temperature=0.0)) != key
+        assert cache.make_key("openai", "o3", _call(thinking_mode="high")) != key
+
+        image = tmp_path / "diagram.png"
+        image.write_bytes(b"png-1")
+        with_image = cache.make_key("openai", "o3", _call(images=[str(image)]))
+        assert with_image != key
+        image.write_bytes(b"png-2")
+        assert cache.make_key("openai", "o3", _call(images=[str(image)])) != with_image
+        assert cache.make_key("openai", "o3", _call(images=[str(tmp_path / "missing.png")])) is None
+
+    def test_creative_temperatures_bypass_cache(self, tmp_path):
+        cache = ResponseCache(enabled=True, db_path=str(tmp_path / "responses.db"), max_temperature=0.2)
+
+        assert cache.make_key("openai", "o3", _call(temperature=0.5)) is None
+        assert cache.make_key("openai", "o3", _call(temperature=None)) is None
+        assert cache.get_stats()["bypassed"] == 2
+
+        # Explicitly enabled for creative tools
+        cache.max_temperature = 1.0
+        assert cache.make_key("openai", "o3", _call(temperature=0.7)) is not None
+
+    def test_disabled_by_default(self, monkeypatch):
+        monkeypatch.delenv("RESPONSE_CACHE_ENABLED", raising=False)
+
+        assert ResponseCache().enabled is False
+
+
+class TestResponseCacheTiers:
+    """Test memory and disk storage"""
+
+    def test_hit_returns_copy(self, cache):
+        key = cache.make_key("openai", "o3", _call())
+        assert cache.get(key) is None
+        cache.put(key, _response())
+
+        first = cache.get(key)
+        first.metadata["response_cache"] = "hit"
+        second = cache.get(key)
+
+        assert second.content == "Looks good"
+        assert second.provider == ProviderType.OPENAI
+        assert second.usage["total_tokens"] == 110
+        assert "response_cache" not in second.metadata
+        assert cache.get_stats()["hits"] == 2
+        assert cache.get_stats()["misses"] == 1
+
+    def test_entries_expire(self, cache):
+        cache.ttl_seconds = 1
+        key = cache.make_key("openai", "o3", _call())
+        cache.put(key, _response())
+
+        with patch("providers.response_cache.time.time", return_value=time.time() + 2):
+            assert cache.get(key) is None
+
+    def test_memory_tier_is_byte_bounded(self, tmp_path):
+        entry_size = len(_serialize(_response("a" * 1000)))
+        cache = ResponseCache(enabled=True, max_bytes=entry_size * 2, disk_max_bytes=0, db_path=str(tmp_path / "r.db"))
+        keys = [cache.make_key("openai", "o3", _call(prompt=str(i))) for i in range(3)]
+        for key in keys:
+            cache.put(key, _response("a" * 1000))
+
+        assert cache.get(keys[0]) is None
+        assert cache.get(keys[2]) is not None
+        assert cache.get_stats()["evictions"] == 1
+        assert not (tmp_path / "r.db").exists()
+
+    def test_disk_tier_survives_restart_and_is_byte_bounded(self, tmp_path):
+        db_path = str(tmp_path / "responses.db")
+        entry_size = len(_serialize(_response("a" * 1000)))
+        cache = ResponseCache(enabled=True, max_bytes=0, disk_max_bytes=entry_size * 2, db_path=db_path)
+        keys = [cache.make_key("openai", "o3", _call(prompt=str(i))) for i in range(3)]
+        for key in keys:
+            cache.put(key, _response("a" * 1000))
+            time.sleep(0.001)
+
+        restarted = ResponseCache(enabled=True, disk_max_bytes=entry_size * 2, db_path=db_path)
+        assert restarted.get(keys[0]) is None
+        assert restarted.get(keys[2]).content == "a" * 1000
+        assert restarted.get_stats()["disk_hits"] == 1
+        # Promoted to the memory tier
+        assert restarted.get(keys[2]) is not None
+        assert restarted.get_stats()["disk_hits"] == 1
+
+
+class TestExecutorResponseCache:
+    """Test the cache in front of provider calls"""
+
+    @pytest.fixture
+    def provider(self):
+        provider = Mock()
+        provider.get_provider_type.return_value = ProviderType.OPENAI
+        provider.count_tokens.return_value = 10
+        provider.generate_content.side_effect = lambda **kwargs: _response()
+        return provider
+
+    @pytest.mark.asyncio
+    async def test_repeated_call_served_from_cache(self, cache, provider):
+        executor = ProviderExecutor(max_workers=1, default_concurrency=1)
+        with patch("providers.executor.get_response_cache", return_value=cache):
+            first = await executor.generate_content(provider, **_call())
+            second = await executor.generate_content(provider, **_call())
+            chunks = [chunk async for chunk in executor.stream_content(provider, **_call())]
+            creative = await executor.generate_content(provider, **_call(temperature=0.7))
+
+        assert first.metadata["response_cache"] == "miss"
+        assert second.metadata["response_cache"] == "hit"
+        assert second.content == first.content
+        assert chunks[0].text == "Looks good"
+        assert chunks[-1].response.metadata["response_cache"] == "hit"
+        assert "response_cache" not in creative.metadata
+        assert provider.generate_content.call_count == 2
+        executor.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_tool_metadata_reports_hits_and_misses(self, cache, provider):
+        tool = ChatTool()
+        with patch("providers.executor.get_response_cache", return_value=cache):
+            await tool.generate_model_response(provider, **_call())
+            assert tool.get_response_cache_metadata() == {"hits": 0, "misses": 1}
+            await tool.generate_model_response(provider, **_call())
+
+        assert tool.get_response_cache_metadata() == {"hits": 1, "misses": 1}
@@ -2,9 +2,11 @@
 Tests for the main server functionality
 """
 
+from unittest.mock import patch
+
 import pytest
 
-from server import handle_call_tool
+from server import TOOLS, handle_call_tool, handle_list_tools
 
 
 class TestServerTools:
@@ -105,3 +107,55 @@ class TestServerTools:
         assert "## Server Information" in content
         assert "## Configuration" in content
         assert "Current Version" in content
+
+    @pytest.mark.asyncio
+    async def test_list_tools_reuses_schemas_until_configuration_changes(self):
+        """Schemas are generated once and regenerated when providers or restrictions change"""
+        from providers.registry import ModelProviderRegistry
+
+        chat_tool = TOOLS["chat"]
+        with patch.object(type(chat_tool), "get_input_schema", autospec=True, return_value={"type": "object"}) as spy:
+            ModelProviderRegistry.invalidate_model_index()
+            first = await handle_list_tools()
+            second = await handle_list_tools()
+
+            assert [tool.name for tool in first] == [tool.name for tool in second] == list(TOOLS)
+            assert spy.call_count == 1
+
+            ModelProviderRegistry.invalidate_model_index()
+            await handle_list_tools()
+
+            assert spy.call_count == 2
+            assert chat_tool.get_cached_input_schema() == {"type": "object"}
+
+        ModelProviderRegistry.invalidate_model_index()
+
+    def test_startup_defers_provider_sdk_imports(self):
+        """Importing the server, configuring providers and listing tools must not import provider SDKs"""
+        import os
+        import subprocess
+        import sys
+        from pathlib import Path
+
+        code = (
+            "import asyncio, sys\n"
+            "import server\n"
+            "server.configure_providers()\n"
+            "asyncio.run(server.handle_list_tools())\n"
+            "loaded = [name for name in ('google.genai', 'openai') if name in sys.modules]\n"
+            "from providers.registry import ModelProviderRegistry\n"
+            "ModelProviderRegistry.preload_provider_sdks()\n"
+            "print(loaded, 'google.genai' in sys.modules and 'openai' in sys.modules)\n"
+        )
+        env = {**os.environ, "GEMINI_API_KEY": "test-key", "OPENAI_API_KEY": "test-key", "LOG_LEVEL": "ERROR"}
+        result = subprocess.run(
+            [sys.executable, "-c", code],
+            cwd=Path(__file__).parent.parent,
+            env=env,
+            capture_output=True,
+            text=True,
+            timeout=60,
+        )
+
+        assert result.returncode == 0, result.stderr
+        assert result.stdout.strip().splitlines()[-1] == "[] True"
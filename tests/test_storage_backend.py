@@ -0,0 +1,281 @@
+"""
+Tests for conversation storage backends and backend selection.
+"""
+
+import sqlite3
+import time
+from unittest.mock import patch
+
+import pytest
+
+from utils import storage_backend
+from utils.storage_backend import InMemoryStorage, SQLiteStorage, create_storage_backend
+
+
+@pytest.fixture
+def sqlite_storage(tmp_path):
+    """Create a SQLite storage backend in a temporary directory."""
+    storage = SQLiteStorage(str(tmp_path / "conversations.db"))
+    yield storage
+    storage.shutdown()
+
+
+class TestSQLiteStorage:
+    """Test the persistent SQLite backend"""
+
+    def test_set_and_get(self, sqlite_storage):
+        """Stored values should be retrievable and overwritable"""
+        sqlite_storage.setex("thread:1", 60, '{"turns": []}')
+        assert sqlite_storage.get("thread:1") == '{"turns": []}'
+
+        sqlite_storage.set_with_ttl("thread:1", 60, '{"turns": [1]}')
+        assert sqlite_storage.get("thread:1") == '{"turns": [1]}'
+        assert sqlite_storage.get("thread:missing") is None
+
+    def test_uses_wal_mode_and_expiry_index(self, sqlite_storage):
+        """Database should run in WAL mode with an index on expires_at"""
+        conn = sqlite3.connect(str(sqlite_storage.db_path))
+        try:
+            assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+            indexes = [row[1] for row in conn.execute("PRAGMA index_list('kv_store')")]
+            assert "idx_kv_store_expires_at" in indexes
+        finally:
+            conn.close()
+
+    def test_expired_values_are_not_returned(self, sqlite_storage):
+        """Values past their TTL should be invisible even before cleanup runs"""
+        sqlite_storage.setex("thread:old", 60, "old")
+        with patch("utils.storage_backend.time.time", return_value=time.time() + 120):
+            assert sqlite_storage.get("thread:old") is None
+
+    def test_cleanup_removes_expired_rows_in_batches(self, sqlite_storage):
+        """Cleanup should delete every expired row across multiple batches and keep live rows"""
+        for i in range(7):
+            sqlite_storage.setex(f"thread:expired:{i}", -1, "gone")
+        sqlite_storage.setex("thread:live", 60, "live")
+
+        with patch("utils.storage_backend.SQLITE_CLEANUP_BATCH_SIZE", 3):
+            removed = sqlite_storage._cleanup_expired()
+
+        assert removed == 7
+        assert sqlite_storage.get("thread:live") == "live"
+        count = sqlite_storage._conn.execute("SELECT COUNT(*) FROM kv_store").fetchone()[0]
+        assert count == 1
+
+    def test_data_survives_restart_and_is_shared(self, tmp_path):
+        """A second backend on the same file (restart or another process) should see stored threads"""
+        db_path = str(tmp_path / "shared.db")
+        first = SQLiteStorage(db_path)
+        second = SQLiteStorage(db_path)
+        try:
+            first.setex("thread:shared", 60, "hello")
+            assert second.get("thread:shared") == "hello"
+        finally:
+            first.shutdown()
+            second.shutdown()
+
+        restarted = SQLiteStorage(db_path)
+        try:
+            assert restarted.get("thread:shared") == "hello"
+        finally:
+            restarted.shutdown()
+
+
+class TestStorageBackendSelection:
+    """Test CONVERSATION_STORAGE_BACKEND handling"""
+
+    def test_default_is_in_memory(self, monkeypatch):
+        monkeypatch.delenv("CONVERSATION_STORAGE_BACKEND", raising=False)
+        backend = create_storage_backend()
+        try:
+            assert isinstance(backend, InMemoryStorage)
+        finally:
+            backend.shutdown()
+
+    def test_sqlite_selected_by_env(self, monkeypatch, tmp_path):
+        db_path = tmp_path / "env.db"
+        monkeypatch.setenv("CONVERSATION_STORAGE_BACKEND", "SQLite")
+        monkeypatch.setenv("CONVERSATION_STORAGE_PATH", str(db_path))
+        backend = create_storage_backend()
+        try:
+            assert isinstance(backend, SQLiteStorage)
+            assert backend.db_path == db_path
+        finally:
+            backend.shutdown()
+
+    def test_unknown_backend_falls_back_to_memory(self, monkeypatch):
+        monkeypatch.setenv("CONVERSATION_STORAGE_BACKEND", "cassandra")
+        backend = create_storage_backend()
+        try:
+            assert isinstance(backend, InMemoryStorage)
+        finally:
+            backend.shutdown()
+
+    def test_conversation_memory_round_trip_with_sqlite(self, monkeypatch, tmp_path):
+        """Threads created through conversation memory should persist in SQLite"""
+        from utils.conversation_memory import add_turn, create_thread, get_thread
+
+        backend = SQLiteStorage(str(tmp_path / "memory.db"))
+        monkeypatch.setattr(storage_backend, "_storage_instance", backend)
+        try:
+            thread_id = create_thread("chat", {"prompt": "hello"})
+            assert add_turn(thread_id, "user", "First message", files=["/tmp/a.py"])
+
+            context = get_thread(thread_id)
+            assert context is not None
+            assert context.tool_name == "chat"
+            assert [turn.content for turn in context.turns] == ["First message"]
+        finally:
+            backend.shutdown()
+
+
+class TestListStorage:
+    """Test the append-only list primitives used for conversation turns"""
+
+    @pytest.fixture(params=["memory", "sqlite"])
+    def backend(self, request, tmp_path):
+        backend = InMemoryStorage() if request.param == "memory" else SQLiteStorage(str(tmp_path / "lists.db"))
+        yield backend
+        backend.shutdown()
+
+    def test_rpush_and_lrange(self, backend):
+        """Appends should return the new length and preserve order"""
+        assert backend.lrange("thread:1:turns") == []
+        assert backend.rpush("thread:1:turns", 60, "a") == 1
+        assert backend.rpush("thread:1:turns", 60, "b") == 2
+        assert backend.lrange("thread:1:turns") == ["a", "b"]
+
+    def test_expired_list_restarts_empty(self, backend):
+        """Appending to an expired list should start a new list"""
+        backend.rpush("thread:1:turns", -1, "stale")
+        assert backend.lrange("thread:1:turns") == []
+        assert backend.rpush("thread:1:turns", 60, "fresh") == 1
+        assert backend.lrange("thread:1:turns") == ["fresh"]
+
+    def test_rpush_rows_appends_parallel_lists_atomically(self, backend):
+        """Rows should go to all lists together, and not at all once the first list is full"""
+        keys = ("thread:1:turns", "thread:1:files")
+
+        assert backend.rpush_rows(keys, 60, [("t1", "f1"), ("t2", "f2")], max_length=3) == 2
+        assert backend.rpush_rows(keys, 60, [("t3", "f3"), ("t4", "f4")], max_length=3) is None
+        assert backend.rpush_rows(keys, 60, [("t3", "f3")], max_length=3) == 3
+        assert backend.rpush_rows(keys, 60, [("t4", "f4")], max_length=3) is None
+        assert backend.rpush_rows(("thread:2:turns",), 60, [("t",)], expected_length=1) is None
+        assert backend.lrange("thread:1:turns") == ["t1", "t2", "t3"]
+        assert backend.lrange("thread:1:files") == ["f1", "f2", "f3"]
+
+    def test_sqlite_cleanup_removes_expired_lists(self, sqlite_storage):
+        sqlite_storage.rpush("thread:old:turns", -1, "gone")
+        sqlite_storage.rpush("thread:live:turns", 60, "kept")
+
+        assert sqlite_storage._cleanup_expired() == 1
+        assert sqlite_storage.lrange("thread:live:turns") == ["kept"]
+        count = sqlite_storage._conn.execute("SELECT COUNT(*) FROM list_items").fetchone()[0]
+        assert count == 1
+
+
+class TestAppendOnlyThreads:
+    """Test conversation memory's append-only thread layout"""
+
+    @pytest.fixture
+    def backend(self, monkeypatch):
+        backend = InMemoryStorage()
+        monkeypatch.setattr(storage_backend, "_storage_instance", backend)
+        yield backend
+        backend.shutdown()
+
+    def test_add_turn_appends_without_rewriting_turns(self, backend):
+        """Metadata stays turn-free and each turn is stored as its own record"""
+        import json
+
+        from utils.conversation_memory import add_turn, create_thread, get_thread
+
+        thread_id = create_thread("chat", {"prompt": "hello"})
+        assert add_turn(thread_id, "user", "First", files=["/a.py"])
+        assert add_turn(thread_id, "assistant", "Second", files=["/b.py", "/a.py"])
+
+        metadata = json.loads(backend.get(f"thread:{thread_id}"))
+        assert metadata["turns"] == []
+        assert "turn_count" not in metadata  # The turn count is the length of the turns list
+        assert len(backend.lrange(f"thread:{thread_id}:turns")) == 2
+
+        context = get_thread(thread_id)
+        assert [turn.content for turn in context.turns] == ["First", "Second"]
+        assert context.tool_name == "chat"
+
+    def test_thread_file_list_does_not_load_turns(self, backend):
+        """get_thread_file_list should read only the per-turn file lists"""
+        from utils.conversation_memory import add_turn, create_thread, get_thread_file_list
+
+        thread_id = create_thread("chat", {})
+        add_turn(thread_id, "user", "First", files=["/a.py", "/b.py"])
+        add_turn(thread_id, "assistant", "Second", files=["/c.py", "/a.py"])
+
+        with patch.object(backend, "lrange", wraps=backend.lrange) as mock_lrange:
+            assert get_thread_file_list(thread_id) == ["/c.py", "/a.py", "/b.py"]
+        mock_lrange.assert_called_once_with(f"thread:{thread_id}:files")
+
+    def test_turn_limit_and_legacy_migration(self, backend, monkeypatch):
+        """Legacy single-record threads migrate on append and the turn limit still applies"""
+        from utils import conversation_memory
+        from utils.conversation_memory import ConversationTurn, ThreadContext, add_turn, get_thread
+
+        thread_id = "12345678-1234-1234-1234-123456789012"
+        legacy = ThreadContext(
+            thread_id=thread_id,
+            created_at="2023-01-01T00:00:00Z",
+            last_updated_at="2023-01-01T00:00:00Z",
+            tool_name="chat",
+            turns=[ConversationTurn(role="user", content="Old", timestamp="2023-01-01T00:00:00Z")],
+            initial_context={},
+        )
+        backend.setex(f"thread:{thread_id}", 60, legacy.model_dump_json())
+        monkeypatch.setattr(conversation_memory, "MAX_CONVERSATION_TURNS", 2)
+
+        assert add_turn(thread_id, "assistant", "New")
+        assert [turn.content for turn in get_thread(thread_id).turns] == ["Old", "New"]
+        assert not add_turn(thread_id, "user", "Over limit")
+
+    def test_concurrent_appends_from_processes_respect_turn_limit(self, tmp_path, monkeypatch):
+        """Appends racing through separate SQLite connections must not exceed the limit or lose turns"""
+        import threading
+        from concurrent.futures import ThreadPoolExecutor
+
+        from utils import conversation_memory
+        from utils.conversation_memory import add_turn, create_thread, get_thread, get_thread_file_list
+
+        db_path = str(tmp_path / "shared.db")
+        # One backend per simulated server process, all sharing the database file
+        backends = [SQLiteStorage(db_path) for _ in range(4)]
+        current = threading.local()
+        monkeypatch.setattr(storage_backend, "get_storage_backend", lambda: getattr(current, "backend", backends[0]))
+        monkeypatch.setattr(conversation_memory, "_thread_cache", conversation_memory.ThreadContextCache(0))
+        monkeypatch.setattr(conversation_memory, "MAX_CONVERSATION_TURNS", 6)
+        thread_id = create_thread("chat", {})
+
+        def slow_get(backend_get, key):
+            # Widen the window between reading a thread and appending to it
+            value = backend_get(key)
+            time.sleep(0.01)
+            return value
+
+        for backend in backends:
+            monkeypatch.setattr(backend, "get", lambda key, backend_get=backend.get: slow_get(backend_get, key))
+
+        def append(index):
+            current.backend = backends[index % len(backends)]
+            return add_turn(thread_id, "user", f"Turn {index}", files=[f"/file{index}.py"])
+
+        try:
+            with ThreadPoolExecutor(max_workers=len(backends)) as pool:
+                results = list(pool.map(append, range(10)))
+
+            context = get_thread(thread_id)
+            assert results.count(True) == 6
+            assert len(context.turns) == 6
+            assert sorted(get_thread_file_list(thread_id)) == sorted(
+                file for turn in context.turns for file in turn.files
+            )
+        finally:
+            for backend in backends:
+                backend.shutdown()
@@ -0,0 +1,254 @@
+"""
+Tests for streaming generation and MCP progress notifications.
+"""
+
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import httpx
+import openai
+import pytest
+
+from providers.base import ModelResponse, ProviderType
+from providers.custom import CustomProvider
+from providers.dial import DIALModelProvider
+from providers.executor import ProviderExecutor
+from providers.gemini import GeminiModelProvider
+from providers.openai_compatible import OpenAICompatibleProvider
+from providers.openai_provider import OpenAIModelProvider
+from providers.xai import XAIModelProvider
+from tools.chat import ChatTool
+from tools.shared.progress import ProgressReporter
+
+
+def _chat_chunk(content=None, finish_reason=None, usage=None):
+    """Create a mock streamed chat completion chunk."""
+    choices = []
+    if content is not None or finish_reason is not None:
+        choices = [SimpleNamespace(delta=SimpleNamespace(content=content), finish_reason=finish_reason)]
+    return SimpleNamespace(choices=choices, usage=usage, model="o3-mini", id="chunk-id", created=1234567890)
+
+
+async def _aiter(items):
+    for item in items:
+        yield item
+
+
+async def _collect(stream):
+    return [chunk async for chunk in stream]
+
+
+class TestProviderStreaming:
+    """Test astream_content implementations"""
+
+    @pytest.mark.asyncio
+    async def test_openai_streams_deltas_and_final_usage(self):
+        """Deltas should be yielded as they arrive, with usage on the final response"""
+        provider = OpenAIModelProvider(api_key="test-key")
+        usage = SimpleNamespace(prompt_tokens=10, completion_tokens=3, total_tokens=13)
+        chunks = [
+            _chat_chunk("Hel"),
+            _chat_chunk("lo"),
+            _chat_chunk(finish_reason="stop"),
+            _chat_chunk(usage=usage),
+        ]
+        async_client = MagicMock()
+        async_client.chat.completions.create = AsyncMock(return_value=_aiter(chunks))
+        provider._async_clients[asyncio.get_running_loop()] = async_client
+
+        result = await _collect(provider.astream_content(prompt="Hi", model_name="mini", temperature=1.0))
+
+        assert [chunk.text for chunk in result[:-1]] == ["Hel", "lo"]
+        final = result[-1].response
+        assert final.content == "Hello"
+        assert final.usage == {"input_tokens": 10, "output_tokens": 3, "total_tokens": 13}
+        assert final.metadata["finish_reason"] == "stop"
+
+        call_kwargs = async_client.chat.completions.create.call_args[1]
+        assert call_kwargs["stream"] is True
+        assert call_kwargs["stream_options"] == {"include_usage": True}
+        assert call_kwargs["model"] == "o4-mini"
+
+    @pytest.mark.asyncio
+    async def test_openai_errors_after_first_delta_are_not_retried(self):
+        """A stream that fails midway cannot be replayed"""
+        provider = OpenAIModelProvider(api_key="test-key")
+
+        async def broken_stream():
+            yield _chat_chunk("partial")
+            raise ConnectionError("Connection reset")
+
+        async_client = MagicMock()
+        async_client.chat.completions.create = AsyncMock(return_value=broken_stream())
+        provider._async_clients[asyncio.get_running_loop()] = async_client
+
+        with pytest.raises(RuntimeError, match="after 1 attempt"):
+            await _collect(provider.astream_content(prompt="Hi", model_name="o3-mini", temperature=1.0))
+        assert async_client.chat.completions.create.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_rejected_stream_falls_back_to_single_response(self):
+        """Endpoints that refuse streaming with a client error are asked again without streaming"""
+        provider = CustomProvider(api_key="", base_url="http://localhost:11434/v1")
+        request = httpx.Request("POST", "http://localhost:11434/v1/chat/completions")
+        rejected = openai.BadRequestError(
+            "stream_options is not supported", response=httpx.Response(400, request=request), body=None
+        )
+        completion = SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content="Hello"), finish_reason="stop")],
+            usage=None,
+            model="llama3.2",
+            id="test-id",
+            created=1234567890,
+        )
+        async_client = MagicMock()
+        async_client.chat.completions.create = AsyncMock(side_effect=[rejected, completion])
+        provider._async_clients[asyncio.get_running_loop()] = async_client
+
+        result = await _collect(provider.astream_content(prompt="Hi", model_name="llama3.2", temperature=0.5))
+
+        assert [chunk.text for chunk in result[:-1]] == ["Hello"]
+        assert result[-1].response.content == "Hello"
+        streaming_call, fallback_call = async_client.chat.completions.create.call_args_list
+        assert streaming_call[1]["stream"] is True
+        # Local servers are not sent stream_options
+        assert "stream_options" not in streaming_call[1]
+        assert "stream" not in fallback_call[1]
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize(
+        "provider_class,model_name,base_methods",
+        [
+            (OpenAIModelProvider, "mini", False),
+            (OpenAIModelProvider, "o3-mini", False),
+            (XAIModelProvider, "grok", False),
+            # The shared OpenAI-compatible implementations, as used by subclasses without overrides
+            (OpenAIModelProvider, "mini", True),
+        ],
+    )
+    async def test_streamed_model_name_matches_generate_content(self, provider_class, model_name, base_methods):
+        """The streamed final response reports the same model_name as generate_content"""
+        provider = provider_class(api_key="test-key")
+        owner = OpenAICompatibleProvider if base_methods else provider_class
+        completion = SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content="Hello"), finish_reason="stop")],
+            usage=None,
+            model="upstream-model",
+            id="test-id",
+            created=1234567890,
+        )
+        client = MagicMock()
+        client.chat.completions.create.return_value = completion
+        provider._client = client
+        async_client = MagicMock()
+        async_client.chat.completions.create = AsyncMock(
+            return_value=_aiter([_chat_chunk("Hello"), _chat_chunk(finish_reason="stop")])
+        )
+        provider._async_clients[asyncio.get_running_loop()] = async_client
+
+        generated = owner.generate_content(provider, prompt="Hi", model_name=model_name, temperature=1.0)
+        streamed = await _collect(owner.astream_content(provider, prompt="Hi", model_name=model_name, temperature=1.0))
+
+        assert streamed[-1].response.model_name == generated.model_name
+        assert (
+            async_client.chat.completions.create.call_args[1]["model"]
+            == client.chat.completions.create.call_args[1]["model"]
+        )
+
+    @pytest.mark.asyncio
+    async def test_gemini_streams_with_aio_client(self):
+        """Gemini should stream through client.aio.models.generate_content_stream"""
+        provider = GeminiModelProvider(api_key="test-key")
+        chunks = [
+            SimpleNamespace(text="Gem", candidates=[], usage_metadata=None),
+            SimpleNamespace(
+                text="ini",
+                candidates=[SimpleNamespace(finish_reason="STOP")],
+                usage_metadata=MagicMock(prompt_token_count=7, candidates_token_count=2),
+            ),
+        ]
+        client = MagicMock()
+        client.aio.models.generate_content_stream = AsyncMock(return_value=_aiter(chunks))
+        provider._client = client
+
+        result = await _collect(provider.astream_content(prompt="Hi", model_name="flash", temperature=0.5))
+
+        assert [chunk.text for chunk in result[:-1]] == ["Gem", "ini"]
+        final = result[-1].response
+        assert final.content == "Gemini"
+        assert final.usage["input_tokens"] == 7
+        assert final.usage["output_tokens"] == 2
+        client.models.generate_content.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_executor_falls_back_for_non_streaming_providers(self):
+        """Providers without native streaming deliver their response as one delta"""
+        executor = ProviderExecutor(max_workers=1, default_concurrency=1)
+        provider = DIALModelProvider(api_key="test-key")
+        response = ModelResponse(content="whole", model_name="o3", provider=ProviderType.DIAL)
+
+        with patch.object(provider, "generate_content", return_value=response):
+            result = await _collect(executor.stream_content(provider, prompt="Hi", model_name="o3"))
+
+        assert [chunk.text for chunk in result] == ["whole", ""]
+        assert result[-1].response is response
+        executor.shutdown()
+
+
+class TestProgressNotifications:
+    """Test forwarding of streamed text as MCP progress notifications"""
+
+    def test_no_reporter_without_progress_token(self):
+        assert ProgressReporter.from_request_context() is None
+
+    @pytest.mark.asyncio
+    async def test_reporter_batches_deltas(self):
+        """Deltas within the throttle interval should be sent together"""
+        session = MagicMock()
+        session.send_progress_notification = AsyncMock()
+        reporter = ProgressReporter(session, "token-1", request_id=5, min_interval=60)
+
+        await reporter.add("first ")  # Sent immediately
+        await reporter.add("second ")
+        await reporter.add("third")
+        await reporter.flush()
+
+        calls = session.send_progress_notification.await_args_list
+        assert [call.kwargs["message"] for call in calls] == ["first ", "second third"]
+        assert [call.args[1] for call in calls] == [6, 18]
+        assert all(call.kwargs["related_request_id"] == 5 for call in calls)
+
+    @pytest.mark.asyncio
+    async def test_tool_streams_progress_when_client_requests_it(self):
+        """generate_model_response should stream and forward deltas for requests with a progress token"""
+        from mcp.server.lowlevel.server import request_ctx
+
+        tool = ChatTool()
+        session = MagicMock()
+        session.send_progress_notification = AsyncMock()
+        context = SimpleNamespace(meta=SimpleNamespace(progressToken="abc"), session=session, request_id=1)
+        final = ModelResponse(content="streamed answer", model_name="flash")
+
+        async def fake_stream(provider, **kwargs):
+            from providers.base import StreamChunk
+
+            yield StreamChunk(text="streamed ")
+            yield StreamChunk(text="answer")
+            yield StreamChunk(response=final)
+
+        executor = MagicMock()
+        executor.stream_content = fake_stream
+        executor.generate_content = AsyncMock()
+
+        token = request_ctx.set(context)
+        try:
+            with patch("providers.executor.get_provider_executor", return_value=executor):
+                response = await tool.generate_model_response(MagicMock(), prompt="Hi", model_name="flash")
+        finally:
+            request_ctx.reset(token)
+
+        assert response is final
+        executor.generate_content.assert_not_called()
+        messages = "".join(call.kwargs["message"] for call in session.send_progress_notification.await_args_list)
+        assert messages == "streamed answer"
@@ -0,0 +1,76 @@
+"""
+Tests for the shared token counter
+"""
+
+import pytest
+
+from utils.file_utils import estimate_file_tokens, read_file_content
+from utils.token_utils import DEFAULT_FAMILY, TokenCounter, get_model_family, get_token_counter
+
+
+class _FakeEncoding:
+    """Tokenizer stand-in: one token per word"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def encode(self, text, disallowed_special=()):
+        self.calls += 1
+        return text.split()
+
+
+class TestTokenCounter:
+    """Test tokenizer selection and count caching"""
+
+    def test_model_families(self):
+        assert get_model_family("o3-mini") == "o200k_base"
+        assert get_model_family("openai/gpt-4o:free") == "o200k_base"
+        assert get_model_family("gpt-4-turbo") == "cl100k_base"
+        assert get_model_family("gemini-2.5-flash") == DEFAULT_FAMILY
+        assert get_model_family(None) == DEFAULT_FAMILY
+
+    def test_counts_are_cached_by_content(self):
+        counter = TokenCounter(cache_size=10)
+        encoding = _FakeEncoding()
+        counter._encodings["o200k_base"] = encoding
+        text = "word " * 100
+
+        assert counter.count(text, "o3") == 100
+        assert counter.count(text, "gpt-4o") == 100  # Same encoding family
+        assert encoding.calls == 1
+        assert counter.get_stats()["hits"] == 1
+
+        assert counter.count("two words", "o3") == 2  # Short texts are not cached
+        assert counter.get_stats()["entries"] == 1
+
+    def test_character_estimate_without_tokenizer(self):
+        counter = TokenCounter()
+
+        assert counter.count("x" * 400, "gemini-2.5-flash") == 100
+        assert counter.count("x" * 400) == 100
+        assert counter.count("") == 0
+
+
+class TestFileTokens:
+    """Test size checks using counts of files already read"""
+
+    @pytest.fixture(autouse=True)
+    def clear_counter(self):
+        get_token_counter().clear()
+        yield
+        get_token_counter().clear()
+
+    def test_size_estimate_uses_counted_tokens(self, project_path):
+        source = project_path / "module.py"
+        source.write_text("value = 1\n" * 350, encoding="utf-8")  # 3500 bytes, ~1000 tokens by file-type ratio
+
+        estimate = estimate_file_tokens(str(source), "gemini-2.5-flash")
+        _, tokens = read_file_content(str(source), model_name="gemini-2.5-flash")
+
+        assert tokens != estimate
+        assert estimate_file_tokens(str(source), "gemini-2.5-flash") == tokens
+        # Counts are per tokenizer family
+        assert estimate_file_tokens(str(source), "o3") == estimate
+
+        source.write_text("value = 2\n" * 700, encoding="utf-8")
+        assert estimate_file_tokens(str(source), "gemini-2.5-flash") == 2000
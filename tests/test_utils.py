@@ -2,7 +2,11 @@
 Tests for utility functions
 """
 
+import os
+from unittest.mock import patch
+
 from utils import check_token_limit, estimate_tokens, read_file_content, read_files
+from utils.file_cache import FileCacheKey, FileContentCache
 
 
 class TestFileUtils:
@@ -201,6 +205,164 @@ class TestFileUtils:
         assert "image.jpg" not in content
 
 
+class TestParallelReadFiles:
+    """Test the concurrent read stage of read_files"""
+
+    def test_output_keeps_sorted_order_with_concurrent_reads(self, project_path, monkeypatch):
+        """Files finishing out of order must still be assembled in expansion order"""
+        import time
+
+        from utils import file_utils
+
+        for i in range(6):
+            (project_path / f"file_{i}.py").write_text(f"value_{i} = {i}\n", encoding="utf-8")
+        original = file_utils.read_file_content
+
+        def slow_early_files(path, **kwargs):
+            # Earlier files take longer, so they complete last
+            time.sleep(0.02 * (6 - int(path[-4])))
+            return original(path, **kwargs)
+
+        monkeypatch.setenv("FILE_READ_WORKERS", "4")
+        monkeypatch.setattr(file_utils, "read_file_content", slow_early_files)
+        content = read_files([str(project_path / f"file_{i}.py") for i in range(6)])
+
+        positions = [content.index(f"value_{i} = {i}") for i in range(6)]
+        assert positions == sorted(positions)
+
+    def test_stops_reading_once_budget_is_exhausted(self, project_path, monkeypatch):
+        """No reads should be issued for files beyond the prefetch window after the budget runs out"""
+        from utils import file_utils
+
+        paths = []
+        for i in range(50):
+            path = project_path / f"big_{i:02d}.py"
+            path.write_text("x" * 400, encoding="utf-8")
+            paths.append(str(path))
+
+        read_paths = []
+        original = file_utils.read_file_content
+
+        def tracking_read(path, **kwargs):
+            read_paths.append(path)
+            return original(path, **kwargs)
+
+        monkeypatch.setenv("FILE_READ_WORKERS", "2")
+        monkeypatch.setattr(file_utils, "read_file_content", tracking_read)
+        # Budget fits exactly two files, after which it is fully used
+        _, file_tokens = original(paths[0])
+        content = read_files(paths, max_tokens=2 * file_tokens, reserve_tokens=0)
+
+        assert "SKIPPED FILES (TOKEN LIMIT)" in content
+        # At most the consumed files plus one prefetch window (workers * 2) are read
+        assert len(read_paths) <= 2 + 4
+
+
+class TestReadFilesBudgetPlanning:
+    """Test size-first budget planning in read_files"""
+
+    def test_files_that_cannot_fit_are_never_read(self, project_path, monkeypatch):
+        """Files whose size estimate exceeds the remaining budget should not be read"""
+        from utils import file_utils
+
+        small = project_path / "a_small.py"
+        small.write_text("x = 1\n", encoding="utf-8")
+        huge = project_path / "b_huge.py"
+        huge.write_text("y = 2\n" * 20_000, encoding="utf-8")
+        tail = project_path / "c_tail.py"
+        tail.write_text("z = 3\n", encoding="utf-8")
+
+        read_paths = []
+        original = file_utils.read_file_content
+
+        def tracking_read(path, **kwargs):
+            read_paths.append(path)
+            return original(path, **kwargs)
+
+        monkeypatch.setattr(file_utils, "read_file_content", tracking_read)
+        content = read_files([str(small), str(huge), str(tail)], max_tokens=1_000, reserve_tokens=0)
+
+        assert str(huge) not in read_paths
+        assert content.index("x = 1") < content.index("z = 3")
+        assert "SKIPPED FILES (TOKEN LIMIT)" in content
+        assert str(huge) in content.split("SKIPPED FILES")[1]
+
+    def test_correction_pass_reads_overestimated_files(self, project_path, monkeypatch):
+        """Files deferred by a pessimistic estimate are still included when they actually fit"""
+        from utils import file_utils
+
+        first = project_path / "first.py"
+        first.write_text("a = 1\n", encoding="utf-8")
+        second = project_path / "second.py"
+        second.write_text("b = 2\n", encoding="utf-8")
+
+        # Pretend every file is estimated far larger than it really is
+        monkeypatch.setattr(file_utils, "estimate_file_tokens", lambda path, model_name=None: 120)
+        content = read_files([str(first), str(second)], max_tokens=200, reserve_tokens=0)
+
+        assert content.index("a = 1") < content.index("b = 2")
+        assert "SKIPPED FILES" not in content
+
+
+class TestFileContentCache:
+    """Test the content-addressed file content cache"""
+
+    def test_unchanged_file_is_served_from_cache(self, project_path):
+        """Re-reading an unchanged file should not touch the disk again"""
+        test_file = project_path / "cached.py"
+        test_file.write_text("print('cached')\n", encoding="utf-8")
+        cache = FileContentCache(max_bytes=1_000_000)
+
+        with patch("utils.file_utils.get_file_content_cache", return_value=cache):
+            first = read_file_content(str(test_file))
+            with patch("builtins.open", side_effect=AssertionError("file should not be re-read")):
+                second = read_file_content(str(test_file))
+
+        assert first == second
+        assert cache.get_stats()["hits"] == 1
+        assert cache.get_stats()["misses"] == 1
+
+    def test_modified_file_is_reread(self, project_path):
+        """A change in mtime or size should produce a fresh read"""
+        test_file = project_path / "changing.py"
+        test_file.write_text("old = 1\n", encoding="utf-8")
+        cache = FileContentCache(max_bytes=1_000_000)
+
+        with patch("utils.file_utils.get_file_content_cache", return_value=cache):
+            first, _ = read_file_content(str(test_file))
+            test_file.write_text("new_value = 2\n", encoding="utf-8")
+            stat = test_file.stat()
+            os.utime(test_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+            second, _ = read_file_content(str(test_file))
+
+        assert "old = 1" in first
+        assert "new_value = 2" in second
+        assert cache.get_stats()["hits"] == 0
+
+    def test_byte_budget_evicts_least_recently_used(self):
+        """Entries beyond the byte budget should evict the oldest ones"""
+        cache = FileContentCache(max_bytes=10)
+        keys = [FileCacheKey(f"/f{i}", 0, 4, False, f"/f{i}") for i in range(3)]
+
+        cache.put(keys[0], "aaaa", 1)
+        cache.put(keys[1], "bbbb", 1)
+        assert cache.get(keys[0]) == ("aaaa", 1)  # keys[0] becomes most recently used
+        cache.put(keys[2], "cccc", 1)
+
+        assert cache.get(keys[1]) is None
+        assert cache.get(keys[0]) is not None
+        stats = cache.get_stats()
+        assert stats["evictions"] == 1
+        assert stats["bytes"] == 8
+
+        # Oversized entries and disabled caches store nothing
+        cache.put(FileCacheKey("/big", 0, 20, False, "/big"), "x" * 20, 5)
+        assert cache.get_stats()["entries"] == 2
+        disabled = FileContentCache(max_bytes=0)
+        disabled.put(keys[0], "aaaa", 1)
+        assert disabled.get(keys[0]) is None
+
+
 class TestTokenUtils:
     """Test token counting utilities"""
 
@@ -27,6 +27,7 @@ if TYPE_CHECKING:
 from config import TEMPERATURE_ANALYTICAL
 from systemprompts import ANALYZE_PROMPT
 from tools.shared.base_models import WorkflowRequest
+from tools.shared.execution_context import workflow_state
 
 from .workflow.base import WorkflowTool
 
@@ -165,6 +166,9 @@ class AnalyzeTool(WorkflowTool):
     including architectural review, performance analysis, security assessment, and maintainability evaluation.
     """
 
+    # Per-workflow state, isolated between concurrent executions
+    analysis_config = workflow_state(default_factory=dict)
+
     def __init__(self):
         super().__init__()
         self.initial_request = None
@@ -27,6 +27,7 @@ if TYPE_CHECKING:
 from config import TEMPERATURE_ANALYTICAL
 from systemprompts import CODEREVIEW_PROMPT
 from tools.shared.base_models import WorkflowRequest
+from tools.shared.execution_context import workflow_state
 
 from .workflow.base import WorkflowTool
 
@@ -180,6 +181,9 @@ class CodeReviewTool(WorkflowTool):
     including security audits, performance analysis, architectural review, and maintainability assessment.
     """
 
+    # Per-workflow state, isolated between concurrent executions
+    review_config = workflow_state(default_factory=dict)
+
     def __init__(self):
         super().__init__()
         self.initial_request = None
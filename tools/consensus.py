@@ -11,13 +11,16 @@ Key features:
 - Context-aware file embedding
 - Support for stance-based analysis (for/against/neutral)
 - Final synthesis combining all perspectives
+- Optional parallel mode that consults every model concurrently in a single step
 """
 
 from __future__ import annotations
 
+import asyncio
 import json
 import logging
-from typing import TYPE_CHECKING, Any
+import time
+from typing import TYPE_CHECKING, Any, Literal
 
 from pydantic import Field, model_validator
 
@@ -26,9 +29,10 @@ if TYPE_CHECKING:
 
 from mcp.types import TextContent
 
-from config import TEMPERATURE_ANALYTICAL
+from config import DEFAULT_CONSENSUS_TIMEOUT, TEMPERATURE_ANALYTICAL
 from systemprompts import CONSENSUS_PROMPT
 from tools.shared.base_models import WorkflowRequest
+from tools.shared.execution_context import workflow_state
 
 from .workflow.base import WorkflowTool
 
@@ -77,6 +81,11 @@ CONSENSUS_WORKFLOW_FIELD_DESCRIPTIONS = {
         "Optional list of image paths or base64 data URLs for visual context. Useful for UI/UX discussions, "
         "architecture diagrams, mockups, or any visual references that help inform the consensus analysis."
     ),
+    "consultation_mode": (
+        "How models are consulted. 'sequential' (default) consults one model per step so you can review each "
+        "response in turn. 'parallel' consults all models concurrently in step 1 and returns every response "
+        "(including partial results if some models time out) in a single step, ready for synthesis."
+    ),
 }
 
 
@@ -113,6 +122,11 @@ class ConsensusRequest(WorkflowRequest):
     # Optional images for visual debugging
     images: list[str] | None = Field(default=None, description=CONSENSUS_WORKFLOW_FIELD_DESCRIPTIONS["images"])
 
+    # Sequential (one model per step) or parallel (all models in step 1)
+    consultation_mode: Literal["sequential", "parallel"] = Field(
+        "sequential", description=CONSENSUS_WORKFLOW_FIELD_DESCRIPTIONS["consultation_mode"]
+    )
+
     # Override inherited fields to exclude them from schema
     temperature: float | None = Field(default=None, exclude=True)
     thinking_mode: str | None = Field(default=None, exclude=True)
@@ -158,6 +172,11 @@ class ConsensusTool(WorkflowTool):
     and finally synthesizes all perspectives into a unified recommendation.
     """
 
+    # Per-workflow state, isolated between concurrent executions
+    initial_prompt = workflow_state()
+    models_to_consult = workflow_state(default_factory=list)
+    accumulated_responses = workflow_state(default_factory=list)
+
     def __init__(self):
         super().__init__()
         self.initial_prompt: str | None = None
@@ -183,7 +202,8 @@ class ConsensusTool(WorkflowTool):
             "- Total steps = number of models (each step includes consultation + response)\n"
             "- Models can have stances (for/against/neutral) for structured debate\n"
             "- Same model can be used multiple times with different stances\n"
-            "- Each model + stance combination must be unique\n\n"
+            "- Each model + stance combination must be unique\n"
+            "- Set consultation_mode='parallel' to consult all models at once in step 1\n\n"
             "Perfect for: complex decisions, architectural choices, feature proposals, "
             "technology evaluations, strategic planning."
         )
@@ -286,6 +306,12 @@ of the evidence, even when it strongly points in one direction.""",
                 "items": {"type": "string"},
                 "description": CONSENSUS_WORKFLOW_FIELD_DESCRIPTIONS["images"],
             },
+            "consultation_mode": {
+                "type": "string",
+                "enum": ["sequential", "parallel"],
+                "default": "sequential",
+                "description": CONSENSUS_WORKFLOW_FIELD_DESCRIPTIONS["consultation_mode"],
+            },
         }
 
         # Define excluded fields for consensus workflow
@@ -436,101 +462,221 @@ of the evidence, even when it strongly points in one direction.""",
 
     async def execute_workflow(self, arguments: dict[str, Any]) -> list:
         """Override execute_workflow to handle model consultations between steps."""
+        with self.workflow_execution_context(arguments):
+            # Store arguments
+            self._current_arguments = arguments
+
+            # Validate request
+            request = self.get_workflow_request_model()(**arguments)
+
+            # On first step, store the models to consult
+            if request.step_number == 1:
+                self.initial_prompt = request.step
+                self.models_to_consult = request.models or []
+                self.accumulated_responses = []
+                # Set total steps: len(models) (each step includes consultation + response)
+                request.total_steps = len(self.models_to_consult)
+
+                if request.consultation_mode == "parallel":
+                    return await self._execute_parallel_consultation(request)
+
+            # For all steps (1 through total_steps), consult the corresponding model
+            if request.step_number <= request.total_steps:
+                # Calculate which model to consult for this step
+                model_idx = request.step_number - 1  # 0-based index
+
+                if model_idx < len(self.models_to_consult):
+                    # Consult the model for this step
+                    context_files = await self._prepare_context_files(request)
+                    model_response = await self._consult_model(
+                        self.models_to_consult[model_idx], request, context_files
+                    )
 
-        # Store arguments
-        self._current_arguments = arguments
+                    # Add to accumulated responses
+                    self.accumulated_responses.append(model_response)
+
+                    # Include the model response in the step data
+                    response_data = {
+                        "status": "model_consulted",
+                        "step_number": request.step_number,
+                        "total_steps": request.total_steps,
+                        "model_consulted": model_response["model"],
+                        "model_stance": model_response.get("stance", "neutral"),
+                        "model_response": model_response,
+                        "current_model_index": model_idx + 1,
+                        "next_step_required": request.step_number < request.total_steps,
+                    }
 
-        # Validate request
-        request = self.get_workflow_request_model()(**arguments)
+                    # Add CLAI Agent's analysis to step 1
+                    if request.step_number == 1:
+                        response_data["agent_analysis"] = {
+                            "initial_analysis": request.step,
+                            "findings": request.findings,
+                        }
+                        response_data["status"] = "analysis_and_first_model_consulted"
+
+                    # Check if this is the final step
+                    if request.step_number == request.total_steps:
+                        response_data["status"] = "consensus_workflow_complete"
+                        response_data["consensus_complete"] = True
+                        response_data["complete_consensus"] = {
+                            "initial_prompt": self.initial_prompt,
+                            "models_consulted": [
+                                f"{m['model']}:{m.get('stance', 'neutral')}" for m in self.accumulated_responses
+                            ],
+                            "total_responses": len(self.accumulated_responses),
+                            "consensus_confidence": "high",
+                        }
+                        response_data["next_steps"] = (
+                            "CONSENSUS GATHERING IS COMPLETE. Synthesize all perspectives and present:\n"
+                            "1. Key points of AGREEMENT across models\n"
+                            "2. Key points of DISAGREEMENT and why they differ\n"
+                            "3. Your final consolidated recommendation\n"
+                            "4. Specific, actionable next steps for implementation\n"
+                            "5. Critical risks or concerns that must be addressed"
+                        )
+                    else:
+                        response_data["next_steps"] = (
+                            f"Model {model_response['model']} has provided its {model_response.get('stance', 'neutral')} "
+                            f"perspective. Please analyze this response and call {self.get_name()} again with:\n"
+                            f"- step_number: {request.step_number + 1}\n"
+                            f"- findings: Summarize key points from this model's response"
+                        )
+
+                    # Add accumulated responses for tracking
+                    response_data["accumulated_responses"] = self.accumulated_responses
+
+                    # Add metadata (since we're bypassing the base class metadata addition)
+                    response_data["metadata"] = self._get_consultation_metadata(request)
+
+                    return [TextContent(type="text", text=json.dumps(response_data, indent=2, ensure_ascii=False))]
+
+            # Otherwise, use standard workflow execution
+            return await super().execute_workflow(arguments)
+
+    async def _execute_parallel_consultation(self, request) -> list:
+        """Consult every model concurrently and return all responses in a single step."""
+        # Read the context files once for all models, not once per concurrent consultation
+        context_files = await self._prepare_context_files(request)
+        start_time = time.monotonic()
+        model_responses = await asyncio.gather(
+            *[
+                self._consult_model_with_timeout(model_config, request, context_files)
+                for model_config in self.models_to_consult
+            ]
+        )
+        wall_time = time.monotonic() - start_time
 
-        # On first step, store the models to consult
-        if request.step_number == 1:
-            self.initial_prompt = request.step
-            self.models_to_consult = request.models or []
-            self.accumulated_responses = []
-            # Set total steps: len(models) (each step includes consultation + response)
-            request.total_steps = len(self.models_to_consult)
-
-        # For all steps (1 through total_steps), consult the corresponding model
-        if request.step_number <= request.total_steps:
-            # Calculate which model to consult for this step
-            model_idx = request.step_number - 1  # 0-based index
-
-            if model_idx < len(self.models_to_consult):
-                # Consult the model for this step
-                model_response = await self._consult_model(self.models_to_consult[model_idx], request)
-
-                # Add to accumulated responses
-                self.accumulated_responses.append(model_response)
-
-                # Include the model response in the step data
-                response_data = {
-                    "status": "model_consulted",
-                    "step_number": request.step_number,
-                    "total_steps": request.total_steps,
-                    "model_consulted": model_response["model"],
-                    "model_stance": model_response.get("stance", "neutral"),
-                    "model_response": model_response,
-                    "current_model_index": model_idx + 1,
-                    "next_step_required": request.step_number < request.total_steps,
-                }
+        self.accumulated_responses = list(model_responses)
+        successful = [r for r in model_responses if r.get("status") == "success"]
+        failed = [f"{r['model']}:{r.get('stance', 'neutral')}" for r in model_responses if r.get("status") != "success"]
 
-                # Add CLAI Agent's analysis to step 1
-                if request.step_number == 1:
-                    response_data["agent_analysis"] = {
-                        "initial_analysis": request.step,
-                        "findings": request.findings,
-                    }
-                    response_data["status"] = "analysis_and_first_model_consulted"
-
-                # Check if this is the final step
-                if request.step_number == request.total_steps:
-                    response_data["status"] = "consensus_workflow_complete"
-                    response_data["consensus_complete"] = True
-                    response_data["complete_consensus"] = {
-                        "initial_prompt": self.initial_prompt,
-                        "models_consulted": [
-                            f"{m['model']}:{m.get('stance', 'neutral')}" for m in self.accumulated_responses
-                        ],
-                        "total_responses": len(self.accumulated_responses),
-                        "consensus_confidence": "high",
-                    }
-                    response_data["next_steps"] = (
-                        "CONSENSUS GATHERING IS COMPLETE. Synthesize all perspectives and present:\n"
-                        "1. Key points of AGREEMENT across models\n"
-                        "2. Key points of DISAGREEMENT and why they differ\n"
-                        "3. Your final consolidated recommendation\n"
-                        "4. Specific, actionable next steps for implementation\n"
-                        "5. Critical risks or concerns that must be addressed"
-                    )
-                else:
-                    response_data["next_steps"] = (
-                        f"Model {model_response['model']} has provided its {model_response.get('stance', 'neutral')} "
-                        f"perspective. Please analyze this response and call {self.get_name()} again with:\n"
-                        f"- step_number: {request.step_number + 1}\n"
-                        f"- findings: Summarize key points from this model's response"
-                    )
+        logger.info(
+            f"[CONSENSUS] Parallel consultation of {len(model_responses)} models finished in {wall_time:.2f}s "
+            f"({len(successful)} succeeded)"
+        )
 
-                # Add accumulated responses for tracking
-                response_data["accumulated_responses"] = self.accumulated_responses
-
-                # Add metadata (since we're bypassing the base class metadata addition)
-                model_name = self.get_request_model_name(request)
-                provider = self.get_model_provider(model_name)
-                response_data["metadata"] = {
-                    "tool_name": self.get_name(),
-                    "model_name": model_name,
-                    "model_used": model_name,
-                    "provider_used": provider.get_provider_type().value,
-                }
+        response_data = {
+            "status": "consensus_workflow_complete",
+            "consultation_mode": "parallel",
+            "step_number": request.step_number,
+            "total_steps": 1,
+            "next_step_required": False,
+            "consensus_complete": True,
+            "agent_analysis": {
+                "initial_analysis": request.step,
+                "findings": request.findings,
+            },
+            "model_responses": self.accumulated_responses,
+            "accumulated_responses": self.accumulated_responses,
+            "complete_consensus": {
+                "initial_prompt": self.initial_prompt,
+                "models_consulted": [f"{m['model']}:{m.get('stance', 'neutral')}" for m in successful],
+                "models_failed": failed,
+                "total_responses": len(successful),
+                "consensus_confidence": "high" if not failed else "partial",
+            },
+            "timing": {
+                "wall_time_seconds": round(wall_time, 3),
+                "per_model_latency_seconds": {
+                    f"{r['model']}:{r.get('stance', 'neutral')}": r.get("latency_seconds") for r in model_responses
+                },
+            },
+            "next_steps": (
+                "CONSENSUS GATHERING IS COMPLETE. Synthesize all perspectives and present:\n"
+                "1. Key points of AGREEMENT across models\n"
+                "2. Key points of DISAGREEMENT and why they differ\n"
+                "3. Your final consolidated recommendation\n"
+                "4. Specific, actionable next steps for implementation\n"
+                "5. Critical risks or concerns that must be addressed"
+            ),
+        }
+
+        if failed:
+            response_data["next_steps"] += (
+                f"\n\nNOTE: {len(failed)} model(s) did not respond successfully ({', '.join(failed)}). "
+                "Base your synthesis on the responses that were received."
+            )
 
-                return [TextContent(type="text", text=json.dumps(response_data, indent=2, ensure_ascii=False))]
+        response_data["metadata"] = {
+            **self._get_consultation_metadata(request),
+            "workflow_type": "multi_model_consensus",
+            "consultation_mode": "parallel",
+            "models_consulted": [f"{m['model']}:{m.get('stance', 'neutral')}" for m in self.models_to_consult],
+            "consensus_complete": True,
+            "total_models": len(self.models_to_consult),
+        }
 
-        # Otherwise, use standard workflow execution
-        return await super().execute_workflow(arguments)
+        return [TextContent(type="text", text=json.dumps(response_data, indent=2, ensure_ascii=False))]
+
+    def _get_consultation_metadata(self, request) -> dict:
+        """Metadata identifying the tool and the model running the consensus workflow."""
+        model_name = self.get_request_model_name(request)
+        provider = self.get_model_provider(model_name)
+        return {
+            "tool_name": self.get_name(),
+            "model_name": model_name,
+            "model_used": model_name,
+            "provider_used": provider.get_provider_type().value,
+        }
 
-    async def _consult_model(self, model_config: dict, request) -> dict:
-        """Consult a single model and return its response."""
+    async def _prepare_context_files(self, request) -> str | None:
+        """Read and format the request's relevant files off the event loop, or None if there are none."""
+        if not request.relevant_files:
+            return None
+        file_content, _ = await asyncio.to_thread(
+            self._prepare_file_content_for_prompt,
+            request.relevant_files,
+            request.continuation_id,
+            "Context files",
+        )
+        return file_content or None
+
+    async def _consult_model_with_timeout(self, model_config: dict, request, context_files: str | None = None) -> dict:
+        """Consult a model under DEFAULT_CONSENSUS_TIMEOUT, recording its latency."""
+        start_time = time.monotonic()
+        try:
+            result = await asyncio.wait_for(
+                self._consult_model(model_config, request, context_files), timeout=DEFAULT_CONSENSUS_TIMEOUT
+            )
+        except asyncio.TimeoutError:
+            logger.warning(
+                f"[CONSENSUS] Model {model_config.get('model')} timed out after {DEFAULT_CONSENSUS_TIMEOUT}s"
+            )
+            result = {
+                "model": model_config.get("model", "unknown"),
+                "stance": model_config.get("stance", "neutral"),
+                "status": "timeout",
+                "error": f"Model did not respond within {DEFAULT_CONSENSUS_TIMEOUT} seconds",
+            }
+        result["latency_seconds"] = round(time.monotonic() - start_time, 3)
+        return result
+
+    async def _consult_model(self, model_config: dict, request, context_files: str | None = None) -> dict:
+        """Consult a single model and return its response.
+
+        context_files is the formatted relevant file content from _prepare_context_files().
+        """
         try:
             # Get the provider for this model
             model_name = model_config["model"]
@@ -538,22 +684,19 @@ of the evidence, even when it strongly points in one direction.""",
 
             # Prepare the prompt with any relevant files
             prompt = self.initial_prompt
-            if request.relevant_files:
-                file_content, _ = self._prepare_file_content_for_prompt(
-                    request.relevant_files,
-                    request.continuation_id,
-                    "Context files",
-                )
-                if file_content:
-                    prompt = f"{prompt}\n\n=== CONTEXT FILES ===\n{file_content}\n=== END CONTEXT ==="
+            if context_files:
+                prompt = f"{prompt}\n\n=== CONTEXT FILES ===\n{context_files}\n=== END CONTEXT ==="
 
             # Get stance-specific system prompt
             stance = model_config.get("stance", "neutral")
             stance_prompt = model_config.get("stance_prompt")
             system_prompt = self._get_stance_enhanced_prompt(stance, stance_prompt)
 
-            # Call the model
-            response = provider.generate_content(
+            # Call the model without blocking the event loop
+            from providers.executor import get_provider_executor
+
+            response = await get_provider_executor().generate_content(
+                provider,
                 prompt=prompt,
                 model_name=model_name,
                 system_prompt=system_prompt,
@@ -562,15 +705,19 @@ of the evidence, even when it strongly points in one direction.""",
                 images=request.images if request.images else None,
             )
 
+            metadata = {
+                "provider": provider.get_provider_type().value,
+                "model_name": model_name,
+            }
+            if isinstance(response.metadata, dict) and response.metadata.get("response_cache"):
+                metadata["response_cache"] = response.metadata["response_cache"]
+
             return {
                 "model": model_name,
                 "stance": stance,
                 "status": "success",
                 "verdict": response.content,
-                "metadata": {
-                    "provider": provider.get_provider_type().value,
-                    "model_name": model_name,
-                },
+                "metadata": metadata,
             }
 
         except Exception as e:
@@ -26,6 +26,7 @@ if TYPE_CHECKING:
 from config import TEMPERATURE_ANALYTICAL
 from systemprompts import DEBUG_ISSUE_PROMPT
 from tools.shared.base_models import WorkflowRequest
+from tools.shared.execution_context import workflow_state
 
 from .workflow.base import WorkflowTool
 
@@ -156,6 +157,9 @@ class DebugIssueTool(WorkflowTool):
     including race conditions, memory leaks, performance issues, and integration problems.
     """
 
+    # Per-workflow state, isolated between concurrent executions
+    initial_issue = workflow_state()
+
     def __init__(self):
         super().__init__()
         self.initial_issue = None
@@ -31,6 +31,7 @@ if TYPE_CHECKING:
 from config import TEMPERATURE_BALANCED
 from systemprompts import PLANNER_PROMPT
 from tools.shared.base_models import WorkflowRequest
+from tools.shared.execution_context import workflow_state
 
 from .workflow.base import WorkflowTool
 
@@ -124,6 +125,10 @@ class PlannerTool(WorkflowTool):
     - Self-contained operation (no expert analysis)
     """
 
+    # Per-workflow state, isolated between concurrent executions
+    branches = workflow_state(default_factory=dict)
+    initial_planning_description = workflow_state()
+
     def __init__(self):
         super().__init__()
         self.branches = {}
@@ -539,10 +544,7 @@ class PlannerTool(WorkflowTool):
 
     def get_initial_request(self, fallback_step: str) -> str:
         """Get initial planning description."""
-        try:
-            return self.initial_planning_description
-        except AttributeError:
-            return fallback_step
+        return self.initial_planning_description or fallback_step
 
     # Required abstract methods from BaseTool
     def get_request_model(self):
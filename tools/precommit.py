@@ -26,6 +26,7 @@ if TYPE_CHECKING:
 from config import TEMPERATURE_ANALYTICAL
 from systemprompts import PRECOMMIT_PROMPT
 from tools.shared.base_models import WorkflowRequest
+from tools.shared.execution_context import workflow_state
 
 from .workflow.base import WorkflowTool
 
@@ -184,6 +185,9 @@ class PrecommitTool(WorkflowTool):
     multi-repository analysis, security review, performance validation, and integration testing.
     """
 
+    # Per-workflow state, isolated between concurrent executions
+    git_config = workflow_state(default_factory=dict)
+
     def __init__(self):
         super().__init__()
         self.initial_request = None
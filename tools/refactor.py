@@ -27,6 +27,7 @@ if TYPE_CHECKING:
 from config import TEMPERATURE_ANALYTICAL
 from systemprompts import REFACTOR_PROMPT
 from tools.shared.base_models import WorkflowRequest
+from tools.shared.execution_context import workflow_state
 
 from .workflow.base import WorkflowTool
 
@@ -178,6 +179,9 @@ class RefactorTool(WorkflowTool):
     opportunities, and organization improvements.
     """
 
+    # Per-workflow state, isolated between concurrent executions
+    refactor_config = workflow_state(default_factory=dict)
+
     def __init__(self):
         super().__init__()
         self.initial_request = None
@@ -24,10 +24,12 @@ from providers import ModelProvider, ModelProviderRegistry
 from utils import check_token_limit
 from utils.conversation_memory import (
     ConversationTurn,
-    get_conversation_file_list,
-    get_thread,
+    get_thread_file_list,
 )
 from utils.file_utils import read_file_content, read_files
+from utils.profiling import annotate_profile, profile_phase
+
+from .execution_context import request_state
 
 # Import models from tools.models for compatibility
 try:
@@ -82,6 +84,14 @@ class BaseTool(ABC):
     # Class-level cache for OpenRouter registry to avoid multiple loads
     _openrouter_registry_cache = None
 
+    # Per-call state lives in the active execution context so one shared tool
+    # instance can serve concurrent requests (see tools/shared/execution_context.py)
+    _current_arguments = request_state()
+    _model_context = request_state()
+    _current_model_name = request_state()
+    _actually_processed_files = request_state(default_factory=list)
+    _response_cache_results = request_state(default_factory=list)
+
     @classmethod
     def _get_openrouter_registry(cls):
         """Get cached OpenRouter registry instance, creating if needed."""
@@ -166,6 +176,48 @@ class BaseTool(ABC):
         """
         return None
 
+    def get_schema_cache_key(self) -> tuple:
+        """
+        Return a key identifying everything the input schema depends on besides the tool itself.
+
+        The model field lists the available models and, in auto mode, their
+        descriptions, so the schema changes with the model index generation
+        (providers and restrictions), the default model and the OpenRouter /
+        custom endpoint configuration. Tools whose schema depends on other state
+        should extend this key.
+
+        Returns:
+            tuple: Hashable key; the cached schema is regenerated whenever it changes
+        """
+        from config import DEFAULT_MODEL
+        from providers.registry import ModelProviderRegistry
+
+        return (
+            ModelProviderRegistry.get_model_index().generation,
+            DEFAULT_MODEL,
+            os.getenv("OPENROUTER_API_KEY"),
+            os.getenv("CUSTOM_API_URL"),
+            BaseTool._openrouter_registry_cache,
+        )
+
+    def get_cached_input_schema(self) -> dict[str, Any]:
+        """
+        Return get_input_schema(), memoized until get_schema_cache_key() changes.
+
+        Building a schema enumerates every model and OpenRouter alias, so the
+        list_tools handler uses this instead of regenerating schemas on every call.
+        The returned dict is shared and must not be modified.
+
+        Returns:
+            Dict[str, Any]: JSON Schema object for the tool's parameters
+        """
+        key = self.get_schema_cache_key()
+        cached = getattr(self, "_input_schema_cache", None)
+        if cached is None or cached[0] != key:
+            cached = (key, self.get_input_schema())
+            self._input_schema_cache = cached
+        return cached[1]
+
     def requires_model(self) -> bool:
         """
         Return whether this tool requires AI model access.
@@ -331,16 +383,18 @@ class BaseTool(ABC):
 
             # Check available providers and add their model descriptions
 
-            # Start with native providers
+            # Start with native providers (listings and configs come from the model index)
+            model_index = ModelProviderRegistry.get_model_index()
             for provider_type in [ProviderType.GOOGLE, ProviderType.OPENAI, ProviderType.XAI, ProviderType.DIAL]:
                 # Only if this is registered / available
-                provider = ModelProviderRegistry.get_provider(provider_type)
-                if provider:
+                provider_models = model_index.list_models(provider_type, respect_restrictions=True)
+                if provider_models:
                     provider_section_added = False
-                    for model_name in provider.list_models(respect_restrictions=True):
+                    for model_name in provider_models:
                         try:
                             # Get model config to extract description
-                            model_config = provider.SUPPORTED_MODELS.get(model_name)
+                            entry = model_index.get_entry(model_name, provider_type)
+                            model_config = entry.capabilities if entry else None
                             if model_config and model_config.description:
                                 if not provider_section_added:
                                     model_desc_parts.append(
@@ -591,7 +645,9 @@ class BaseTool(ABC):
         Raises:
             ValueError: If content exceeds size limit
         """
-        is_valid, token_count = check_token_limit(content, MCP_PROMPT_SIZE_LIMIT)
+        model_context = getattr(self, "_model_context", None)
+        model_name = model_context.canonical_model_name if model_context is not None else None
+        is_valid, token_count = check_token_limit(content, MCP_PROMPT_SIZE_LIMIT, model_name)
         if not is_valid:
             error_msg = f"~{token_count:,} tokens. Maximum is {MCP_PROMPT_SIZE_LIMIT:,} tokens."
             logger.error(f"{self.name} tool {content_type.lower()} validation failed: {error_msg}")
@@ -648,12 +704,8 @@ class BaseTool(ABC):
             # New conversation, no files embedded yet
             return []
 
-        thread_context = get_thread(continuation_id)
-        if not thread_context:
-            # Thread not found, no files embedded
-            return []
-
-        embedded_files = get_conversation_file_list(thread_context)
+        # Reads only the per-turn file lists, not the turn bodies
+        embedded_files = get_thread_file_list(continuation_id)
         logger.debug(f"[FILES] {self.name}: Found {len(embedded_files)} embedded files")
         return embedded_files
 
@@ -961,6 +1013,8 @@ class BaseTool(ABC):
 
         content_parts = []
         actually_processed_files = []
+        token_model_context = model_context or getattr(self, "_model_context", None)
+        token_model_name = token_model_context.canonical_model_name if token_model_context else None
 
         # Read content of new files only
         if files_to_embed:
@@ -982,6 +1036,7 @@ class BaseTool(ABC):
                     max_tokens=effective_max_tokens + reserve_tokens,
                     reserve_tokens=reserve_tokens,
                     include_line_numbers=self.wants_line_numbers_by_default(),
+                    model_name=token_model_name,
                 )
                 self._validate_token_limit(file_content, context_description)
                 content_parts.append(file_content)
@@ -992,7 +1047,7 @@ class BaseTool(ABC):
                 # Estimate tokens for debug logging
                 from utils.token_utils import estimate_tokens
 
-                content_tokens = estimate_tokens(file_content)
+                content_tokens = estimate_tokens(file_content, token_model_name)
                 logger.debug(
                     f"{self.name} tool successfully embedded {len(files_to_embed)} files ({content_tokens:,} tokens)"
                 )
@@ -1145,6 +1200,79 @@ When recommending searches, be specific about what information you need and why
         """
         return response
 
+    async def generate_model_response(self, provider: ModelProvider, **kwargs):
+        """
+        Generate a model response without blocking the event loop.
+
+        When the MCP client supplied a progress token, the response is streamed
+        and its text deltas are forwarded as progress notifications, so the client
+        sees output from the first token. Otherwise the provider is called once.
+
+        Args:
+            provider: Provider to call
+            **kwargs: Arguments for the provider's generate_content
+
+        Returns:
+            ModelResponse: The complete response
+        """
+        from providers.executor import get_provider_executor
+
+        from .progress import ProgressReporter
+
+        executor = get_provider_executor()
+        reporter = ProgressReporter.from_request_context()
+        with profile_phase("provider_call"):
+            if reporter is None:
+                model_response = await executor.generate_content(provider, **kwargs)
+            else:
+                model_response = None
+                async for chunk in executor.stream_content(provider, **kwargs):
+                    if chunk.text:
+                        await reporter.add(chunk.text)
+                    if chunk.response is not None:
+                        model_response = chunk.response
+                await reporter.flush()
+
+        self._report_token_usage(model_response)
+        metadata = getattr(model_response, "metadata", None)
+        cache_result = metadata.get("response_cache") if isinstance(metadata, dict) else None
+        if cache_result:
+            self._response_cache_results = self._response_cache_results + [cache_result]
+            annotate_profile(response_cache=cache_result)
+        return model_response
+
+    def get_response_cache_metadata(self) -> Optional[dict[str, int]]:
+        """
+        Summarize how this call's model responses used the response cache.
+
+        Returns:
+            {"hits": n, "misses": m} for responses that went through the cache,
+            or None if the cache was disabled or bypassed for every response
+        """
+        results = self._response_cache_results
+        if not results:
+            return None
+        return {"hits": results.count("hit"), "misses": results.count("miss")}
+
+    def _report_token_usage(self, model_response) -> None:
+        """Log prompt cache hits and add the response's token usage to the call's profile record."""
+        usage = getattr(model_response, "usage", None)
+        if not isinstance(usage, dict):
+            return
+        annotate_profile(
+            **{
+                key: usage[key]
+                for key in ("input_tokens", "cached_input_tokens", "output_tokens")
+                if isinstance(usage.get(key), int)
+            }
+        )
+        cached_tokens = usage.get("cached_input_tokens")
+        if isinstance(cached_tokens, int) and cached_tokens > 0:
+            logger.info(
+                f"{self.get_name()}: {cached_tokens:,} of {usage.get('input_tokens', 0):,} input tokens "
+                "served from the provider's prompt cache"
+            )
+
     # === IMPLEMENTATION METHODS ===
     # These will be provided in a full implementation but are inherited from current base.py
     # for now to maintain compatibility.
@@ -0,0 +1,186 @@
+"""
+Per-execution state for Zen MCP tools
+
+server.py keeps a single instance of every tool in its TOOLS dict, but tool hooks
+historically stored per-call data on ``self`` (current arguments, model context,
+work history, ...). Two concurrent calls to the same tool would then overwrite each
+other's state.
+
+This module moves that state into a request-scoped execution context carried by a
+context variable, so tools stay re-entrant without changing how hooks access it:
+
+- Attributes declared with ``request_state()`` live for a single ``execute`` call
+- Attributes declared with ``workflow_state()`` live for one multi-step workflow and
+  are restored on the next step of the same workflow
+- Outside an execution (construction, direct calls in tests) attributes behave like
+  plain instance attributes; after an execution finishes its final state is left on
+  the instance for introspection only - it is never read back by later executions
+
+Because asyncio tasks copy the current context when they are created, each MCP
+request (and each task it spawns) sees only its own execution state.
+"""
+
+import copy
+import logging
+from collections import OrderedDict
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Maximum number of in-progress workflows remembered per tool instance
+MAX_WORKFLOW_SESSIONS = 100
+
+_MISSING = object()
+
+
+@dataclass
+class ToolExecutionContext:
+    """State belonging to one tool execution."""
+
+    tool: Any
+    request_state: dict[str, Any] = field(default_factory=dict)
+    workflow_state: dict[str, Any] = field(default_factory=dict)
+
+
+_current_execution: ContextVar[Optional[ToolExecutionContext]] = ContextVar("zen_tool_execution", default=None)
+
+
+def get_current_execution(tool: Any) -> Optional[ToolExecutionContext]:
+    """Return the active execution context for ``tool``, if it is currently executing."""
+    context = _current_execution.get()
+    if context is not None and context.tool is tool:
+        return context
+    return None
+
+
+@contextmanager
+def tool_execution_context(
+    tool: Any, workflow_state: Optional[dict[str, Any]] = None
+) -> Iterator[ToolExecutionContext]:
+    """
+    Run a block of tool code inside its own execution context.
+
+    Re-entering for a tool that is already executing in the current context reuses
+    the existing context, so overridden ``execute_workflow`` methods can safely
+    delegate to the base implementation.
+
+    Args:
+        tool: Tool instance being executed
+        workflow_state: Workflow state dict to resume (a fresh one is used if None)
+    """
+    existing = get_current_execution(tool)
+    if existing is not None:
+        yield existing
+        return
+
+    context = ToolExecutionContext(tool=tool, workflow_state=workflow_state if workflow_state is not None else {})
+    token = _current_execution.set(context)
+    try:
+        yield context
+    finally:
+        _current_execution.reset(token)
+        # Leave a snapshot of the final state on the instance for introspection/debugging
+        tool.__dict__.update(context.workflow_state)
+        tool.__dict__.update(context.request_state)
+
+
+class ExecutionStateAttribute:
+    """Descriptor storing a tool attribute in the active execution context."""
+
+    def __init__(self, scope: str, default: Any = None, default_factory: Optional[Callable[[], Any]] = None):
+        self.scope = scope
+        self.default = default
+        self.default_factory = default_factory
+        self.name = ""
+
+    def __set_name__(self, owner: type, name: str) -> None:
+        self.name = name
+
+    def _new_default(self) -> Any:
+        if self.default_factory is not None:
+            return self.default_factory()
+        return copy.copy(self.default)
+
+    def _get_store(self, instance: Any) -> Optional[dict[str, Any]]:
+        context = get_current_execution(instance)
+        if context is None:
+            return None
+        return context.request_state if self.scope == "request" else context.workflow_state
+
+    def __get__(self, instance: Any, owner: type) -> Any:
+        if instance is None:
+            return self
+
+        store = self._get_store(instance)
+        if store is None:
+            value = instance.__dict__.get(self.name, _MISSING)
+            return self._new_default() if value is _MISSING else value
+
+        value = store.get(self.name, _MISSING)
+        if value is _MISSING:
+            # Never fall back to instance state here - it may belong to another execution
+            value = self._new_default()
+            store[self.name] = value
+        return value
+
+    def __set__(self, instance: Any, value: Any) -> None:
+        store = self._get_store(instance)
+        if store is None:
+            instance.__dict__[self.name] = value
+        else:
+            store[self.name] = value
+
+
+def request_state(default: Any = None, default_factory: Optional[Callable[[], Any]] = None) -> Any:
+    """Declare a tool attribute that is scoped to a single execute() call."""
+    return ExecutionStateAttribute("request", default, default_factory)
+
+
+def workflow_state(default: Any = None, default_factory: Optional[Callable[[], Any]] = None) -> Any:
+    """Declare a tool attribute that persists across the steps of one workflow."""
+    return ExecutionStateAttribute("workflow", default, default_factory)
+
+
+class WorkflowSessionStore:
+    """
+    Bounded mapping of continuation_id -> workflow state for one tool instance.
+
+    Steps of the same workflow are linked by continuation_id. Requests without a
+    known continuation_id (beyond step 1) fall back to the most recently used
+    session, preserving the behavior of clients that never send one.
+    """
+
+    def __init__(self, max_sessions: int = MAX_WORKFLOW_SESSIONS):
+        self.max_sessions = max_sessions
+        self._sessions: OrderedDict[str, dict[str, Any]] = OrderedDict()
+        self._latest: Optional[dict[str, Any]] = None
+
+    def resolve(self, continuation_id: Optional[str], step_number: Any) -> dict[str, Any]:
+        """Find (or create) the workflow state for a workflow step."""
+        if step_number == 1 or (self._latest is None and continuation_id not in self._sessions):
+            # Step 1 always starts a new workflow, even when continuing an earlier conversation
+            state = {}
+        elif continuation_id and continuation_id in self._sessions:
+            state = self._sessions[continuation_id]
+        else:
+            logger.debug(f"No workflow session for continuation '{continuation_id}', resuming latest session")
+            state = self._latest
+
+        if continuation_id:
+            self.bind(continuation_id, state)
+        self._latest = state
+        return state
+
+    def bind(self, continuation_id: str, state: dict[str, Any]) -> None:
+        """Associate workflow state with a continuation_id."""
+        self._sessions[continuation_id] = state
+        self._sessions.move_to_end(continuation_id)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._sessions)
@@ -0,0 +1,85 @@
+"""
+MCP progress notifications for streamed model output
+
+When an MCP client sends a ``progressToken`` with a tool call, the tool can
+report progress while it runs. Long model responses (thinkdeep, codereview,
+expert analysis) stream their text deltas through these notifications so the
+client sees output as soon as the first token arrives instead of a call that
+appears hung for minutes.
+
+Notifications are batched: deltas are accumulated and flushed at most once per
+PROGRESS_MIN_INTERVAL_SECONDS, and the remainder is flushed when the stream ends.
+"""
+
+import logging
+import time
+from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+
+# Minimum time between two progress notifications for the same request
+PROGRESS_MIN_INTERVAL_SECONDS = 0.25
+
+
+class ProgressReporter:
+    """Sends streamed text to the MCP client as progress notifications."""
+
+    def __init__(
+        self,
+        session: Any,
+        progress_token: Any,
+        request_id: Any = None,
+        min_interval: float = PROGRESS_MIN_INTERVAL_SECONDS,
+    ):
+        self.session = session
+        self.progress_token = progress_token
+        self.request_id = request_id
+        self.min_interval = min_interval
+        self.progress = 0
+        self._pending: list[str] = []
+        self._last_sent = 0.0
+        self._disabled = False
+
+    @classmethod
+    def from_request_context(cls) -> Optional["ProgressReporter"]:
+        """Create a reporter for the current MCP request, if the client asked for progress."""
+        try:
+            from mcp.server.lowlevel.server import request_ctx
+
+            context = request_ctx.get()
+        except (ImportError, LookupError):
+            return None
+
+        meta = getattr(context, "meta", None)
+        progress_token = getattr(meta, "progressToken", None) if meta is not None else None
+        if progress_token is None:
+            return None
+        return cls(context.session, progress_token, getattr(context, "request_id", None))
+
+    async def add(self, text: str) -> None:
+        """Queue a text delta, sending a notification if the throttle interval has passed."""
+        if not text or self._disabled:
+            return
+        self._pending.append(text)
+        self.progress += len(text)
+        if time.monotonic() - self._last_sent >= self.min_interval:
+            await self.flush()
+
+    async def flush(self) -> None:
+        """Send any queued text immediately."""
+        if not self._pending or self._disabled:
+            return
+        message = "".join(self._pending)
+        self._pending.clear()
+        self._last_sent = time.monotonic()
+        try:
+            await self.session.send_progress_notification(
+                self.progress_token,
+                self.progress,
+                message=message,
+                related_request_id=self.request_id,
+            )
+        except Exception as e:
+            # Progress is best-effort; never fail the tool call because a notification could not be sent
+            logger.debug(f"Disabling progress notifications after send failure: {type(e).__name__}: {e}")
+            self._disabled = True
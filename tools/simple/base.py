@@ -17,7 +17,9 @@ from typing import Any, Optional
 
 from tools.shared.base_models import ToolRequest
 from tools.shared.base_tool import BaseTool
+from tools.shared.execution_context import tool_execution_context
 from tools.shared.schema_builders import SchemaBuilder
+from utils.profiling import profile_phase
 
 
 class SimpleTool(BaseTool):
@@ -284,204 +286,213 @@ class SimpleTool(BaseTool):
 
         logger = logging.getLogger(f"tools.{self.get_name()}")
 
-        try:
-            # Store arguments for access by helper methods
-            self._current_arguments = arguments
-
-            logger.info(f"🔧 {self.get_name()} tool called with arguments: {list(arguments.keys())}")
-
-            # Validate request using the tool's Pydantic model
-            request_model = self.get_request_model()
-            request = request_model(**arguments)
-            logger.debug(f"Request validation successful for {self.get_name()}")
-
-            # Validate file paths for security
-            # This prevents path traversal attacks and ensures proper access control
-            path_error = self._validate_file_paths(request)
-            if path_error:
-                error_output = ToolOutput(
-                    status="error",
-                    content=path_error,
-                    content_type="text",
-                )
-                return [TextContent(type="text", text=error_output.model_dump_json())]
-
-            # Handle model resolution like old base.py
-            model_name = self.get_request_model_name(request)
-            if not model_name:
-                from config import DEFAULT_MODEL
-
-                model_name = DEFAULT_MODEL
-
-            # Store the current model name for later use
-            self._current_model_name = model_name
+        with tool_execution_context(self):
+            try:
+                # Store arguments for access by helper methods
+                self._current_arguments = arguments
+
+                logger.info(f"🔧 {self.get_name()} tool called with arguments: {list(arguments.keys())}")
+
+                # Validate request using the tool's Pydantic model
+                request_model = self.get_request_model()
+                request = request_model(**arguments)
+                logger.debug(f"Request validation successful for {self.get_name()}")
+
+                # Validate file paths for security
+                # This prevents path traversal attacks and ensures proper access control
+                path_error = self._validate_file_paths(request)
+                if path_error:
+                    error_output = ToolOutput(
+                        status="error",
+                        content=path_error,
+                        content_type="text",
+                    )
+                    return [TextContent(type="text", text=error_output.model_dump_json())]
 
-            # Handle model context from arguments (for in-process testing)
-            if "_model_context" in arguments:
-                self._model_context = arguments["_model_context"]
-                logger.debug(f"{self.get_name()}: Using model context from arguments")
-            else:
-                # Create model context if not provided
-                from utils.model_context import ModelContext
+                # Handle model resolution like old base.py
+                model_name = self.get_request_model_name(request)
+                if not model_name:
+                    from config import DEFAULT_MODEL
 
-                self._model_context = ModelContext(model_name)
-                logger.debug(f"{self.get_name()}: Created model context for {model_name}")
+                    model_name = DEFAULT_MODEL
 
-            # Get images if present
-            images = self.get_request_images(request)
-            continuation_id = self.get_request_continuation_id(request)
+                # Store the current model name for later use
+                self._current_model_name = model_name
 
-            # Handle conversation history and prompt preparation
-            if continuation_id:
-                # Check if conversation history is already embedded
-                field_value = self.get_request_prompt(request)
-                if "=== CONVERSATION HISTORY ===" in field_value:
-                    # Use pre-embedded history
-                    prompt = field_value
-                    logger.debug(f"{self.get_name()}: Using pre-embedded conversation history")
+                # Handle model context from arguments (for in-process testing)
+                if "_model_context" in arguments:
+                    self._model_context = arguments["_model_context"]
+                    logger.debug(f"{self.get_name()}: Using model context from arguments")
                 else:
-                    # No embedded history - reconstruct it (for in-process calls)
-                    logger.debug(f"{self.get_name()}: No embedded history found, reconstructing conversation")
-
-                    # Get thread context
-                    from utils.conversation_memory import add_turn, build_conversation_history, get_thread
-
-                    thread_context = get_thread(continuation_id)
-
-                    if thread_context:
-                        # Add user's new input to conversation
-                        user_prompt = self.get_request_prompt(request)
-                        user_files = self.get_request_files(request)
-                        if user_prompt:
-                            add_turn(continuation_id, "user", user_prompt, files=user_files)
-
-                            # Get updated thread context after adding the turn
-                            thread_context = get_thread(continuation_id)
-                            logger.debug(
-                                f"{self.get_name()}: Retrieved updated thread with {len(thread_context.turns)} turns"
+                    # Create model context if not provided
+                    from utils.model_context import ModelContext
+
+                    self._model_context = ModelContext(model_name)
+                    logger.debug(f"{self.get_name()}: Created model context for {model_name}")
+
+                # Get images if present
+                images = self.get_request_images(request)
+                continuation_id = self.get_request_continuation_id(request)
+
+                # Handle conversation history and prompt preparation
+                if continuation_id:
+                    # Check if conversation history is already embedded
+                    field_value = self.get_request_prompt(request)
+                    if "=== CONVERSATION HISTORY ===" in field_value:
+                        # Use pre-embedded history
+                        prompt = field_value
+                        logger.debug(f"{self.get_name()}: Using pre-embedded conversation history")
+                    else:
+                        # No embedded history - reconstruct it (for in-process calls)
+                        logger.debug(f"{self.get_name()}: No embedded history found, reconstructing conversation")
+
+                        # Get thread context
+                        from utils.conversation_memory import add_turn, build_conversation_history, get_thread
+
+                        thread_context = get_thread(continuation_id)
+
+                        if thread_context:
+                            # Add user's new input to conversation
+                            user_prompt = self.get_request_prompt(request)
+                            user_files = self.get_request_files(request)
+                            if user_prompt:
+                                add_turn(continuation_id, "user", user_prompt, files=user_files)
+
+                                # Get updated thread context after adding the turn
+                                thread_context = get_thread(continuation_id)
+                                logger.debug(
+                                    f"{self.get_name()}: Retrieved updated thread with {len(thread_context.turns)} turns"
+                                )
+
+                            # Build conversation history with updated thread context
+                            conversation_history, conversation_tokens = build_conversation_history(
+                                thread_context, self._model_context
                             )
 
-                        # Build conversation history with updated thread context
-                        conversation_history, conversation_tokens = build_conversation_history(
-                            thread_context, self._model_context
-                        )
-
-                        # Get the base prompt from the tool
-                        base_prompt = await self.prepare_prompt(request)
+                            # Get the base prompt from the tool
+                            with profile_phase("prompt_build"):
+                                base_prompt = await self.prepare_prompt(request)
 
-                        # Combine with conversation history
-                        if conversation_history:
-                            prompt = f"{conversation_history}\n\n=== NEW USER INPUT ===\n{base_prompt}"
+                            # Combine with conversation history
+                            if conversation_history:
+                                prompt = f"{conversation_history}\n\n=== NEW USER INPUT ===\n{base_prompt}"
+                            else:
+                                prompt = base_prompt
                         else:
-                            prompt = base_prompt
-                    else:
-                        # Thread not found, prepare normally
-                        logger.warning(f"Thread {continuation_id} not found, preparing prompt normally")
+                            # Thread not found, prepare normally
+                            logger.warning(f"Thread {continuation_id} not found, preparing prompt normally")
+                            with profile_phase("prompt_build"):
+                                prompt = await self.prepare_prompt(request)
+                else:
+                    # New conversation, prepare prompt normally
+                    with profile_phase("prompt_build"):
                         prompt = await self.prepare_prompt(request)
-            else:
-                # New conversation, prepare prompt normally
-                prompt = await self.prepare_prompt(request)
-
-                # Add follow-up instructions for new conversations
-                from server import get_follow_up_instructions
-
-                follow_up_instructions = get_follow_up_instructions(0)
-                prompt = f"{prompt}\n\n{follow_up_instructions}"
-                logger.debug(
-                    f"Added follow-up instructions for new {self.get_name()} conversation"
-                )  # Validate images if any were provided
-            if images:
-                image_validation_error = self._validate_image_limits(
-                    images, model_context=self._model_context, continuation_id=continuation_id
+
+                    # Add follow-up instructions for new conversations
+                    from server import get_follow_up_instructions
+
+                    follow_up_instructions = get_follow_up_instructions(0)
+                    prompt = f"{prompt}\n\n{follow_up_instructions}"
+                    logger.debug(
+                        f"Added follow-up instructions for new {self.get_name()} conversation"
+                    )  # Validate images if any were provided
+                if images:
+                    image_validation_error = self._validate_image_limits(
+                        images, model_context=self._model_context, continuation_id=continuation_id
+                    )
+                    if image_validation_error:
+                        return [TextContent(type="text", text=json.dumps(image_validation_error, ensure_ascii=False))]
+
+                # Get and validate temperature against model constraints
+                temperature, temp_warnings = self.get_validated_temperature(request, self._model_context)
+
+                # Log any temperature corrections
+                for warning in temp_warnings:
+                    # Get thinking mode with defaults
+                    logger.warning(warning)
+                thinking_mode = self.get_request_thinking_mode(request)
+                if thinking_mode is None:
+                    thinking_mode = self.get_default_thinking_mode()
+
+                # Get the provider from model context (clean OOP - no re-fetching)
+                provider = self._model_context.provider
+
+                # Get system prompt for this tool
+                base_system_prompt = self.get_system_prompt()
+                language_instruction = self.get_language_instruction()
+                system_prompt = language_instruction + base_system_prompt
+
+                # Generate AI response using the provider
+                logger.info(f"Sending request to {provider.get_provider_type().value} API for {self.get_name()}")
+                logger.info(
+                    f"Using model: {self._model_context.model_name} via {provider.get_provider_type().value} provider"
                 )
-                if image_validation_error:
-                    return [TextContent(type="text", text=json.dumps(image_validation_error, ensure_ascii=False))]
-
-            # Get and validate temperature against model constraints
-            temperature, temp_warnings = self.get_validated_temperature(request, self._model_context)
-
-            # Log any temperature corrections
-            for warning in temp_warnings:
-                # Get thinking mode with defaults
-                logger.warning(warning)
-            thinking_mode = self.get_request_thinking_mode(request)
-            if thinking_mode is None:
-                thinking_mode = self.get_default_thinking_mode()
-
-            # Get the provider from model context (clean OOP - no re-fetching)
-            provider = self._model_context.provider
-
-            # Get system prompt for this tool
-            base_system_prompt = self.get_system_prompt()
-            language_instruction = self.get_language_instruction()
-            system_prompt = language_instruction + base_system_prompt
-
-            # Generate AI response using the provider
-            logger.info(f"Sending request to {provider.get_provider_type().value} API for {self.get_name()}")
-            logger.info(
-                f"Using model: {self._model_context.model_name} via {provider.get_provider_type().value} provider"
-            )
 
-            # Estimate tokens for logging
-            from utils.token_utils import estimate_tokens
+                # Estimate tokens for logging
+                from utils.token_utils import estimate_tokens
+
+                estimated_tokens = estimate_tokens(prompt, self._model_context.canonical_model_name)
+                logger.debug(f"Prompt length: {len(prompt)} characters (~{estimated_tokens:,} tokens)")
+
+                # Generate content with provider abstraction, off the event loop,
+                # streaming progress to the client when it asked for it
+                model_response = await self.generate_model_response(
+                    provider,
+                    prompt=prompt,
+                    model_name=self._current_model_name,
+                    system_prompt=system_prompt,
+                    temperature=temperature,
+                    thinking_mode=thinking_mode if provider.supports_thinking_mode(self._current_model_name) else None,
+                    images=images if images else None,
+                )
 
-            estimated_tokens = estimate_tokens(prompt)
-            logger.debug(f"Prompt length: {len(prompt)} characters (~{estimated_tokens:,} tokens)")
+                logger.info(f"Received response from {provider.get_provider_type().value} API for {self.get_name()}")
 
-            # Generate content with provider abstraction
-            model_response = provider.generate_content(
-                prompt=prompt,
-                model_name=self._current_model_name,
-                system_prompt=system_prompt,
-                temperature=temperature,
-                thinking_mode=thinking_mode if provider.supports_thinking_mode(self._current_model_name) else None,
-                images=images if images else None,
-            )
+                # Process the model's response
+                if model_response.content:
+                    raw_text = model_response.content
 
-            logger.info(f"Received response from {provider.get_provider_type().value} API for {self.get_name()}")
+                    # Create model info for conversation tracking
+                    model_info = {
+                        "provider": provider,
+                        "model_name": self._current_model_name,
+                        "model_response": model_response,
+                    }
 
-            # Process the model's response
-            if model_response.content:
-                raw_text = model_response.content
+                    # Parse response using the same logic as old base.py
+                    with profile_phase("response_parse"):
+                        tool_output = self._parse_response(raw_text, request, model_info)
+                    logger.info(f"✅ {self.get_name()} tool completed successfully")
 
-                # Create model info for conversation tracking
-                model_info = {
-                    "provider": provider,
-                    "model_name": self._current_model_name,
-                    "model_response": model_response,
-                }
+                else:
+                    # Handle cases where the model couldn't generate a response
+                    finish_reason = model_response.metadata.get("finish_reason", "Unknown")
+                    logger.warning(
+                        f"Response blocked or incomplete for {self.get_name()}. Finish reason: {finish_reason}"
+                    )
+                    tool_output = ToolOutput(
+                        status="error",
+                        content=f"Response blocked or incomplete. Finish reason: {finish_reason}",
+                        content_type="text",
+                    )
 
-                # Parse response using the same logic as old base.py
-                tool_output = self._parse_response(raw_text, request, model_info)
-                logger.info(f"✅ {self.get_name()} tool completed successfully")
+                # Return the tool output as TextContent
+                return [TextContent(type="text", text=tool_output.model_dump_json())]
 
-            else:
-                # Handle cases where the model couldn't generate a response
-                finish_reason = model_response.metadata.get("finish_reason", "Unknown")
-                logger.warning(f"Response blocked or incomplete for {self.get_name()}. Finish reason: {finish_reason}")
-                tool_output = ToolOutput(
+            except Exception as e:
+                # Special handling for MCP size check errors
+                if str(e).startswith("MCP_SIZE_CHECK:"):
+                    # Extract the JSON content after the prefix
+                    json_content = str(e)[len("MCP_SIZE_CHECK:") :]
+                    return [TextContent(type="text", text=json_content)]
+
+                logger.error(f"Error in {self.get_name()}: {str(e)}")
+                error_output = ToolOutput(
                     status="error",
-                    content=f"Response blocked or incomplete. Finish reason: {finish_reason}",
+                    content=f"Error in {self.get_name()}: {str(e)}",
                     content_type="text",
                 )
-
-            # Return the tool output as TextContent
-            return [TextContent(type="text", text=tool_output.model_dump_json())]
-
-        except Exception as e:
-            # Special handling for MCP size check errors
-            if str(e).startswith("MCP_SIZE_CHECK:"):
-                # Extract the JSON content after the prefix
-                json_content = str(e)[len("MCP_SIZE_CHECK:") :]
-                return [TextContent(type="text", text=json_content)]
-
-            logger.error(f"Error in {self.get_name()}: {str(e)}")
-            error_output = ToolOutput(
-                status="error",
-                content=f"Error in {self.get_name()}: {str(e)}",
-                content_type="text",
-            )
-            return [TextContent(type="text", text=error_output.model_dump_json())]
+                return [TextContent(type="text", text=error_output.model_dump_json())]
 
     def _parse_response(self, raw_text: str, request, model_info: Optional[dict] = None):
         """
@@ -559,6 +570,9 @@ class SimpleTool(BaseTool):
                         except AttributeError:
                             # Fallback if provider doesn't have get_provider_type method
                             metadata["provider_used"] = str(provider)
+            response_cache = self.get_response_cache_metadata()
+            if response_cache:
+                metadata["response_cache"] = response_cache
 
             return ToolOutput(
                 status="success",
@@ -647,6 +661,9 @@ class SimpleTool(BaseTool):
                         except AttributeError:
                             # Fallback if provider doesn't have get_provider_type method
                             metadata["provider_used"] = str(provider)
+            response_cache = self.get_response_cache_metadata()
+            if response_cache:
+                metadata["response_cache"] = response_cache
 
             return ToolOutput(
                 status="continuation_available",
@@ -24,6 +24,7 @@ if TYPE_CHECKING:
 from config import TEMPERATURE_CREATIVE
 from systemprompts import THINKDEEP_PROMPT
 from tools.shared.base_models import WorkflowRequest
+from tools.shared.execution_context import workflow_state
 
 from .workflow.base import WorkflowTool
 
@@ -151,6 +152,9 @@ class ThinkDeepTool(WorkflowTool):
         "these tools can provide enhanced capabilities."
     )
 
+    # Parameters given in earlier steps, kept for the expert analysis of the final step
+    stored_request_params = workflow_state(default_factory=dict)
+
     def __init__(self):
         """Initialize the ThinkDeep workflow tool"""
         super().__init__()
@@ -218,22 +222,12 @@ class ThinkDeepTool(WorkflowTool):
         """
         Customize the workflow response for thinkdeep-specific needs
         """
-        # Store request parameters for later use in expert analysis
-        self.stored_request_params = {}
-        try:
-            self.stored_request_params["temperature"] = request.temperature
-        except AttributeError:
-            self.stored_request_params["temperature"] = None
-
-        try:
-            self.stored_request_params["thinking_mode"] = request.thinking_mode
-        except AttributeError:
-            self.stored_request_params["thinking_mode"] = None
-
-        try:
-            self.stored_request_params["use_websearch"] = request.use_websearch
-        except AttributeError:
-            self.stored_request_params["use_websearch"] = None
+        # Store request parameters for later use in expert analysis. Steps that omit
+        # a parameter keep the value given in an earlier step.
+        for param in ("temperature", "thinking_mode", "use_websearch"):
+            value = getattr(request, param, None)
+            if value is not None:
+                self.stored_request_params[param] = value
 
         # Add thinking-specific context to response
         response_data.update(
@@ -360,7 +354,9 @@ but also acknowledge strong insights and valid conclusions.
     # Override hook methods to use stored request parameters for expert analysis
 
     def get_request_temperature(self, request) -> float:
-        """Use stored temperature from initial request."""
+        """Use the temperature of this step, or else the one given in an earlier step."""
+        if getattr(request, "temperature", None) is not None:
+            return super().get_request_temperature(request)
         try:
             stored_params = self.stored_request_params
             if stored_params and stored_params.get("temperature") is not None:
@@ -370,7 +366,9 @@ but also acknowledge strong insights and valid conclusions.
         return super().get_request_temperature(request)
 
     def get_request_thinking_mode(self, request) -> str:
-        """Use stored thinking mode from initial request."""
+        """Use the thinking mode of this step, or else the one given in an earlier step."""
+        if getattr(request, "thinking_mode", None) is not None:
+            return super().get_request_thinking_mode(request)
         try:
             stored_params = self.stored_request_params
             if stored_params and stored_params.get("thinking_mode") is not None:
@@ -380,7 +378,9 @@ but also acknowledge strong insights and valid conclusions.
         return super().get_request_thinking_mode(request)
 
     def get_request_use_websearch(self, request) -> bool:
-        """Use stored use_websearch from initial request."""
+        """Use the use_websearch of this step, or else the one given in an earlier step."""
+        if getattr(request, "use_websearch", None) is not None:
+            return super().get_request_use_websearch(request)
         try:
             stored_params = self.stored_request_params
             if stored_params and stored_params.get("use_websearch") is not None:
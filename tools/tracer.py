@@ -30,6 +30,7 @@ if TYPE_CHECKING:
 from config import TEMPERATURE_ANALYTICAL
 from systemprompts import TRACER_PROMPT
 from tools.shared.base_models import WorkflowRequest
+from tools.shared.execution_context import workflow_state
 
 from .workflow.base import WorkflowTool
 
@@ -172,6 +173,10 @@ class TracerTool(WorkflowTool):
     both precision tracing (execution flow) and dependencies tracing (structural relationships).
     """
 
+    # Per-workflow state, isolated between concurrent executions
+    trace_config = workflow_state(default_factory=dict)
+    initial_tracing_description = workflow_state()
+
     def __init__(self):
         super().__init__()
         self.initial_request = None
@@ -777,10 +782,7 @@ DTOClass ──uses──→ [TARGET_CLASS] ──uses──→ EntityClass
 
     def get_initial_request(self, fallback_step: str) -> str:
         """Get initial tracing description."""
-        try:
-            return self.initial_tracing_description
-        except AttributeError:
-            return fallback_step
+        return self.initial_tracing_description or fallback_step
 
     def get_request_confidence(self, request) -> str:
         """Get confidence from request for tracer workflow."""
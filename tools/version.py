@@ -308,6 +308,48 @@ class VersionTool(BaseTool):
             logger.warning(f"Error checking provider configuration: {e}")
             output_lines.append("\n\n**Providers**: Error checking configuration")
 
+        # Providers whose circuit breaker is not closed
+        try:
+            from providers.health import get_provider_health
+
+            unhealthy = {
+                provider_key: stats
+                for provider_key, stats in get_provider_health().get_stats().items()
+                if stats.get("state", "closed") != "closed"
+            }
+            if unhealthy:
+                output_lines.append("\n\n**Provider Circuits**:")
+                for provider_key, stats in sorted(unhealthy.items()):
+                    output_lines.append(
+                        f"- **{provider_key}**: {stats['state']} after {stats['consecutive_failures']} consecutive failure(s)"
+                    )
+        except Exception as e:
+            logger.debug(f"Error reading provider health: {e}")
+
+        # Client-side rate limit queues (only present when limits are configured and used)
+        try:
+            from providers.rate_limiter import get_rate_limiter
+
+            rate_limit_stats = get_rate_limiter().get_stats()
+            if rate_limit_stats:
+                output_lines.append("\n\n**Rate Limits**:")
+                for scope, stats in sorted(rate_limit_stats.items()):
+                    details = ", ".join(f"{key}={value}" for key, value in stats.items())
+                    output_lines.append(f"- **{scope}**: {details}")
+        except Exception as e:
+            logger.debug(f"Error reading rate limit stats: {e}")
+
+        # Response cache (only when enabled)
+        try:
+            from providers.response_cache import get_response_cache
+
+            response_cache = get_response_cache()
+            if response_cache.enabled:
+                details = ", ".join(f"{key}={value}" for key, value in response_cache.get_stats().items())
+                output_lines.append(f"\n\n**Response Cache**: {details}")
+        except Exception as e:
+            logger.debug(f"Error reading response cache stats: {e}")
+
         output_lines.append("")
 
         # Format output
@@ -30,8 +30,16 @@ from mcp.types import TextContent
 
 from config import MCP_PROMPT_SIZE_LIMIT
 from utils.conversation_memory import add_turn, create_thread
+from utils.profiling import profile_phase
 
 from ..shared.base_models import ConsolidatedFindings
+from ..shared.execution_context import (
+    WorkflowSessionStore,
+    get_current_execution,
+    request_state,
+    tool_execution_context,
+    workflow_state,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -64,11 +72,22 @@ class BaseWorkflowMixin(ABC):
     - _prepare_file_content_for_prompt()
     """
 
+    # State shared by the steps of one workflow, restored per continuation_id
+    work_history = workflow_state(default_factory=list)
+    consolidated_findings = workflow_state(default_factory=ConsolidatedFindings)
+    initial_request = workflow_state()
+
+    # File context prepared for the current step only
+    _embedded_file_content = request_state("")
+    _file_reference_note = request_state("")
+    _referenced_files = request_state(default_factory=list)
+
     def __init__(self) -> None:
         super().__init__()
         self.work_history: list[dict[str, Any]] = []
         self.consolidated_findings: ConsolidatedFindings = ConsolidatedFindings()
         self.initial_request: Optional[str] = None
+        self._workflow_sessions = WorkflowSessionStore()
 
     # ================================================================================
     # Abstract Methods - Required Implementation by BaseTool or Subclasses
@@ -611,124 +630,149 @@ class BaseWorkflowMixin(ABC):
         """
         from mcp.types import TextContent
 
-        try:
-            # Store arguments for access by helper methods
-            self._current_arguments = arguments
-
-            # Validate request using tool-specific model
-            request = self.get_workflow_request_model()(**arguments)
-
-            # Validate step field size (basic validation for workflow instructions)
-            # If step is too large, user should use shorter instructions and put details in files
-            step_content = request.step
-            if step_content and len(step_content) > MCP_PROMPT_SIZE_LIMIT:
-                from tools.models import ToolOutput
-
-                error_output = ToolOutput(
-                    status="resend_prompt",
-                    content="Step instructions are too long. Please use shorter instructions and provide detailed context via file paths instead.",
-                    content_type="text",
-                    metadata={"prompt_size": len(step_content), "limit": MCP_PROMPT_SIZE_LIMIT},
-                )
-                raise ValueError(f"MCP_SIZE_CHECK:{error_output.model_dump_json()}")
-
-            # Validate file paths for security (same as base tool)
-            # Use try/except instead of hasattr as per coding standards
+        with self.workflow_execution_context(arguments):
             try:
-                path_error = self.validate_file_paths(request)
-                if path_error:
+                # Store arguments for access by helper methods
+                self._current_arguments = arguments
+
+                # Validate request using tool-specific model
+                request = self.get_workflow_request_model()(**arguments)
+
+                # Validate step field size (basic validation for workflow instructions)
+                # If step is too large, user should use shorter instructions and put details in files
+                step_content = request.step
+                if step_content and len(step_content) > MCP_PROMPT_SIZE_LIMIT:
                     from tools.models import ToolOutput
 
                     error_output = ToolOutput(
-                        status="error",
-                        content=path_error,
+                        status="resend_prompt",
+                        content="Step instructions are too long. Please use shorter instructions and provide detailed context via file paths instead.",
                         content_type="text",
+                        metadata={"prompt_size": len(step_content), "limit": MCP_PROMPT_SIZE_LIMIT},
                     )
-                    return [TextContent(type="text", text=error_output.model_dump_json())]
-            except AttributeError:
-                # validate_file_paths method not available - skip validation
-                pass
+                    raise ValueError(f"MCP_SIZE_CHECK:{error_output.model_dump_json()}")
 
-            # Try to validate model availability early for production scenarios
-            # For tests, defer model validation to later to allow mocks to work
-            try:
-                model_name, model_context = self._resolve_model_context(arguments, request)
-                # Store for later use
-                self._current_model_name = model_name
-                self._model_context = model_context
-            except ValueError as e:
-                # Model resolution failed - in production this would be an error,
-                # but for tests we defer to allow mocks to handle model resolution
-                logger.debug(f"Early model validation failed, deferring to later: {e}")
-                self._current_model_name = None
-                self._model_context = None
-
-            # Adjust total steps if needed
-            if request.step_number > request.total_steps:
-                request.total_steps = request.step_number
-
-            # Handle continuation
-            continuation_id = request.continuation_id
-
-            # Create thread for first step
-            if not continuation_id and request.step_number == 1:
-                clean_args = {k: v for k, v in arguments.items() if k not in ["_model_context", "_resolved_model_name"]}
-                continuation_id = create_thread(self.get_name(), clean_args)
-                self.initial_request = request.step
-                # Allow tools to store initial description for expert analysis
-                self.store_initial_issue(request.step)
-
-            # Handle backtracking if requested
-            backtrack_step = self.get_backtrack_step(request)
-            if backtrack_step:
-                self._handle_backtracking(backtrack_step)
-
-            # Process work step - allow tools to customize field mapping
-            step_data = self.prepare_step_data(request)
-
-            # Store in history
-            self.work_history.append(step_data)
-
-            # Update consolidated findings
-            self._update_consolidated_findings(step_data)
-
-            # Handle file context appropriately based on workflow phase
-            self._handle_workflow_file_context(request, arguments)
-
-            # Build response with tool-specific customization
-            response_data = self.build_base_response(request, continuation_id)
-
-            # If work is complete, handle completion logic
-            if not request.next_step_required:
-                response_data = await self.handle_work_completion(response_data, request, arguments)
-            else:
-                # Force Claude to work before calling tool again
-                response_data = self.handle_work_continuation(response_data, request)
+                # Validate file paths for security (same as base tool)
+                # Use try/except instead of hasattr as per coding standards
+                try:
+                    path_error = self.validate_file_paths(request)
+                    if path_error:
+                        from tools.models import ToolOutput
+
+                        error_output = ToolOutput(
+                            status="error",
+                            content=path_error,
+                            content_type="text",
+                        )
+                        return [TextContent(type="text", text=error_output.model_dump_json())]
+                except AttributeError:
+                    # validate_file_paths method not available - skip validation
+                    pass
 
-            # Allow tools to customize the final response
-            response_data = self.customize_workflow_response(response_data, request)
+                # Try to validate model availability early for production scenarios
+                # For tests, defer model validation to later to allow mocks to work
+                try:
+                    model_name, model_context = self._resolve_model_context(arguments, request)
+                    # Store for later use
+                    self._current_model_name = model_name
+                    self._model_context = model_context
+                except ValueError as e:
+                    # Model resolution failed - in production this would be an error,
+                    # but for tests we defer to allow mocks to handle model resolution
+                    logger.debug(f"Early model validation failed, deferring to later: {e}")
+                    self._current_model_name = None
+                    self._model_context = None
+
+                # Adjust total steps if needed
+                if request.step_number > request.total_steps:
+                    request.total_steps = request.step_number
+
+                # Handle continuation
+                continuation_id = request.continuation_id
+
+                # Create thread for first step
+                if not continuation_id and request.step_number == 1:
+                    clean_args = {
+                        k: v for k, v in arguments.items() if k not in ["_model_context", "_resolved_model_name"]
+                    }
+                    continuation_id = create_thread(self.get_name(), clean_args)
+                    self._bind_workflow_session(continuation_id)
+                    self.initial_request = request.step
+                    # Allow tools to store initial description for expert analysis
+                    self.store_initial_issue(request.step)
 
-            # Add metadata (provider_used and model_used) to workflow response
-            self._add_workflow_metadata(response_data, arguments)
+                # Handle backtracking if requested
+                backtrack_step = self.get_backtrack_step(request)
+                if backtrack_step:
+                    self._handle_backtracking(backtrack_step)
 
-            # Store in conversation memory
-            if continuation_id:
-                self.store_conversation_turn(continuation_id, response_data, request)
+                # Process work step - allow tools to customize field mapping
+                step_data = self.prepare_step_data(request)
 
-            return [TextContent(type="text", text=json.dumps(response_data, indent=2, ensure_ascii=False))]
+                # Store in history
+                self.work_history.append(step_data)
 
-        except Exception as e:
-            logger.error(f"Error in {self.get_name()} work: {e}", exc_info=True)
-            error_data = {
-                "status": f"{self.get_name()}_failed",
-                "error": str(e),
-                "step_number": arguments.get("step_number", 0),
-            }
+                # Update consolidated findings
+                self._update_consolidated_findings(step_data)
 
-            # Add metadata to error responses too
-            self._add_workflow_metadata(error_data, arguments)
+                # Handle file context appropriately based on workflow phase
+                self._handle_workflow_file_context(request, arguments)
 
-            return [TextContent(type="text", text=json.dumps(error_data, indent=2, ensure_ascii=False))]
+                # Build response with tool-specific customization
+                response_data = self.build_base_response(request, continuation_id)
+
+                # If work is complete, handle completion logic
+                if not request.next_step_required:
+                    response_data = await self.handle_work_completion(response_data, request, arguments)
+                else:
+                    # Force Claude to work before calling tool again
+                    response_data = self.handle_work_continuation(response_data, request)
+
+                # Allow tools to customize the final response
+                response_data = self.customize_workflow_response(response_data, request)
+
+                # Add metadata (provider_used and model_used) to workflow response
+                self._add_workflow_metadata(response_data, arguments)
+
+                # Store in conversation memory
+                if continuation_id:
+                    self.store_conversation_turn(continuation_id, response_data, request)
+
+                return [TextContent(type="text", text=json.dumps(response_data, indent=2, ensure_ascii=False))]
+
+            except Exception as e:
+                logger.error(f"Error in {self.get_name()} work: {e}", exc_info=True)
+                error_data = {
+                    "status": f"{self.get_name()}_failed",
+                    "error": str(e),
+                    "step_number": arguments.get("step_number", 0),
+                }
+
+                # Add metadata to error responses too
+                self._add_workflow_metadata(error_data, arguments)
+
+                return [TextContent(type="text", text=json.dumps(error_data, indent=2, ensure_ascii=False))]
+
+    def workflow_execution_context(self, arguments: dict[str, Any]):
+        """
+        Enter the execution context for one workflow step.
+
+        Workflow state (work history, consolidated findings, ...) is looked up by
+        continuation_id so concurrent workflows on the shared tool instance stay
+        isolated, while consecutive steps of the same workflow see their history.
+        """
+        if get_current_execution(self) is not None:
+            # Already executing (e.g. an overridden execute_workflow delegating to this one)
+            return tool_execution_context(self)
+
+        state = self._workflow_sessions.resolve(arguments.get("continuation_id"), arguments.get("step_number"))
+        return tool_execution_context(self, workflow_state=state)
+
+    def _bind_workflow_session(self, continuation_id: str) -> None:
+        """Link the current workflow state to a newly created continuation thread."""
+        context = get_current_execution(self)
+        if context is not None:
+            self._workflow_sessions.bind(continuation_id, context.workflow_state)
 
     # Hook methods for tool customization
 
@@ -1133,6 +1177,9 @@ class BaseWorkflowMixin(ABC):
                     "model_used": resolved_model_name,
                     "provider_used": provider_name,
                 }
+                response_cache = self.get_response_cache_metadata()
+                if response_cache:
+                    metadata["response_cache"] = response_cache
 
                 # Preserve existing metadata and add workflow metadata
                 if "metadata" not in response_data:
@@ -1438,24 +1485,25 @@ class BaseWorkflowMixin(ABC):
 
             provider = self._model_context.provider
 
-            # Prepare expert analysis context
-            expert_context = self.prepare_expert_analysis_context(self.consolidated_findings)
+            with profile_phase("prompt_build"):
+                # Prepare expert analysis context
+                expert_context = self.prepare_expert_analysis_context(self.consolidated_findings)
 
-            # Check if tool wants to include files in prompt
-            if self.should_include_files_in_expert_prompt():
-                file_content = self._prepare_files_for_expert_analysis()
-                if file_content:
-                    expert_context = self._add_files_to_expert_context(expert_context, file_content)
+                # Check if tool wants to include files in prompt
+                if self.should_include_files_in_expert_prompt():
+                    file_content = self._prepare_files_for_expert_analysis()
+                    if file_content:
+                        expert_context = self._add_files_to_expert_context(expert_context, file_content)
 
-            # Get system prompt for this tool
-            system_prompt = self.get_system_prompt()
+                # Get system prompt for this tool
+                system_prompt = self.get_system_prompt()
 
-            # Check if tool wants system prompt embedded in main prompt
-            if self.should_embed_system_prompt():
-                prompt = f"{system_prompt}\n\n{expert_context}\n\n{self.get_expert_analysis_instruction()}"
-                system_prompt = ""  # Clear it since we embedded it
-            else:
-                prompt = expert_context
+                # Check if tool wants system prompt embedded in main prompt
+                if self.should_embed_system_prompt():
+                    prompt = f"{system_prompt}\n\n{expert_context}\n\n{self.get_expert_analysis_instruction()}"
+                    system_prompt = ""  # Clear it since we embedded it
+                else:
+                    prompt = expert_context
 
             # Validate temperature against model constraints
             validated_temperature, temp_warnings = self.get_validated_temperature(request, self._model_context)
@@ -1465,7 +1513,10 @@ class BaseWorkflowMixin(ABC):
                 logger.warning(warning)
 
             # Generate AI response - use request parameters if available
-            model_response = provider.generate_content(
+            # Dispatched to the provider executor so the event loop stays responsive,
+            # streaming progress to the client when it asked for it
+            model_response = await self.generate_model_response(
+                provider,
                 prompt=prompt,
                 model_name=model_name,
                 system_prompt=system_prompt,
@@ -1478,7 +1529,8 @@ class BaseWorkflowMixin(ABC):
             if model_response.content:
                 try:
                     # Try to parse as JSON
-                    analysis_result = json.loads(model_response.content.strip())
+                    with profile_phase("response_parse"):
+                        analysis_result = json.loads(model_response.content.strip())
                     return analysis_result
                 except json.JSONDecodeError:
                     # Return as text if not valid JSON
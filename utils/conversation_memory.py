@@ -8,7 +8,9 @@ across independent request cycles.
 
 CRITICAL ARCHITECTURAL REQUIREMENT:
 This conversation memory system is designed for PERSISTENT MCP SERVER PROCESSES.
-It uses in-memory storage that persists only within a single Python process.
+By default it uses in-memory storage that persists only within a single Python
+process; set CONVERSATION_STORAGE_BACKEND=sqlite to persist threads on disk and
+share them between processes on the same host.
 
 ⚠️  IMPORTANT: This system will NOT work correctly if MCP tool calls are made
     as separate subprocess invocations (each subprocess starts with empty memory).
@@ -49,7 +51,7 @@ Key Features:
   most recent file context is preserved when token limits require exclusions.
 - Automatic turn limiting (20 turns max) to prevent runaway conversations
 - Context reconstruction for stateless request continuity
-- In-memory persistence with automatic expiration (3 hour TTL)
+- Pluggable persistence (in-memory or SQLite) with automatic expiration (3 hour TTL)
 - Thread-safe operations for concurrent access
 - Graceful degradation when storage is unavailable
 
@@ -104,13 +106,21 @@ This enables true AI-to-AI collaboration across the entire tool ecosystem with o
 context preservation and natural conversation understanding.
 """
 
+import json
 import logging
 import os
+import threading
 import uuid
+from collections import OrderedDict
+from contextvars import ContextVar
+from dataclasses import dataclass
 from datetime import datetime, timezone
 from typing import Any, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, PrivateAttr
+
+from utils.profiling import profile_phase
+from utils.token_utils import get_model_family
 
 logger = logging.getLogger(__name__)
 
@@ -143,6 +153,33 @@ except ValueError:
 
 CONVERSATION_TIMEOUT_SECONDS = CONVERSATION_TIMEOUT_HOURS * 3600
 
+# Number of decoded ThreadContext objects kept in memory, default 128 (0 disables the cache)
+try:
+    THREAD_CONTEXT_CACHE_SIZE = int(os.getenv("THREAD_CONTEXT_CACHE_SIZE", "128"))
+    if THREAD_CONTEXT_CACHE_SIZE < 0:
+        logger.warning(
+            f"Invalid THREAD_CONTEXT_CACHE_SIZE value ({THREAD_CONTEXT_CACHE_SIZE}), using default of 128 threads"
+        )
+        THREAD_CONTEXT_CACHE_SIZE = 128
+except ValueError:
+    logger.warning(
+        f"Invalid THREAD_CONTEXT_CACHE_SIZE value ('{os.getenv('THREAD_CONTEXT_CACHE_SIZE')}'), using default of 128 threads"
+    )
+    THREAD_CONTEXT_CACHE_SIZE = 128
+
+
+def is_prefix_stable_layout() -> bool:
+    """
+    Whether CACHE_FRIENDLY_PROMPTS requested the prefix-stable history layout.
+
+    In this layout everything that changes between continuations (the turn
+    counter, notes about omitted files) follows the turns, and files are
+    embedded in the order they were first shared. Each continuation's history
+    then starts with the previous one's, so providers can serve that prefix
+    from their prompt cache.
+    """
+    return os.getenv("CACHE_FRIENDLY_PROMPTS", "").lower() in ("true", "1", "yes")
+
 
 class ConversationTurn(BaseModel):
     """
@@ -173,6 +210,11 @@ class ConversationTurn(BaseModel):
     model_name: Optional[str] = None  # Specific model used
     model_metadata: Optional[dict[str, Any]] = None  # Additional model info
 
+    # History block rendered for this turn as (turn number, text) and its token count per
+    # tokenizer family, memoized by build_conversation_history(); never persisted
+    _rendered: Optional[tuple[int, str]] = PrivateAttr(default=None)
+    _rendered_tokens: dict[str, int] = PrivateAttr(default_factory=dict)
+
 
 class ThreadContext(BaseModel):
     """
@@ -201,18 +243,136 @@ class ThreadContext(BaseModel):
     initial_context: dict[str, Any]  # Original request parameters
 
 
+class ThreadContextCache:
+    """
+    LRU cache of decoded ThreadContext objects, stamped with the stored record version
+
+    A single continuation request looks the same thread up several times
+    (history reconstruction, file filtering, expert analysis, chain traversal).
+    Each entry remembers the raw thread record it was decoded from; a lookup
+    still reads that record from storage - so writes by other processes and TTL
+    expiry are always honoured - but when it is unchanged the turns are neither
+    re-read nor re-validated.
+
+    Callers receive a copy with its own turns list, so mutating a returned
+    context never changes the cached one.
+    """
+
+    def __init__(self, max_size: int = THREAD_CONTEXT_CACHE_SIZE):
+        self.max_size = max_size
+        self._entries: OrderedDict[str, tuple[str, ThreadContext]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, thread_id: str, version: str) -> Optional[ThreadContext]:
+        """Return a copy of the cached context if it was decoded from ``version``."""
+        with self._lock:
+            entry = self._entries.get(thread_id)
+            if entry is None or entry[0] != version:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(thread_id)
+            self.hits += 1
+            context = entry[1]
+        return context.model_copy(update={"turns": list(context.turns)})
+
+    def put(self, thread_id: str, version: str, context: ThreadContext) -> None:
+        """Cache a decoded context under the record version it was decoded from."""
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[thread_id] = (version, context.model_copy(update={"turns": list(context.turns)}))
+            self._entries.move_to_end(thread_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, thread_id: str) -> None:
+        with self._lock:
+            self._entries.pop(thread_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+_thread_cache = ThreadContextCache()
+
+
+def get_thread_cache() -> ThreadContextCache:
+    """Get the process-wide decoded ThreadContext cache"""
+    return _thread_cache
+
+
 def get_storage():
     """
-    Get in-memory storage backend for conversation persistence.
+    Get the storage backend for conversation persistence.
+
+    The backend is selected by CONVERSATION_STORAGE_BACKEND ("memory" by default,
+    or "sqlite" for persistent storage shared across processes).
 
     Returns:
-        InMemoryStorage: Thread-safe in-memory storage backend
+        StorageBackend: Thread-safe storage backend
     """
     from .storage_backend import get_storage_backend
 
     return get_storage_backend()
 
 
+# Marker stored in thread metadata records written with the append-only layout
+APPEND_LAYOUT = "append"
+
+
+def _thread_key(thread_id: str) -> str:
+    return f"thread:{thread_id}"
+
+
+def _turns_key(thread_id: str) -> str:
+    return f"thread:{thread_id}:turns"
+
+
+def _files_key(thread_id: str) -> str:
+    return f"thread:{thread_id}:files"
+
+
+def _supports_append(storage) -> bool:
+    """
+    Check whether the storage backend offers append-only lists.
+
+    Backends without list support (including test doubles that only model
+    get/setex) fall back to storing the whole ThreadContext in one record.
+    """
+    return getattr(storage, "SUPPORTS_LISTS", False) is True
+
+
+def _serialize_thread_metadata(context: ThreadContext) -> str:
+    """
+    Serialize a thread's metadata record for the append-only layout.
+
+    Turns are kept out of the record - they live in their own list, whose length
+    is the turn count - so updating the metadata costs the same no matter how
+    long the conversation is.
+    """
+    data = context.model_dump(mode="json", exclude={"turns"})
+    data["turns"] = []
+    data["layout"] = APPEND_LAYOUT
+    return json.dumps(data)
+
+
+def _load_thread_record(storage, thread_id: str) -> Optional[dict[str, Any]]:
+    """Load the raw thread record (metadata-only or legacy full context)."""
+    data = storage.get(_thread_key(thread_id))
+    if not data:
+        return None
+    return json.loads(data)
+
+
+def _is_append_record(record: dict[str, Any]) -> bool:
+    return record.get("layout") == APPEND_LAYOUT
+
+
 def create_thread(tool_name: str, initial_request: dict[str, Any], parent_thread_id: Optional[str] = None) -> str:
     """
     Create new conversation thread and return thread ID
@@ -257,8 +417,14 @@ def create_thread(tool_name: str, initial_request: dict[str, Any], parent_thread
 
     # Store in memory with configurable TTL to prevent indefinite accumulation
     storage = get_storage()
-    key = f"thread:{thread_id}"
-    storage.setex(key, CONVERSATION_TIMEOUT_SECONDS, context.model_dump_json())
+    key = _thread_key(thread_id)
+    if _supports_append(storage):
+        # Metadata only - turns are appended to their own list by add_turn()
+        record = _serialize_thread_metadata(context)
+    else:
+        record = context.model_dump_json()
+    storage.setex(key, CONVERSATION_TIMEOUT_SECONDS, record)
+    _thread_cache.put(thread_id, record, context)
 
     logger.debug(f"[THREAD] Created new thread {thread_id} with parent {parent_thread_id}")
 
@@ -267,7 +433,7 @@ def create_thread(tool_name: str, initial_request: dict[str, Any], parent_thread
 
 def get_thread(thread_id: str) -> Optional[ThreadContext]:
     """
-    Retrieve thread context from in-memory storage
+    Retrieve thread context from conversation storage
 
     Fetches complete conversation context for cross-tool continuation.
     This is the core function that enables tools to access conversation
@@ -290,17 +456,28 @@ def get_thread(thread_id: str) -> Optional[ThreadContext]:
 
     try:
         storage = get_storage()
-        key = f"thread:{thread_id}"
-        data = storage.get(key)
-
-        if data:
-            return ThreadContext.model_validate_json(data)
-        return None
+        data = storage.get(_thread_key(thread_id))
+        if not data:
+            _thread_cache.invalidate(thread_id)
+            return None
+
+        # The stored record doubles as the cache version stamp
+        cached = _thread_cache.get(thread_id, data)
+        if cached is not None:
+            return cached
+
+        record = json.loads(data)
+        if _is_append_record(record):
+            record["turns"] = [json.loads(turn) for turn in storage.lrange(_turns_key(thread_id))]
+        context = ThreadContext.model_validate(record)
+        _thread_cache.put(thread_id, data, context)
+        return context
     except Exception:
         # Silently handle errors to avoid exposing storage details
         return None
 
 
+@profile_phase("add_turn")
 def add_turn(
     thread_id: str,
     role: str,
@@ -347,6 +524,24 @@ def add_turn(
     """
     logger.debug(f"[FLOW] Adding {role} turn to {thread_id} ({tool_name})")
 
+    storage = get_storage()
+    if _supports_append(storage):
+        return _append_turn(
+            storage,
+            thread_id,
+            ConversationTurn(
+                role=role,
+                content=content,
+                timestamp=datetime.now(timezone.utc).isoformat(),
+                files=files,
+                images=images,
+                tool_name=tool_name,
+                model_provider=model_provider,
+                model_name=model_name,
+                model_metadata=model_metadata,
+            ),
+        )
+
     context = get_thread(thread_id)
     if not context:
         logger.debug(f"[FLOW] Thread {thread_id} not found for turn addition")
@@ -375,11 +570,80 @@ def add_turn(
 
     # Save back to storage and refresh TTL
     try:
-        storage = get_storage()
-        key = f"thread:{thread_id}"
-        storage.setex(key, CONVERSATION_TIMEOUT_SECONDS, context.model_dump_json())  # Refresh TTL to configured timeout
+        key = _thread_key(thread_id)
+        record = context.model_dump_json()
+        storage.setex(key, CONVERSATION_TIMEOUT_SECONDS, record)  # Refresh TTL to configured timeout
+        _thread_cache.put(thread_id, record, context)
+        return True
+    except Exception as e:
+        _thread_cache.invalidate(thread_id)
+        logger.debug(f"[FLOW] Failed to save turn to storage: {type(e).__name__}")
+        return False
+
+
+def _append_turn(storage, thread_id: str, turn: ConversationTurn) -> bool:
+    """
+    Append a turn using the append-only layout.
+
+    Only the new turn is serialized and written; existing turns are never read
+    or rewritten. The turn's file list is appended to a separate list so
+    get_thread_file_list() can answer without decoding turn bodies. Threads
+    stored in the legacy single-record layout are migrated on their first append.
+    """
+    if not _is_valid_uuid(thread_id):
+        return False
+
+    try:
+        data = storage.get(_thread_key(thread_id))
+        if not data:
+            logger.debug(f"[FLOW] Thread {thread_id} not found for turn addition")
+            return False
+        record = json.loads(data)
+
+        if _is_append_record(record):
+            legacy_turns = []
+            expected_length = None
+        else:
+            legacy_turns = [ConversationTurn.model_validate(t) for t in record.get("turns", [])]
+            # Only one concurrent append may migrate the legacy turns
+            expected_length = 0
+
+        # The turn limit is checked in the same transaction that appends the turn and
+        # its files, so concurrent appends (possibly from other processes) cannot
+        # exceed it or leave the turn and file lists out of step
+        rows = [(t.model_dump_json(), json.dumps(t.files or [])) for t in [*legacy_turns, turn]]
+        turn_count = storage.rpush_rows(
+            (_turns_key(thread_id), _files_key(thread_id)),
+            CONVERSATION_TIMEOUT_SECONDS,
+            rows,
+            max_length=MAX_CONVERSATION_TURNS,
+            expected_length=expected_length,
+        )
+        if turn_count is None:
+            logger.debug(f"[FLOW] Thread {thread_id} at max turns ({MAX_CONVERSATION_TURNS}) or migrated concurrently")
+            _thread_cache.invalidate(thread_id)
+            return False
+
+        # Rewrite the (constant-size) metadata record to refresh its timestamp and TTL.
+        # It holds no turn count, so a concurrent append overwriting it loses nothing.
+        record["turns"] = []
+        record.pop("turn_count", None)
+        record["last_updated_at"] = datetime.now(timezone.utc).isoformat()
+        context = ThreadContext.model_validate(record)
+        metadata = _serialize_thread_metadata(context)
+        storage.setex(_thread_key(thread_id), CONVERSATION_TIMEOUT_SECONDS, metadata)
+
+        # Extend the cached context in place of re-reading every turn on the next lookup
+        cached = _thread_cache.get(thread_id, data)
+        if cached is not None and len(cached.turns) + 1 == turn_count:
+            cached.turns.append(turn)
+            cached.last_updated_at = context.last_updated_at
+            _thread_cache.put(thread_id, metadata, cached)
+        else:
+            _thread_cache.invalidate(thread_id)
         return True
     except Exception as e:
+        _thread_cache.invalidate(thread_id)
         logger.debug(f"[FLOW] Failed to save turn to storage: {type(e).__name__}")
         return False
 
@@ -498,6 +762,47 @@ def get_conversation_file_list(context: ThreadContext) -> list[str]:
     return file_list
 
 
+def get_thread_file_list(thread_id: str) -> list[str]:
+    """
+    Get a thread's unique files with newest-first prioritization, without loading turns.
+
+    Uses the same ordering as get_conversation_file_list(). With the append-only
+    layout only the per-turn file lists are read, so no turn bodies are decoded;
+    legacy single-record threads fall back to loading the full context.
+
+    Args:
+        thread_id: UUID of the conversation thread
+
+    Returns:
+        list[str]: Unique file paths ordered by newest reference first.
+                   Empty list if the thread doesn't exist or references no files.
+    """
+    if not thread_id or not _is_valid_uuid(thread_id):
+        return []
+
+    try:
+        storage = get_storage()
+        if _supports_append(storage):
+            record = _load_thread_record(storage, thread_id)
+            if record is None:
+                return []
+            if _is_append_record(record):
+                per_turn_files = [json.loads(files) for files in storage.lrange(_files_key(thread_id))]
+                seen_files = set()
+                file_list = []
+                for turn_files in reversed(per_turn_files):  # Newest turn first
+                    for file_path in turn_files:
+                        if file_path not in seen_files:
+                            seen_files.add(file_path)
+                            file_list.append(file_path)
+                return file_list
+    except Exception:
+        return []
+
+    context = get_thread(thread_id)
+    return get_conversation_file_list(context) if context else []
+
+
 def get_conversation_image_list(context: ThreadContext) -> list[str]:
     """
     Extract all unique images from conversation turns with newest-first prioritization.
@@ -570,7 +875,9 @@ def get_conversation_image_list(context: ThreadContext) -> list[str]:
     return image_list
 
 
-def _plan_file_inclusion_by_size(all_files: list[str], max_file_tokens: int) -> tuple[list[str], list[str], int]:
+def _plan_file_inclusion_by_size(
+    all_files: list[str], max_file_tokens: int, model_name: Optional[str] = None
+) -> tuple[list[str], list[str], int]:
     """
     Plan which files to include based on size constraints.
 
@@ -579,6 +886,7 @@ def _plan_file_inclusion_by_size(all_files: list[str], max_file_tokens: int) ->
     Args:
         all_files: List of files to consider for inclusion
         max_file_tokens: Maximum tokens available for file content
+        model_name: Model the history is for, to use counts from its tokenizer
 
     Returns:
         Tuple of (files_to_include, files_to_skip, estimated_total_tokens)
@@ -598,7 +906,7 @@ def _plan_file_inclusion_by_size(all_files: list[str], max_file_tokens: int) ->
 
             if os.path.exists(file_path) and os.path.isfile(file_path):
                 # Use centralized token estimation for consistency
-                estimated_tokens = estimate_file_tokens(file_path)
+                estimated_tokens = estimate_file_tokens(file_path, model_name)
 
                 if total_tokens + estimated_tokens <= max_file_tokens:
                     files_to_include.append(file_path)
@@ -631,6 +939,40 @@ def _plan_file_inclusion_by_size(all_files: list[str], max_file_tokens: int) ->
     return files_to_include, files_to_skip, total_tokens
 
 
+@dataclass(frozen=True)
+class EmbeddedConversationFiles:
+    """Files embedded by the most recent build_conversation_history() call of the current request"""
+
+    thread_id: str
+    file_paths: tuple[str, ...]  # Embedded files, in the order they appear in content
+    file_versions: tuple[tuple[str, int, int], ...]  # (path, mtime_ns, size) of each file when it was read
+    content: str  # The embedded file block exactly as it appears in the history
+
+
+_embedded_conversation_files: ContextVar[Optional[EmbeddedConversationFiles]] = ContextVar(
+    "embedded_conversation_files", default=None
+)
+
+
+def get_embedded_conversation_files() -> Optional[EmbeddedConversationFiles]:
+    """
+    Return the files embedded in the conversation history built for the current request.
+
+    Lets providers treat the file block, which is identical across continuations
+    while the files are unchanged, separately from the rest of the prompt (e.g.
+    Gemini context caching). None if no history with files was built.
+    """
+    return _embedded_conversation_files.get()
+
+
+def _get_file_version(file_path: str) -> tuple[str, int, int]:
+    try:
+        stat = os.stat(file_path)
+        return file_path, stat.st_mtime_ns, stat.st_size
+    except OSError:
+        return file_path, 0, -1
+
+
 def build_conversation_history(context: ThreadContext, model_context=None, read_files_func=None) -> tuple[str, int]:
     """
     Build formatted conversation history for tool prompts with embedded file contents.
@@ -675,6 +1017,14 @@ def build_conversation_history(context: ThreadContext, model_context=None, read_
     - Stops adding turns when token budget would be exceeded
     - Gracefully handles token limits with informative notes
 
+    PREFIX-STABLE LAYOUT (CACHE_FRIENDLY_PROMPTS=true):
+    - The "Turn <current>/<max_allowed>" line and notes about omitted files move
+      after the turns, just before "=== END CONVERSATION HISTORY ==="
+    - Included files are embedded in the order they were first shared rather than
+      newest-first, so files shared later are appended
+    - As long as no file or turn is dropped for budget reasons, the history of each
+      continuation starts with the complete file block and turns of the previous one
+
     Args:
         context: ThreadContext containing the conversation to format
         model_context: ModelContext for token allocation (optional, uses DEFAULT_MODEL fallback)
@@ -761,6 +1111,7 @@ def build_conversation_history(context: ThreadContext, model_context=None, read_
         total_turns = len(context.turns)
         all_files = get_conversation_file_list(context)
 
+    _embedded_conversation_files.set(None)
     if not all_turns:
         return "", 0
 
@@ -783,6 +1134,7 @@ def build_conversation_history(context: ThreadContext, model_context=None, read_
         model_context = ModelContext(model_name)
 
     token_allocation = model_context.calculate_token_allocation()
+    token_model_name = model_context.canonical_model_name
     max_file_tokens = token_allocation.file_tokens
     max_history_tokens = token_allocation.history_tokens
 
@@ -790,14 +1142,18 @@ def build_conversation_history(context: ThreadContext, model_context=None, read_
     logger.debug(f"[HISTORY]   Max file tokens: {max_file_tokens:,}")
     logger.debug(f"[HISTORY]   Max history tokens: {max_history_tokens:,}")
 
+    # In the prefix-stable layout the turn counter moves to the footer, after the turns
+    prefix_stable = is_prefix_stable_layout()
+    turn_counter = f"Turn {total_turns}/{MAX_CONVERSATION_TURNS}"
     history_parts = [
         "=== CONVERSATION HISTORY (CONTINUATION) ===",
         f"Thread: {context.thread_id}",
         f"Tool: {context.tool_name}",  # Original tool that started the conversation
-        f"Turn {total_turns}/{MAX_CONVERSATION_TURNS}",
+        *([] if prefix_stable else [turn_counter]),
         "You are continuing this conversation thread from where it left off.",
         "",
     ]
+    files_omitted_note = None
 
     # Embed files referenced in this conversation with size-aware selection
     if all_files:
@@ -807,12 +1163,24 @@ def build_conversation_history(context: ThreadContext, model_context=None, read_
         # CRITICAL: all_files is already ordered by newest-first prioritization from get_conversation_file_list()
         # So when _plan_file_inclusion_by_size() hits token limits, it naturally excludes OLDER files first
         # while preserving the most recent file references - exactly what we want!
-        files_to_include, files_to_skip, estimated_tokens = _plan_file_inclusion_by_size(all_files, max_file_tokens)
+        files_to_include, files_to_skip, estimated_tokens = _plan_file_inclusion_by_size(
+            all_files, max_file_tokens, token_model_name
+        )
 
         if files_to_skip:
             logger.info(f"[FILES] Excluding {len(files_to_skip)} files from conversation history: {files_to_skip}")
             logger.debug("[FILES] Files excluded for various reasons (size constraints, missing files, access issues)")
 
+        if prefix_stable:
+            # Newest-first decides which files fit the budget; embedding them in the order
+            # they were first shared means files shared later are appended, not prepended
+            files_to_include = _order_by_first_reference(files_to_include, all_turns)
+            if files_to_skip:
+                files_omitted_note = (
+                    f"[NOTE: {len(files_to_skip)} older file(s) from this conversation were omitted "
+                    "(size constraints, missing files, or access issues)]"
+                )
+
         if files_to_include:
             history_parts.extend(
                 [
@@ -820,7 +1188,7 @@ def build_conversation_history(context: ThreadContext, model_context=None, read_
                     "The following files have been shared and analyzed during our conversation.",
                     (
                         ""
-                        if not files_to_skip
+                        if not files_to_skip or prefix_stable
                         else f"[NOTE: {len(files_to_skip)} files omitted (size constraints, missing files, or access issues)]"
                     ),
                     "Refer to these when analyzing the context and requests below:",
@@ -833,15 +1201,17 @@ def build_conversation_history(context: ThreadContext, model_context=None, read_
 
                 # Process files for embedding
                 file_contents = []
+                embedded_files = []
                 total_tokens = 0
                 files_included = 0
 
                 for file_path in files_to_include:
                     try:
                         logger.debug(f"[FILES] Processing file {file_path}")
-                        formatted_content, content_tokens = read_file_content(file_path)
+                        formatted_content, content_tokens = read_file_content(file_path, model_name=token_model_name)
                         if formatted_content:
                             file_contents.append(formatted_content)
+                            embedded_files.append(file_path)
                             total_tokens += content_tokens
                             files_included += 1
                             logger.debug(
@@ -869,7 +1239,15 @@ def build_conversation_history(context: ThreadContext, model_context=None, read_
 
                 if file_contents:
                     files_content = "".join(file_contents)
-                    if files_to_skip:
+                    _embedded_conversation_files.set(
+                        EmbeddedConversationFiles(
+                            thread_id=context.thread_id,
+                            file_paths=tuple(embedded_files),
+                            file_versions=tuple(_get_file_version(file_path) for file_path in embedded_files),
+                            content=files_content,
+                        )
+                    )
+                    if files_to_skip and not prefix_stable:
                         files_content += (
                             f"\n[NOTE: {len(files_to_skip)} additional file(s) were omitted due to size constraints, missing files, or access issues. "
                             f"These were older files from earlier conversation turns.]\n"
@@ -883,12 +1261,14 @@ def build_conversation_history(context: ThreadContext, model_context=None, read_
                     logger.debug(f"[FILES] No accessible files found from {len(files_to_include)} planned files")
             else:
                 # Fallback to original read_files function
-                files_content = read_files_func(all_files)
+                files_content = read_files_func(
+                    _order_by_first_reference(all_files, all_turns) if prefix_stable else all_files
+                )
                 if files_content:
                     # Add token validation for the combined file content
                     from utils.token_utils import check_token_limit
 
-                    within_limit, estimated_tokens = check_token_limit(files_content)
+                    within_limit, estimated_tokens = check_token_limit(files_content, model_name=token_model_name)
                     if within_limit:
                         history_parts.append(files_content)
                     else:
@@ -915,37 +1295,21 @@ def build_conversation_history(context: ThreadContext, model_context=None, read_
     turn_entries = []  # Will store (index, formatted_turn_content) for chronological ordering later
     total_turn_tokens = 0
     file_embedding_tokens = sum(model_context.estimate_tokens(part) for part in history_parts)
+    token_family = get_model_family(token_model_name)
 
     # CRITICAL: Process turns in REVERSE chronological order (newest to oldest)
     # This prioritization strategy ensures recent context is preserved when token budget is tight
     for idx in range(len(all_turns) - 1, -1, -1):
         turn = all_turns[idx]
         turn_num = idx + 1
-        role_label = "Claude" if turn.role == "user" else "Gemini"
-
-        # Build the complete turn content
-        turn_parts = []
-
-        # Add turn header with tool attribution for cross-tool tracking
-        turn_header = f"\n--- Turn {turn_num} ({role_label}"
-        if turn.tool_name:
-            turn_header += f" using {turn.tool_name}"
-
-        # Add model info if available
-        if turn.model_provider and turn.model_name:
-            turn_header += f" via {turn.model_provider}/{turn.model_name}"
 
-        turn_header += ") ---"
-        turn_parts.append(turn_header)
-
-        # Get tool-specific formatting if available
-        # This includes file references and the actual content
-        tool_formatted_content = _get_tool_formatted_content(turn)
-        turn_parts.extend(tool_formatted_content)
-
-        # Calculate tokens for this turn
-        turn_content = "\n".join(turn_parts)
-        turn_tokens = model_context.estimate_tokens(turn_content)
+        # Rendered blocks and their token counts are memoized on the turn, so a
+        # continuation only renders and counts turns added since the last one
+        turn_content = _render_turn(turn, turn_num)
+        turn_tokens = turn._rendered_tokens.get(token_family)
+        if turn_tokens is None:
+            turn_tokens = model_context.estimate_tokens(turn_content)
+            turn._rendered_tokens[token_family] = turn_tokens
 
         # Check if adding this turn would exceed history budget
         if file_embedding_tokens + total_turn_tokens + turn_tokens > max_history_tokens:
@@ -973,6 +1337,7 @@ def build_conversation_history(context: ThreadContext, model_context=None, read_
     # The LLM will see: "--- Turn 1 (Claude) ---" followed by "--- Turn 2 (Gemini) ---" etc.
     for _, turn_content in turn_entries:
         history_parts.append(turn_content)
+    footer_start = len(history_parts)
 
     # Log what we included
     included_turns = len(turn_entries)
@@ -981,6 +1346,11 @@ def build_conversation_history(context: ThreadContext, model_context=None, read_
         logger.info(f"[HISTORY] Included {included_turns}/{total_turns} turns due to token limit")
         history_parts.append(f"\n[Note: Showing {included_turns} most recent turns out of {total_turns} total]")
 
+    if prefix_stable:
+        history_parts.append(f"\n{turn_counter}")
+        if files_omitted_note:
+            history_parts.append(files_omitted_note)
+
     history_parts.extend(
         [
             "",
@@ -997,11 +1367,11 @@ def build_conversation_history(context: ThreadContext, model_context=None, read_
         ]
     )
 
-    # Calculate total tokens for the complete conversation history
+    # Calculate total tokens for the complete conversation history from the parts
+    # already counted, rather than counting the whole history again
     complete_history = "\n".join(history_parts)
-    from utils.token_utils import estimate_tokens
-
-    total_conversation_tokens = estimate_tokens(complete_history)
+    footer_tokens = model_context.estimate_tokens("\n".join(history_parts[footer_start:]))
+    total_conversation_tokens = file_embedding_tokens + total_turn_tokens + footer_tokens
 
     # Summary log of what was built
     user_turns = len([t for t in all_turns if t.role == "user"])
@@ -1013,6 +1383,58 @@ def build_conversation_history(context: ThreadContext, model_context=None, read_
     return complete_history, total_conversation_tokens
 
 
+def _order_by_first_reference(file_paths: list[str], turns: list[ConversationTurn]) -> list[str]:
+    """
+    Order files by the turn that first referenced them (oldest first).
+
+    Unlike the newest-first order of get_conversation_file_list(), this order
+    does not change when later turns reference files again.
+    """
+    first_reference: dict[str, int] = {}
+    for turn in turns:
+        for file_path in turn.files or []:
+            first_reference.setdefault(file_path, len(first_reference))
+    return sorted(file_paths, key=lambda file_path: first_reference.get(file_path, len(first_reference)))
+
+
+def _render_turn(turn: ConversationTurn, turn_num: int) -> str:
+    """
+    Render a turn's block in the conversation history, memoized on the turn.
+
+    Turns never change once added, so the block only needs rendering again if
+    the turn's position in the history changes (e.g. when threads are chained).
+
+    Args:
+        turn: The conversation turn to render
+        turn_num: 1-based position of the turn in the history
+
+    Returns:
+        str: Turn header followed by the tool-formatted turn content
+    """
+    if turn._rendered is not None and turn._rendered[0] == turn_num:
+        return turn._rendered[1]
+
+    role_label = "Claude" if turn.role == "user" else "Gemini"
+
+    # Add turn header with tool attribution for cross-tool tracking
+    turn_header = f"\n--- Turn {turn_num} ({role_label}"
+    if turn.tool_name:
+        turn_header += f" using {turn.tool_name}"
+
+    # Add model info if available
+    if turn.model_provider and turn.model_name:
+        turn_header += f" via {turn.model_provider}/{turn.model_name}"
+
+    turn_header += ") ---"
+
+    # Get tool-specific formatting if available
+    # This includes file references and the actual content
+    turn_content = "\n".join([turn_header, *_get_tool_formatted_content(turn)])
+    turn._rendered = (turn_num, turn_content)
+    turn._rendered_tokens = {}
+    return turn_content
+
+
 def _get_tool_formatted_content(turn: ConversationTurn) -> list[str]:
     """
     Get tool-specific formatting for a conversation turn.
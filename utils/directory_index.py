@@ -0,0 +1,331 @@
+"""
+Cached, gitignore-aware directory index for expand_paths
+
+expand_paths() runs several times per request (prompt file preparation,
+read_files, expert analysis embedding) and used to walk the whole tree each
+time. This module keeps a per-root snapshot of the directory tree:
+
+- Each directory is listed once with os.scandir and remembered together with
+  its mtime_ns; adding, removing or renaming an entry changes that mtime
+- Later expansions re-validate the snapshot with a single stat per directory
+  and only re-list directories whose mtime (or governing .gitignore) changed
+- Directories modified within the last few seconds are always re-listed, so
+  filesystems with coarse mtime granularity never serve a stale listing
+
+Pruning matches the original os.walk traversal (hidden entries, EXCLUDED_DIRS and
+the MCP server's own directory are skipped) and additionally honours .gitignore
+files inside the scanned tree and in its enclosing git repository.
+"""
+
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# Number of scan roots kept in the index
+MAX_INDEXED_ROOTS = 32
+
+# Directories modified this recently (seconds) are re-listed on every expansion
+MTIME_SETTLE_SECONDS = 2.0
+
+
+def _translate_glob(pattern: str) -> str:
+    """Translate a gitignore glob into a regular expression fragment."""
+    result = []
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if pattern.startswith("**/", i):
+            result.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("/**", i) and i + 3 == len(pattern):
+            result.append("/.*")
+            i += 3
+        elif pattern.startswith("**", i):
+            result.append(".*")
+            i += 2
+        elif char == "*":
+            result.append("[^/]*")
+            i += 1
+        elif char == "?":
+            result.append("[^/]")
+            i += 1
+        elif char == "[":
+            end = pattern.find("]", i + 1)
+            if end == -1:
+                result.append(re.escape(char))
+                i += 1
+            else:
+                body = pattern[i + 1 : end]
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                result.append(f"[{body}]")
+                i = end + 1
+        elif char == "\\" and i + 1 < len(pattern):
+            result.append(re.escape(pattern[i + 1]))
+            i += 2
+        else:
+            result.append(re.escape(char))
+            i += 1
+    return "".join(result)
+
+
+@dataclass
+class _GitignorePattern:
+    regex: re.Pattern
+    negated: bool
+    dir_only: bool
+
+
+@dataclass
+class GitignoreFile:
+    """Compiled patterns of one .gitignore file, relative to the directory containing it"""
+
+    base_dir: str
+    patterns: list[_GitignorePattern]
+
+    @classmethod
+    def load(cls, path: str) -> Optional["GitignoreFile"]:
+        try:
+            with open(path, encoding="utf-8", errors="replace") as f:
+                lines = f.read().splitlines()
+        except OSError:
+            return None
+
+        patterns = []
+        for line in lines:
+            line = line.rstrip()
+            if not line or line.startswith("#"):
+                continue
+            negated = line.startswith("!")
+            if negated:
+                line = line[1:]
+            dir_only = line.endswith("/")
+            line = line.rstrip("/")
+            if not line:
+                continue
+            # Patterns containing a slash (other than trailing) are anchored to the .gitignore directory
+            if "/" in line:
+                regex = "^" + _translate_glob(line.lstrip("/")) + "$"
+            else:
+                regex = "^(?:.*/)?" + _translate_glob(line) + "$"
+            patterns.append(_GitignorePattern(re.compile(regex), negated, dir_only))
+
+        if not patterns:
+            return None
+        return cls(base_dir=os.path.dirname(path), patterns=patterns)
+
+    def match(self, path: str, is_dir: bool) -> Optional[bool]:
+        """Return True if ignored, False if re-included, None if no pattern applies."""
+        relative = os.path.relpath(path, self.base_dir).replace(os.sep, "/")
+        if relative.startswith(".."):
+            return None
+        result = None
+        for pattern in self.patterns:
+            if pattern.dir_only and not is_dir:
+                continue
+            if pattern.regex.match(relative):
+                result = not pattern.negated
+        return result
+
+
+def is_ignored(path: str, is_dir: bool, rules: tuple[GitignoreFile, ...]) -> bool:
+    """Apply gitignore files from outermost to innermost; the last matching pattern wins."""
+    ignored = False
+    for rule in rules:
+        result = rule.match(path, is_dir)
+        if result is not None:
+            ignored = result
+    return ignored
+
+
+@dataclass
+class _DirectoryNode:
+    """Cached listing of one directory"""
+
+    mtime_ns: int
+    stable: bool
+    # (path, mtime_ns) of the .gitignore files that governed this listing
+    rules_key: tuple[tuple[str, int], ...]
+    files: list[str] = field(default_factory=list)
+    # Lowercased extension of each entry in files, so filtering needs no path parsing
+    suffixes: list[str] = field(default_factory=list)
+    subdirs: list[str] = field(default_factory=list)
+
+
+class DirectoryIndex:
+    """Thread-safe cache of expanded directory listings, validated by directory mtimes"""
+
+    def __init__(self, max_roots: int = MAX_INDEXED_ROOTS):
+        self.max_roots = max_roots
+        self._roots: OrderedDict[str, dict[str, _DirectoryNode]] = OrderedDict()
+        self._gitignores: dict[str, tuple[int, Optional[GitignoreFile]]] = {}
+        self._lock = threading.Lock()
+        self.directories_scanned = 0
+        self.directories_reused = 0
+
+    def list_files(self, root: Path, extensions: Optional[set[str]] = None) -> list[str]:
+        """
+        List every non-hidden, non-ignored file under root (unsorted).
+
+        Args:
+            root: Resolved directory path
+            extensions: Optional set of lowercase extensions to include (all files if empty or None)
+
+        Returns:
+            list[str]: File paths joined onto str(root), like os.walk would produce
+        """
+        root_str = str(root)
+        with self._lock:
+            nodes = self._roots.pop(root_str, None) or {}
+            fresh_nodes: dict[str, _DirectoryNode] = {}
+            files: list[str] = []
+            self._collect(root_str, self._enclosing_rules(root_str), nodes, fresh_nodes, files, extensions)
+
+            self._roots[root_str] = fresh_nodes
+            while len(self._roots) > self.max_roots:
+                self._roots.popitem(last=False)
+        return files
+
+    def clear(self) -> None:
+        with self._lock:
+            self._roots.clear()
+            self._gitignores.clear()
+
+    def _collect(
+        self,
+        directory: str,
+        inherited_rules: tuple[GitignoreFile, ...],
+        nodes: dict[str, _DirectoryNode],
+        fresh_nodes: dict[str, _DirectoryNode],
+        files: list[str],
+        extensions: Optional[set[str]],
+    ) -> None:
+        # Iterative depth-first traversal to avoid recursion limits on deep trees
+        stack = [(directory, inherited_rules)]
+        while stack:
+            current, rules = stack.pop()
+            try:
+                mtime_ns = os.stat(current).st_mtime_ns
+            except OSError:
+                continue
+
+            gitignore = self._load_gitignore(os.path.join(current, ".gitignore"))
+            if gitignore is not None:
+                rules = rules + (gitignore,)
+            rules_key = tuple(
+                (os.path.join(rule.base_dir, ".gitignore"), self._gitignores_mtime(rule)) for rule in rules
+            )
+
+            node = nodes.get(current)
+            if node is None or not node.stable or node.mtime_ns != mtime_ns or node.rules_key != rules_key:
+                node = self._scan(current, mtime_ns, rules, rules_key)
+                self.directories_scanned += 1
+            else:
+                self.directories_reused += 1
+
+            fresh_nodes[current] = node
+            if extensions:
+                files.extend(path for path, suffix in zip(node.files, node.suffixes) if suffix in extensions)
+            else:
+                files.extend(node.files)
+            for subdir in reversed(node.subdirs):
+                stack.append((subdir, rules))
+
+    def _scan(
+        self, directory: str, mtime_ns: int, rules: tuple[GitignoreFile, ...], rules_key: tuple
+    ) -> _DirectoryNode:
+        from .file_utils import is_mcp_directory
+        from .security_config import EXCLUDED_DIRS
+
+        stable = time.time() - mtime_ns / 1_000_000_000 > MTIME_SETTLE_SECONDS
+        node = _DirectoryNode(mtime_ns=mtime_ns, stable=stable, rules_key=rules_key)
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    # Skip hidden files and directories (e.g., .git, .DS_Store, .gitignore)
+                    if entry.name.startswith("."):
+                        continue
+                    try:
+                        is_dir = entry.is_dir()
+                    except OSError:
+                        is_dir = False
+
+                    if is_dir:
+                        if entry.name in EXCLUDED_DIRS:
+                            continue
+                        # Symlinked directories are listed but not descended into, matching os.walk
+                        if entry.is_symlink():
+                            continue
+                        if is_ignored(entry.path, True, rules):
+                            continue
+                        if is_mcp_directory(Path(entry.path)):
+                            logger.debug(f"Skipping MCP directory during traversal: {entry.path}")
+                            continue
+                        node.subdirs.append(entry.path)
+                    elif not is_ignored(entry.path, False, rules):
+                        node.files.append(entry.path)
+                        node.suffixes.append(os.path.splitext(entry.name)[1].lower())
+        except OSError as e:
+            logger.debug(f"Could not list directory {directory}: {e}")
+        return node
+
+    def _load_gitignore(self, path: str) -> Optional[GitignoreFile]:
+        """Load a .gitignore, reusing the compiled rules while its mtime is unchanged."""
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+        except OSError:
+            self._gitignores.pop(path, None)
+            return None
+        cached = self._gitignores.get(path)
+        if cached is not None and cached[0] == mtime_ns:
+            return cached[1]
+        gitignore = GitignoreFile.load(path)
+        self._gitignores[path] = (mtime_ns, gitignore)
+        return gitignore
+
+    def _gitignores_mtime(self, rule: GitignoreFile) -> int:
+        cached = self._gitignores.get(os.path.join(rule.base_dir, ".gitignore"))
+        return cached[0] if cached else 0
+
+    def _enclosing_rules(self, root: str) -> tuple[GitignoreFile, ...]:
+        """Collect .gitignore files above root, up to the enclosing git repository's top level."""
+        ancestors = []
+        current = os.path.dirname(root)
+        while current and current != os.path.dirname(current):
+            ancestors.append(current)
+            if os.path.exists(os.path.join(current, ".git")):
+                break
+            current = os.path.dirname(current)
+        else:
+            # No enclosing repository - parent .gitignore files do not apply
+            return ()
+
+        rules = []
+        for directory in reversed(ancestors):
+            gitignore = self._load_gitignore(os.path.join(directory, ".gitignore"))
+            if gitignore is not None:
+                rules.append(gitignore)
+        return tuple(rules)
+
+
+# Global singleton instance
+_index_instance: Optional[DirectoryIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_directory_index() -> DirectoryIndex:
+    """Get the global directory index (singleton pattern)"""
+    global _index_instance
+    if _index_instance is None:
+        with _index_lock:
+            if _index_instance is None:
+                _index_instance = DirectoryIndex()
+    return _index_instance
@@ -0,0 +1,136 @@
+"""
+Content-addressed cache for formatted file content
+
+read_file_content() validates, decodes, line-numbers and wraps every file on
+every tool call, and continuation turns embed the same files again and again.
+This module keeps the finished result - the formatted block and its token
+estimate - in a byte-bounded LRU cache.
+
+Entries are keyed by the resolved path together with the file's mtime_ns and
+size, so any modification on disk naturally produces a new key; stale entries
+are never served and simply age out of the LRU.
+
+Configuration:
+- FILE_CONTENT_CACHE_MAX_BYTES: approximate memory budget for cached content
+  (default 64MB, 0 disables the cache)
+"""
+
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FILE_CONTENT_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+
+class FileCacheKey(NamedTuple):
+    """Identity of one formatted file block"""
+
+    resolved_path: str
+    mtime_ns: int
+    size: int
+    line_numbers: bool
+    # Path as displayed in the BEGIN/END FILE markers, which may differ from the resolved path
+    display_path: str
+
+
+def _get_max_bytes() -> int:
+    """Read FILE_CONTENT_CACHE_MAX_BYTES, falling back to the default on invalid values."""
+    value = os.getenv("FILE_CONTENT_CACHE_MAX_BYTES", "")
+    if not value:
+        return DEFAULT_FILE_CONTENT_CACHE_MAX_BYTES
+    try:
+        max_bytes = int(value)
+        if max_bytes < 0:
+            raise ValueError(value)
+        return max_bytes
+    except ValueError:
+        logger.warning(
+            f"Invalid FILE_CONTENT_CACHE_MAX_BYTES value ('{value}'), "
+            f"using default of {DEFAULT_FILE_CONTENT_CACHE_MAX_BYTES} bytes"
+        )
+        return DEFAULT_FILE_CONTENT_CACHE_MAX_BYTES
+
+
+class FileContentCache:
+    """Thread-safe LRU cache of (formatted_content, tokens) bounded by total content size"""
+
+    def __init__(self, max_bytes: Optional[int] = None):
+        self.max_bytes = _get_max_bytes() if max_bytes is None else max_bytes
+        self._entries: OrderedDict[FileCacheKey, tuple[str, int]] = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def get(self, key: FileCacheKey) -> Optional[tuple[str, int]]:
+        """Return the cached (formatted_content, tokens) for key, or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: FileCacheKey, content: str, tokens: int) -> None:
+        """Cache a formatted block, evicting least recently used entries to stay within budget"""
+        # Character count is used as a cheap approximation of the content's size in bytes
+        entry_size = len(content)
+        if not self.enabled or entry_size > self.max_bytes:
+            return
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous[0])
+            self._entries[key] = (content, tokens)
+            self._size += entry_size
+            while self._size > self.max_bytes:
+                _, (evicted, _) = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def get_stats(self) -> dict[str, int]:
+        """Return hit/miss counters and current occupancy"""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._size,
+                "max_bytes": self.max_bytes,
+            }
+
+
+# Global singleton instance
+_cache_instance: Optional[FileContentCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_file_content_cache() -> FileContentCache:
+    """Get the global file content cache (singleton pattern)"""
+    global _cache_instance
+    if _cache_instance is None:
+        with _cache_lock:
+            if _cache_instance is None:
+                _cache_instance = FileContentCache()
+    return _cache_instance
@@ -40,12 +40,19 @@ multi-turn file handling:
 import json
 import logging
 import os
+import threading
+from collections import deque
+from collections.abc import Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
 from typing import Optional
 
+from .directory_index import get_directory_index
+from .file_cache import FileCacheKey, get_file_content_cache
 from .file_types import BINARY_EXTENSIONS, CODE_EXTENSIONS, IMAGE_EXTENSIONS, TEXT_EXTENSIONS
-from .security_config import EXCLUDED_DIRS, is_dangerous_path
-from .token_utils import DEFAULT_CONTEXT_WINDOW, estimate_tokens
+from .profiling import profile_phase
+from .security_config import is_dangerous_path
+from .token_utils import DEFAULT_CONTEXT_WINDOW, estimate_tokens, get_token_counter
 
 
 def _is_builtin_custom_models_config(path_str: str) -> bool:
@@ -323,13 +330,16 @@ def resolve_and_validate_path(path_str: str) -> Path:
     return resolved_path
 
 
+@profile_phase("file_expansion")
 def expand_paths(paths: list[str], extensions: Optional[set[str]] = None) -> list[str]:
     """
     Expand paths to individual files, handling both files and directories.
 
     This function recursively walks directories to find all matching files.
-    It automatically filters out hidden files and common non-code directories
-    like __pycache__ to avoid including generated or system files.
+    It automatically filters out hidden files, common non-code directories
+    like __pycache__ and anything excluded by .gitignore to avoid including
+    generated or system files. Directory listings are cached and re-validated
+    by directory mtime, so repeated expansions of the same tree are cheap.
 
     Args:
         paths: List of file or directory paths (must be absolute)
@@ -376,40 +386,13 @@ def expand_paths(paths: list[str], extensions: Optional[set[str]] = None) -> lis
                 seen.add(str(path_obj))
 
         elif path_obj.is_dir():
-            # Walk directory recursively to find all files
-            for root, dirs, files in os.walk(path_obj):
-                # Filter directories in-place to skip hidden and excluded directories
-                # This prevents descending into .git, .venv, __pycache__, node_modules, etc.
-                original_dirs = dirs[:]
-                dirs[:] = []
-                for d in original_dirs:
-                    # Skip hidden directories
-                    if d.startswith("."):
-                        continue
-                    # Skip excluded directories
-                    if d in EXCLUDED_DIRS:
-                        continue
-                    # Skip MCP directories found during traversal
-                    dir_path = Path(root) / d
-                    if is_mcp_directory(dir_path):
-                        logger.debug(f"Skipping MCP directory during traversal: {dir_path}")
-                        continue
-                    dirs.append(d)
-
-                for file in files:
-                    # Skip hidden files (e.g., .DS_Store, .gitignore)
-                    if file.startswith("."):
-                        continue
-
-                    file_path = Path(root) / file
-
-                    # Filter by extension if specified
-                    if not extensions or file_path.suffix.lower() in extensions:
-                        full_path = str(file_path)
-                        # Use set to prevent duplicates
-                        if full_path not in seen:
-                            expanded_files.append(full_path)
-                            seen.add(full_path)
+            # List files through the cached directory index, which skips hidden,
+            # excluded, gitignored and MCP directories and only re-lists changed ones
+            for full_path in get_directory_index().list_files(path_obj, extensions):
+                # Use set to prevent duplicates
+                if full_path not in seen:
+                    expanded_files.append(full_path)
+                    seen.add(full_path)
 
     # Sort for consistent ordering across different runs
     # This makes output predictable and easier to debug
@@ -418,7 +401,11 @@ def expand_paths(paths: list[str], extensions: Optional[set[str]] = None) -> lis
 
 
 def read_file_content(
-    file_path: str, max_size: int = 1_000_000, *, include_line_numbers: Optional[bool] = None
+    file_path: str,
+    max_size: int = 1_000_000,
+    *,
+    include_line_numbers: Optional[bool] = None,
+    model_name: Optional[str] = None,
 ) -> tuple[str, int]:
     """
     Read a single file and format it for inclusion in AI prompts.
@@ -431,6 +418,7 @@ def read_file_content(
         file_path: Path to file (must be absolute)
         max_size: Maximum file size to read (default 1MB to prevent memory issues)
         include_line_numbers: Whether to add line numbers. If None, auto-detects based on file type
+        model_name: Model the content is for, to count tokens with its tokenizer
 
     Returns:
         Tuple of (formatted_content, estimated_tokens)
@@ -463,7 +451,8 @@ def read_file_content(
             return content, estimate_tokens(content)
 
         # Check file size to prevent memory exhaustion
-        file_size = path.stat().st_size
+        stat_result = path.stat()
+        file_size = stat_result.st_size
         logger.debug(f"[FILES] File size for {file_path}: {file_size:,} bytes")
         if file_size > max_size:
             logger.debug(f"[FILES] File too large: {file_path} ({file_size:,} > {max_size:,} bytes)")
@@ -474,6 +463,15 @@ def read_file_content(
         add_line_numbers = should_add_line_numbers(file_path, include_line_numbers)
         logger.debug(f"[FILES] Line numbers for {file_path}: {'enabled' if add_line_numbers else 'disabled'}")
 
+        # Unchanged files (same mtime and size) are served from the content cache
+        cache = get_file_content_cache()
+        cache_key = FileCacheKey(str(path), stat_result.st_mtime_ns, file_size, add_line_numbers, file_path)
+        cached = cache.get(cache_key) if cache.enabled else None
+        if cached is not None:
+            tokens = estimate_tokens(cached[0], model_name)
+            logger.debug(f"[FILES] Content cache hit for {file_path}: {tokens} tokens")
+            return cached[0], tokens
+
         # Read the file with UTF-8 encoding, replacing invalid characters
         # This ensures we can handle files with mixed encodings
         logger.debug(f"[FILES] Reading file content for {file_path}")
@@ -496,8 +494,11 @@ def read_file_content(
         # ("--- BEGIN DIFF: ... ---") to allow AI to distinguish between complete file content
         # vs. partial diff content when files appear in both sections
         formatted = f"\n--- BEGIN FILE: {file_path} ---\n{file_content}\n--- END FILE: {file_path} ---\n"
-        tokens = estimate_tokens(formatted)
+        tokens = estimate_tokens(formatted, model_name)
         logger.debug(f"[FILES] Formatted content for {file_path}: {len(formatted)} chars, {tokens} tokens")
+        cache.put(cache_key, formatted, tokens)
+        # Later size checks of this version of the file use the exact count
+        get_token_counter().remember_file_tokens(file_path, stat_result.st_mtime_ns, file_size, model_name, tokens)
         return formatted, tokens
 
     except Exception as e:
@@ -508,6 +509,181 @@ def read_file_content(
         return content, tokens
 
 
+# Bounded pool used to prefetch file contents for read_files()
+_read_pool: Optional[ThreadPoolExecutor] = None
+_read_pool_lock = threading.Lock()
+
+
+def _get_file_read_workers() -> int:
+    """Number of concurrent file reads used by read_files() (FILE_READ_WORKERS, default 8)."""
+    value = os.getenv("FILE_READ_WORKERS", "")
+    if not value:
+        return 8
+    try:
+        return max(1, int(value))
+    except ValueError:
+        logger.warning(f"Invalid FILE_READ_WORKERS value ('{value}'), using default of 8 workers")
+        return 8
+
+
+def _get_file_read_pool() -> ThreadPoolExecutor:
+    """Get the shared file read pool (singleton pattern)"""
+    global _read_pool
+    if _read_pool is None:
+        with _read_pool_lock:
+            if _read_pool is None:
+                _read_pool = ThreadPoolExecutor(
+                    max_workers=_get_file_read_workers(), thread_name_prefix="zen-file-read"
+                )
+    return _read_pool
+
+
+def _iter_file_contents(
+    file_paths: list[str], include_line_numbers: bool, model_name: Optional[str] = None
+) -> Iterator[tuple[str, str, int]]:
+    """
+    Yield (file_path, formatted_content, tokens) in input order, prefetching ahead.
+
+    At most FILE_READ_WORKERS * 2 reads are outstanding at any time, so a
+    consumer that stops early (token budget exhausted) and closes the generator
+    never triggers reads of the remaining files; reads not yet started are cancelled.
+    """
+    workers = _get_file_read_workers()
+    if workers <= 1 or len(file_paths) <= 1:
+        for file_path in file_paths:
+            yield (
+                file_path,
+                *read_file_content(file_path, include_line_numbers=include_line_numbers, model_name=model_name),
+            )
+        return
+
+    pool = _get_file_read_pool()
+    window = workers * 2
+    pending: deque[Future] = deque()
+    next_index = 0
+    try:
+        for file_path in file_paths:
+            while next_index < len(file_paths) and len(pending) < window:
+                pending.append(
+                    pool.submit(
+                        read_file_content,
+                        file_paths[next_index],
+                        include_line_numbers=include_line_numbers,
+                        model_name=model_name,
+                    )
+                )
+                next_index += 1
+            yield (file_path, *pending.popleft().result())
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+def _estimate_read_tokens(file_path: str, max_size: int = 1_000_000, model_name: Optional[str] = None) -> int:
+    """
+    Estimate the tokens read_file_content() will return for a file, from its size alone.
+
+    Missing files and files over max_size produce a short placeholder block, so
+    they are estimated at zero and always read.
+    """
+    try:
+        if os.path.getsize(file_path) > max_size:
+            return 0
+    except OSError:
+        return 0
+    return estimate_file_tokens(file_path, model_name)
+
+
+def _read_files_within_budget(
+    file_paths: list[str], budget: int, include_line_numbers: bool, model_name: Optional[str] = None
+) -> tuple[list[str], int, list[str]]:
+    """
+    Read the files that fit within a token budget, planning from file sizes first.
+
+    Planning pass: walking the files in order, a file is scheduled for reading only
+    if its size-based estimate fits in the budget left by earlier scheduled files,
+    so files that cannot fit are never read or formatted.
+
+    Assembly pass: scheduled files are read concurrently and accepted in order
+    against their actual token counts, exactly like a sequential read.
+
+    Correction pass: estimates are approximate, so if budget remains afterwards,
+    files skipped during planning are revisited in order and read when their
+    estimate fits the remaining budget.
+
+    Args:
+        file_paths: Expanded file paths in output order
+        budget: Tokens available for file content
+        include_line_numbers: Whether to add line numbers to file content
+        model_name: Model the content is for, to count tokens with its tokenizer
+
+    Returns:
+        Tuple of (formatted file blocks in input order, tokens used, skipped file paths)
+    """
+    estimates = [_estimate_read_tokens(file_path, model_name=model_name) for file_path in file_paths]
+
+    planned = []
+    deferred = []
+    planned_tokens = 0
+    for index, estimate in enumerate(estimates):
+        if planned_tokens + estimate <= budget:
+            planned.append(index)
+            planned_tokens += estimate
+        else:
+            deferred.append(index)
+    logger.debug(
+        f"[FILES] Planned {len(planned)} of {len(file_paths)} files (~{planned_tokens:,} tokens), "
+        f"{len(deferred)} deferred by size estimate"
+    )
+
+    accepted: dict[int, str] = {}
+    skipped: set[int] = set(deferred)
+    total_tokens = 0
+
+    planned_contents = _iter_file_contents([file_paths[i] for i in planned], include_line_numbers, model_name)
+    for position, index in enumerate(planned):
+        if total_tokens >= budget:
+            logger.debug(f"[FILES] Token budget exhausted, skipping remaining {len(planned) - position} planned files")
+            skipped.update(planned[position:])
+            # Stop prefetching - no further file can fit
+            planned_contents.close()
+            break
+
+        file_path, file_content, file_tokens = next(planned_contents)
+        logger.debug(f"[FILES] File {file_path}: {file_tokens:,} tokens")
+
+        # Check if adding this file would exceed limit
+        if total_tokens + file_tokens <= budget:
+            accepted[index] = file_content
+            total_tokens += file_tokens
+            logger.debug(f"[FILES] Added file {file_path}, total tokens: {total_tokens:,}")
+        else:
+            # File too large for remaining budget
+            logger.debug(
+                f"[FILES] File {file_path} too large for remaining budget ({file_tokens:,} tokens, {budget - total_tokens:,} remaining)"
+            )
+            skipped.add(index)
+
+    # Correction pass: size estimates overshot, so some deferred files may still fit
+    for index in deferred:
+        if total_tokens >= budget:
+            break
+        if estimates[index] > budget - total_tokens:
+            continue
+        file_content, file_tokens = read_file_content(
+            file_paths[index], include_line_numbers=include_line_numbers, model_name=model_name
+        )
+        if total_tokens + file_tokens <= budget:
+            accepted[index] = file_content
+            total_tokens += file_tokens
+            skipped.discard(index)
+            logger.debug(f"[FILES] Added deferred file {file_paths[index]}, total tokens: {total_tokens:,}")
+
+    parts = [accepted[index] for index in sorted(accepted)]
+    return parts, total_tokens, [file_paths[index] for index in sorted(skipped)]
+
+
+@profile_phase("file_reading")
 def read_files(
     file_paths: list[str],
     code: Optional[str] = None,
@@ -515,6 +691,7 @@ def read_files(
     reserve_tokens: int = 50_000,
     *,
     include_line_numbers: bool = False,
+    model_name: Optional[str] = None,
 ) -> str:
     """
     Read multiple files and optional direct code with smart token management.
@@ -530,6 +707,7 @@ def read_files(
         max_tokens: Maximum tokens to use (defaults to DEFAULT_CONTEXT_WINDOW)
         reserve_tokens: Tokens to reserve for prompt and response (default 50K)
         include_line_numbers: Whether to add line numbers to file content
+        model_name: Model the content is for, to count tokens with its tokenizer
 
     Returns:
         str: All file contents formatted for AI consumption
@@ -552,7 +730,7 @@ def read_files(
     # Direct code is prioritized because it's explicitly provided by the user
     if code:
         formatted_code = f"\n--- BEGIN DIRECT CODE ---\n{code}\n--- END DIRECT CODE ---\n"
-        code_tokens = estimate_tokens(formatted_code)
+        code_tokens = estimate_tokens(formatted_code, model_name)
 
         if code_tokens <= available_tokens:
             content_parts.append(formatted_code)
@@ -571,28 +749,12 @@ def read_files(
             logger.debug("[FILES] No files found from provided paths")
             content_parts.append(f"\n--- NO FILES FOUND ---\nProvided paths: {', '.join(file_paths)}\n--- END ---\n")
         else:
-            # Read files sequentially until token limit is reached
             logger.debug(f"[FILES] Reading {len(all_files)} files with token budget {available_tokens:,}")
-            for i, file_path in enumerate(all_files):
-                if total_tokens >= available_tokens:
-                    logger.debug(f"[FILES] Token budget exhausted, skipping remaining {len(all_files) - i} files")
-                    files_skipped.extend(all_files[i:])
-                    break
-
-                file_content, file_tokens = read_file_content(file_path, include_line_numbers=include_line_numbers)
-                logger.debug(f"[FILES] File {file_path}: {file_tokens:,} tokens")
-
-                # Check if adding this file would exceed limit
-                if total_tokens + file_tokens <= available_tokens:
-                    content_parts.append(file_content)
-                    total_tokens += file_tokens
-                    logger.debug(f"[FILES] Added file {file_path}, total tokens: {total_tokens:,}")
-                else:
-                    # File too large for remaining budget
-                    logger.debug(
-                        f"[FILES] File {file_path} too large for remaining budget ({file_tokens:,} tokens, {available_tokens - total_tokens:,} remaining)"
-                    )
-                    files_skipped.append(file_path)
+            file_parts, file_tokens, files_skipped = _read_files_within_budget(
+                all_files, available_tokens - total_tokens, include_line_numbers, model_name
+            )
+            content_parts.extend(file_parts)
+            total_tokens += file_tokens
 
     # Add informative note about skipped files to help users understand
     # what was omitted and why
@@ -613,21 +775,29 @@ def read_files(
     return result
 
 
-def estimate_file_tokens(file_path: str) -> int:
+def estimate_file_tokens(file_path: str, model_name: Optional[str] = None) -> int:
     """
-    Estimate tokens for a file using file-type aware ratios.
+    Estimate tokens for a file.
+
+    Files already read by read_file_content() (unchanged since) use their
+    counted tokens; others are estimated from their size using file-type aware ratios.
 
     Args:
         file_path: Path to the file
+        model_name: Model the file is for, to use counts from its tokenizer
 
     Returns:
         Estimated token count for the file
     """
     try:
-        if not os.path.exists(file_path) or not os.path.isfile(file_path):
+        if not os.path.isfile(file_path):
             return 0
 
-        file_size = os.path.getsize(file_path)
+        stat_result = os.stat(file_path)
+        file_size = stat_result.st_size
+        counted = get_token_counter().get_file_tokens(file_path, stat_result.st_mtime_ns, file_size, model_name)
+        if counted is not None:
+            return counted
 
         # Get the appropriate ratio for this file type
         from .file_types import get_token_estimation_ratio
@@ -639,7 +809,9 @@ def estimate_file_tokens(file_path: str) -> int:
         return 0
 
 
-def check_files_size_limit(files: list[str], max_tokens: int, threshold_percent: float = 1.0) -> tuple[bool, int, int]:
+def check_files_size_limit(
+    files: list[str], max_tokens: int, threshold_percent: float = 1.0, model_name: Optional[str] = None
+) -> tuple[bool, int, int]:
     """
     Check if a list of files would exceed token limits.
 
@@ -647,6 +819,7 @@ def check_files_size_limit(files: list[str], max_tokens: int, threshold_percent:
         files: List of file paths to check
         max_tokens: Maximum allowed tokens
         threshold_percent: Percentage of max_tokens to use as threshold (0.0-1.0)
+        model_name: Model the files are for, to use counts from its tokenizer
 
     Returns:
         Tuple of (within_limit, total_estimated_tokens, file_count)
@@ -660,7 +833,7 @@ def check_files_size_limit(files: list[str], max_tokens: int, threshold_percent:
 
     for file_path in files:
         try:
-            estimated_tokens = estimate_file_tokens(file_path)
+            estimated_tokens = estimate_file_tokens(file_path, model_name)
             total_estimated_tokens += estimated_tokens
             if estimated_tokens > 0:  # Only count accessible files
                 file_count += 1
@@ -838,7 +1011,9 @@ def check_total_file_size(files: list[str], model_name: str) -> Optional[dict]:
     max_file_tokens = int(token_allocation.file_tokens * threshold_percent)
 
     # Use centralized file size checking (threshold already applied to max_file_tokens)
-    within_limit, total_estimated_tokens, file_count = check_files_size_limit(files, max_file_tokens)
+    within_limit, total_estimated_tokens, file_count = check_files_size_limit(
+        files, max_file_tokens, model_name=model_context.capabilities.model_name
+    )
 
     if not within_limit:
         return {
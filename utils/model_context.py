@@ -32,6 +32,7 @@ from typing import Any, Optional
 
 from config import DEFAULT_MODEL
 from providers import ModelCapabilities, ModelProviderRegistry
+from utils.token_utils import estimate_tokens
 
 logger = logging.getLogger(__name__)
 
@@ -153,16 +154,22 @@ class ModelContext:
 
         return allocation
 
+    @property
+    def canonical_model_name(self) -> str:
+        """Model name with aliases resolved, falling back to the requested name."""
+        try:
+            return self.capabilities.model_name
+        except Exception:
+            return self.model_name
+
     def estimate_tokens(self, text: str) -> int:
         """
         Estimate token count for text using model-specific tokenizer.
 
-        For now, uses simple estimation. Can be enhanced with model-specific
-        tokenizers (tiktoken for OpenAI, etc.) in the future.
+        Uses the shared token counter (utils/token_utils.py), so counts agree
+        with file reading and size checks for the same model.
         """
-        # TODO: Integrate model-specific tokenizers
-        # For now, use conservative estimation
-        return len(text) // 3  # Conservative estimate
+        return estimate_tokens(text, self.canonical_model_name)
 
     @classmethod
     def from_arguments(cls, arguments: dict[str, Any]) -> "ModelContext":
@@ -0,0 +1,257 @@
+"""
+Opt-in profiling of server startup and tool calls
+
+Enabled with PROFILING_ENABLED=true. Profiles are written as JSON lines to
+logs/mcp_profile.jsonl (next to logs/mcp_server.log), one record per event:
+
+- startup: time spent in each startup phase (imports, logging, tools,
+  providers), the slowest module imports and how long each provider took to
+  initialize
+- tool_call: total time of one handle_call_tool() invocation and the time
+  spent in each of its phases (reconstruct_thread_context, file_expansion,
+  file_reading, prompt_build, provider_call, response_parse, add_turn), with
+  the model's reported input_tokens, cached_input_tokens and output_tokens
+
+Phase times are exclusive: when phases nest (prompt_build reads files, which
+expands paths first), the inner phase's time is only counted once, under the
+inner phase. other_ms is the part of the call not covered by any phase.
+
+When profiling is disabled, profile_phase() only looks up a context variable,
+so the instrumented call sites cost next to nothing.
+"""
+
+import builtins
+import functools
+import importlib.util
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+
+# Logger the profile records are written to; server.py attaches the JSON lines file handler
+PROFILE_LOGGER_NAME = "mcp_profile"
+
+# Number of slowest module imports included in the startup record
+SLOWEST_IMPORTS = 25
+
+
+def is_profiling_enabled() -> bool:
+    """Whether profiling was requested with PROFILING_ENABLED."""
+    return os.getenv("PROFILING_ENABLED", "").lower() in ("true", "1", "yes")
+
+
+def write_profile_record(event: str, **fields: Any) -> None:
+    """Write one profile record as a JSON line."""
+    record = {"event": event, "timestamp": datetime.now(timezone.utc).isoformat(), **fields}
+    try:
+        logging.getLogger(PROFILE_LOGGER_NAME).info(json.dumps(record, default=str))
+    except Exception as e:
+        logger.debug(f"Could not write profile record: {e}")
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 3)
+
+
+class CallProfile:
+    """Phase timings of one tool call"""
+
+    def __init__(self, tool_name: str):
+        self.tool_name = tool_name
+        self.started = time.perf_counter()
+        self.fields: dict[str, Any] = {}
+        self.phases: dict[str, list] = {}  # phase -> [exclusive seconds, calls]
+        self._lock = threading.Lock()
+
+    def add(self, phase: str, seconds: float) -> None:
+        with self._lock:
+            totals = self.phases.setdefault(phase, [0.0, 0])
+            totals[0] += seconds
+            totals[1] += 1
+
+    def as_record(self, status: str) -> dict[str, Any]:
+        total = time.perf_counter() - self.started
+        with self._lock:
+            phases = {phase: {"ms": _ms(seconds), "calls": calls} for phase, (seconds, calls) in self.phases.items()}
+            covered = sum(seconds for seconds, _ in self.phases.values())
+        return {
+            "tool": self.tool_name,
+            **self.fields,
+            "status": status,
+            "total_ms": _ms(total),
+            "phases": phases,
+            "other_ms": _ms(max(total - covered, 0.0)),
+        }
+
+
+class _PhaseTimer:
+    """A phase in progress; nested phases report their time to it so it is not counted twice"""
+
+    __slots__ = ("child_seconds",)
+
+    def __init__(self):
+        self.child_seconds = 0.0
+
+
+_current_profile: ContextVar[Optional[CallProfile]] = ContextVar("current_profile", default=None)
+_current_phase: ContextVar[Optional[_PhaseTimer]] = ContextVar("current_phase", default=None)
+
+
+@contextmanager
+def profile_phase(name: str):
+    """
+    Attribute the time spent in the block to a phase of the current tool call.
+
+    A no-op outside a profiled tool call. Can also decorate synchronous functions.
+    """
+    profile = _current_profile.get()
+    if profile is None:
+        yield
+        return
+
+    parent = _current_phase.get()
+    timer = _PhaseTimer()
+    token = _current_phase.set(timer)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        _current_phase.reset(token)
+        profile.add(name, max(elapsed - timer.child_seconds, 0.0))
+        if parent is not None:
+            parent.child_seconds += elapsed
+
+
+def annotate_profile(**fields: Any) -> None:
+    """Add fields (e.g. the resolved model) to the current tool call's profile record, if profiling."""
+    profile = _current_profile.get()
+    if profile is not None:
+        profile.fields.update(fields)
+
+
+def _result_status(result: Any) -> str:
+    """Status reported by a tool's JSON output, if it has one."""
+    try:
+        return json.loads(result[0].text).get("status", "unknown")
+    except Exception:
+        return "unknown"
+
+
+def profile_tool_calls(func):
+    """Decorate the MCP call_tool handler to write a tool_call profile record per call when profiling."""
+
+    @functools.wraps(func)
+    async def wrapper(name: str, arguments: dict[str, Any]):
+        if not is_profiling_enabled():
+            return await func(name, arguments)
+
+        profile = CallProfile(name)
+        profile_token = _current_profile.set(profile)
+        phase_token = _current_phase.set(None)
+        status = "exception"
+        try:
+            result = await func(name, arguments)
+            status = _result_status(result)
+            return result
+        finally:
+            _current_phase.reset(phase_token)
+            _current_profile.reset(profile_token)
+            write_profile_record("tool_call", **profile.as_record(status))
+
+    return wrapper
+
+
+# Provider initialization times in seconds, recorded while profiling
+_provider_init_seconds: dict[str, float] = {}
+
+
+def record_provider_init(provider_key: str, seconds: float) -> None:
+    """Record how long a provider took to initialize, if profiling."""
+    if is_profiling_enabled():
+        _provider_init_seconds[provider_key] = seconds
+
+
+class ImportTimer:
+    """
+    Time module imports by wrapping builtins.__import__.
+
+    Only imports made on the installing thread are timed. Each module newly
+    loaded is recorded with its self time (excluding the modules it imported in
+    turn) and cumulative time, like python -X importtime.
+    """
+
+    def __init__(self):
+        self.modules: list[tuple[str, float, float]] = []  # (module, self seconds, cumulative seconds)
+        self._original_import = None
+        self._thread_id: Optional[int] = None
+        self._child_seconds: list[float] = []
+
+    def install(self) -> None:
+        if self._original_import is None:
+            self._original_import = builtins.__import__
+            self._thread_id = threading.get_ident()
+            builtins.__import__ = self._import
+
+    def uninstall(self) -> None:
+        if self._original_import is not None:
+            if builtins.__import__ == self._import:
+                builtins.__import__ = self._original_import
+            self._original_import = None
+
+    def _import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        original_import = self._original_import or builtins.__import__
+        if threading.get_ident() != self._thread_id:
+            return original_import(name, globals, locals, fromlist, level)
+        try:
+            module_name = importlib.util.resolve_name("." * level + name, (globals or {}).get("__package__"))
+        except (ImportError, ValueError):
+            module_name = name
+        if module_name in sys.modules:
+            return original_import(name, globals, locals, fromlist, level)
+
+        self._child_seconds.append(0.0)
+        started = time.perf_counter()
+        try:
+            return original_import(name, globals, locals, fromlist, level)
+        finally:
+            elapsed = time.perf_counter() - started
+            child_seconds = self._child_seconds.pop()
+            if self._child_seconds:
+                self._child_seconds[-1] += elapsed
+            self.modules.append((module_name, max(elapsed - child_seconds, 0.0), elapsed))
+
+    def slowest(self, limit: int = SLOWEST_IMPORTS) -> list[dict[str, Any]]:
+        """The modules with the highest self time."""
+        ordered = sorted(self.modules, key=lambda module: module[1], reverse=True)[:limit]
+        return [
+            {"module": module_name, "self_ms": _ms(self_seconds), "cumulative_ms": _ms(cumulative_seconds)}
+            for module_name, self_seconds, cumulative_seconds in ordered
+        ]
+
+
+def write_startup_profile(phases: dict[str, float], import_timer: Optional[ImportTimer] = None) -> None:
+    """
+    Write the startup profile record.
+
+    Args:
+        phases: Seconds spent in each startup phase, in order
+        import_timer: Timer installed at the start of server initialization, if any
+    """
+    fields: dict[str, Any] = {
+        "total_ms": _ms(sum(phases.values())),
+        "phases": {phase: _ms(seconds) for phase, seconds in phases.items()},
+        "provider_init_ms": {provider: _ms(seconds) for provider, seconds in _provider_init_seconds.items()},
+    }
+    if import_timer is not None:
+        fields["modules_imported"] = len(import_timer.modules)
+        fields["slowest_imports"] = import_timer.slowest()
+    write_profile_record("startup", **fields)
@@ -1,43 +1,127 @@
 """
-In-memory storage backend for conversation threads
+Storage backends for conversation threads
 
-This module provides a thread-safe, in-memory alternative to Redis for storing
-conversation contexts. It's designed for ephemeral MCP server sessions where
-conversations only need to persist during a single Claude session.
+This module defines the StorageBackend protocol used by conversation memory and
+ships two implementations, selected with the CONVERSATION_STORAGE_BACKEND
+environment variable:
 
-⚠️  PROCESS-SPECIFIC STORAGE: This storage is confined to a single Python process.
+- "memory" (default): InMemoryStorage, a thread-safe in-memory alternative to
+  Redis designed for ephemeral MCP server sessions.
+- "sqlite": SQLiteStorage, a WAL-mode SQLite database (CONVERSATION_STORAGE_PATH)
+  so threads survive restarts and can be shared by several server processes
+  on the same host.
+
+⚠️  PROCESS-SPECIFIC STORAGE: InMemoryStorage is confined to a single Python process.
     Data stored in one process is NOT accessible from other processes or subprocesses.
     This is why simulator tests that run server.py as separate subprocesses cannot
-    share conversation state between tool calls.
+    share conversation state between tool calls unless the SQLite backend is used.
 
 Key Features:
 - Thread-safe operations using locks
 - TTL support with automatic expiration
-- Background cleanup thread for memory management
+- Background cleanup thread for expired entries
+- Append-only lists (rpush/lrange) so conversation turns can be stored as
+  separate records instead of rewriting the whole thread on every turn
 - Singleton pattern for consistent state within a single process
 - Drop-in replacement for Redis storage (for single-process scenarios)
 """
 
 import logging
 import os
+import sqlite3
 import threading
 import time
-from typing import Optional
+from pathlib import Path
+from typing import Optional, Protocol
 
 logger = logging.getLogger(__name__)
 
+# Default location of the SQLite database, alongside the server's logs/ directory
+DEFAULT_SQLITE_PATH = Path(__file__).resolve().parent.parent / ".zen_storage" / "conversations.db"
+
+# Number of expired rows deleted per transaction during cleanup
+SQLITE_CLEANUP_BATCH_SIZE = 500
+
+
+def _get_cleanup_interval() -> tuple[int, int]:
+    """Return (timeout_hours, cleanup_interval_seconds) based on CONVERSATION_TIMEOUT_HOURS."""
+    try:
+        timeout_hours = int(os.getenv("CONVERSATION_TIMEOUT_HOURS", "3"))
+    except ValueError:
+        timeout_hours = 3
+    # Match Redis behavior: cleanup interval based on conversation timeout
+    # Run cleanup at 1/10th of timeout interval (e.g., 18 mins for 3 hour timeout)
+    cleanup_interval = max(300, (timeout_hours * 3600) // 10)  # Minimum 5 minutes
+    return timeout_hours, cleanup_interval
+
+
+class StorageBackend(Protocol):
+    """Interface shared by all conversation storage backends"""
+
+    def set_with_ttl(self, key: str, ttl_seconds: int, value: str) -> None:
+        """Store value with expiration time"""
+        ...
+
+    def get(self, key: str) -> Optional[str]:
+        """Retrieve value if not expired"""
+        ...
+
+    def setex(self, key: str, ttl_seconds: int, value: str) -> None:
+        """Redis-compatible setex method"""
+        ...
+
+    def shutdown(self) -> None:
+        """Release resources held by the backend"""
+        ...
+
+
+class ListStorageBackend(StorageBackend, Protocol):
+    """
+    Optional list capability for storage backends
+
+    Backends that set SUPPORTS_LISTS = True store conversation turns as
+    append-only lists. Backends without it (e.g. plain Redis-style clients that
+    only offer get/setex) keep the legacy single-record thread layout.
+    """
+
+    SUPPORTS_LISTS: bool
+
+    def rpush(self, key: str, ttl_seconds: int, value: str) -> int:
+        """Append value to the list at key, refresh its TTL and return the new length"""
+        ...
+
+    def rpush_rows(
+        self,
+        keys: tuple[str, ...],
+        ttl_seconds: int,
+        rows: list[tuple[str, ...]],
+        max_length: Optional[int] = None,
+        expected_length: Optional[int] = None,
+    ) -> Optional[int]:
+        """
+        Append rows to parallel lists in one transaction, row[i] going to keys[i].
+
+        Nothing is written if the first list would grow beyond max_length, or if
+        expected_length is given and the first list does not hold exactly that many
+        values. Returns the first list's new length, or None if nothing was written.
+        """
+        ...
+
+    def lrange(self, key: str) -> list[str]:
+        """Return all values of the list at key, or an empty list if missing or expired"""
+        ...
+
 
 class InMemoryStorage:
     """Thread-safe in-memory storage for conversation threads"""
 
+    SUPPORTS_LISTS = True
+
     def __init__(self):
         self._store: dict[str, tuple[str, float]] = {}
+        self._lists: dict[str, tuple[list[str], float]] = {}
         self._lock = threading.Lock()
-        # Match Redis behavior: cleanup interval based on conversation timeout
-        # Run cleanup at 1/10th of timeout interval (e.g., 18 mins for 3 hour timeout)
-        timeout_hours = int(os.getenv("CONVERSATION_TIMEOUT_HOURS", "3"))
-        self._cleanup_interval = (timeout_hours * 3600) // 10
-        self._cleanup_interval = max(300, self._cleanup_interval)  # Minimum 5 minutes
+        timeout_hours, self._cleanup_interval = _get_cleanup_interval()
         self._shutdown = False
 
         # Start background cleanup thread
@@ -73,6 +157,47 @@ class InMemoryStorage:
         """Redis-compatible setex method"""
         self.set_with_ttl(key, ttl_seconds, value)
 
+    def rpush(self, key: str, ttl_seconds: int, value: str) -> int:
+        """Append value to the list at key, refresh its TTL and return the new length"""
+        return self.rpush_rows((key,), ttl_seconds, [(value,)])
+
+    def rpush_rows(
+        self,
+        keys: tuple[str, ...],
+        ttl_seconds: int,
+        rows: list[tuple[str, ...]],
+        max_length: Optional[int] = None,
+        expected_length: Optional[int] = None,
+    ) -> Optional[int]:
+        """Append rows to parallel lists in one step, row[i] going to keys[i] (see ListStorageBackend)"""
+        with self._lock:
+            now = time.time()
+            lists = []
+            for key in keys:
+                entry = self._lists.get(key)
+                lists.append(entry[0] if entry is not None and now < entry[1] else [])
+            length = len(lists[0])
+            if (max_length is not None and length + len(rows) > max_length) or (
+                expected_length is not None and length != expected_length
+            ):
+                return None
+            for key, values, column in zip(keys, lists, zip(*rows)):
+                values.extend(column)
+                self._lists[key] = (values, now + ttl_seconds)
+            return length + len(rows)
+
+    def lrange(self, key: str) -> list[str]:
+        """Return all values of the list at key, or an empty list if missing or expired"""
+        with self._lock:
+            entry = self._lists.get(key)
+            if entry is None:
+                return []
+            values, expires_at = entry
+            if time.time() < expires_at:
+                return list(values)
+            del self._lists[key]
+        return []
+
     def _cleanup_worker(self):
         """Background thread that periodically cleans up expired entries"""
         while not self._shutdown:
@@ -87,6 +212,10 @@ class InMemoryStorage:
             for key in expired_keys:
                 del self._store[key]
 
+            expired_lists = [k for k, (_, exp) in self._lists.items() if exp < current_time]
+            for key in expired_lists:
+                del self._lists[key]
+
             if expired_keys:
                 logger.debug(f"Cleaned up {len(expired_keys)} expired conversation threads")
 
@@ -97,17 +226,241 @@ class InMemoryStorage:
             self._cleanup_thread.join(timeout=1)
 
 
+class SQLiteStorage:
+    """
+    Persistent SQLite storage for conversation threads
+
+    Uses a key/value table keyed by the primary key with an indexed expires_at
+    column, so lookups are index hits and cleanup is a range scan. Lists are
+    stored one row per item (keyed by list key and position) with their length
+    and expiry in a separate metadata table, so appending never rewrites
+    existing items. The database runs in WAL mode, which lets several server processes on the same host read
+    concurrently while one writes.
+    """
+
+    SUPPORTS_LISTS = True
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = Path(db_path or os.getenv("CONVERSATION_STORAGE_PATH") or DEFAULT_SQLITE_PATH)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False, isolation_level=None, timeout=30)
+        self._initialize_schema()
+
+        timeout_hours, self._cleanup_interval = _get_cleanup_interval()
+        self._shutdown_event = threading.Event()
+
+        # Start background cleanup thread
+        self._cleanup_thread = threading.Thread(target=self._cleanup_worker, daemon=True)
+        self._cleanup_thread.start()
+
+        logger.info(
+            f"SQLite storage initialized at {self.db_path} with {timeout_hours}h timeout, "
+            f"cleanup every {self._cleanup_interval//60}m"
+        )
+
+    def _initialize_schema(self) -> None:
+        """Enable WAL mode and create the key/value and list tables with their expiry indexes"""
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            # NORMAL is durable across application crashes in WAL mode and avoids an fsync per write
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS kv_store ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL"
+                ") WITHOUT ROWID"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_kv_store_expires_at ON kv_store(expires_at)")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS list_meta ("
+                "key TEXT PRIMARY KEY, length INTEGER NOT NULL, expires_at REAL NOT NULL"
+                ") WITHOUT ROWID"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_list_meta_expires_at ON list_meta(expires_at)")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS list_items ("
+                "key TEXT NOT NULL, position INTEGER NOT NULL, value TEXT NOT NULL, "
+                "PRIMARY KEY (key, position)"
+                ") WITHOUT ROWID"
+            )
+
+    def set_with_ttl(self, key: str, ttl_seconds: int, value: str) -> None:
+        """Store value with expiration time"""
+        expires_at = time.time() + ttl_seconds
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO kv_store (key, value, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value, expires_at = excluded.expires_at",
+                (key, value, expires_at),
+            )
+        logger.debug(f"Stored key {key} with TTL {ttl_seconds}s")
+
+    def get(self, key: str) -> Optional[str]:
+        """Retrieve value if not expired"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM kv_store WHERE key = ? AND expires_at > ?", (key, time.time())
+            ).fetchone()
+        if row is None:
+            return None
+        logger.debug(f"Retrieved key {key}")
+        return row[0]
+
+    def setex(self, key: str, ttl_seconds: int, value: str) -> None:
+        """Redis-compatible setex method"""
+        self.set_with_ttl(key, ttl_seconds, value)
+
+    def rpush(self, key: str, ttl_seconds: int, value: str) -> int:
+        """Append value to the list at key, refresh its TTL and return the new length"""
+        return self.rpush_rows((key,), ttl_seconds, [(value,)])
+
+    def rpush_rows(
+        self,
+        keys: tuple[str, ...],
+        ttl_seconds: int,
+        rows: list[tuple[str, ...]],
+        max_length: Optional[int] = None,
+        expected_length: Optional[int] = None,
+    ) -> Optional[int]:
+        """Append rows to parallel lists in one transaction, row[i] going to keys[i] (see ListStorageBackend)"""
+        now = time.time()
+        with self._lock:
+            # IMMEDIATE takes the write lock up front, so the length check and the appends
+            # are atomic across processes and no two writers can claim the same position
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                lengths = []
+                for key in keys:
+                    row = self._conn.execute(
+                        "SELECT length, expires_at FROM list_meta WHERE key = ?", (key,)
+                    ).fetchone()
+                    if row is None or row[1] <= now:
+                        if row is not None:
+                            self._conn.execute("DELETE FROM list_items WHERE key = ?", (key,))
+                        lengths.append(0)
+                    else:
+                        lengths.append(row[0])
+                length = lengths[0]
+                if (max_length is not None and length + len(rows) > max_length) or (
+                    expected_length is not None and length != expected_length
+                ):
+                    self._conn.execute("ROLLBACK")
+                    return None
+                for key, key_length, column in zip(keys, lengths, zip(*rows)):
+                    self._conn.executemany(
+                        "INSERT INTO list_items (key, position, value) VALUES (?, ?, ?)",
+                        [(key, key_length + offset, value) for offset, value in enumerate(column)],
+                    )
+                    self._conn.execute(
+                        "INSERT INTO list_meta (key, length, expires_at) VALUES (?, ?, ?) "
+                        "ON CONFLICT(key) DO UPDATE SET length = excluded.length, expires_at = excluded.expires_at",
+                        (key, key_length + len(column), now + ttl_seconds),
+                    )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        logger.debug(f"Appended {len(rows)} row(s) to {', '.join(keys)} (length {length + len(rows)})")
+        return length + len(rows)
+
+    def lrange(self, key: str) -> list[str]:
+        """Return all values of the list at key, or an empty list if missing or expired"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT list_items.value FROM list_meta JOIN list_items ON list_items.key = list_meta.key "
+                "WHERE list_meta.key = ? AND list_meta.expires_at > ? ORDER BY list_items.position",
+                (key, time.time()),
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def _cleanup_worker(self):
+        """Background thread that periodically cleans up expired entries"""
+        while not self._shutdown_event.wait(self._cleanup_interval):
+            try:
+                self._cleanup_expired()
+            except sqlite3.Error as e:
+                logger.warning(f"SQLite storage cleanup failed: {e}")
+
+    def _cleanup_expired(self) -> int:
+        """Remove expired entries in small batches so writers are never blocked for long"""
+        now = time.time()
+        total_removed = 0
+        while True:
+            with self._lock:
+                cursor = self._conn.execute(
+                    "DELETE FROM kv_store WHERE key IN " "(SELECT key FROM kv_store WHERE expires_at <= ? LIMIT ?)",
+                    (now, SQLITE_CLEANUP_BATCH_SIZE),
+                )
+                removed = cursor.rowcount
+            total_removed += removed
+            if removed < SQLITE_CLEANUP_BATCH_SIZE:
+                break
+
+        while True:
+            with self._lock:
+                expired_lists = [
+                    row[0]
+                    for row in self._conn.execute(
+                        "SELECT key FROM list_meta WHERE expires_at <= ? LIMIT ?", (now, SQLITE_CLEANUP_BATCH_SIZE)
+                    ).fetchall()
+                ]
+                if expired_lists:
+                    placeholders = ",".join("?" * len(expired_lists))
+                    self._conn.execute("BEGIN")
+                    try:
+                        self._conn.execute(f"DELETE FROM list_items WHERE key IN ({placeholders})", expired_lists)
+                        self._conn.execute(f"DELETE FROM list_meta WHERE key IN ({placeholders})", expired_lists)
+                        self._conn.execute("COMMIT")
+                    except BaseException:
+                        self._conn.execute("ROLLBACK")
+                        raise
+            total_removed += len(expired_lists)
+            if len(expired_lists) < SQLITE_CLEANUP_BATCH_SIZE:
+                break
+
+        if total_removed:
+            logger.debug(f"Cleaned up {total_removed} expired conversation threads")
+        return total_removed
+
+    def shutdown(self):
+        """Stop the cleanup thread and close the database connection"""
+        self._shutdown_event.set()
+        if self._cleanup_thread.is_alive():
+            self._cleanup_thread.join(timeout=1)
+        with self._lock:
+            self._conn.close()
+
+
 # Global singleton instance
 _storage_instance = None
 _storage_lock = threading.Lock()
 
 
-def get_storage_backend() -> InMemoryStorage:
+def create_storage_backend(backend_name: Optional[str] = None) -> StorageBackend:
+    """
+    Create a storage backend by name
+
+    Args:
+        backend_name: "memory" or "sqlite"; defaults to CONVERSATION_STORAGE_BACKEND
+
+    Returns:
+        StorageBackend: New backend instance
+    """
+    backend_name = (backend_name or os.getenv("CONVERSATION_STORAGE_BACKEND") or "memory").strip().lower()
+
+    if backend_name == "sqlite":
+        return SQLiteStorage()
+    if backend_name not in ("memory", "inmemory", "in-memory"):
+        logger.warning(f"Unknown CONVERSATION_STORAGE_BACKEND '{backend_name}', using in-memory storage")
+    return InMemoryStorage()
+
+
+def get_storage_backend() -> StorageBackend:
     """Get the global storage instance (singleton pattern)"""
     global _storage_instance
     if _storage_instance is None:
         with _storage_lock:
             if _storage_instance is None:
-                _storage_instance = InMemoryStorage()
-                logger.info("Initialized in-memory conversation storage")
+                _storage_instance = create_storage_backend()
+                logger.info(f"Initialized {type(_storage_instance).__name__} conversation storage")
     return _storage_instance
@@ -1,39 +1,228 @@
 """
 Token counting utilities for managing API context limits
 
-This module provides functions for estimating token counts to ensure
-requests stay within the Gemini API's context window limits.
+All token budgeting (file reading, conversation history, size checks, prompt
+validation and provider token counts) goes through one TokenCounter, so the
+budgets agree with each other:
 
-Note: The estimation uses a simple character-to-token ratio which is
-approximate. For production systems requiring precise token counts,
-consider using the actual tokenizer for the specific model.
+- OpenAI-family models are counted with their tiktoken encoding when the
+  optional tiktoken package is installed; encodings are loaded once per
+  encoding family and reused
+- Other models (and OpenAI models without tiktoken) use the character-based
+  estimate of ~4 characters per token
+
+Tokenizer counts are cached by a hash of the content, so counting the same
+file or conversation turn again (e.g. on every continuation) is free. Token
+counts of files read by read_file_content() are also remembered by path, mtime
+and size, so size checks of files that were already read use the exact count
+instead of a file-type estimate.
+
+Configuration:
+- TOKEN_COUNT_CACHE_SIZE: number of cached counts (default 4096, 0 disables caching)
 """
 
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+
 # Default fallback for token limit (conservative estimate)
 DEFAULT_CONTEXT_WINDOW = 200_000  # Conservative fallback for unknown models
 
+# Character-based estimate used when no tokenizer is available for a model
+CHARS_PER_TOKEN = 4
+
+# Family of models without a tokenizer
+DEFAULT_FAMILY = "default"
+
+DEFAULT_TOKEN_COUNT_CACHE_SIZE = 4096
+
+# Shorter texts are tokenized directly; hashing them would cost about as much as counting
+MIN_CACHED_LENGTH = 256
+
+# tiktoken encoding per OpenAI model name prefix, most specific first
+OPENAI_ENCODINGS = (
+    (("gpt-4o", "gpt-4.1", "gpt-4.5", "gpt-5", "chatgpt", "o1", "o3", "o4"), "o200k_base"),
+    (("gpt-4", "gpt-3.5"), "cl100k_base"),
+)
+
+
+def get_model_family(model_name: Optional[str]) -> str:
+    """
+    Return the tokenizer family of a model: its tiktoken encoding name, or DEFAULT_FAMILY.
+
+    Provider prefixes (openai/gpt-4o) and tags (:free) are ignored.
+    """
+    if not model_name or not isinstance(model_name, str):
+        return DEFAULT_FAMILY
+    name = model_name.lower().rsplit("/", 1)[-1].split(":", 1)[0]
+    for prefixes, encoding_name in OPENAI_ENCODINGS:
+        if name.startswith(prefixes):
+            return encoding_name
+    return DEFAULT_FAMILY
+
+
+def _get_cache_size() -> int:
+    """Read TOKEN_COUNT_CACHE_SIZE, falling back to the default on invalid values."""
+    value = os.getenv("TOKEN_COUNT_CACHE_SIZE", "")
+    if not value:
+        return DEFAULT_TOKEN_COUNT_CACHE_SIZE
+    try:
+        size = int(value)
+        if size < 0:
+            raise ValueError(value)
+        return size
+    except ValueError:
+        logger.warning(
+            f"Invalid TOKEN_COUNT_CACHE_SIZE value ('{value}'), using default of {DEFAULT_TOKEN_COUNT_CACHE_SIZE}"
+        )
+        return DEFAULT_TOKEN_COUNT_CACHE_SIZE
+
+
+class TokenCounter:
+    """Thread-safe token counter with tokenizers loaded once per family and counts cached by content hash"""
+
+    def __init__(self, cache_size: Optional[int] = None):
+        self.cache_size = _get_cache_size() if cache_size is None else cache_size
+        self._lock = threading.Lock()
+        self._encodings: dict[str, Any] = {DEFAULT_FAMILY: None}
+        self._counts: OrderedDict[tuple[str, bytes], int] = OrderedDict()
+        self._file_counts: OrderedDict[tuple[str, int, int, str], int] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def _get_encoding(self, family: str):
+        """Return the tokenizer of a family, loading it on first use (None if unavailable)."""
+        try:
+            return self._encodings[family]
+        except KeyError:
+            pass
+        with self._lock:
+            if family not in self._encodings:
+                try:
+                    import tiktoken
+
+                    self._encodings[family] = tiktoken.get_encoding(family)
+                except ImportError:
+                    logger.debug(f"tiktoken not installed, estimating {family} tokens from characters")
+                    self._encodings[family] = None
+                except Exception as e:
+                    logger.warning(f"Could not load tokenizer {family}, estimating tokens from characters: {e}")
+                    self._encodings[family] = None
+            return self._encodings[family]
+
+    def _remember(self, cache: OrderedDict, key, tokens: int) -> None:
+        with self._lock:
+            cache[key] = tokens
+            cache.move_to_end(key)
+            while len(cache) > self.cache_size:
+                cache.popitem(last=False)
+
+    def count(self, text: str, model_name: Optional[str] = None) -> int:
+        """
+        Count the tokens of text for a model.
+
+        Args:
+            text: The text to count
+            model_name: Model the text is for; None uses the character-based estimate
+
+        Returns:
+            int: Token count (exact when the model's tokenizer is available, estimated otherwise)
+        """
+        if not text:
+            return 0
+        family = get_model_family(model_name)
+        encoding = self._get_encoding(family)
+        if encoding is None:
+            return len(text) // CHARS_PER_TOKEN
+        if len(text) < MIN_CACHED_LENGTH or self.cache_size <= 0:
+            return len(encoding.encode(text, disallowed_special=()))
+
+        key = (family, hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest())
+        with self._lock:
+            tokens = self._counts.get(key)
+            if tokens is not None:
+                self._counts.move_to_end(key)
+                self.hits += 1
+                return tokens
+            self.misses += 1
+        tokens = len(encoding.encode(text, disallowed_special=()))
+        self._remember(self._counts, key, tokens)
+        return tokens
+
+    def remember_file_tokens(
+        self, file_path: str, mtime_ns: int, size: int, model_name: Optional[str], tokens: int
+    ) -> None:
+        """Remember the token count of a file's content as read, for later size checks."""
+        if self.cache_size > 0:
+            self._remember(self._file_counts, (file_path, mtime_ns, size, get_model_family(model_name)), tokens)
+
+    def get_file_tokens(self, file_path: str, mtime_ns: int, size: int, model_name: Optional[str]) -> Optional[int]:
+        """Return the remembered token count of a file, if this version of it was read before."""
+        with self._lock:
+            return self._file_counts.get((file_path, mtime_ns, size, get_model_family(model_name)))
+
+    def get_stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._counts),
+                "files": len(self._file_counts),
+                "hits": self.hits,
+                "misses": self.misses,
+                "tokenizers": sorted(family for family, encoding in self._encodings.items() if encoding is not None),
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._counts.clear()
+            self._file_counts.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+# Global singleton instance
+_token_counter: Optional[TokenCounter] = None
+_token_counter_lock = threading.Lock()
+
+
+def get_token_counter() -> TokenCounter:
+    """Get the global token counter (singleton pattern)"""
+    global _token_counter
+    if _token_counter is None:
+        with _token_counter_lock:
+            if _token_counter is None:
+                _token_counter = TokenCounter()
+    return _token_counter
+
 
-def estimate_tokens(text: str) -> int:
+def estimate_tokens(text: str, model_name: Optional[str] = None) -> int:
     """
-    Estimate token count using a character-based approximation.
+    Count the tokens of text, with the model's tokenizer when one is available.
 
-    This uses a rough heuristic where 1 token ≈ 4 characters, which is
-    a reasonable approximation for English text. The actual token count
-    may vary based on:
+    Without a model name, or for models without a tokenizer, this uses a rough
+    heuristic where 1 token ≈ 4 characters, which is a reasonable approximation
+    for English text. The actual token count may vary based on:
     - Language (non-English text may have different ratios)
     - Code vs prose (code often has more tokens per character)
     - Special characters and formatting
 
     Args:
         text: The text to estimate tokens for
+        model_name: Optional model the text is for
 
     Returns:
         int: Estimated number of tokens
     """
-    return len(text) // 4
+    return get_token_counter().count(text, model_name)
 
 
-def check_token_limit(text: str, context_window: int = DEFAULT_CONTEXT_WINDOW) -> tuple[bool, int]:
+def check_token_limit(
+    text: str, context_window: int = DEFAULT_CONTEXT_WINDOW, model_name: Optional[str] = None
+) -> tuple[bool, int]:
     """
     Check if text exceeds the specified token limit.
 
@@ -44,11 +233,12 @@ def check_token_limit(text: str, context_window: int = DEFAULT_CONTEXT_WINDOW) -
     Args:
         text: The text to check
         context_window: The model's context window size (defaults to conservative fallback)
+        model_name: Optional model the text is for, to count with its tokenizer
 
     Returns:
         Tuple[bool, int]: (is_within_limit, estimated_tokens)
         - is_within_limit: True if the text fits within context_window
         - estimated_tokens: The estimated token count
     """
-    estimated = estimate_tokens(text)
+    estimated = estimate_tokens(text, model_name)
     return estimated <= context_window, estimated